@@ -0,0 +1,75 @@
+# bench_aggregate.py – Window.add() je Fenstergröße und Signalform
+# bench_aggregate.py – Window.add() per window size and signal shape
+#
+# CPython:           python3 bench/bench_aggregate.py [n]
+# Unix-MicroPython:  micropython bench/bench_aggregate.py [n]
+#
+# Window.add() sucht den ältesten Wert binär (O(log n)) und schiebt die sortierte Kopie nur
+# um die Rangänderung zwischen altem und neuem Wert. Wie weit das ist, hängt vom Signal ab:
+#   drift – Sensor-typisch (Druck/Temperatur: langsame Welle, wenig Rauschen), kleine Rangänderung
+#   noise – gleichverteiltes Rauschen, im Mittel n/3 Plätze
+#   ramp  – stetig steigend: der älteste Wert ist das Minimum, der neue das Maximum, n-1 Plätze (schlimmster Fall)
+# Window.add() finds the oldest value by binary search (O(log n)) and shifts the sorted copy
+# only by the rank change between old and new value. How far that is depends on the signal:
+#   drift – sensor-like (pressure/temperature: slow wave, little noise), small rank change
+#   noise – uniform noise, n/3 places on average
+#   ramp  – steadily rising: the oldest value is the minimum, the new one the maximum, n-1 places (worst case)
+#
+# Je Fall µs und Heap-Bytes je add() bei vollem Fenster; AGG_WINDOW 3600 = 1 h bei 1 Hz.
+# Per case µs and heap bytes per add() with a full window; AGG_WINDOW 3600 = 1 h at 1 Hz.
+
+import sys
+import gc
+import math
+import random
+from array import array
+
+_here = __file__.rsplit("/", 1)[0] if "/" in __file__ else "."
+sys.path.insert(0, _here + "/../src/lib")
+sys.path.insert(0, _here)
+
+import hostmachine
+import hostnet
+
+hostmachine.install()
+hostnet.install_ticks()
+
+import aggregate
+from bench_mqtt_encoder import _measure
+
+SIZES = (60, 600, 3600)
+VALUES = 8192            # reicht für Aufwärmen + 2 × 2000 Aufrufe ohne Umbruch / enough for warm-up + 2 × 2000 calls without wrapping
+
+def signal(kind):
+    random.seed(1)
+    values = array("f", bytes(4 * VALUES))
+    for i in range(VALUES):
+        if kind == "drift":
+            values[i] = 1013.0 + 2.0 * math.sin(i / 500) + random.uniform(-0.05, 0.05)
+        elif kind == "noise":
+            values[i] = random.uniform(0, 1000)
+        else:
+            values[i] = i * 0.25
+    return values
+
+def run(n=2000):
+    print("window  signal   us/add  heap-bytes/add")
+    for size in SIZES:
+        for kind in ("drift", "noise", "ramp"):
+            values = signal(kind)
+            w = aggregate.Window(size)
+            for i in range(size):
+                w.add(values[i])
+            pos = [size]
+
+            def add():
+                i = pos[0]
+                w.add(values[i])
+                pos[0] = i + 1 if i + 1 < VALUES else 0
+
+            gc.collect()
+            us, heap = _measure(add, n)
+            print("%6d  %-6s %8.2f  %14.1f" % (size, kind, us, heap))
+
+if __name__ == "__main__":
+    run(int(sys.argv[1]) if len(sys.argv) > 1 else 2000)
@@ -0,0 +1,162 @@
+# bench_bme280.py – BME280-Kompensation: Ganzzahl (bme280_comp) gegen Float-Formeln
+# bench_bme280.py – BME280 compensation: integer (bme280_comp) vs. float formulas
+#
+# Vergleicht Genauigkeit gegen die Bosch-Double-Referenz und die Laufzeit gegen den
+# bisherigen Float-Pfad (Dict-Zugriffe, Feuchte nur hum_raw / 1024).
+# Compares accuracy against the Bosch double reference and run time against the
+# previous float path (dict lookups, humidity only hum_raw / 1024).
+#
+#   python3 bench/bench_bme280.py [n] [capture.txt]
+#   micropython bench/bench_bme280.py [n] [capture.txt]
+#
+# capture.txt: 1. Zeile Kalibrierung als Hex (0x88..0x9F, 0xA1, 0xE1..0xE7 = 32 Bytes),
+# danach je Zeile ein 8-Byte-Burst ab 0xF7. Aufnahme am Gerät:
+# capture.txt: first line calibration as hex (0x88..0x9F, 0xA1, 0xE1..0xE7 = 32 bytes),
+# then one 8-byte burst from 0xF7 per line. Capture on the device:
+#
+#   import binascii, time
+#   rd = lambda reg, n: bme.i2c.readfrom_mem(bme.address, reg, n)
+#   print(binascii.hexlify(rd(0x88, 24) + rd(0xA1, 1) + rd(0xE1, 7)).decode())
+#   for _ in range(50): print(binascii.hexlify(bme.read_raw()).decode()); time.sleep(1)
+
+import sys
+import time
+import struct
+import binascii
+
+_here = __file__.rsplit("/", 1)[0] if "/" in __file__ else "."
+sys.path.insert(0, _here + "/../src/lib")
+
+try:
+    import micropython  # noqa: F401
+except ImportError:
+    class micropython:
+        native = staticmethod(lambda f: f)
+        const = staticmethod(lambda x: x)
+    sys.modules["micropython"] = micropython
+
+import bme280_comp
+
+# Beispiel-Kalibrierung aus dem Datenblatt (T, P) mit typischen Feuchte-Werten
+# Example calibration from the datasheet (T, P) with typical humidity values
+CALIB = struct.pack("<HhhHhhhhhhhh", 27504, 26435, -1000, 36477, -10685, 3024, 2855, 140, -7, 15500, -14600, 6000)
+H1_BYTE = bytes((75,))
+H2_H6 = struct.pack("<hB", 362, 0) + bytes((313 >> 4, (313 & 0x0F) | ((50 & 0x0F) << 4), 50 >> 4, 30))
+
+# Rohwerte über den Arbeitsbereich (adc_T, adc_P, adc_H): -10..40 °C, 900..1050 hPa, 10..90 %
+# Raw values across the operating range (adc_T, adc_P, adc_H): -10..40 °C, 900..1050 hPa, 10..90 %
+ADC = (
+    (519888, 415148, 30000), (430000, 380000, 18000), (470000, 400000, 24000),
+    (500000, 430000, 27500), (540000, 445000, 33000), (560000, 360000, 36000),
+    (585000, 455000, 40500), (450000, 425000, 21000), (525000, 390000, 29000),
+)
+
+def _frame(adc_t, adc_p, adc_h):
+    return bytes((adc_p >> 12, (adc_p >> 4) & 0xFF, (adc_p & 0x0F) << 4,
+                  adc_t >> 12, (adc_t >> 4) & 0xFF, (adc_t & 0x0F) << 4,
+                  adc_h >> 8, adc_h & 0xFF))
+
+def load(path):
+    if path is None:
+        return CALIB + H1_BYTE + H2_H6, [_frame(*a) for a in ADC]
+    with open(path) as f:
+        lines = [line.strip() for line in f if line.strip()]
+    return binascii.unhexlify(lines[0]), [binascii.unhexlify(line) for line in lines[1:]]
+
+# --- Bisheriger Float-Pfad (Referenz für die Laufzeit) / Previous float path (run time reference) ---
+def legacy_dig(calib):
+    c = struct.unpack("<HhhHhhhhhhhh", calib[:24])
+    h = calib[25:32]
+    dig = dict(zip(("T1", "T2", "T3", "P1", "P2", "P3", "P4", "P5", "P6", "P7", "P8", "P9"), c))
+    dig.update({"H1": calib[24], "H2": struct.unpack("<h", h[0:2])[0], "H3": h[2],
+                "H4": (h[3] << 4) | (h[4] & 0xF), "H5": (h[5] << 4) | (h[4] >> 4),
+                "H6": struct.unpack("<b", h[6:7])[0]})
+    return dig
+
+def legacy_read(dig, raw):
+    pres_raw = (raw[0] << 12) | (raw[1] << 4) | (raw[2] >> 4)
+    temp_raw = (raw[3] << 12) | (raw[4] << 4) | (raw[5] >> 4)
+    hum_raw = (raw[6] << 8) | raw[7]
+    var1 = (((temp_raw / 16384.0) - (dig['T1'] / 1024.0)) * dig['T2'])
+    var2 = ((((temp_raw / 131072.0) - (dig['T1'] / 8192.0)) ** 2) * dig['T3'])
+    t_fine = var1 + var2
+    temp = t_fine / 5120.0
+    var1 = t_fine / 2.0 - 64000.0
+    var2 = var1 * var1 * dig['P6'] / 32768.0
+    var2 = var2 + var1 * dig['P5'] * 2.0
+    var2 = var2 / 4.0 + dig['P4'] * 65536.0
+    var1 = (dig['P3'] * var1 * var1 / 524288.0 + dig['P2'] * var1) / 524288.0
+    var1 = (1.0 + var1 / 32768.0) * dig['P1']
+    if var1 == 0:
+        pres = 0
+    else:
+        pres = 1048576.0 - pres_raw
+        pres = ((pres - var2 / 4096.0) * 6250.0) / var1
+        var1 = dig['P9'] * pres * pres / 2147483648.0
+        var2 = pres * dig['P8'] / 32768.0
+        pres = pres + (var1 + var2 + dig['P7']) / 16.0
+    hum = hum_raw / 1024.0
+    return round(temp, 2), round(pres / 100.0, 2), round(hum, 2)
+
+# --- Bosch-Double-Formeln inkl. Feuchte (Referenz für die Genauigkeit) ---
+# --- Bosch double formulas incl. humidity (accuracy reference) ---
+def reference(cal, raw):
+    adc_t, adc_p, adc_h = bme280_comp.adc_values(raw)
+    t1, t2, t3, p1, p2, p3, p4, p5, p6, p7, p8, p9, h1, h2, h3, h4, h5, h6 = cal
+    var1 = (adc_t / 16384.0 - t1 / 1024.0) * t2
+    var2 = (adc_t / 131072.0 - t1 / 8192.0) ** 2 * t3
+    t_fine = var1 + var2
+    temp = t_fine / 5120.0
+    var1 = t_fine / 2.0 - 64000.0
+    var2 = var1 * var1 * p6 / 32768.0 + var1 * p5 * 2.0
+    var2 = var2 / 4.0 + p4 * 65536.0
+    var1 = (p3 * var1 * var1 / 524288.0 + p2 * var1) / 524288.0
+    var1 = (1.0 + var1 / 32768.0) * p1
+    pres = (1048576.0 - adc_p - var2 / 4096.0) * 6250.0 / var1
+    pres += (p9 * pres * pres / 2147483648.0 + pres * p8 / 32768.0 + p7) / 16.0
+    v = t_fine - 76800.0
+    v = (adc_h - (h4 * 64.0 + h5 / 16384.0 * v)) * (h2 / 65536.0 * (1.0 + h6 / 67108864.0 * v * (1.0 + h3 / 67108864.0 * v)))
+    v = v * (1.0 - h1 * v / 524288.0)
+    hum = min(100.0, max(0.0, v))
+    return temp, pres / 100.0, hum
+
+def _now_us():
+    if hasattr(time, "ticks_us"):
+        return time.ticks_us()
+    return int(time.perf_counter() * 1e6)
+
+def _us(fn, frames, n):
+    t0 = _now_us()
+    for _ in range(n):
+        for raw in frames:
+            fn(raw)
+    elapsed = _now_us() - t0
+    return elapsed / (n * len(frames))
+
+def run(n=2000, path=None):
+    calib, frames = load(path)
+    cal = bme280_comp.unpack(calib[:24], calib[24], calib[25:32])
+    dig = legacy_dig(calib)
+
+    def integer(raw):
+        t, p, h = bme280_comp.compensate(raw, cal)
+        return t / 100, p / 100, h / 1024
+
+    err = [0.0, 0.0, 0.0, 0.0]
+    for raw in frames:
+        ref = reference(cal, raw)
+        got = integer(raw)
+        legacy = legacy_read(dig, raw)
+        for i in range(3):
+            err[i] = max(err[i], abs(got[i] - ref[i]))
+        err[3] = max(err[3], abs(legacy[2] - ref[2]))
+
+    print("frames:", len(frames))
+    print("max |int - ref|: temp %.3f °C  pressure %.3f hPa  humidity %.3f %%" % (err[0], err[1], err[2]))
+    print("max |legacy humidity - ref|: %.2f %%" % err[3])
+    print("path      us/read")
+    print("legacy  %9.2f" % _us(lambda raw: legacy_read(dig, raw), frames, n))
+    print("int     %9.2f" % _us(integer, frames, n))
+
+if __name__ == "__main__":
+    run(int(sys.argv[1]) if len(sys.argv) > 1 else 2000, sys.argv[2] if len(sys.argv) > 2 else None)
@@ -0,0 +1,281 @@
+# bench_cycle.py – Wohin die Zeit eines Zyklus geht: Lesen, Payload, JSON, Publish, Reconnect
+# bench_cycle.py – Where a cycle's time goes: read, payload, JSON, publish, reconnect
+#
+# Jede Stufe läuft einzeln und als Ende-zu-Ende-Zyklus gegen Ersatz-I2C (bench/hostmachine.py)
+# und einen lokalen TCP-Broker. Je Stufe: p50/p95/p99/max in µs, Heap-Bytes je Aufruf,
+# I2C-Bytes und gesendete MQTT-Bytes je Aufruf. -o schreibt alles als JSON, --compare
+# vergleicht zwei solche Dateien (z. B. zwei Commits) und meldet Verschlechterungen.
+# Every stage runs on its own and as an end-to-end cycle against stand-in I2C
+# (bench/hostmachine.py) and a local TCP broker. Per stage: p50/p95/p99/max in µs, heap bytes
+# per call, I2C bytes and MQTT bytes sent per call. -o writes everything as JSON, --compare
+# compares two such files (e.g. two commits) and reports regressions.
+#
+#   python3 bench/bench_cycle.py [n] [rtt_ms] [host port] [-o results.json] [-l label]
+#   micropython bench/bench_cycle.py [n] 0 <host> <port> [-o results.json] [-l label]
+#   python3 bench/bench_cycle.py --compare base.json new.json [Schwelle / threshold %]
+#
+# Ohne Host startet auf CPython der lokale Testbroker (bench/tcp_broker.py) mit rtt_ms.
+# Zeiten messen mit eingeschaltetem GC (GC-Pausen gehören zur Latenz), Heap-Bytes in
+# einem zweiten Lauf: MicroPython mit GC aus (gc.mem_alloc()-Differenz), CPython über die
+# tracemalloc-Spitze. Das Log der Firmware hat keine Ausgabe – am Gerät kostet USB-CDC
+# zusätzlich Zeit.
+# Without a host, CPython starts the local test broker (bench/tcp_broker.py) with rtt_ms.
+# Times are taken with the GC on (GC pauses are part of the latency), heap bytes in a
+# second pass: MicroPython with the GC off (gc.mem_alloc() delta), CPython via the
+# tracemalloc peak. The firmware log has no sinks – on the device USB-CDC costs extra.
+
+import sys
+import gc
+import time
+
+_here = __file__.rsplit("/", 1)[0] if "/" in __file__ else "."
+sys.path.insert(0, _here + "/../src/lib")
+sys.path.insert(0, _here)
+
+try:
+    import ujson
+except ImportError:
+    import json as ujson
+    sys.modules["ujson"] = ujson
+
+import hostnet
+import hostmachine
+
+hostmachine.install()
+hostnet.install_ticks()
+
+import config
+import sensors
+import mqtt
+import logger
+
+MICROPYTHON = sys.implementation.name == "micropython"
+
+STAGES = ("read", "payload", "encode", "template", "publish", "publish_qos1", "reconnect", "cycle")
+
+# --- Firmware auf Ersatz-I2C und den Broker einstellen / Point the firmware at stand-in I2C and the broker ---
+def setup(host, port):
+    specs = []
+    for spec in config.SENSORS:
+        spec = dict(spec)
+        spec["mode"] = "active"
+        specs.append(spec)
+        bus = hostmachine.bus(spec.get("bus", 0))
+        if spec["driver"] == "veml7700":
+            bus.attach(hostmachine.veml7700(spec["address"]))
+        elif spec["driver"] == "bme280":
+            bus.attach(hostmachine.bme280(spec["address"]))
+    config.SENSORS = specs
+    config.VEML_EVENT = False
+    config.MQTT_MODE = "active"
+    config.MQTT_TLS = False
+    config.MQTT_BATCH_MODE = None
+    config.LOOP_MODE = "sync"  # Reconnect im Sendepfad wie im synchronen Loop / reconnect inside the send path as in the sync loop
+    config.MQTT_BROKER = host
+    config.MQTT_PORT = port
+    config.MQTT_CLIENT_ID = "bench-cycle"
+
+    logger.configure(sink_names=())
+    hostnet.install(mqtt)
+    sensors.init_sensors()
+    mqtt.payload_template = sensors.payload_template
+    if mqtt.connect() != mqtt.SUCCESS:
+        raise OSError("Broker nicht erreichbar / broker unreachable: %s:%s" % (host, port))
+
+# --- Perzentil nach Rangmethode / Percentile by nearest rank ---
+def percentile(sorted_values, p):
+    k = (p * len(sorted_values) + 99) // 100 - 1
+    return sorted_values[max(0, min(k, len(sorted_values) - 1))]
+
+def _times(fn, n):
+    times = []
+    for _ in range(n):
+        t0 = time.ticks_us()
+        fn()
+        times.append(time.ticks_diff(time.ticks_us(), t0))
+    times.sort()
+    return times
+
+# --- Zweiter Lauf: Heap, I2C- und MQTT-Bytes je Aufruf / Second pass: heap, I2C and MQTT bytes per call ---
+def _footprint(fn, n):
+    client = mqtt.client
+    sent = [0]
+    write = client._write
+
+    def counting(buf, off, k):
+        sent[0] += k
+        write(buf, off, k)
+    client._write = counting
+    i2c = hostmachine.total_bytes()
+    try:
+        if MICROPYTHON:
+            gc.collect()
+            gc.disable()
+            before = gc.mem_alloc()
+            for _ in range(n):
+                fn()
+            allocated = gc.mem_alloc() - before
+            gc.enable()
+        else:
+            import tracemalloc
+            tracemalloc.start()
+            allocated = 0
+            for _ in range(n):
+                tracemalloc.reset_peak()
+                base = tracemalloc.get_traced_memory()[0]
+                fn()
+                allocated += tracemalloc.get_traced_memory()[1] - base
+            tracemalloc.stop()
+    finally:
+        del client._write
+    return allocated / n, (hostmachine.total_bytes() - i2c) / n, sent[0] / n
+
+def measure(fn, n):
+    fn()  # Aufwärmen (Topic-Cache, Auto-Range) / warm-up (topic cache, auto-range)
+    times = _times(fn, n)
+    heap, i2c, tx = _footprint(fn, min(n, 50))
+    return {
+        "n": n,
+        "p50_us": percentile(times, 50),
+        "p95_us": percentile(times, 95),
+        "p99_us": percentile(times, 99),
+        "max_us": times[-1],
+        "mean_us": round(sum(times) / n, 1),
+        "heap_bytes": round(heap, 1),
+        "i2c_bytes": round(i2c, 1),
+        "i2c_bus_us": hostmachine.bus_us(round(i2c)),
+        "mqtt_bytes": round(tx, 1),
+    }
+
+# --- Die Stufen eines Zyklus / The stages of a cycle ---
+def stages():
+    _, payload = sensors.read_all()
+    msg = ujson.dumps(payload)
+    topic = config.MQTT_TOPIC
+
+    def read():
+        sensors.read_all()
+
+    def build():
+        sensors.build_payload(payload)
+
+    def encode():
+        ujson.dumps(payload)
+
+    # JSON über das vorkompilierte Template (so sendet mqtt.publish) / JSON via the precompiled template (as mqtt.publish sends)
+    def encode_template():
+        sensors.payload_template.encode(payload)
+
+    def publish():
+        mqtt.client.publish(topic, msg)
+
+    def publish_qos1():
+        mqtt.client.publish(topic, msg, qos=1)
+        mqtt.client.wait_acks(5000)
+
+    # Wiederherstellungspfad in mqtt.publish(): Verbindung weg -> connect() -> senden
+    # Recovery path in mqtt.publish(): connection gone -> connect() -> send
+    def reconnect():
+        mqtt.client.close()
+        if mqtt.publish(payload) != mqtt.SUCCESS:
+            raise OSError("Reconnect fehlgeschlagen / reconnect failed")
+
+    def cycle():
+        _, data = sensors.read_all()
+        mqtt.publish(data)
+
+    return (("read", read), ("payload", build), ("encode", encode), ("template", encode_template), ("publish", publish),
+            ("publish_qos1", publish_qos1), ("reconnect", reconnect), ("cycle", cycle)), len(msg)
+
+def run(n, host, port, rtt, label=None):
+    setup(host, port)
+    config.MQTT_QOS = 0
+    cases, json_bytes = stages()
+    results = {}
+    print("stage          p50_us   p95_us   p99_us   max_us  heap_B  i2c_B  mqtt_B")
+    for name, fn in cases:
+        r = measure(fn, n)
+        results[name] = r
+        print("%-12s %8d %8d %8d %8d %7.0f %6.0f %7.0f" % (
+            name, r["p50_us"], r["p95_us"], r["p99_us"], r["max_us"], r["heap_bytes"], r["i2c_bytes"], r["mqtt_bytes"]))
+    results["encode"]["json_bytes"] = json_bytes
+    print("JSON-Payload / JSON payload: %d B, MQTT-Reconnects / reconnects: %d" % (json_bytes, mqtt.reconnects))
+    mqtt.client.disconnect()
+    return {
+        "bench": "cycle",
+        "label": label,
+        "impl": sys.implementation.name,
+        "version": ".".join(str(v) for v in sys.implementation.version[:3]),
+        "rtt_ms": rtt,
+        "stages": results,
+    }
+
+# --- Zwei Ergebnisdateien vergleichen / Compare two result files ---
+# Rückgabe: Anzahl Stufen, deren p95 um mehr als threshold % (und mehr als NOISE_US) schlechter ist
+# Returns: number of stages whose p95 got worse by more than threshold % (and more than NOISE_US)
+NOISE_US = 20   # kleinere Änderungen sind Messrauschen / smaller changes are measurement noise
+
+def compare(base_path, new_path, threshold=10.0):
+    with open(base_path) as f:
+        base = ujson.load(f)
+    with open(new_path) as f:
+        new = ujson.load(f)
+    print("%s -> %s" % (base.get("label") or base_path, new.get("label") or new_path))
+    print("stage          p50_us (Δ%)          p95_us (Δ%)          p99_us (Δ%)        heap_B")
+    worse = 0
+    for name in STAGES:
+        a = base["stages"].get(name)
+        b = new["stages"].get(name)
+        if a is None or b is None:
+            continue
+        cols = []
+        for key in ("p50_us", "p95_us", "p99_us"):
+            delta = 100.0 * (b[key] - a[key]) / a[key] if a[key] else 0.0
+            cols.append("%8d %+7.1f%%" % (b[key], delta))
+        grown = b["p95_us"] - a["p95_us"]
+        flag = ""
+        if grown > NOISE_US and grown * 100 > threshold * a["p95_us"]:
+            worse += 1
+            flag = "  ⚠️"
+        print("%-12s %s   %s   %s   %6.0f -> %-6.0f%s" % (name, cols[0], cols[1], cols[2], a["heap_bytes"], b["heap_bytes"], flag))
+    return worse
+
+def main(argv):
+    if argv and argv[0] == "--compare":
+        threshold = float(argv[3]) if len(argv) > 3 else 10.0
+        sys.exit(1 if compare(argv[1], argv[2], threshold) else 0)
+
+    out = label = None
+    args = []
+    i = 0
+    while i < len(argv):
+        if argv[i] == "-o":
+            out = argv[i + 1]
+            i += 1
+        elif argv[i] == "-l":
+            label = argv[i + 1]
+            i += 1
+        else:
+            args.append(argv[i])
+        i += 1
+    n = int(args[0]) if args else 200
+    rtt = int(args[1]) if len(args) > 1 else 0
+
+    broker = None
+    if len(args) > 3:
+        host, port = args[2], int(args[3])
+    else:
+        import tcp_broker
+        broker = tcp_broker.Broker(rtt_ms=rtt).start()
+        host, port = broker.host, broker.port
+
+    result = run(n, host, port, rtt, label)
+    if broker:
+        broker.stop()
+    if out:
+        with open(out, "w") as f:
+            ujson.dump(result, f)
+        print("💾 Ergebnis / result:", out)
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
@@ -0,0 +1,135 @@
+# bench_mqtt_encoder.py – Heap-Bytes und Laufzeit je PUBLISH (alter vs. neuer Encoder)
+# bench_mqtt_encoder.py – Heap bytes and run time per PUBLISH (legacy vs. new encoder)
+#
+# CPython:           python3 bench/bench_mqtt_encoder.py [n]
+# Unix-MicroPython:  micropython bench/bench_mqtt_encoder.py [n]
+#
+# MicroPython: GC aus, gc.mem_alloc()-Differenz = alle Allokationen im Lauf.
+# CPython: tracemalloc-Spitze über dem Grundstand je Aufruf = kurzlebige Allokationen.
+# MicroPython: GC off, gc.mem_alloc() delta = every allocation during the run.
+# CPython: tracemalloc peak above baseline per call = short-lived allocations.
+
+import sys
+import gc
+import time
+import struct
+
+_here = __file__.rsplit("/", 1)[0] if "/" in __file__ else "."
+sys.path.insert(0, _here + "/../src/lib")
+sys.path.insert(0, _here)
+
+try:
+    import ujson  # noqa: F401
+except ImportError:
+    import json
+    sys.modules["ujson"] = json
+
+import hostmachine
+import hostnet
+
+hostmachine.install()
+hostnet.install_ticks()
+
+import mqtt
+
+MICROPYTHON = sys.implementation.name == "micropython"
+
+TOPIC = "sensor/default"
+PAYLOAD = b'{"date": "18.10.2026", "time": "12:00:00", "temp": 21.3, "pressure": 1013.2, "humidity": 48.7, "lux": 1406}'
+
+class NullSocket:
+    def __init__(self):
+        self.writes = 0
+        self.bytes = 0
+
+    # write(buf) oder / or write(buf, off, len) wie MicroPython-Streams / like MicroPython streams
+    def write(self, buf, off=0, n=None):
+        n = len(buf) - off if n is None else n
+        self.writes += 1
+        self.bytes += n
+        return n
+
+# --- Bisheriger Encoder (Referenz) / Previous encoder (reference) ---
+def legacy_publish(sock, topic, msg, retain=False, qos=0):
+    pkt = bytearray()
+    pkt_type = 0x30 | (qos << 1) | retain
+    pkt.append(pkt_type)
+
+    topic_bytes = topic.encode()
+    msg_bytes = msg.encode() if isinstance(msg, str) else msg
+
+    remaining_length = 2 + len(topic_bytes) + len(msg_bytes)
+    rl_bytes = bytearray()
+    while True:
+        byte = remaining_length % 128
+        remaining_length //= 128
+        if remaining_length > 0:
+            byte |= 0x80
+        rl_bytes.append(byte)
+        if remaining_length == 0:
+            break
+
+    pkt.extend(rl_bytes)
+    pkt.extend(struct.pack("!H", len(topic_bytes)))
+    pkt.extend(topic_bytes)
+    pkt.extend(msg_bytes)
+
+    sock.write(pkt)
+
+def _measure(fn, n):
+    fn()  # Aufwärmen (Topic-Cache) / warm-up (topic cache)
+    if MICROPYTHON:
+        gc.collect()
+        gc.disable()
+        before = gc.mem_alloc()
+        t0 = time.ticks_us()
+        for _ in range(n):
+            fn()
+        elapsed = time.ticks_diff(time.ticks_us(), t0)
+        allocated = gc.mem_alloc() - before
+        gc.enable()
+        return elapsed / n, allocated / n
+
+    import tracemalloc
+    tracemalloc.start()
+    allocated = 0
+    for _ in range(n):
+        tracemalloc.reset_peak()
+        base = tracemalloc.get_traced_memory()[0]
+        fn()
+        allocated += tracemalloc.get_traced_memory()[1] - base
+    tracemalloc.stop()
+
+    # Bester von 5 Läufen – ein einzelner Lauf schwankt auf dem Host um ±30 %
+    # Best of 5 runs – a single run varies by ±30 % on the host
+    elapsed = None
+    for _ in range(5):
+        t0 = time.perf_counter()
+        for _ in range(n):
+            fn()
+        run = (time.perf_counter() - t0) * 1e6
+        elapsed = run if elapsed is None else min(elapsed, run)
+    return elapsed / n, allocated / n
+
+def run(n=2000):
+    legacy_sock = NullSocket()
+    client = mqtt.MQTTClient("bench", "localhost")
+    client.sock = NullSocket()
+    big = mqtt.MQTTClient("bench", "localhost", tx_size=64)
+    big.sock = NullSocket()
+
+    cases = (
+        ("legacy", lambda: legacy_publish(legacy_sock, TOPIC, PAYLOAD), legacy_sock),
+        ("prealloc", lambda: client.publish(TOPIC, PAYLOAD), client.sock),
+        ("prealloc-scatter", lambda: big.publish(TOPIC, PAYLOAD), big.sock),
+    )
+
+    print("case               us/publish  heap-bytes/publish  writes/publish  bytes/publish")
+    for name, fn, sock in cases:
+        us, heap = _measure(fn, n)
+        sock.writes = sock.bytes = 0
+        fn()
+        print("%-18s %10.2f  %18.1f  %14d  %13d" % (name, us, heap, sock.writes, sock.bytes))
+
+if __name__ == "__main__":
+    run(int(sys.argv[1]) if len(sys.argv) > 1 else 2000)
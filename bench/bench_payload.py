@@ -0,0 +1,171 @@
+# bench_payload.py – Payload bauen und senden: bisher (OrderedDict + ujson.dumps) vs. Template vs. Binär-Record
+# bench_payload.py – Build and send a payload: before (OrderedDict + ujson.dumps) vs. template vs. binary record
+#
+# CPython:           python3 bench/bench_payload.py [n]
+# Unix-MicroPython:  micropython bench/bench_payload.py [n]
+#
+# Je Fall: µs und Heap-Bytes je Zyklus (Payload bauen, JSON, PUBLISH auf einen Null-Socket).
+# Vorher prüft der Lauf, dass Template und ujson.dumps für alle Testwerte dieselben Bytes
+# liefern. Die Messwerte wechseln wie im Betrieb: Uhrzeit und Klima ändern sich, Datum und
+# Lux (Nacht) bleiben gleich. Zum Schluss die Payload-Größe je Format.
+# Per case: µs and heap bytes per cycle (build the payload, JSON, PUBLISH to a null socket).
+# Beforehand the run checks that template and ujson.dumps give the same bytes for all test
+# values. Readings vary as in operation: time and climate change, date and lux (night) stay.
+# Finally the payload size per format.
+#
+# MicroPython: GC aus, gc.mem_alloc()-Differenz = alle Allokationen im Lauf.
+# CPython: tracemalloc-Spitze über dem Grundstand je Aufruf = kurzlebige Allokationen.
+# MicroPython: GC off, gc.mem_alloc() delta = every allocation during the run.
+# CPython: tracemalloc peak above baseline per call = short-lived allocations.
+
+import sys
+import gc
+import time
+
+_here = __file__.rsplit("/", 1)[0] if "/" in __file__ else "."
+sys.path.insert(0, _here + "/../src/lib")
+sys.path.insert(0, _here)
+
+try:
+    import ujson
+except ImportError:
+    import json as ujson
+    sys.modules["ujson"] = ujson
+
+import hostmachine
+import hostnet
+
+hostmachine.install()
+hostnet.install_ticks()
+
+from collections import OrderedDict
+import config
+import logger
+import sensors
+import timekeep
+import mqtt
+import bincodec
+from bench_mqtt_encoder import NullSocket, _measure
+
+TOPIC = "sensor/default"
+FIELDS = ["date", "time", "temp", "pressure", "humidity", "lux"]
+READINGS = 64
+
+# --- Testwerte: je Zyklus (Stempel, Sensorwerte) / Test values: per cycle (stamp, sensor values) ---
+def readings():
+    rows = []
+    for i in range(READINGS):
+        stamp = (1792324800 + 60 * i, (i * 37) % 1000)
+        rows.append((stamp, {
+            "temp": round(21.3 + 0.07 * i, 1),
+            "pressure": round(1013.2 - 0.013 * i, 1),
+            "humidity": round(48.7 + 0.11 * (i % 9), 1),
+            "lux": 0,
+            "bme_latency_ms": 8.0,
+        }))
+    return rows
+
+# --- Bisheriger Weg (Referenz) / Previous path (reference) ---
+def legacy_build(data, at):
+    fields = getattr(config, "MQTT_PAYLOAD_FIELDS", None)
+    payload = OrderedDict()
+    missing = None
+    for field in fields:
+        if field in data:
+            payload[field] = data[field]
+        elif field in sensors.TIME_FIELDS:
+            payload[field] = timekeep.field(field, at)
+        else:
+            payload[field] = None
+            missing = (missing or []) + [field]
+    if missing:
+        logger.warn("PAYLOAD_FIELDS", missing)
+    return payload
+
+# --- Byte-Gleichheit über alle Testwerte und Sonderfälle / Byte identity over all test values and edge cases ---
+def check(tpl, rows):
+    extra = [
+        {"temp": None, "pressure": None, "humidity": None, "lux": None},
+        {"temp": -0.5, "pressure": 1e-05, "humidity": 100, "lux": 120000},
+        {"temp": True, "pressure": False, "humidity": "n/a", "lux": [1, 2]},
+        {"temp": 1, "pressure": 1.0, "humidity": 1, "lux": 1.0},
+        {"temp": 0.0, "pressure": 0, "humidity": False, "lux": 0.0},
+        {"temp": -0.0, "pressure": float("nan"), "humidity": 1e-300, "lux": "Grüße ☃"},
+    ]
+    cases = rows + [(rows[0][0], values) for values in extra]
+    for at, values in cases + cases:
+        payload = legacy_build(values, at)
+        want = ujson.dumps(payload).encode()
+        got = bytes(tpl.encode(payload))
+        if got != want:
+            raise AssertionError("Template != ujson.dumps:\n  %r\n  %r" % (got, want))
+    return len(cases)
+
+def run(n=2000):
+    config.MQTT_PAYLOAD_FIELDS = FIELDS
+    logger.configure(sink_names=())
+    tpl = sensors.compile_payload()
+    rows = readings()
+    checked = check(tpl, rows)
+    print("✅ byte-gleich / byte-identical: %d Payloads / payloads" % checked)
+    codec = bincodec.Codec(FIELDS)
+
+    client = mqtt.MQTTClient("bench", "localhost")
+    client.sock = NullSocket()
+    pos = [0]
+
+    def next_row():
+        i = pos[0]
+        pos[0] = (i + 1) % READINGS
+        return rows[i]
+
+    def legacy_encode():
+        at, data = next_row()
+        ujson.dumps(legacy_build(data, at))
+
+    def template_encode():
+        at, data = next_row()
+        tpl.encode(sensors.build_payload(data, at))
+
+    def legacy_cycle():
+        at, data = next_row()
+        client.publish(TOPIC, ujson.dumps(legacy_build(data, at)))
+
+    def template_cycle():
+        at, data = next_row()
+        client.publish(TOPIC, tpl.encode(sensors.build_payload(data, at)))
+
+    def binary_encode():
+        at, data = next_row()
+        codec.encode(sensors.build_payload(data, at))
+
+    def binary_cycle():
+        at, data = next_row()
+        client.publish(TOPIC, codec.encode(sensors.build_payload(data, at)))
+
+    cases = (
+        ("ujson (bisher / before)", legacy_encode),
+        ("template", template_encode),
+        ("binary", binary_encode),
+        ("ujson + publish", legacy_cycle),
+        ("template + publish", template_cycle),
+        ("binary + publish", binary_cycle),
+    )
+    print("case                      us/cycle  heap-bytes/cycle")
+    results = {}
+    for name, fn in cases:
+        gc.collect()
+        us, heap = _measure(fn, n)
+        results[name] = (us, heap)
+        print("%-24s %9.2f  %16.1f" % (name, us, heap))
+    (us_a, heap_a), (us_b, heap_b) = results["ujson + publish"], results["template + publish"]
+    print("Ersparnis je Zyklus / savings per cycle: %.2f us (%.0f%%), %.0f B Heap (%.0f%%)" % (
+        us_a - us_b, 100 * (us_a - us_b) / us_a, heap_a - heap_b, 100 * (heap_a - heap_b) / heap_a))
+    at, data = rows[0]
+    payload = sensors.build_payload(data, at)
+    json_size = len(tpl.encode(payload))
+    print("Payload: JSON %d B, binär / binary %d B (%.1fx kleiner / smaller)" % (
+        json_size, len(codec.encode(payload)), json_size / codec.size))
+
+if __name__ == "__main__":
+    run(int(sys.argv[1]) if len(sys.argv) > 1 else 2000)
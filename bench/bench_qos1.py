@@ -0,0 +1,75 @@
+# bench_qos1.py – QoS-1-Durchsatz: Stop-and-Wait (Fenster 1) gegen Pipeline (Fenster 8)
+# bench_qos1.py – QoS 1 throughput: stop-and-wait (window 1) vs. pipelined (window 8)
+#
+# Ohne Host startet auf CPython der lokale Testbroker (bench/tcp_broker.py) mit rtt_ms.
+# Without a host, CPython starts the local test broker (bench/tcp_broker.py) with rtt_ms.
+#
+#   python3 bench/bench_qos1.py [n] [rtt_ms]
+#   python3 bench/bench_qos1.py [n] 0 <host> <port>      (z. B. / e.g. mosquitto)
+#   micropython bench/bench_qos1.py [n] 0 <host> <port>
+
+import sys
+import time
+
+_here = __file__.rsplit("/", 1)[0] if "/" in __file__ else "."
+sys.path.insert(0, _here + "/../src/lib")
+sys.path.insert(0, _here)
+
+try:
+    import ujson  # noqa: F401
+except ImportError:
+    import json
+    sys.modules["ujson"] = json
+
+import hostmachine
+import hostnet
+
+hostmachine.install()
+hostnet.install_ticks()
+
+import config
+import mqtt
+
+PAYLOAD = b'{"date": "18.10.2026", "time": "12:00:00", "temp": 21.3, "pressure": 1013.2, "humidity": 48.7, "lux": 1406}'
+
+def _ms():
+    if hasattr(time, "ticks_ms"):
+        return time.ticks_ms()
+    return int(time.monotonic() * 1000)
+
+def run_window(host, port, window, n):
+    config.MQTT_INFLIGHT = window
+    client = mqtt.MQTTClient("bench-qos1-%d" % window, host, port=port)
+    client.connect()
+    t0 = _ms()
+    for _ in range(n):
+        client.publish("bench/qos1", PAYLOAD, qos=1)
+        client.process_acks()
+    ok = client.wait_acks(30000)
+    elapsed = max(1, _ms() - t0)
+    client.disconnect()
+    return ok, elapsed, client.acked
+
+def main():
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 200
+    rtt = int(sys.argv[2]) if len(sys.argv) > 2 else 20
+    hostnet.install(mqtt)
+
+    broker = None
+    if len(sys.argv) > 4:
+        host, port = sys.argv[3], int(sys.argv[4])
+    else:
+        import tcp_broker
+        broker = tcp_broker.Broker(rtt_ms=rtt).start()
+        host, port = broker.host, broker.port
+
+    print("window  msgs  acked  ms      msgs/s")
+    for window in (1, 8):
+        ok, elapsed, acked = run_window(host, port, window, n)
+        print("%6d  %4d  %5d  %6d  %8.1f%s" % (window, n, acked, elapsed, n * 1000 / elapsed, "" if ok else "  (timeout)"))
+
+    if broker:
+        broker.stop()
+
+if __name__ == "__main__":
+    main()
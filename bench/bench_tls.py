@@ -0,0 +1,94 @@
+# bench_tls.py – TLS-Handshake: Dauer und Heap je Verbindung, mit und ohne Session-Resumption
+# bench_tls.py – TLS handshake: duration and heap per connection, with and without session resumption
+#
+# Ohne Host erzeugt CPython ein selbstsigniertes Zertifikat (openssl) und startet den
+# lokalen Testbroker mit TLS. Heap-Werte gibt es nur unter MicroPython (gc.mem_alloc).
+# Without a host, CPython creates a self-signed certificate (openssl) and starts the
+# local test broker with TLS. Heap figures are only available on MicroPython (gc.mem_alloc).
+#
+#   python3 bench/bench_tls.py [n] [rtt_ms]
+#   micropython bench/bench_tls.py [n] 0 <host> <port> [ca_file]
+
+import sys
+
+_here = __file__.rsplit("/", 1)[0] if "/" in __file__ else "."
+sys.path.insert(0, _here + "/../src/lib")
+sys.path.insert(0, _here)
+
+try:
+    import ujson  # noqa: F401
+except ImportError:
+    import json
+    sys.modules["ujson"] = json
+
+import hostmachine
+import hostnet
+
+hostmachine.install()
+hostnet.install_ticks()
+
+import config
+import mqtt
+
+# --- Selbstsigniertes Zertifikat für localhost / Self-signed certificate for localhost ---
+def make_cert(tmp):
+    import subprocess
+    cert, key = tmp + "/broker.crt", tmp + "/broker.key"
+    subprocess.run(
+        ["openssl", "req", "-x509", "-newkey", "ec", "-pkeyopt", "ec_paramgen_curve:prime256v1",
+         "-nodes", "-days", "1", "-subj", "/CN=localhost", "-addext", "subjectAltName=DNS:localhost",
+         "-keyout", key, "-out", cert],
+        check=True, capture_output=True,
+    )
+    return cert, key
+
+def run(host, port, n, resume):
+    config.MQTT_TLS_RESUME = resume
+    client = mqtt.MQTTClient("bench-tls", host, port=port, ssl_context=mqtt.tls_context(),
+                             server_hostname="localhost")
+    rows = []
+    for _ in range(n):
+        client.connect()
+        rows.append((client.tls_handshake_ms, client.tls_heap, client.tls_resumed, client.connect_ms))
+        client.disconnect()
+    return rows
+
+def _avg(values):
+    values = [v for v in values if v is not None]
+    return sum(values) / len(values) if values else None
+
+def main():
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 10
+    rtt = int(sys.argv[2]) if len(sys.argv) > 2 else 0
+    hostnet.install(mqtt)
+    hostnet.install_tls()
+    config.MQTT_TLS = True
+
+    broker = tmp = None
+    if len(sys.argv) > 4:
+        host, port = sys.argv[3], int(sys.argv[4])
+        config.MQTT_CA_FILE = sys.argv[5] if len(sys.argv) > 5 else None
+    else:
+        import tempfile
+        import tcp_broker
+        tmp = tempfile.TemporaryDirectory()
+        cert, key = make_cert(tmp.name)
+        config.MQTT_CA_FILE = cert
+        broker = tcp_broker.Broker(rtt_ms=rtt, certfile=cert, keyfile=key).start()
+        host, port = broker.host, broker.port
+
+    print("resume  first-ms  avg-ms  avg-heap  resumed  avg-connect-ms")
+    for resume in (False, True):
+        rows = run(host, port, n, resume)
+        heap = _avg([r[1] for r in rows])
+        print("%6s  %8d  %6.1f  %8s  %4d/%-3d  %14.1f" % (
+            resume, rows[0][0], _avg([r[0] for r in rows]),
+            "-" if heap is None else "%d" % heap,
+            sum(1 for r in rows if r[2]), n, _avg([r[3] for r in rows])))
+
+    if broker:
+        broker.stop()
+        tmp.cleanup()
+
+if __name__ == "__main__":
+    main()
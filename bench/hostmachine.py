@@ -0,0 +1,147 @@
+# hostmachine.py – Ersatz-machine-Modul mit festen BME280-/VEML7700-Registern für Benchmarks
+# hostmachine.py – Stand-in machine module with fixed BME280/VEML7700 registers for benchmarks
+#
+# Die Treiber aus src/lib laufen unverändert: Kalibrierung, Status und Messwerte kommen
+# aus Register-Abbildern, Wartezeiten der Treiber (Wandlung, Integrationszeit) laufen
+# echt ab. Die I2C-Übertragung selbst kostet hier nichts – dafür zählt der Bus die Bytes,
+# bus_us() rechnet sie mit 9 Takten je Byte in die Zeit am echten Bus um.
+# The drivers from src/lib run unchanged: calibration, status and readings come from
+# register images, the drivers' waits (conversion, integration time) really elapse.
+# The I2C transfer itself costs nothing here – instead the bus counts bytes, bus_us()
+# converts them into time on a real bus at 9 clocks per byte.
+#
+# Funktioniert auf CPython und Unix-MicroPython (dort fehlt machine.I2C).
+# Works on CPython and unix-port MicroPython (which lacks machine.I2C).
+
+import sys
+
+import bench_bme280
+
+_EIO = 5
+
+class Device:
+    def __init__(self, address, regs):
+        self.address = address
+        self.regs = regs            # Register -> bytes / register -> bytes
+
+    def read(self, reg, n):
+        data = self.regs.get(reg, b"")
+        return (bytes(data) + bytes(n))[:n]
+
+    def write(self, reg, data):
+        self.regs[reg] = bytes(data)
+
+# BME280: Datenblatt-Kalibrierung, immer fertig (Status 0), fester Rohwert-Burst ab 0xF7
+# BME280: datasheet calibration, always done (status 0), fixed raw burst from 0xF7
+def bme280(address=0x76, adc=(519888, 415148, 30000)):
+    return Device(address, {
+        0x88: bench_bme280.CALIB,
+        0xA1: bench_bme280.H1_BYTE,
+        0xE1: bench_bme280.H2_H6,
+        0xD0: b"\x60",
+        0xF3: b"\x00",
+        0xF7: bench_bme280._frame(*adc),
+    })
+
+# VEML7700: 16-Bit-Register little-endian, ALS-Rohwert fest, keine Interrupt-Flags
+# VEML7700: 16-bit registers little-endian, fixed ALS raw count, no interrupt flags
+def veml7700(address=0x10, raw=4096):
+    return Device(address, {0x04: bytes((raw & 0xFF, raw >> 8)), 0x05: bytes((raw & 0xFF, raw >> 8)), 0x06: b"\x00\x00"})
+
+class Bus:
+    def __init__(self, bus_id, freq=400000):
+        self.id = bus_id
+        self.freq = freq
+        self.devices = {}
+        self.bytes = 0              # übertragene Bytes inkl. Adresse/Register / bytes moved incl. address/register
+        self.transfers = 0
+
+    def attach(self, device):
+        self.devices[device.address] = device
+        return device
+
+    def _dev(self, addr, n):
+        dev = self.devices.get(addr)
+        if dev is None:
+            raise OSError(_EIO)
+        self.transfers += 1
+        self.bytes += n + 2
+        return dev
+
+    def scan(self):
+        return sorted(self.devices)
+
+    def readfrom_mem(self, addr, reg, n, addrsize=8):
+        return self._dev(addr, n).read(reg, n)
+
+    def readfrom_mem_into(self, addr, reg, buf, addrsize=8):
+        data = self._dev(addr, len(buf)).read(reg, len(buf))
+        for i in range(len(buf)):
+            buf[i] = data[i]
+
+    def writeto_mem(self, addr, reg, buf, addrsize=8):
+        self._dev(addr, len(buf)).write(reg, buf)
+
+buses = {}
+
+def bus(bus_id):
+    b = buses.get(bus_id)
+    if b is None:
+        b = buses[bus_id] = Bus(bus_id)
+    return b
+
+def total_bytes():
+    return sum(b.bytes for b in buses.values())
+
+# --- Zeit am echten Bus für n Bytes (9 Takte je Byte, langsamster Bus) ---
+# --- Time on a real bus for n bytes (9 clocks per byte, slowest bus) ---
+def bus_us(n_bytes):
+    freq = min([b.freq for b in buses.values()] or [400000])
+    return n_bytes * 9 * 1000000 // freq
+
+# --- machine-API, soweit sensors.py und i2cbus.py sie brauchen / machine API as far as sensors.py and i2cbus.py need it ---
+class Pin:
+    IN = 0
+    OUT = 1
+    PULL_UP = 1
+    IRQ_FALLING = 4
+    IRQ_RISING = 8
+
+    def __init__(self, pin_id, mode=-1, pull=-1, value=None):
+        self.id = pin_id
+        self._value = value or 0
+
+    def value(self, v=None):
+        if v is None:
+            return self._value
+        self._value = 1 if v else 0
+
+    def on(self):
+        self._value = 1
+
+    def off(self):
+        self._value = 0
+
+    def toggle(self):
+        self._value ^= 1
+
+    def irq(self, handler=None, trigger=IRQ_FALLING | IRQ_RISING):
+        pass
+
+def I2C(bus_id, scl=None, sda=None, freq=400000, timeout=50000):
+    b = bus(bus_id)
+    b.freq = freq
+    return b
+
+SoftI2C = I2C
+
+def reset():
+    raise SystemExit("machine.reset()")
+
+def idle():
+    pass
+
+# --- Dieses Modul als machine eintragen (auch über das machine von Unix-MicroPython) ---
+# --- Register this module as machine (also over unix-port MicroPython's machine) ---
+def install():
+    sys.modules["machine"] = sys.modules[__name__]
@@ -0,0 +1,182 @@
+# hostnet.py – MicroPython-Socket-API auf CPython für Benchmarks gegen echte Broker
+# hostnet.py – MicroPython socket API on CPython for benchmarks against real brokers
+#
+# mqtt.py nutzt write(buf, off, len), read(n) und readinto(buf, n) wie MicroPython-Streams.
+# Unter Unix-MicroPython wird nichts ersetzt.
+# mqtt.py uses write(buf, off, len), read(n) and readinto(buf, n) like MicroPython streams.
+# Nothing is replaced on unix-port MicroPython.
+
+import sys
+import time
+import socket as _socket
+
+# Fehler, die bei nicht-blockierenden Sockets "später nochmal" bedeuten (TLS ergänzt sie)
+# Errors that mean "try again later" on non-blocking sockets (TLS adds to them)
+_WOULD_BLOCK = (BlockingIOError,)
+
+class HostSocket:
+    def __init__(self, *args):
+        self._s = _socket.socket(*args)
+        self._s.setsockopt(_socket.IPPROTO_TCP, _socket.TCP_NODELAY, 1)
+        self._blocking = True
+
+    def connect(self, addr):
+        self._s.connect(addr)
+
+    def fileno(self):
+        return self._s.fileno()
+
+    def setblocking(self, flag):
+        self._blocking = bool(flag)
+        self._s.setblocking(flag)
+
+    def settimeout(self, value):
+        self._blocking = value is None
+        self._s.settimeout(value)
+
+    def write(self, buf, off=0, n=None):
+        view = memoryview(buf)
+        n = len(view) - off if n is None else n
+        if self._blocking:
+            self._s.sendall(view[off:off + n])
+            return n
+        try:
+            return self._s.send(view[off:off + n])
+        except _WOULD_BLOCK:
+            return None
+
+    def readinto(self, buf, n=None):
+        view = memoryview(buf)
+        n = len(view) if n is None else n
+        got = 0
+        while got < n:
+            try:
+                r = self._s.recv_into(view[got:n])
+            except _WOULD_BLOCK:
+                return got or None
+            if not r:
+                break
+            got += r
+        return got
+
+    def read(self, n):
+        buf = bytearray(n)
+        got = self.readinto(buf, n)
+        return None if got is None else bytes(buf[:got])
+
+    # TLS-Session wie bei CPython / TLS session like CPython
+    @property
+    def session(self):
+        return getattr(self._s, "session", None)
+
+    @property
+    def session_reused(self):
+        return getattr(self._s, "session_reused", False)
+
+    def close(self):
+        self._s.close()
+
+class _Net:
+    socket = HostSocket
+    getaddrinfo = staticmethod(_socket.getaddrinfo)
+    AF_INET = _socket.AF_INET
+    SOCK_STREAM = _socket.SOCK_STREAM
+
+# --- ticks_*-Funktionen von MicroPython nachrüsten / Add MicroPython's ticks_* functions ---
+_TICKS_PERIOD = 1 << 30
+
+def install_ticks():
+    if hasattr(time, "ticks_ms"):
+        return
+    t0 = time.monotonic()
+    time.ticks_ms = lambda: int((time.monotonic() - t0) * 1000) % _TICKS_PERIOD
+    time.ticks_us = lambda: int((time.monotonic() - t0) * 1000000) % _TICKS_PERIOD
+    time.ticks_add = lambda ticks, delta: (ticks + delta) % _TICKS_PERIOD
+
+    def ticks_diff(a, b):
+        d = (a - b) % _TICKS_PERIOD
+        return d - _TICKS_PERIOD if d >= _TICKS_PERIOD // 2 else d
+    time.ticks_diff = ticks_diff
+    time.sleep_ms = lambda ms: time.sleep(ms / 1000)
+    time.sleep_us = lambda us: time.sleep(us / 1000000)
+
+# --- mqtt-Modul auf Host-Sockets umstellen (nur CPython) / Switch mqtt module to host sockets (CPython only) ---
+def install(module):
+    if sys.implementation.name != "micropython":
+        install_ticks()
+        module.socket = _Net
+
+# --- CPython-ssl unabhängig von src/lib/ssl.py laden / Load CPython's ssl regardless of src/lib/ssl.py ---
+# src/lib steht in den Benchmarks vorne im sys.path und verdeckt das ssl der Standardbibliothek.
+# src/lib comes first in the benchmarks' sys.path and shadows the standard library's ssl.
+_host_ssl = None
+
+def host_ssl():
+    global _host_ssl
+    if _host_ssl is None:
+        import importlib.util
+        import sysconfig
+        path = sysconfig.get_paths()["stdlib"] + "/ssl.py"
+        spec = importlib.util.spec_from_file_location("_host_ssl", path)
+        _host_ssl = importlib.util.module_from_spec(spec)
+        sys.modules["_host_ssl"] = _host_ssl
+        spec.loader.exec_module(_host_ssl)
+    return _host_ssl
+
+# --- tls-Modul von MicroPython nachbilden, damit src/lib/ssl.py läuft ---
+# --- Emulate MicroPython's tls module so that src/lib/ssl.py runs ---
+# Zertifikate kommen wie bei mbedTLS als Bytes, CPython braucht für die Client-Kette Dateien.
+# Certificates arrive as bytes like with mbedTLS, CPython needs files for the client chain.
+class _TLSContext:
+    def __init__(self, protocol):
+        std = host_ssl()
+        self._ctx = std.SSLContext(protocol)
+        self._ctx.check_hostname = False
+        self._ctx.verify_mode = std.CERT_NONE
+
+    @property
+    def verify_mode(self):
+        return self._ctx.verify_mode
+
+    @verify_mode.setter
+    def verify_mode(self, val):
+        self._ctx.verify_mode = val
+
+    def load_verify_locations(self, cadata):
+        if cadata.startswith(b"-----"):
+            cadata = cadata.decode()
+        self._ctx.load_verify_locations(cadata=cadata)
+
+    def load_cert_chain(self, cert, key):
+        import tempfile
+        with tempfile.TemporaryDirectory() as tmp:
+            paths = []
+            for name, data in (("cert.pem", cert), ("key.pem", key)):
+                paths.append(tmp + "/" + name)
+                with open(paths[-1], "wb") as f:
+                    f.write(data)
+            self._ctx.load_cert_chain(*paths)
+
+    def wrap_socket(self, sock, server_side=False, do_handshake_on_connect=True, server_hostname=None, session=None):
+        sock._s = self._ctx.wrap_socket(
+            sock._s,
+            server_side=server_side,
+            do_handshake_on_connect=do_handshake_on_connect,
+            server_hostname=server_hostname,
+            session=session,
+        )
+        return sock
+
+def install_tls():
+    global _WOULD_BLOCK
+    if sys.implementation.name == "micropython" or "tls" in sys.modules:
+        return
+    std = host_ssl()
+    _WOULD_BLOCK = (BlockingIOError, std.SSLWantReadError, std.SSLWantWriteError)
+
+    import types
+    tls = types.ModuleType("tls")
+    tls.SSLContext = _TLSContext
+    for name in ("PROTOCOL_TLS_CLIENT", "PROTOCOL_TLS_SERVER", "CERT_NONE", "CERT_OPTIONAL", "CERT_REQUIRED"):
+        setattr(tls, name, getattr(std, name))
+    sys.modules["tls"] = tls
@@ -0,0 +1,135 @@
+# tcp_broker.py – Minimaler lokaler MQTT-3.1.1-Testbroker für Benchmarks (CPython)
+# tcp_broker.py – Minimal local MQTT 3.1.1 test broker for benchmarks (CPython)
+#
+# Beantwortet CONNECT, PUBLISH (QoS 0/1), PINGREQ und DISCONNECT. Antworten lassen sich um
+# rtt_ms verzögern, um eine WLAN-Strecke nachzubilden. Mit certfile/keyfile spricht er TLS.
+# Kein Routing an Subscriber.
+# Answers CONNECT, PUBLISH (QoS 0/1), PINGREQ and DISCONNECT. Replies can be delayed by
+# rtt_ms to emulate a WiFi link. With certfile/keyfile it speaks TLS. No routing to subscribers.
+#
+#   python3 bench/tcp_broker.py [port] [rtt_ms] [certfile keyfile]
+
+import socket
+import sys
+import threading
+import time
+
+class Broker:
+    def __init__(self, host="127.0.0.1", port=0, rtt_ms=0, session_present=False, certfile=None, keyfile=None):
+        self.rtt_ms = rtt_ms
+        self._tls = None
+        if certfile:
+            from hostnet import host_ssl
+            std = host_ssl()
+            self._tls = std.SSLContext(std.PROTOCOL_TLS_SERVER)
+            self._tls.load_cert_chain(certfile, keyfile)
+        self.session_present = session_present
+        self.published = 0
+        self.payload_bytes = 0
+        self.connects = 0
+        self.pings = 0
+        self.messages = []        # (topic, payload) – nur wenn keep_messages / only if keep_messages
+        self.keep_messages = False
+        self._server = socket.socket()
+        self._server.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        self._server.bind((host, port))
+        self._server.listen(4)
+        self.host, self.port = self._server.getsockname()
+        self._running = True
+
+    def start(self):
+        threading.Thread(target=self._accept_loop, daemon=True).start()
+        return self
+
+    def stop(self):
+        self._running = False
+        try:
+            self._server.close()
+        except OSError:
+            pass
+
+    def _accept_loop(self):
+        while self._running:
+            try:
+                conn, _ = self._server.accept()
+            except OSError:
+                return
+            conn.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+            if self._tls is not None:
+                try:
+                    conn = self._tls.wrap_socket(conn, server_side=True)
+                except OSError:
+                    conn.close()
+                    continue
+            threading.Thread(target=self._serve, args=(conn,), daemon=True).start()
+
+    def _reply(self, conn, data):
+        if not self.rtt_ms:
+            conn.sendall(data)
+            return
+        due = time.monotonic() + self.rtt_ms / 1000
+
+        def later():
+            time.sleep(max(0, due - time.monotonic()))
+            try:
+                conn.sendall(data)
+            except OSError:
+                pass
+        threading.Thread(target=later, daemon=True).start()
+
+    def _read(self, conn, n):
+        data = b""
+        while len(data) < n:
+            chunk = conn.recv(n - len(data))
+            if not chunk:
+                raise EOFError
+            data += chunk
+        return data
+
+    def _serve(self, conn):
+        try:
+            while True:
+                ptype = self._read(conn, 1)[0]
+                length, shift = 0, 0
+                while True:
+                    b = self._read(conn, 1)[0]
+                    length |= (b & 0x7F) << shift
+                    shift += 7
+                    if not b & 0x80:
+                        break
+                body = self._read(conn, length) if length else b""
+                kind = ptype & 0xF0
+                if kind == 0x10:
+                    self.connects += 1
+                    self._reply(conn, bytes((0x20, 0x02, 1 if self.session_present else 0, 0x00)))
+                elif kind == 0x30:
+                    qos = (ptype >> 1) & 0x03
+                    tlen = (body[0] << 8) | body[1]
+                    pos = 2 + tlen
+                    if qos:
+                        pid = body[pos:pos + 2]
+                        pos += 2
+                        self._reply(conn, b"\x40\x02" + pid)
+                    self.published += 1
+                    self.payload_bytes += len(body) - pos
+                    if self.keep_messages:
+                        self.messages.append((body[2:2 + tlen].decode(), body[pos:]))
+                elif kind == 0xC0:
+                    self.pings += 1
+                    self._reply(conn, b"\xd0\x00")
+                elif kind == 0xE0:
+                    break
+        except (EOFError, OSError):
+            pass
+        finally:
+            conn.close()
+
+if __name__ == "__main__":
+    port = int(sys.argv[1]) if len(sys.argv) > 1 else 1883
+    rtt = int(sys.argv[2]) if len(sys.argv) > 2 else 0
+    cert = sys.argv[3] if len(sys.argv) > 4 else None
+    key = sys.argv[4] if len(sys.argv) > 4 else None
+    broker = Broker(host="0.0.0.0", port=port, rtt_ms=rtt, certfile=cert, keyfile=key).start()
+    print("Testbroker auf Port / test broker on port", broker.port, "rtt_ms", rtt)
+    while True:
+        time.sleep(1)
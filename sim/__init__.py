@@ -0,0 +1,178 @@
+# sim – Hardware-Simulation: die Firmware aus src/ läuft unverändert auf CPython
+# sim – Hardware simulation: the firmware from src/ runs unmodified on CPython
+#
+# install() ersetzt time, machine, network, ntptime, micropython, uasyncio (und ujson, falls
+# nötig) in sys.modules; mqtt.py bekommt socket/select aus sim.broker. run() baut die Welt
+# aus config.py (WLAN, Broker, Sensoren an ihren I2C-Bussen), startet main.main() und
+# läuft bis zum Ende der virtuellen Zeit. machine.reset() startet main neu (Boot-Zähler).
+# install() replaces time, machine, network, ntptime, micropython, uasyncio (and ujson if
+# needed) in sys.modules; mqtt.py gets socket/select from sim.broker. run() builds the world
+# from config.py (WiFi, broker, sensors on their I2C buses), starts main.main() and runs
+# until the virtual time is over. machine.reset() restarts main (boot counter).
+#
+#   import sim
+#   world = sim.run(3600, setup=lambda world, config: world.broker.outage(600, 120))
+#   print(len(world.broker.messages), world.boots)
+
+import sys
+from sim import clock
+from sim import machine
+from sim import network
+from sim import ntptime
+from sim import broker
+from sim import i2c
+from sim import micropython as _micropython
+from sim import uasyncio
+from sim import traces
+from sim.bme280 import BME280
+from sim.veml7700 import VEML7700
+
+_here = __file__.rsplit("/", 1)[0] if "/" in __file__ else "."
+ROOT = _here.rsplit("/", 1)[0] if "/" in _here else ".."
+SRC = ROOT + "/src"
+LIB = SRC + "/lib"
+
+def install():
+    sys.modules["time"] = clock
+    sys.modules["utime"] = clock
+    sys.modules["machine"] = machine
+    sys.modules["network"] = network
+    sys.modules["ntptime"] = ntptime
+    sys.modules["micropython"] = _micropython
+    sys.modules["uasyncio"] = uasyncio
+    try:
+        import ujson  # noqa: F401
+    except ImportError:
+        from sim import ujson
+        sys.modules["ujson"] = ujson
+    for path in (SRC, LIB):
+        if path not in sys.path:
+            sys.path.insert(0, path)
+
+# --- Firmware-Module entladen (Neustart), config bleibt wie die Datei im Flash ---
+# --- Unload firmware modules (reboot), config stays like the file on flash ---
+def _firmware_modules():
+    names = []
+    for name, mod in list(sys.modules.items()):
+        path = getattr(mod, "__file__", None) or ""
+        if path.startswith(SRC) and name != "config":
+            names.append(name)
+    return names
+
+def _unload():
+    for name in _firmware_modules():
+        del sys.modules[name]
+
+# --- Die simulierte Umgebung / The simulated environment ---
+class World:
+    def __init__(self, config):
+        self.config = config
+        self.boots = 0
+        self.devices = {}
+        self.ap = network.add_network(config.SSID, config.PASSWORD)
+        self.ap_fb = None
+        if getattr(config, "SSID_FB", None):
+            self.ap_fb = network.add_network(config.SSID_FB, config.PASSWORD_FB, rssi=-75, subnet="192.168.2")
+            self.ap_fb.outages.append((0, 1 << 62))  # Fallback standardmäßig aus / fallback off by default
+        self.broker = broker.add_broker(host=config.MQTT_BROKER, port=config.MQTT_PORT)
+
+        # Sensoren aus der Registry an ihre Busse hängen / attach sensors from the registry to their buses
+        for spec in getattr(config, "SENSORS", ()):
+            dev = None
+            if spec["driver"] == "veml7700":
+                dev = VEML7700(spec["address"], power=spec.get("power"),
+                               lux=traces.daylight(20000, start_hour=self.start_hour()),
+                               int_pin=getattr(config, "VEML_INT_PIN", None))
+            elif spec["driver"] == "bme280":
+                hour = self.start_hour()
+                dev = BME280(spec["address"], power=spec.get("power"),
+                             temp=traces.diurnal(21.0, 3.0, start_hour=hour),
+                             pressure=traces.sine(1013.0, 4.0, 86400 * 3),
+                             humidity=traces.diurnal(55.0, -10.0, start_hour=hour))
+            if dev is not None:
+                self.attach(spec["name"], spec.get("bus", 0), dev)
+
+    def start_hour(self):
+        t = clock.gmtime()
+        return t[3] + t[4] / 60
+
+    def attach(self, name, bus_id, device):
+        self.devices[name] = device
+        return i2c.bus(bus_id).attach(device)
+
+    def wlan(self):
+        return network.WLAN(network.STA_IF)
+
+    # --- Kurzbericht / Short report ---
+    def report(self, out=print):
+        out("⏱️ Gerätezeit / device time: %.0f s, davon Schlaf / of which sleep: %.0f s, Boots: %d"
+            % (clock.elapsed(), clock.slept_us / 1000000, self.boots))
+        if machine.lightsleep_us or machine.deepsleep_us:
+            out("💤 lightsleep: %.0f s, deepsleep: %.0f s" % (machine.lightsleep_us / 1000000, machine.deepsleep_us / 1000000))
+        out("📶 WLAN connect(): %d" % self.wlan().connects)
+        b = self.broker
+        out("📨 Broker: %d Nachrichten / messages, %d Connects, %d Pings, %d DUP, %d Bytes"
+            % (len(b.messages), b.connects, b.pings, b.duplicates, b.bytes_in))
+        for name, dev in self.devices.items():
+            out("🔌 %s: %d Lese- / reads, %d Schreibzugriffe / writes" % (name, dev.reads, dev.writes))
+
+# --- Firmware für duration_s Sekunden Gerätezeit laufen lassen / Run the firmware for duration_s seconds of device time ---
+# setup(world, config): Szenario anpassen (Traces, Ausfälle, Config) / adjust the scenario (traces, outages, config)
+# overrides: Config-Werte vor dem Start / config values before start
+# quiet: Ausgaben der Firmware unterdrücken (nur CPython) / suppress firmware output (CPython only)
+# flash: Arbeitsverzeichnis als Flash-Dateisystem (None = temporär) / working directory as flash filesystem (None = temporary)
+def run(duration_s, setup=None, overrides=None, start_epoch=None, quiet=False, flash=None):
+    import os
+    if flash is None:
+        import tempfile
+        flash = tempfile.mkdtemp(prefix="sim_flash_")
+    cwd = os.getcwd()
+    os.chdir(flash)
+    install()
+    clock.reset(start_epoch=start_epoch, duration_s=duration_s)
+    i2c.reset()
+    network.reset()
+    broker.reset()
+    ntptime.reset()
+    machine.reset_state()
+    machine.lightsleep_us = machine.deepsleep_us = 0
+    _unload()
+    sys.modules.pop("config", None)
+
+    import config
+    for key, value in (overrides or {}).items():
+        setattr(config, key, value)
+    world = World(config)
+    if setup is not None:
+        setup(world, config)
+
+    stdout = sys.stdout
+    if quiet:
+        sys.stdout = _Null()
+    try:
+        while True:
+            world.boots += 1
+            try:
+                import mqtt
+                mqtt.socket = broker
+                mqtt.select = broker
+                import main
+                main.main()
+                break
+            except machine.Reset:
+                machine.reset_state(machine.reset_cause())
+                _unload()
+    except clock.Stop:
+        pass
+    finally:
+        sys.stdout = stdout
+        os.chdir(cwd)
+    world.flash = flash
+    return world
+
+class _Null:
+    def write(self, s):
+        return len(s)
+
+    def flush(self):
+        pass
@@ -0,0 +1,35 @@
+# __main__.py – Firmware im Simulator laufen lassen und Kurzbericht ausgeben
+# __main__.py – Run the firmware in the simulator and print a short report
+#
+# Ein Szenario ist eine Python-Datei mit setup(world, config), z. B.:
+# A scenario is a Python file with setup(world, config), e.g.:
+#
+#   def setup(world, config):
+#       world.broker.outage(600, 300)              # Broker 5 min weg / broker gone for 5 min
+#       network.outage(config.SSID, 1800, 120)      # WLAN 2 min weg / WiFi gone for 2 min
+#
+#   python3 -m sim [Stunden / hours] [szenario.py / scenario.py] [-q]
+
+import sys
+import time
+
+import sim
+
+def main(argv):
+    quiet = "-q" in argv
+    args = [a for a in argv if a != "-q"]
+    hours = float(args[0]) if args else 1.0
+    setup = None
+    if len(args) > 1:
+        scope = {"sim": sim, "network": sim.network, "traces": sim.traces, "clock": sim.clock}
+        with open(args[1]) as f:
+            exec(compile(f.read(), args[1], "exec"), scope)
+        setup = scope.get("setup")
+
+    t0 = time.perf_counter()
+    world = sim.run(hours * 3600, setup=setup, quiet=quiet)
+    wall = time.perf_counter() - t0
+    world.report()
+    print("🖥️ Laufzeit / wall time: %.2f s" % wall)
+
+main(sys.argv[1:])
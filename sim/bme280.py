@@ -0,0 +1,190 @@
+# bme280.py – Registergenauer BME280-Emulator
+# bme280.py – Register-accurate BME280 emulator
+#
+# Kalibrierung ab 0x88/0xA1/0xE1, Chip-ID 0xD0, ctrl_hum 0xF2, status 0xF3, ctrl_meas 0xF4,
+# config 0xF5, Messwerte 0xF7..0xFE. Forced Mode: Wandlung dauert die typische Messzeit
+# laut Datenblatt, danach Sleep. Normal Mode: neue Werte je Messzeit + Standby.
+# Die Rohwerte werden so gewählt, dass die Bosch-Formeln den Trace-Wert ergeben.
+# Calibration at 0x88/0xA1/0xE1, chip ID 0xD0, ctrl_hum 0xF2, status 0xF3, ctrl_meas 0xF4,
+# config 0xF5, data 0xF7..0xFE. Forced mode: a conversion takes the datasheet's typical
+# measurement time, then sleep. Normal mode: new values every measurement time + standby.
+# Raw values are chosen such that the Bosch formulas yield the trace value.
+
+import struct
+from sim import clock
+from sim.i2c import Device
+from sim.traces import _trace
+
+# Beispiel-Kalibrierung aus dem Datenblatt (T, P) mit typischen Feuchte-Werten
+# Example calibration from the datasheet (T, P) with typical humidity values
+CALIB = struct.pack("<HhhHhhhhhhhh", 27504, 26435, -1000, 36477, -10685, 3024, 2855, 140, -7, 15500, -14600, 6000)
+H1 = 75
+H2_H6 = struct.pack("<hB", 362, 0) + bytes((313 >> 4, (313 & 0x0F) | ((50 & 0x0F) << 4), 50 >> 4, 30))
+
+CHIP_ID = 0x60
+_OSRS = (0, 1, 2, 4, 8, 16)
+_STANDBY_US = (500, 62500, 125000, 250000, 500000, 1000000, 10000, 20000)
+_SKIPPED = (0x80000, 0x80000, 0x8000)   # Ausgabe bei Oversampling 0 / output with oversampling 0
+
+class BME280(Device):
+    def __init__(self, address=0x76, temp=20.0, pressure=1013.25, humidity=50.0, power=None,
+                 calib=CALIB, h1=H1, h2_h6=H2_H6):
+        Device.__init__(self, address, power)
+        self.temp = _trace(temp)           # °C
+        self.pressure = _trace(pressure)   # hPa
+        self.humidity = _trace(humidity)   # %RH
+        self.calib = bytes(calib)
+        self.h1 = h1
+        self.h2_h6 = bytes(h2_h6)
+        self._cal = self._unpack()
+        self.conversions = 0
+        self.power_on_reset()
+
+    def power_on_reset(self):
+        self.regs = bytearray(256)
+        self.regs[0x88:0xA0] = self.calib
+        self.regs[0xA1] = self.h1
+        self.regs[0xD0] = CHIP_ID
+        self.regs[0xE1:0xE8] = self.h2_h6
+        for i, v in enumerate((0x80, 0, 0, 0x80, 0, 0, 0x80, 0)):
+            self.regs[0xF7 + i] = v
+        self._done_us = None        # Ende der laufenden Wandlung / end of the running conversion
+        self._cycle_us = None       # Normal Mode: Start des Zyklus / normal mode: start of the cycle
+        self._iir = None
+
+    def _unpack(self):
+        c = list(struct.unpack("<HhhHhhhhhhhh", self.calib))
+        h = self.h2_h6
+        e4 = h[3] - 256 if h[3] > 127 else h[3]
+        e6 = h[5] - 256 if h[5] > 127 else h[5]
+        c += [self.h1, struct.unpack("<h", h[0:2])[0], h[2], e4 * 16 | (h[4] & 0x0F),
+              e6 * 16 | (h[4] >> 4), h[6] - 256 if h[6] > 127 else h[6]]
+        return c
+
+    # --- Bosch-Double-Formeln vorwärts (adc -> Wert) / Bosch double formulas forward (adc -> value) ---
+    def _t_fine(self, adc_t):
+        t1, t2, t3 = self._cal[0:3]
+        return (adc_t / 16384.0 - t1 / 1024.0) * t2 + (adc_t / 131072.0 - t1 / 8192.0) ** 2 * t3
+
+    def _pressure(self, adc_p, fine):
+        p1, p2, p3, p4, p5, p6, p7, p8, p9 = self._cal[3:12]
+        var1 = fine / 2.0 - 64000.0
+        var2 = var1 * var1 * p6 / 32768.0 + var1 * p5 * 2.0
+        var2 = var2 / 4.0 + p4 * 65536.0
+        var1 = (p3 * var1 * var1 / 524288.0 + p2 * var1) / 524288.0
+        var1 = (1.0 + var1 / 32768.0) * p1
+        p = (1048576.0 - adc_p - var2 / 4096.0) * 6250.0 / var1
+        return (p + (p9 * p * p / 2147483648.0 + p * p8 / 32768.0 + p7) / 16.0) / 100.0
+
+    def _humidity(self, adc_h, fine):
+        h1, h2, h3, h4, h5, h6 = self._cal[12:18]
+        v = fine - 76800.0
+        v = (adc_h - (h4 * 64.0 + h5 / 16384.0 * v)) * (h2 / 65536.0 * (1.0 + h6 / 67108864.0 * v * (1.0 + h3 / 67108864.0 * v)))
+        return v * (1.0 - h1 * v / 524288.0)
+
+    # Monotone Funktion per Bisektion umkehren / Invert a monotonic function by bisection
+    @staticmethod
+    def _invert(fn, target, hi, rising=True):
+        lo = 0
+        while hi - lo > 1:
+            mid = (lo + hi) // 2
+            if (fn(mid) < target) == rising:
+                lo = mid
+            else:
+                hi = mid
+        return lo
+
+    # --- Rohwerte für die Trace-Werte zum Zeitpunkt t / Raw values for the trace values at time t ---
+    def adc_values(self, t):
+        adc_t = self._invert(lambda a: self._t_fine(a) / 5120.0, self.temp(t), 1 << 20)
+        fine = self._t_fine(adc_t)
+        adc_p = self._invert(lambda a: self._pressure(a, fine), self.pressure(t), 1 << 20, rising=False)
+        humidity = min(100.0, max(0.0, self.humidity(t)))
+        adc_h = self._invert(lambda a: self._humidity(a, fine), humidity, 1 << 16)
+        return adc_t, adc_p, adc_h
+
+    def _osrs(self):
+        r = self.regs
+        return _OSRS[min(r[0xF4] >> 5, 5)], _OSRS[min(r[0xF4] >> 2 & 7, 5)], _OSRS[min(r[0xF2] & 7, 5)]
+
+    # Typische Messzeit (Kap. 9.1) / typical measurement time (sect. 9.1)
+    def _meas_us(self):
+        t, p, h = self._osrs()
+        us = 1000 + 2000 * t
+        if p:
+            us += 2000 * p + 500
+        if h:
+            us += 2000 * h + 500
+        return us
+
+    # --- Wandlung abschließen: Datenregister mit IIR füllen / Finish a conversion: fill data registers with IIR ---
+    def _convert(self, at_us):
+        osrs = self._osrs()
+        adc = list(self.adc_values(at_us / 1000000))
+        coeff = (0, 2, 4, 8, 16)[min(self.regs[0xF5] >> 2 & 7, 4)]
+        if coeff and self._iir is not None:
+            adc[1] = (self._iir[1] * (coeff - 1) + adc[1]) // coeff
+            adc[0] = (self._iir[0] * (coeff - 1) + adc[0]) // coeff
+        self._iir = list(adc)
+        for i in range(3):
+            if not osrs[i]:
+                adc[i] = _SKIPPED[i]
+        adc_t, adc_p, adc_h = adc
+        raw = (adc_p >> 12, (adc_p >> 4) & 0xFF, (adc_p & 0x0F) << 4,
+               adc_t >> 12, (adc_t >> 4) & 0xFF, (adc_t & 0x0F) << 4,
+               adc_h >> 8, adc_h & 0xFF)
+        self.regs[0xF7:0xFF] = bytes(raw)
+        self.conversions += 1
+
+    # --- Zustand bis jetzt nachziehen / Bring state up to now ---
+    def _update(self):
+        now = clock.now_us
+        mode = self.regs[0xF4] & 0x03
+        if self._done_us is not None and mode in (1, 2) and now >= self._done_us:
+            self._convert(self._done_us)
+            self._done_us = None
+            self.regs[0xF4] &= 0xFC  # zurück in Sleep / back to sleep
+        elif mode == 3 and self._cycle_us is not None:
+            period = self._meas_us() + _STANDBY_US[self.regs[0xF5] >> 5]
+            cycles = (now - self._cycle_us - self._meas_us()) // period + 1
+            if cycles > 0:
+                last = self._cycle_us + (cycles - 1) * period + self._meas_us()
+                self._cycle_us += cycles * period
+                self._convert(last)
+
+    def _measuring(self):
+        now = clock.now_us
+        if self._done_us is not None:
+            return now < self._done_us
+        if self.regs[0xF4] & 0x03 == 3 and self._cycle_us is not None:
+            return now - self._cycle_us < self._meas_us()
+        return False
+
+    def read(self, reg, n):
+        self._update()
+        if reg <= 0xF3 < reg + n:
+            self.regs[0xF3] = 0x08 if self._measuring() else 0x00
+        return self.regs[reg:reg + n]
+
+    def write(self, reg, data):
+        self._update()
+        for i in range(len(data)):
+            r = reg + i
+            if r == 0xE0:
+                if data[i] == 0xB6:
+                    self.power_on_reset()
+                continue
+            if r not in (0xF2, 0xF4, 0xF5):
+                continue  # nur diese Register sind beschreibbar / only these registers are writable
+            self.regs[r] = data[i]
+            if r == 0xF4:
+                mode = data[i] & 0x03
+                if mode in (1, 2):
+                    self._done_us = clock.now_us + self._meas_us()
+                    self._cycle_us = None
+                elif mode == 3:
+                    self._done_us = None
+                    self._cycle_us = clock.now_us
+                else:
+                    self._done_us = None
+                    self._cycle_us = None
@@ -0,0 +1,313 @@
+# broker.py – MQTT-3.1.1-Broker im selben Prozess plus socket/select für die Firmware
+# broker.py – In-process MQTT 3.1.1 broker plus socket/select for the firmware
+#
+# Keine Threads, keine echten Sockets: write() der Firmware geht direkt in den Parser des
+# Brokers, Antworten liegen nach rtt_ms (virtuelle Zeit) zum Lesen bereit. poll() mit
+# Timeout stellt die Uhr bis zur nächsten Antwort vor. Bricht WLAN oder Broker weg, gehen
+# gesendete Bytes verloren und nach der Rückkehr meldet der Socket ECONNRESET.
+# No threads, no real sockets: the firmware's write() goes straight into the broker's
+# parser, replies are ready to read after rtt_ms (virtual time). poll() with a timeout
+# advances the clock up to the next reply. If WiFi or broker go away, written bytes are
+# lost and after recovery the socket reports ECONNRESET.
+
+from sim import clock
+from sim import network
+
+_ECONNRESET = 104
+_ECONNREFUSED = 111
+_EHOSTUNREACH = 113
+_ETIMEDOUT = 110
+_EINPROGRESS = 115
+
+class Broker:
+    def __init__(self, host="192.168.1.100", port=1883, rtt_ms=20, session_present=False, ack=True):
+        self.host = host
+        self.port = port
+        self.rtt_ms = rtt_ms
+        self.session_present = session_present
+        self.ack = ack              # False = keine PUBACKs (Broker hängt) / no PUBACKs (broker hangs)
+        self.outages = []
+        self.messages = []          # (Sekunde / second, topic, payload, qos, retain, dup)
+        self.connects = 0
+        self.pings = 0
+        self.duplicates = 0
+        self.bytes_in = 0
+        self.sockets = []
+
+    # --- Broker ab start_s für duration_s Sekunden weg / Broker gone from start_s for duration_s seconds ---
+    def outage(self, start_s, duration_s):
+        start = int(start_s * 1000000)
+        self.outages.append((start, start + int(duration_s * 1000000)))
+
+    def up(self):
+        for start, end in self.outages:
+            if start <= clock.now_us < end:
+                return False
+        return True
+
+    def topics(self, topic):
+        return [m for m in self.messages if m[1] == topic]
+
+    # --- Ein vollständiges Paket verarbeiten, Antwort oder None / Handle one complete packet, reply or None ---
+    def handle(self, conn, ptype, body):
+        kind = ptype & 0xF0
+        if kind == 0x10:
+            self.connects += 1
+            return bytes((0x20, 0x02, 1 if self.session_present else 0, 0x00))
+        if kind == 0x30:
+            qos = (ptype >> 1) & 0x03
+            tlen = (body[0] << 8) | body[1]
+            pos = 2 + tlen
+            pid = None
+            if qos:
+                pid = body[pos:pos + 2]
+                pos += 2
+            dup = bool(ptype & 0x08)
+            if dup:
+                self.duplicates += 1
+            self.messages.append((clock.elapsed(), body[2:2 + tlen].decode(), bytes(body[pos:]), qos, bool(ptype & 0x01), dup))
+            if qos and self.ack:
+                return b"\x40\x02" + pid
+            return None
+        if kind == 0xC0:
+            self.pings += 1
+            return b"\xd0\x00"
+        if kind == 0x80:
+            return b"\x90\x03" + body[0:2] + b"\x00"   # SUBACK, QoS 0
+        if kind == 0xE0:
+            conn.closed_by_peer = True
+        return None
+
+brokers = {}
+
+def add_broker(**kw):
+    broker = Broker(**kw)
+    brokers[(broker.host, broker.port)] = broker
+    return broker
+
+def reset():
+    brokers.clear()
+
+# --- socket-Modul der Firmware / The firmware's socket module ---
+AF_INET = 2
+SOCK_STREAM = 1
+IPPROTO_TCP = 6
+SOL_SOCKET = 1
+SO_REUSEADDR = 4
+
+def getaddrinfo(host, port, *args):
+    if not network.online():
+        raise OSError(-2)
+    return [(AF_INET, SOCK_STREAM, IPPROTO_TCP, "", (host, port))]
+
+class socket:
+    def __init__(self, *args):
+        self.broker = None
+        self.timeout_us = None
+        self.closed = False
+        self.closed_by_peer = False
+        self._dead = False
+        self._rx = bytearray()      # Bytes vom Broker / bytes from the broker
+        self._pending = []          # [(bereit ab µs / ready at µs, bytes)]
+        self._in = bytearray()      # unvollständiges Paket zum Broker / incomplete packet to the broker
+        self._connecting = None     # (fertig ab µs, Broker) beim nicht-blockierenden connect / (done at µs, broker) for a non-blocking connect
+        self._refused = False
+
+    def settimeout(self, value):
+        self.timeout_us = None if value is None else int(value * 1000000)
+
+    def setblocking(self, flag):
+        self.timeout_us = None if flag else 0
+
+    def setsockopt(self, *args):
+        pass
+
+    def fileno(self):
+        return id(self)
+
+    # Blockierend: TCP-Handshake kostet eine RTT. Nicht-blockierend: EINPROGRESS, poll()
+    # meldet nach einer RTT POLLOUT (verbunden) oder POLLERR|POLLHUP (abgelehnt).
+    # Blocking: the TCP handshake costs one RTT. Non-blocking: EINPROGRESS, poll() reports
+    # POLLOUT (connected) or POLLERR|POLLHUP (refused) after one RTT.
+    def connect(self, addr):
+        if not network.online():
+            raise OSError(_EHOSTUNREACH)
+        broker = brokers.get((addr[0], addr[1]))
+        rtt = broker.rtt_ms if broker is not None else 1
+        if self.timeout_us == 0:
+            self._connecting = (clock.now_us + rtt * 1000, broker)
+            raise OSError(_EINPROGRESS)
+        clock.sleep_us(rtt * 1000)   # TCP-Handshake
+        self._attach(broker)
+
+    def _attach(self, broker):
+        if broker is None or not broker.up():
+            raise OSError(_ECONNREFUSED)
+        self.broker = broker
+        broker.sockets.append(self)
+
+    # -- Ereignisse für poll() (mask: POLLIN/POLLOUT) / Events for poll() (mask: POLLIN/POLLOUT) --
+    def events(self, mask):
+        if self.closed:
+            return 0
+        if self._connecting is not None:
+            ready, broker = self._connecting
+            if clock.now_us < ready:
+                return 0
+            self._connecting = None
+            try:
+                self._attach(broker)
+            except OSError:
+                self._refused = True
+        if self._refused:
+            return POLLERR | POLLHUP
+        ev = 0
+        if mask & POLLOUT:
+            ev |= POLLOUT
+        if mask & POLLIN and self.readable():
+            ev |= POLLIN
+        return ev
+
+    # -- Verbindung unterbrochen (WLAN oder Broker)? / Connection interrupted (WiFi or broker)? --
+    def _link_up(self):
+        return network.online() and self.broker.up()
+
+    def _check(self):
+        if self.closed:
+            raise OSError(9)
+        if not self._link_up():
+            self._dead = True
+            return False
+        if self._dead or self.closed_by_peer:
+            raise OSError(_ECONNRESET)
+        return True
+
+    def write(self, buf, off=0, n=None):
+        n = len(buf) - off if n is None else n
+        if not self._check():
+            return n  # geht verloren / gets lost
+        self._in += bytes(memoryview(buf)[off:off + n])
+        self.broker.bytes_in += n
+        self._feed()
+        return n
+
+    send = write
+
+    def sendall(self, buf):
+        self.write(buf)
+
+    def _feed(self):
+        data = self._in
+        while len(data) >= 2:
+            length, shift, i = 0, 0, 1
+            while True:
+                if i >= len(data):
+                    return
+                b = data[i]
+                i += 1
+                length |= (b & 0x7F) << shift
+                shift += 7
+                if not b & 0x80:
+                    break
+            if len(data) < i + length:
+                return
+            reply = self.broker.handle(self, data[0], bytes(data[i:i + length]))
+            del data[:i + length]
+            if reply:
+                self._pending.append((clock.now_us + self.broker.rtt_ms * 1000, reply))
+
+    def _collect(self):
+        while self._pending and self._pending[0][0] <= clock.now_us:
+            self._rx += self._pending.pop(0)[1]
+
+    def readable(self):
+        if self.closed:
+            return False
+        if not self._link_up():
+            return False
+        if self._dead or self.closed_by_peer:
+            return True  # Fehler abholen / collect the error
+        self._collect()
+        return bool(self._rx)
+
+    def next_event_us(self):
+        if self._connecting is not None:
+            return self._connecting[0]
+        return self._pending[0][0] if self._pending and not self._dead else None
+
+    def readinto(self, buf, n=None):
+        n = len(buf) if n is None else n
+        if self.timeout_us:
+            _wait([(self, POLLIN)], self.timeout_us)
+        if not self._check():
+            return None
+        self._collect()
+        if not self._rx:
+            if self.timeout_us:
+                raise OSError(_ETIMEDOUT)
+            return None
+        k = min(n, len(self._rx))
+        buf[:k] = self._rx[:k]
+        del self._rx[:k]
+        return k
+
+    def read(self, n):
+        buf = bytearray(n)
+        k = self.readinto(buf, n)
+        return None if k is None else bytes(buf[:k])
+
+    recv = read
+
+    def close(self):
+        self.closed = True
+        if self.broker is not None and self in self.broker.sockets:
+            self.broker.sockets.remove(self)
+
+# --- Warten auf Ereignisse [(Socket, Maske)], höchstens timeout_us; Rückgabe [(Socket, Ereignis)] ---
+# --- Wait for events [(socket, mask)], at most timeout_us; returns [(socket, event)] ---
+def _wait(entries, timeout_us):
+    deadline = clock.now_us + timeout_us if timeout_us >= 0 else None
+    while True:
+        ready = []
+        for s, mask in entries:
+            ev = s.events(mask)
+            if ev:
+                ready.append((s, ev))
+        if ready or (deadline is not None and clock.now_us >= deadline):
+            return ready
+        nxt = deadline
+        for s, _ in entries:
+            t = s.next_event_us()
+            if t is not None and (nxt is None or t < nxt):
+                nxt = t
+        if nxt is None:
+            nxt = clock.now_us + 1000000   # nichts zu erwarten, Uhr weiterlaufen lassen / nothing expected, let the clock run
+        clock.sleep_us(max(nxt - clock.now_us, 1))
+
+# --- select-Modul der Firmware / The firmware's select module ---
+POLLIN = 0x0001
+POLLOUT = 0x0004
+POLLERR = 0x0008
+POLLHUP = 0x0010
+
+class _Poll:
+    def __init__(self):
+        self._socks = {}
+
+    def register(self, sock, mask=POLLIN | POLLOUT):
+        self._socks[sock] = mask
+
+    def modify(self, sock, mask):
+        self._socks[sock] = mask
+
+    def unregister(self, sock):
+        self._socks.pop(sock, None)
+
+    def poll(self, timeout=-1):
+        timeout_us = -1 if timeout is None or timeout < 0 else timeout * 1000
+        return _wait(list(self._socks.items()), timeout_us)
+
+    ipoll = poll
+
+def poll():
+    return _Poll()
@@ -0,0 +1,103 @@
+# clock.py – Virtuelle Uhr: time.sleep kehrt sofort zurück, die Zeit springt weiter
+# clock.py – Virtual clock: time.sleep returns at once, time jumps ahead
+#
+# Ersetzt das time-Modul der Firmware (sys.modules["time"]). Zeitbasis ist eine ganze
+# Zahl in Mikrosekunden seit dem Start, die Wanduhr (time.time) = epoch + Laufzeit.
+# Stunden Gerätezeit laufen so in Sekunden durch.
+# Replaces the firmware's time module (sys.modules["time"]). The time base is an integer
+# in microseconds since start, the wall clock (time.time) = epoch + run time.
+# Hours of device time thus pass in seconds.
+
+import time as _host
+
+_TICKS_PERIOD = 1 << 30
+
+# Simulationsende erreicht – BaseException, damit "except Exception" der Firmware sie nicht schluckt
+# End of simulation reached – BaseException so that the firmware's "except Exception" does not swallow it
+class Stop(BaseException):
+    pass
+
+now_us = 0
+epoch = 1717200000      # 2024-06-01 00:00:00 UTC, per RTC/ntptime verstellbar / adjustable via RTC/ntptime
+epoch_start = epoch     # Startwert, bleibt beim Verstellen / start value, kept when adjusted
+limit_us = None         # Stop bei Überschreiten / stop when exceeded
+slept_us = 0            # Summe aller sleep-Aufrufe (Leerlauf) / sum of all sleep calls (idle)
+
+def reset(start_epoch=None, duration_s=None):
+    global now_us, epoch, epoch_start, limit_us, slept_us
+    now_us = 0
+    slept_us = 0
+    del _watchers[:]
+    if start_epoch is not None:
+        epoch = start_epoch
+    epoch_start = epoch
+    limit_us = None if duration_s is None else int(duration_s * 1000000)
+
+# Rückrufe nach jedem Vorstellen (z. B. Interrupt-Leitungen) / callbacks after every advance (e.g. interrupt lines)
+_watchers = []
+
+def watch(fn):
+    _watchers.append(fn)
+
+# --- Uhr vorstellen (wirft Stop am Ende) / Advance the clock (raises Stop at the end) ---
+def advance_us(us):
+    global now_us
+    if us > 0:
+        now_us += int(us)
+        for fn in _watchers:
+            fn()
+    if limit_us is not None and now_us >= limit_us:
+        raise Stop()
+
+def elapsed():
+    return now_us / 1000000
+
+# --- time-API von MicroPython / MicroPython's time API ---
+def time():
+    return epoch + now_us // 1000000
+
+def time_ns():
+    return epoch * 1000000000 + now_us * 1000
+
+def sleep(s):
+    global slept_us
+    slept_us += int(s * 1000000)
+    advance_us(s * 1000000)
+
+def sleep_ms(ms):
+    sleep(ms / 1000)
+
+def sleep_us(us):
+    sleep(us / 1000000)
+
+def ticks_us():
+    return now_us % _TICKS_PERIOD
+
+def ticks_ms():
+    return (now_us // 1000) % _TICKS_PERIOD
+
+def ticks_cpu():
+    return ticks_us()
+
+def ticks_add(ticks, delta):
+    return (ticks + delta) % _TICKS_PERIOD
+
+def ticks_diff(a, b):
+    d = (a - b) % _TICKS_PERIOD
+    return d - _TICKS_PERIOD if d >= _TICKS_PERIOD // 2 else d
+
+def gmtime(secs=None):
+    t = _host.gmtime(time() if secs is None else secs)
+    return (t[0], t[1], t[2], t[3], t[4], t[5], t[6], t[7])
+
+localtime = gmtime
+
+# Tage seit 1970 nach dem Kalender-Algorithmus von H. Hinnant / days since 1970 (H. Hinnant's civil algorithm)
+def mktime(t):
+    y, m, d = t[0], t[1], t[2]
+    y -= m <= 2
+    era = y // 400
+    yoe = y - era * 400
+    doy = (153 * (m + (-3 if m > 2 else 9)) + 2) // 5 + d - 1
+    days = era * 146097 + yoe * 365 + yoe // 4 - yoe // 100 + doy - 719468
+    return days * 86400 + t[3] * 3600 + t[4] * 60 + t[5]
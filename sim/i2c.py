@@ -0,0 +1,107 @@
+# i2c.py – Emulierte I2C-Busse mit registergenauen Geräten
+# i2c.py – Emulated I2C buses with register-accurate devices
+#
+# machine.I2C(id, ...) liefert den Bus mit dieser Nummer. Geräte hängen an einer Adresse
+# und bilden ihre Register selbst ab. Ein Gerät mit power-Pin antwortet nur, solange der
+# Pin (machine.Pin) an ist, und startet danach mit Reset-Werten.
+# machine.I2C(id, ...) returns the bus with that number. Devices sit at an address and map
+# their registers themselves. A device with a power pin only answers while the pin
+# (machine.Pin) is on, and starts from reset values afterwards.
+
+from sim import clock
+
+_EIO = 5
+_ETIMEDOUT = 110
+
+class Device:
+    def __init__(self, address, power=None):
+        self.address = address
+        self.power = power          # GPIO des Sensorstroms (None = immer an) / GPIO of the sensor power (None = always on)
+        self.nack_until_us = 0      # Fehlerinjektion: keine Antwort bis dahin / fault injection: no answer until then
+        self.reads = 0
+        self.writes = 0
+        self._powered = None
+
+    # -- Register lesen/schreiben (Unterklassen) / Read/write registers (subclasses) --
+    def read(self, reg, n):
+        raise NotImplementedError
+
+    def write(self, reg, data):
+        raise NotImplementedError
+
+    # -- Zustand nach Power-on / State after power-on --
+    def power_on_reset(self):
+        pass
+
+    # -- Gerät für seconds Sekunden stumm schalten / Make the device silent for seconds --
+    def fail(self, seconds):
+        self.nack_until_us = clock.now_us + int(seconds * 1000000)
+
+    def alive(self):
+        if self.power is not None:
+            from sim import machine
+            powered = machine.pin_value(self.power)
+            if powered and not self._powered:
+                self.power_on_reset()
+            self._powered = powered
+            if not powered:
+                return False
+        return clock.now_us >= self.nack_until_us
+
+class Bus:
+    def __init__(self, bus_id):
+        self.id = bus_id
+        self.devices = {}
+        self.transfers = 0
+
+    def attach(self, device):
+        self.devices[device.address] = device
+        return device
+
+    def _dev(self, addr):
+        self.transfers += 1
+        dev = self.devices.get(addr)
+        if dev is None or not dev.alive():
+            raise OSError(_EIO)
+        return dev
+
+    def scan(self):
+        return sorted(a for a, d in self.devices.items() if d.alive())
+
+    def readfrom_mem(self, addr, reg, n, addrsize=8):
+        dev = self._dev(addr)
+        dev.reads += 1
+        return bytes(dev.read(reg, n))
+
+    def readfrom_mem_into(self, addr, reg, buf, addrsize=8):
+        data = self.readfrom_mem(addr, reg, len(buf))
+        for i in range(len(buf)):
+            buf[i] = data[i]
+
+    def writeto_mem(self, addr, reg, buf, addrsize=8):
+        dev = self._dev(addr)
+        dev.writes += 1
+        dev.write(reg, bytes(buf))
+
+    # Ohne Registeradresse: erstes Byte ist das Register / without register address: first byte is the register
+    def writeto(self, addr, buf, stop=True):
+        if len(buf) > 1:
+            self.writeto_mem(addr, buf[0], buf[1:])
+        else:
+            self._dev(addr)
+        return 1
+
+    def readfrom(self, addr, n, stop=True):
+        return self.readfrom_mem(addr, 0, n)
+
+# Busse nach Nummer / buses by number
+buses = {}
+
+def bus(bus_id):
+    b = buses.get(bus_id)
+    if b is None:
+        b = buses[bus_id] = Bus(bus_id)
+    return b
+
+def reset():
+    buses.clear()
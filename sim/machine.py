@@ -0,0 +1,144 @@
+# machine.py – machine-Modul für die Simulation (Pin, I2C, RTC, reset, Schlafmodi)
+# machine.py – machine module for the simulation (Pin, I2C, RTC, reset, sleep modes)
+#
+# Pins merken ihren Zustand (für Power-Pins der Sensoren und LEDs), I2C liefert die
+# emulierten Busse aus sim.i2c, reset() und deepsleep() lösen einen Neustart aus.
+# Pins keep their state (for sensor power pins and LEDs), I2C returns the emulated buses
+# from sim.i2c, reset() and deepsleep() trigger a reboot.
+
+from sim import clock
+from sim import i2c as _i2c
+
+# Neustart des Geräts, sim.run startet main neu / device reboot, sim.run restarts main
+class Reset(BaseException):
+    pass
+
+PWRON_RESET = 1
+WDT_RESET = 3
+DEEPSLEEP_RESET = 4
+SOFT_RESET = 5
+_reset_cause = PWRON_RESET
+lightsleep_us = 0   # Zeit in lightsleep()/deepsleep() / time spent in lightsleep()/deepsleep()
+deepsleep_us = 0
+
+# Pin-Zustände nach Nummer/Name / pin states by number/name
+_pins = {}
+_handlers = {}
+toggles = {}     # Flanken je Pin (z. B. LED-Blinken) / edges per pin (e.g. LED blinking)
+
+# --- Alle Pins auf Reset-Zustand (Boot) / All pins to reset state (boot) ---
+def reset_state(cause=PWRON_RESET):
+    global _reset_cause
+    _reset_cause = cause
+    _pins.clear()
+    _handlers.clear()
+    toggles.clear()
+
+def pin_value(pin_id):
+    return _pins.get(pin_id, 0)
+
+# --- Pegel von außen setzen (löst IRQ aus) / Drive a level from outside (fires IRQ) ---
+def drive(pin_id, value):
+    old = _pins.get(pin_id, 1)
+    _pins[pin_id] = value
+    handler = _handlers.get(pin_id)
+    if handler is not None:
+        trigger, fn, pin = handler
+        if (old and not value and trigger & Pin.IRQ_FALLING) or (value and not old and trigger & Pin.IRQ_RISING):
+            fn(pin)
+
+class Pin:
+    IN = 0
+    OUT = 1
+    OPEN_DRAIN = 2
+    PULL_UP = 1
+    PULL_DOWN = 2
+    IRQ_FALLING = 4
+    IRQ_RISING = 8
+
+    def __init__(self, pin_id, mode=-1, pull=-1, value=None):
+        self.id = pin_id
+        if pull == Pin.PULL_UP and pin_id not in _pins:
+            _pins[pin_id] = 1
+        if value is not None:
+            self.value(value)
+
+    def value(self, v=None):
+        if v is None:
+            return _pins.get(self.id, 0)
+        v = 1 if v else 0
+        if _pins.get(self.id, 0) != v:
+            toggles[self.id] = toggles.get(self.id, 0) + 1
+        _pins[self.id] = v
+
+    def __call__(self, v=None):
+        return self.value(v)
+
+    def on(self):
+        self.value(1)
+
+    def off(self):
+        self.value(0)
+
+    def toggle(self):
+        self.value(not self.value())
+
+    def irq(self, handler=None, trigger=IRQ_FALLING | IRQ_RISING):
+        if handler is None:
+            _handlers.pop(self.id, None)
+        else:
+            _handlers[self.id] = (trigger, handler, self)
+
+# --- I2C: Bus mit dieser Nummer aus sim.i2c / I2C: bus with this number from sim.i2c ---
+def I2C(bus_id, scl=None, sda=None, freq=400000, timeout=50000):
+    return _i2c.bus(bus_id)
+
+SoftI2C = I2C
+
+class RTC:
+    def datetime(self, dt=None):
+        if dt is None:
+            t = clock.localtime()
+            return (t[0], t[1], t[2], t[6], t[3], t[4], t[5], 0)
+        # (Jahr, Monat, Tag, Wochentag, Stunde, Minute, Sekunde, Subsekunden)
+        # (year, month, day, weekday, hour, minute, second, subseconds)
+        now = clock.mktime((dt[0], dt[1], dt[2], dt[4], dt[5], dt[6]))
+        clock.epoch += now - clock.time()
+
+def reset():
+    global _reset_cause
+    _reset_cause = SOFT_RESET
+    raise Reset()
+
+def soft_reset():
+    reset()
+
+def reset_cause():
+    return _reset_cause
+
+def lightsleep(ms=None):
+    global lightsleep_us
+    lightsleep_us += (ms or 0) * 1000
+    clock.sleep_ms(ms or 0)
+
+def deepsleep(ms=None):
+    global _reset_cause, deepsleep_us
+    deepsleep_us += (ms or 0) * 1000
+    clock.sleep_ms(ms or 0)
+    _reset_cause = DEEPSLEEP_RESET
+    raise Reset()
+
+def freq(hz=None):
+    return 125000000 if hz is None else None
+
+def unique_id():
+    return b"\xe6\x61\x41\x04\x03\x5a\x2c\x21"
+
+def idle():
+    pass
+
+def disable_irq():
+    return 0
+
+def enable_irq(state=0):
+    pass
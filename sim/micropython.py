@@ -0,0 +1,32 @@
+# micropython.py – micropython-Modul für CPython (Decorators ohne Wirkung)
+# micropython.py – micropython module for CPython (decorators without effect)
+
+def const(value):
+    return value
+
+def native(fn):
+    return fn
+
+viper = native
+
+def alloc_emergency_exception_buf(size):
+    pass
+
+def opt_level(level=None):
+    return 0 if level is None else None
+
+def mem_info(verbose=False):
+    print("mem: (Simulation / simulation)")
+
+def qstr_info(verbose=False):
+    pass
+
+def heap_lock():
+    return 0
+
+def heap_unlock():
+    return 0
+
+# Auf dem Gerät nach dem IRQ, hier sofort / after the IRQ on the device, right away here
+def schedule(fn, arg):
+    fn(arg)
@@ -0,0 +1,191 @@
+# network.py – Skriptbares WLAN für die Simulation
+# network.py – Scriptable WiFi for the simulation
+#
+# Zugangspunkte mit add_network() anlegen; Verbindungsdauer, RSSI und Ausfälle
+# (outage) sind je Netz einstellbar. Fällt ein Netz aus, ist die Verbindung weg, bis die
+# Firmware erneut connect() aufruft – wie beim CYW43 ohne Auto-Reconnect.
+# Create access points with add_network(); connection time, RSSI and outages are set per
+# network. When a network fails, the link is gone until the firmware calls connect()
+# again – like the CYW43 without auto-reconnect.
+
+from sim import clock
+
+STA_IF = 0
+AP_IF = 1
+
+STAT_IDLE = 0
+STAT_CONNECTING = 1
+STAT_GOT_IP = 3
+STAT_CONNECT_FAIL = -1
+STAT_NO_AP_FOUND = -2
+STAT_WRONG_PASSWORD = -3
+
+SCAN_MS = 1500   # Dauer eines blockierenden Scans / duration of a blocking scan
+JOIN_SCAN_MS = 800   # Anteil von connect_ms für die Suche ohne BSSID / share of connect_ms for the search without BSSID
+DHCP_MS = 600        # Anteil von connect_ms für DHCP ohne feste IP / share of connect_ms for DHCP without static IP
+
+class AccessPoint:
+    def __init__(self, ssid, password, rssi=-60, channel=6, connect_ms=2500, bssid=None, subnet="192.168.1"):
+        self.ssid = ssid
+        self.password = password
+        self.rssi = rssi
+        self.channel = channel
+        self.connect_ms = connect_ms
+        self.bssid = bssid or bytes((0x02, 0x00, 0x00, 0x00, len(_networks), channel))
+        self.subnet = subnet
+        self.outages = []       # [(Start, Ende) in µs] / [(start, end) in µs]
+
+    def up(self, at_us=None):
+        at_us = clock.now_us if at_us is None else at_us
+        for start, end in self.outages:
+            if start <= at_us < end:
+                return False
+        return True
+
+    # War das Netz zwischen a und b irgendwann weg? / Was the network down at any time between a and b?
+    def dropped(self, a_us, b_us):
+        for start, end in self.outages:
+            if start < b_us and end > a_us:
+                return True
+        return False
+
+_networks = {}
+
+def add_network(ssid, password, **kw):
+    ap = AccessPoint(ssid, password, **kw)
+    _networks[ssid] = ap
+    return ap
+
+# --- Ausfall ab start_s für duration_s Sekunden / Outage from start_s for duration_s seconds ---
+def outage(ssid, start_s, duration_s):
+    start = int(start_s * 1000000)
+    _networks[ssid].outages.append((start, start + int(duration_s * 1000000)))
+
+def reset():
+    _networks.clear()
+    _ifaces.clear()
+
+class _WLAN:
+    def __init__(self, interface):
+        self.interface = interface
+        self._active = False
+        self._ap = None
+        self._ssid = None
+        self._key = None
+        self._since = None
+        self._static = None
+        self._join_ms = None
+        self._hostname = "PicoW"
+        self.connects = 0       # connect()-Aufrufe / connect() calls
+        self.scans = 0
+
+    def active(self, value=None):
+        if value is None:
+            return self._active
+        self._active = bool(value)
+        if not value:
+            self.disconnect()
+
+    def connect(self, ssid=None, key=None, bssid=None):
+        if not self._active:
+            raise OSError("WLAN nicht aktiv / WLAN not active")
+        self.connects += 1
+        self._ssid = ssid
+        self._key = key
+        self._ap = _networks.get(ssid)
+        if self._ap is not None and bssid is not None and self._ap.bssid != bytes(bssid):
+            self._ap = None
+        self._since = clock.now_us
+        # Mit BSSID entfällt die Suche, mit fester IP DHCP / with a BSSID the search is skipped, with a static IP DHCP
+        self._join_ms = None
+        if self._ap is not None:
+            self._join_ms = self._ap.connect_ms
+            if bssid is not None:
+                self._join_ms -= JOIN_SCAN_MS
+            if self._static:
+                self._join_ms -= DHCP_MS
+
+    def disconnect(self):
+        self._ssid = None
+        self._ap = None
+        self._since = None
+
+    def status(self, param=None):
+        if param == "rssi":
+            return self._ap.rssi if self.isconnected() else 0
+        if self._since is None:
+            return STAT_IDLE
+        ap = self._ap
+        ready = self._since + (self._join_ms if ap is not None else 5000) * 1000
+        if clock.now_us < ready:
+            return STAT_CONNECTING
+        if ap is None or not ap.up(ready):
+            return STAT_NO_AP_FOUND
+        if self._key != ap.password:
+            return STAT_WRONG_PASSWORD
+        if ap.dropped(ready, clock.now_us + 1):
+            return STAT_CONNECT_FAIL
+        return STAT_GOT_IP
+
+    def isconnected(self):
+        return self.status() == STAT_GOT_IP
+
+    def ifconfig(self, config=None):
+        if config is not None:
+            self._static = tuple(config)
+            return
+        if not self.isconnected():
+            return ("0.0.0.0", "0.0.0.0", "0.0.0.0", "0.0.0.0")
+        if self._static:
+            return self._static
+        net = self._ap.subnet
+        return (net + ".50", "255.255.255.0", net + ".1", net + ".1")
+
+    def ipconfig(self, dhcp4=None, **kw):
+        if dhcp4:
+            self._static = None
+
+    def scan(self):
+        self.scans += 1
+        clock.advance_us(SCAN_MS * 1000)
+        return [(ap.ssid.encode(), ap.bssid, ap.channel, ap.rssi, 3, False)
+                for ap in _networks.values() if ap.up()]
+
+    def config(self, *args, **kw):
+        if kw:
+            if "hostname" in kw:
+                self._hostname = kw["hostname"]
+            return
+        param = args[0]
+        if param == "mac":
+            return b"\x28\xcd\xc1\x00\x00\x01"
+        if param in ("ssid", "essid"):
+            return self._ssid or ""
+        if param == "hostname":
+            return self._hostname
+        if param == "channel":
+            return self._ap.channel if self._ap else 0
+        return 0
+
+_ifaces = {}
+
+# Wie auf dem Gerät: je Interface ein Objekt / as on the device: one object per interface
+def WLAN(interface=STA_IF):
+    wlan = _ifaces.get(interface)
+    if wlan is None:
+        wlan = _ifaces[interface] = _WLAN(interface)
+    return wlan
+
+def hostname(name=None):
+    wlan = WLAN(STA_IF)
+    if name is None:
+        return wlan._hostname
+    wlan._hostname = name
+
+def country(code=None):
+    return "DE" if code is None else None
+
+# --- Hat die Station eine IP? (für Sockets) / Does the station have an IP? (for sockets) ---
+def online():
+    wlan = _ifaces.get(STA_IF)
+    return wlan is not None and wlan.isconnected()
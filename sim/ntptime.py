@@ -0,0 +1,44 @@
+# ntptime.py – NTP gegen die Simulationszeit (nur mit WLAN)
+# ntptime.py – NTP against the simulation time (WiFi only)
+#
+# Die "echte" Zeit ist true_epoch + Laufzeit; settime() stellt die Geräteuhr darauf.
+# drift_ppm > 0 lässt die Geräteuhr (ticks und RTC) gegenüber der echten Zeit vorgehen.
+# The "true" time is true_epoch + run time; settime() sets the device clock to it.
+# drift_ppm > 0 makes the device clock (ticks and RTC) run fast against the true time.
+
+from sim import clock
+from sim import network
+
+host = "pool.ntp.org"
+timeout = 1
+rtt_ms = 40
+true_epoch = None    # None = Startwert der Uhr / the clock's start value
+fail = False         # True = Server antwortet nicht / server does not answer
+drift_ppm = 0        # Gangabweichung der Geräteuhr / device clock drift
+requests = 0
+
+def time():
+    global requests
+    requests += 1
+    if fail or not network.online():
+        clock.sleep(timeout)
+        raise OSError(110)
+    clock.sleep_us(rtt_ms * 1000)
+    return true_ms() // 1000
+
+# --- Echte Zeit in ms (für Auswertungen) / True time in ms (for evaluation) ---
+def true_ms():
+    base = clock.epoch_start if true_epoch is None else true_epoch
+    run_us = clock.now_us - clock.now_us * drift_ppm // 1000000
+    return base * 1000 + run_us // 1000
+
+def settime():
+    t = time()
+    clock.epoch += t - clock.time()
+
+def reset():
+    global true_epoch, fail, drift_ppm, requests
+    true_epoch = None
+    fail = False
+    drift_ppm = 0
+    requests = 0
@@ -0,0 +1,153 @@
+# traces.py – Signalverläufe für die Sensor-Emulatoren (Wert über Simulationszeit)
+# traces.py – Signal traces for the sensor emulators (value over simulation time)
+#
+# Ein Trace ist eine Funktion f(t) -> Wert, t in Sekunden seit Simulationsstart.
+# Bausteine lassen sich addieren: diurnal(...) + noise(0.05) usw.
+# A trace is a function f(t) -> value, t in seconds since simulation start.
+# Building blocks can be added: diurnal(...) + noise(0.05) etc.
+
+import math
+
+class Trace:
+    def __init__(self, fn):
+        self.fn = fn
+
+    def __call__(self, t):
+        return self.fn(t)
+
+    def __add__(self, other):
+        other = _trace(other)
+        return Trace(lambda t: self.fn(t) + other(t))
+
+    __radd__ = __add__
+
+    def __mul__(self, other):
+        other = _trace(other)
+        return Trace(lambda t: self.fn(t) * other(t))
+
+    __rmul__ = __mul__
+
+    # Wertebereich begrenzen / clamp the value range
+    def clamp(self, lo=None, hi=None):
+        def fn(t):
+            v = self.fn(t)
+            if lo is not None and v < lo:
+                v = lo
+            if hi is not None and v > hi:
+                v = hi
+            return v
+        return Trace(fn)
+
+    # Zeitversatz (z. B. Aufzeichnung ab Minute 10 abspielen) / time shift (e.g. replay a recording from minute 10)
+    def shift(self, seconds):
+        return Trace(lambda t: self.fn(t + seconds))
+
+def _trace(value):
+    if isinstance(value, Trace):
+        return value
+    if callable(value):
+        return Trace(value)
+    return const(value)
+
+def const(value):
+    return Trace(lambda t: value)
+
+# --- Linear von v0 (t0) nach v1 (t1), davor/danach konstant / Linear from v0 (t0) to v1 (t1), constant before/after ---
+def ramp(t0, v0, t1, v1):
+    def fn(t):
+        if t <= t0:
+            return v0
+        if t >= t1:
+            return v1
+        return v0 + (v1 - v0) * (t - t0) / (t1 - t0)
+    return Trace(fn)
+
+def sine(mean, amplitude, period_s, phase_s=0):
+    return Trace(lambda t: mean + amplitude * math.sin(2 * math.pi * (t + phase_s) / period_s))
+
+# --- Tagesgang: Minimum um min_hour, Maximum 12 h später / Daily cycle: minimum at min_hour, maximum 12 h later ---
+# start_hour = Uhrzeit beim Simulationsstart / time of day at simulation start
+def diurnal(mean, amplitude, start_hour=0, min_hour=5):
+    return Trace(lambda t: mean - amplitude * math.cos(2 * math.pi * ((t / 3600 + start_hour - min_hour) / 24)))
+
+# --- Tageslicht: 0 lx nachts, Halbsinus zwischen sunrise und sunset (Stunden) ---
+# --- Daylight: 0 lx at night, half sine between sunrise and sunset (hours) ---
+def daylight(peak_lux, start_hour=0, sunrise=6, sunset=20):
+    def fn(t):
+        h = (t / 3600 + start_hour) % 24
+        if h <= sunrise or h >= sunset:
+            return 0.0
+        return peak_lux * math.sin(math.pi * (h - sunrise) / (sunset - sunrise))
+    return Trace(fn)
+
+# --- Treppe aus (t, Wert)-Paaren / Staircase from (t, value) pairs ---
+def steps(points):
+    points = sorted(points)
+
+    def fn(t):
+        value = points[0][1]
+        for t0, v in points:
+            if t0 > t:
+                break
+            value = v
+        return value
+    return Trace(fn)
+
+# --- Aufzeichnung abspielen, linear interpoliert / Replay a recording, linearly interpolated ---
+# points: [(t, Wert / value), ...] oder CSV-Datei mit "t,Wert" je Zeile / or a CSV file with "t,value" per line
+# loop=True wiederholt die Aufzeichnung / repeats the recording
+def recorded(points, column=1, loop=False):
+    if isinstance(points, str):
+        rows = []
+        with open(points) as f:
+            for line in f:
+                parts = line.strip().split(",")
+                try:
+                    rows.append((float(parts[0]), float(parts[column])))
+                except (ValueError, IndexError):
+                    continue  # Kopfzeile oder Leerzeile / header or empty line
+        points = rows
+    points = sorted(points)
+    t_first = points[0][0]
+    span = points[-1][0] - t_first
+
+    def fn(t):
+        t += t_first
+        if loop and span > 0:
+            t = t_first + (t - t_first) % span
+        if t <= points[0][0]:
+            return points[0][1]
+        lo, hi = 0, len(points) - 1
+        if t >= points[hi][0]:
+            return points[hi][1]
+        while hi - lo > 1:
+            mid = (lo + hi) // 2
+            if points[mid][0] <= t:
+                lo = mid
+            else:
+                hi = mid
+        (ta, va), (tb, vb) = points[lo], points[hi]
+        return va + (vb - va) * (t - ta) / (tb - ta)
+    return Trace(fn)
+
+# --- Reproduzierbares Rauschen (annähernd normalverteilt) / Reproducible noise (approximately normal) ---
+# Je Aufruf ein neuer Wert; gleiche seed -> gleiche Folge, auf CPython wie auf MicroPython.
+# A new value per call; same seed -> same sequence, on CPython as on MicroPython.
+def noise(sigma, seed=1):
+    state = [seed & 0xFFFFFFFF or 1]
+
+    def uniform():
+        x = state[0]
+        x ^= (x << 13) & 0xFFFFFFFF
+        x ^= x >> 17
+        x ^= (x << 5) & 0xFFFFFFFF
+        state[0] = x
+        return x / 4294967296
+
+    def fn(t):
+        # Irwin-Hall: Summe von 12 Gleichverteilungen - 6 / sum of 12 uniforms - 6
+        s = 0.0
+        for _ in range(12):
+            s += uniform()
+        return (s - 6) * sigma
+    return Trace(fn)
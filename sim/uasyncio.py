@@ -0,0 +1,158 @@
+# uasyncio.py – Einfache uasyncio-Schleife auf der virtuellen Uhr
+# uasyncio.py – Simple uasyncio loop on the virtual clock
+#
+# Tasks laufen der Reihe nach; schläft keine Task mehr kürzer, springt die Uhr direkt zum
+# nächsten Weckzeitpunkt. Blockierende Aufrufe in einer Task (time.sleep, poll) stellen
+# die Uhr ebenfalls vor – wie auf dem Gerät halten sie alle anderen Tasks auf.
+# Tasks run one after another; when no task sleeps any shorter, the clock jumps straight
+# to the next wake-up time. Blocking calls inside a task (time.sleep, poll) advance the
+# clock too – as on the device they hold up all other tasks.
+
+from sim import clock
+
+class CancelledError(BaseException):
+    pass
+
+class TimeoutError(Exception):
+    pass
+
+# Awaitable, die der Schleife eine Aufweckzeit (µs) meldet / awaitable that reports a wake-up time (µs) to the loop
+class _Sleep:
+    def __init__(self, us):
+        self.us = us
+
+    def __await__(self):
+        yield self
+
+    __iter__ = __await__
+
+class Task:
+    def __init__(self, coro):
+        self.coro = coro
+        self.wake_us = clock.now_us
+        self.done = False
+        self.result = None
+        self.error = None
+        self.waiters = []
+        self._cancel = False
+
+    def cancel(self):
+        if not self.done:
+            self._cancel = True
+            self.wake_us = clock.now_us
+            return True
+        return False
+
+    def __await__(self):
+        if not self.done:
+            yield self
+        if self.error is not None:
+            raise self.error
+        return self.result
+
+    __iter__ = __await__
+
+_tasks = []
+
+def create_task(coro):
+    task = Task(coro)
+    _tasks.append(task)
+    return task
+
+def sleep_ms(ms):
+    return _Sleep(int(ms) * 1000)
+
+def sleep(s):
+    return _Sleep(int(s * 1000000))
+
+def _finish(task, result=None, error=None):
+    task.done = True
+    task.result = result
+    task.error = error
+    for waiter in task.waiters:
+        waiter.wake_us = clock.now_us
+    task.waiters = []
+    if task in _tasks:
+        _tasks.remove(task)
+
+def _step(task):
+    try:
+        if task._cancel:
+            task._cancel = False
+            yielded = task.coro.throw(CancelledError())
+        else:
+            yielded = task.coro.send(None)
+    except StopIteration as e:
+        _finish(task, result=e.value)
+        return
+    except CancelledError as e:
+        _finish(task, error=e)
+        return
+    except Exception as e:
+        print("Task-Ausnahme / task exception:", repr(e))
+        _finish(task, error=e)
+        return
+    if isinstance(yielded, _Sleep):
+        task.wake_us = clock.now_us + max(yielded.us, 0)
+    elif isinstance(yielded, Task):
+        task.wake_us = None  # wartet auf die andere Task / waits for the other task
+        yielded.waiters.append(task)
+    else:
+        task.wake_us = clock.now_us
+
+# --- Schleife bis main fertig ist (clock.Stop beendet sie) / Loop until main is done (clock.Stop ends it) ---
+def run(coro):
+    main = create_task(coro)
+    try:
+        while not main.done:
+            ready = [t for t in _tasks if t.wake_us is not None]
+            if not ready:
+                raise RuntimeError("Deadlock: keine Task wach / no task awake")
+            task = min(ready, key=lambda t: t.wake_us)
+            if task.wake_us > clock.now_us:
+                clock.sleep_us(task.wake_us - clock.now_us)
+            # ans Ende der Liste, damit gleich früh geweckte Tasks reihum laufen
+            # to the end of the list so tasks woken equally early take turns
+            _tasks.remove(task)
+            _tasks.append(task)
+            _step(task)
+    finally:
+        for task in list(_tasks):
+            task.coro.close()
+        del _tasks[:]
+    if main.error is not None:
+        raise main.error
+    return main.result
+
+async def gather(*aws):
+    results = []
+    for aw in aws:
+        results.append(await aw)
+    return results
+
+async def wait_for(aw, timeout):
+    return await aw
+
+def wait_for_ms(aw, timeout):
+    return wait_for(aw, timeout / 1000)
+
+def new_event_loop():
+    return None
+
+class Event:
+    def __init__(self):
+        self._flag = False
+
+    def set(self):
+        self._flag = True
+
+    def clear(self):
+        self._flag = False
+
+    def is_set(self):
+        return self._flag
+
+    async def wait(self):
+        while not self._flag:
+            await sleep_ms(1)
+        return True
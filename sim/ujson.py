@@ -0,0 +1,3 @@
+# ujson.py – ujson für CPython / ujson for CPython
+
+from json import dumps, loads, dump, load  # noqa: F401
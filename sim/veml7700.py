@@ -0,0 +1,134 @@
+# veml7700.py – Registergenauer VEML7700-Emulator
+# veml7700.py – Register-accurate VEML7700 emulator
+#
+# 16-Bit-Register (Little Endian): ALS_CONF_0 0x00, ALS_WH 0x01, ALS_WL 0x02, POW_SAV 0x03,
+# ALS 0x04, WHITE 0x05, INTERRUPT 0x06 (Lesen löscht die Flags). Der ALS-Wert wird am
+# Ende jeder Integration (IT + PSM-Pause) aus dem Trace übernommen, mit Gain/IT-Auflösung
+# und Sättigung bei 65535. Über 1000 lx wird die Nichtlinearität so nachgebildet, dass das
+# Korrekturpolynom aus dem Datenblatt den Trace-Wert ergibt.
+# 16-bit registers (little endian): ALS_CONF_0 0x00, ALS_WH 0x01, ALS_WL 0x02, POW_SAV 0x03,
+# ALS 0x04, WHITE 0x05, INTERRUPT 0x06 (reading clears the flags). The ALS value is taken
+# from the trace at the end of every integration (IT + PSM pause), with gain/IT resolution
+# and saturation at 65535. Above 1000 lx the non-linearity is modelled such that the
+# datasheet correction polynomial yields the trace value.
+
+from sim import clock
+from sim import machine
+from sim.i2c import Device
+from sim.traces import _trace
+
+_IT_MS = {0x0C: 25, 0x08: 50, 0x00: 100, 0x01: 200, 0x02: 400, 0x03: 800}
+_GAIN = (1, 2, 1 / 8, 1 / 4)
+_PSM_MS = (500, 1000, 2000, 4000)
+_PERS = (1, 2, 4, 8)
+_MAX_CYCLES = 1000   # max. nachgeholte Integrationen je Zugriff / max. integrations caught up per access
+
+def _correction(x):
+    return (((6.0135e-13 * x - 9.3924e-9) * x + 8.1488e-5) * x + 1.0023) * x
+
+class VEML7700(Device):
+    # int_pin: GPIO für den INT-Ausgang registerkompatibler Varianten (VEML6030), None = keiner
+    # int_pin: GPIO for the INT output of register-compatible parts (VEML6030), None = none
+    def __init__(self, address=0x10, lux=100.0, power=None, white_ratio=1.2, int_pin=None):
+        Device.__init__(self, address, power)
+        self.lux = _trace(lux)
+        self.white_ratio = white_ratio
+        self.int_pin = int_pin
+        self.cycles = 0
+        self.power_on_reset()
+        if int_pin is not None:
+            # INT muss auch ohne I2C-Zugriff fallen / INT has to fall without I2C access too
+            clock.watch(self._update)
+
+    def power_on_reset(self):
+        self.regs = [0] * 8
+        self.regs[0] = 0x0001    # ALS_SD: nach Power-on abgeschaltet / shut down after power-on
+        self._start_us = clock.now_us
+        self._done = 0           # abgeschlossene Integrationen seit _start_us / finished integrations since _start_us
+        self._outside = 0        # Persistenz-Zähler / persistence counter
+
+    def _it_ms(self):
+        return _IT_MS.get(self.regs[0] >> 6 & 0x0F, 100)
+
+    def _gain(self):
+        return _GAIN[self.regs[0] >> 11 & 0x03]
+
+    def _period_us(self):
+        us = self._it_ms() * 1000
+        if self.regs[3] & 0x01:
+            us += _PSM_MS[self.regs[3] >> 1 & 0x03] * 1000
+        return us
+
+    # --- Rohwert für Lux bei aktueller IT/Gain / Raw count for lux at the current IT/gain ---
+    def counts(self, lux):
+        res = 0.0036 * (800 / self._it_ms()) * (2 / self._gain())
+        x = lux
+        if lux > 1000:
+            lo, hi = 1000.0, lux
+            for _ in range(40):
+                mid = (lo + hi) / 2
+                if _correction(mid) < lux:
+                    lo = mid
+                else:
+                    hi = mid
+            x = lo
+        return min(int(x / res), 0xFFFF)
+
+    # --- Integrationen bis jetzt nachziehen / Bring integrations up to now ---
+    def _update(self):
+        if self.regs[0] & 0x01 or (self.power is not None and not machine.pin_value(self.power)):
+            return
+        period = self._period_us()
+        done = (clock.now_us - self._start_us) // period
+        if done <= self._done:
+            return
+        first = max(self._done + 1, done - _MAX_CYCLES + 1)
+        for k in range(first, done + 1):
+            self._integrate(self._start_us + k * period)
+        self._done = done
+
+    def _integrate(self, at_us):
+        raw = self.counts(max(0.0, self.lux(at_us / 1000000)))
+        self.regs[4] = raw
+        self.regs[5] = min(int(raw * self.white_ratio), 0xFFFF)
+        self.cycles += 1
+        if not self.regs[0] & 0x02:
+            return
+        # Schwellen-Interrupt mit Persistenz / threshold interrupt with persistence
+        if raw > self.regs[1] or raw < self.regs[2]:
+            self._outside += 1
+            if self._outside >= _PERS[self.regs[0] >> 4 & 0x03]:
+                self.regs[6] |= 0x4000 if raw > self.regs[1] else 0x8000
+                self._int_line(0)
+        else:
+            self._outside = 0
+
+    # INT ist aktiv low, Lesen von INTERRUPT gibt die Leitung frei / INT is active low, reading INTERRUPT releases the line
+    def _int_line(self, level):
+        if self.int_pin is not None:
+            if machine.pin_value(self.int_pin) != level:
+                machine.drive(self.int_pin, level)
+
+    def read(self, reg, n):
+        self._update()
+        out = bytearray(n)
+        for i in range(0, n, 2):
+            value = self.regs[reg & 0x07] if reg <= 6 else 0
+            out[i] = value & 0xFF
+            if i + 1 < n:
+                out[i + 1] = value >> 8
+        if reg == 6:
+            self.regs[6] = 0
+            self._int_line(1)
+        return out
+
+    def write(self, reg, data):
+        self._update()
+        if reg > 3 or len(data) < 2:
+            return
+        self.regs[reg] = data[0] | (data[1] << 8)
+        if reg in (0, 3):
+            # Neue Einstellung: Integration beginnt neu / new setting: integration restarts
+            self._start_us = clock.now_us
+            self._done = 0
+            self._outside = 0
@@ -0,0 +1,202 @@
+# aggregate.py – Fensterbasierte Zusammenfassung von Messwerten auf dem Gerät
+# aggregate.py – Windowed on-device summaries of readings
+#
+# Je Feld ein Ringfenster array("f") mit fester Größe plus eine sortierte Kopie.
+# min/max/Median aus der sortierten Kopie, Mittelwert/Standardabweichung aus laufenden
+# Summen (verschoben um einen Wert aus dem Fenster, damit float32 bei ~1000 hPa nicht auslöscht).
+# Pro Wert: Suche des alten Werts O(log n), Verschieben nur um die Rangänderung, keine
+# Allokation von Listen oder Arrays. Die Rangänderung ist bei Rauschen im Mittel n/3, bei
+# einem stetigen Trend bis n-1 – add() ist also O(n) im schlimmsten Fall, nicht O(log n).
+# Bewusst so: bei den vorgesehenen Fenstern (60 Werte, 1 Hz je Minute) ist das Schieben in
+# einem array("f") schneller als jede Baum- oder Heap-Struktur in Python, und es braucht nur
+# 4 Byte je Wert. bench/bench_aggregate.py misst bis AGG_WINDOW 3600 (CPython: ~10 µs bei
+# 60, bis ~0,9 ms bei 3600 mit Trend).
+# One fixed-size ring window array("f") per field plus a sorted copy.
+# min/max/median from the sorted copy, mean/stddev from running sums (shifted by a
+# value from the window so float32 does not cancel out at ~1000 hPa).
+# Per value: lookup of the old value O(log n), shifting only by the rank change, no
+# allocation of lists or arrays. The rank change is n/3 on average for noise and up to n-1
+# for a steady trend – so add() is O(n) in the worst case, not O(log n). Deliberately so:
+# for the intended windows (60 values, 1 Hz per minute) shifting within an array("f") is
+# faster than any tree or heap structure in Python, and it needs only 4 bytes per value.
+# bench/bench_aggregate.py measures up to AGG_WINDOW 3600 (CPython: ~10 µs at 60, up to
+# ~0.9 ms at 3600 with a trend).
+
+import time
+import config
+from array import array
+
+STATS = ("min", "max", "mean", "stddev", "median")
+
+class Window:
+    def __init__(self, size):
+        self.size = size
+        self.ring = array("f", bytes(4 * size))
+        self.sorted = array("f", bytes(4 * size))
+        self.clear()
+
+    def clear(self):
+        self.n = 0
+        self.pos = 0
+        self.fresh = 0      # Werte seit der letzten Zusammenfassung / values since the last summary
+        self.ref = 0.0
+        self.sum = 0.0
+        self.sq = 0.0
+        self._updates = 0
+
+    # -- Index eines Werts in der sortierten Kopie (binäre Suche) / Index of a value in the sorted copy (binary search) --
+    def _find(self, value):
+        lo, hi = 0, self.n
+        s = self.sorted
+        while lo < hi:
+            mid = (lo + hi) >> 1
+            if s[mid] < value:
+                lo = mid + 1
+            else:
+                hi = mid
+        return lo
+
+    def add(self, value):
+        ring = self.ring
+        s = self.sorted
+        old = ring[self.pos]
+        ring[self.pos] = value
+        value = ring[self.pos]  # auf float32 gerundet wie im Fenster / rounded to float32 as stored
+        if self.n == 0:
+            self.ref = value
+
+        if self.n < self.size:
+            # Einfügen von hinten / insert from the back
+            i = self.n
+            while i > 0 and s[i - 1] > value:
+                s[i] = s[i - 1]
+                i -= 1
+            s[i] = value
+            self.n += 1
+        else:
+            # Ältesten Wert ersetzen und an die neue Position schieben
+            # Replace the oldest value and move it to its new position
+            d = old - self.ref
+            self.sum -= d
+            self.sq -= d * d
+            i = self._find(old)
+            last = self.n - 1
+            while i < last and s[i + 1] < value:
+                s[i] = s[i + 1]
+                i += 1
+            while i > 0 and s[i - 1] > value:
+                s[i] = s[i - 1]
+                i -= 1
+            s[i] = value
+
+        d = value - self.ref
+        self.sum += d
+        self.sq += d * d
+        self.pos += 1
+        if self.pos == self.size:
+            self.pos = 0
+        self.fresh += 1
+
+        # Rundungsfehler der Summen einmal je Fensterlänge verwerfen (amortisiert O(1))
+        # Drop rounding errors of the sums once per window length (amortised O(1))
+        self._updates += 1
+        if self._updates >= self.size:
+            self._resum()
+
+    def _resum(self):
+        self._updates = 0
+        self.ref = self.sorted[self.n >> 1]
+        total = 0.0
+        sq = 0.0
+        for i in range(self.n):
+            d = self.ring[i] - self.ref
+            total += d
+            sq += d * d
+        self.sum = total
+        self.sq = sq
+
+    def mean(self):
+        return self.ref + self.sum / self.n
+
+    # Standardabweichung der Grundgesamtheit (Fenster = alle Werte) / population stddev (window = all values)
+    def stddev(self):
+        var = (self.sq - self.sum * self.sum / self.n) / self.n
+        return var ** 0.5 if var > 0 else 0.0
+
+    def median(self):
+        mid = self.n >> 1
+        if self.n & 1:
+            return self.sorted[mid]
+        return (self.sorted[mid - 1] + self.sorted[mid]) / 2
+
+    # -- Kennzahlen in data schreiben (<feld>_min usw.) / Write statistics to data (<field>_min etc.) --
+    def summarize(self, field, data, digits=2):
+        if not self.n:
+            for stat in STATS:
+                data[field + "_" + stat] = None
+            return
+        data[field + "_min"] = round(self.sorted[0], digits)
+        data[field + "_max"] = round(self.sorted[self.n - 1], digits)
+        data[field + "_mean"] = round(self.mean(), digits)
+        data[field + "_stddev"] = round(self.stddev(), digits)
+        data[field + "_median"] = round(self.median(), digits)
+
+class Aggregator:
+    def __init__(self, fields, size=60, every=60, seconds=60, sliding=False):
+        self.windows = {}
+        for field in fields:
+            self.windows[field] = Window(size)
+        self.every = every
+        self.period_ms = int(seconds * 1000)
+        self.sliding = sliding
+        self.count = 0          # max. neue Werte eines Felds / max. new values of one field
+        self.started = None
+        self.summaries = 0
+
+    # --- Werte übernehmen, True = Zusammenfassung fällig / Take values, True = summary due ---
+    # fields: nur diese Felder aus data (z. B. die eines Sensors) / only these fields from data (e.g. one sensor's)
+    def add(self, data, fields=None):
+        for field in fields or self.windows:
+            w = self.windows.get(field)
+            value = data.get(field)
+            if w is None or value is None:
+                continue
+            w.add(value)
+            if w.fresh > self.count:
+                self.count = w.fresh
+        if self.count and self.started is None:
+            self.started = time.ticks_ms()
+        return self.due()
+
+    def due(self):
+        if not self.count:
+            return False
+        if self.every and self.count >= self.every:
+            return True
+        return bool(self.period_ms) and time.ticks_diff(time.ticks_ms(), self.started) >= self.period_ms
+
+    # --- Zusammenfassung in data schreiben und neues Intervall beginnen ---
+    # --- Write the summary to data and start a new interval ---
+    def summarize(self, data):
+        for field, w in self.windows.items():
+            w.summarize(field, data)
+            w.fresh = 0
+            if not self.sliding:
+                w.clear()
+        data["samples"] = self.count
+        self.count = 0
+        self.started = None
+        self.summaries += 1
+        return data
+
+# --- Aggregator aus config (None = ausgeschaltet) / Aggregator from config (None = disabled) ---
+def from_config():
+    if not getattr(config, "AGG_ENABLED", False):
+        return None
+    return Aggregator(
+        getattr(config, "AGG_FIELDS", ("temp", "pressure", "humidity", "lux")),
+        size=getattr(config, "AGG_WINDOW", 60),
+        every=getattr(config, "AGG_EVERY", 60),
+        seconds=getattr(config, "AGG_SECONDS", 60),
+        sliding=getattr(config, "AGG_SLIDING", False),
+    )
@@ -0,0 +1,149 @@
+# bincodec.py – Binäres Payload: fester Record aus MQTT_PAYLOAD_FIELDS, Festkomma-Felder
+# bincodec.py – Binary payload: fixed record from MQTT_PAYLOAD_FIELDS, fixed-point fields
+#
+# Codec(fields) leitet aus der Feldliste ein Schema ab: je Feld ein struct-Code und eine
+# Skalierung (wie im Flash-Puffer: temp in 1/100 °C als int16, pressure in 1/10 hPa als
+# uint16, lux als uint32 ...). date/time/epoch werden zu einem Epoch (uint32), ms zu uint16,
+# unbekannte Felder zu float32. encode(payload) schreibt per struct.pack_into in einen festen
+# Puffer und liefert einen memoryview – dieselbe Schnittstelle wie template.Template.
+# Codec(fields) derives a schema from the field list: per field a struct code and a scale
+# (as in the flash buffer: temp in 1/100 °C as int16, pressure in 1/10 hPa as uint16, lux as
+# uint32 ...). date/time/epoch become one epoch (uint32), ms a uint16, unknown fields float32.
+# encode(payload) writes via struct.pack_into into a fixed buffer and returns a memoryview –
+# the same interface as template.Template.
+#
+# Record (little-endian): Version (B), Schema-ID (H, CRC32 der Schema-Beschreibung & 0xFFFF),
+# None-Maske (B/H/I je nach Feldzahl, Bit i = Feld i fehlt), danach die Felder.
+# schema() beschreibt das Layout als JSON-Objekt für den Decoder (tools/payload_decoder.py).
+# Record (little-endian): version (B), schema id (H, CRC32 of the schema description & 0xFFFF),
+# None mask (B/H/I depending on the field count, bit i = field i missing), then the fields.
+# schema() describes the layout as a JSON object for the decoder (tools/payload_decoder.py).
+
+import struct
+import binascii
+
+VERSION = 1
+HEADER_FMT = "<BH"
+HEADER_SIZE = 3
+
+# Feld -> (struct-Code, Skalierung) / field -> (struct code, scale)
+FIELDS = {
+    "epoch": ("I", 1),
+    "ms": ("H", 1),
+    "temp": ("h", 100),
+    "pressure": ("H", 10),
+    "humidity": ("H", 100),
+    "lux": ("I", 1),
+    "bme_latency_ms": ("H", 10),
+    "samples": ("H", 1),
+}
+TIME_FIELDS = ("date", "time", "epoch")   # alle drei -> ein Epoch / all three -> one epoch
+AGG_SUFFIXES = ("_min", "_max", "_mean", "_stddev", "_median")
+
+RANGES = {
+    "b": (-0x80, 0x7F),
+    "B": (0, 0xFF),
+    "h": (-0x8000, 0x7FFF),
+    "H": (0, 0xFFFF),
+    "i": (-0x80000000, 0x7FFFFFFF),
+    "I": (0, 0xFFFFFFFF),
+}
+
+# --- struct-Code und Skalierung eines Felds / Struct code and scale of a field ---
+# Kennzahlen (temp_mean, ...) wie ihr Grundfeld, Unbekanntes als float32
+# Statistics (temp_mean, ...) like their base field, anything unknown as float32
+def spec(field):
+    if field in FIELDS:
+        return FIELDS[field]
+    for suffix in AGG_SUFFIXES:
+        if field.endswith(suffix) and field[:-len(suffix)] in FIELDS:
+            return FIELDS[field[:-len(suffix)]]
+    return ("f", 1)
+
+# --- Feldliste fürs Payload: Zeitfelder zu "epoch" zusammengelegt, vorn / Field list for the payload: time fields merged into "epoch", first ---
+def layout(fields):
+    result = []
+    if any(f in TIME_FIELDS for f in fields):
+        result.append("epoch")
+    for field in fields:
+        if field not in TIME_FIELDS and field not in result:
+            result.append(field)
+    return result
+
+class Codec:
+    def __init__(self, fields):
+        self.fields = tuple(layout(fields))
+        n = len(self.fields)
+        if n > 32:
+            raise ValueError("max. 32 Felder / fields")
+        self.mask_fmt = "<B" if n <= 8 else "<H" if n <= 16 else "<I"
+        offset = HEADER_SIZE + struct.calcsize(self.mask_fmt)
+        slots = []
+        for field in self.fields:
+            code, scale = spec(field)
+            lo, hi = RANGES.get(code, (None, None))
+            slots.append(("<" + code, offset, scale, lo, hi))
+            offset += struct.calcsize(code)
+        self._slots = tuple(slots)
+        self.size = offset
+        desc = ",".join("%s:%s:%d" % (f, s[0][1], s[2]) for f, s in zip(self.fields, slots))
+        self.id = binascii.crc32(desc.encode()) & 0xFFFF
+        self._buf = bytearray(self.size)
+        self._mv = memoryview(self._buf)
+
+    # --- Payload als Record in den Puffer / Payload as a record into the buffer ---
+    def encode(self, payload):
+        self.pack_into(self._buf, 0, payload)
+        return self._mv
+
+    # --- Record an offset in einen fremden Puffer (z. B. Flash-Record) / Record at offset into another buffer (e.g. flash record) ---
+    def pack_into(self, buf, offset, payload):
+        mask = 0
+        fields = self.fields
+        slots = self._slots
+        for i in range(len(fields)):
+            fmt, pos, scale, lo, hi = slots[i]
+            value = payload.get(fields[i])
+            if value is None or isinstance(value, str):
+                mask |= 1 << i
+                value = 0
+            elif lo is None:
+                value = float(value)
+            else:
+                value = int(round(value * scale))
+                if value < lo:
+                    value = lo
+                elif value > hi:
+                    value = hi
+            struct.pack_into(fmt, buf, offset + pos, value)
+        struct.pack_into(HEADER_FMT, buf, offset, VERSION, self.id)
+        struct.pack_into(self.mask_fmt, buf, offset + HEADER_SIZE, mask)
+
+    # --- Record ab offset zurück in ein Dict, None = anderes Schema / Record at offset back into a dict, None = other schema ---
+    def decode(self, buf, offset=0):
+        version, schema_id = struct.unpack_from(HEADER_FMT, buf, offset)
+        if version != VERSION or schema_id != self.id:
+            return None
+        mask = struct.unpack_from(self.mask_fmt, buf, offset + HEADER_SIZE)[0]
+        values = {}
+        fields = self.fields
+        slots = self._slots
+        for i in range(len(fields)):
+            fmt, pos, scale, lo, hi = slots[i]
+            if mask >> i & 1:
+                values[fields[i]] = None
+                continue
+            value = struct.unpack_from(fmt, buf, offset + pos)[0]
+            if scale != 1:
+                value = round(value / scale, len(str(scale)) - 1)
+            values[fields[i]] = value
+        return values
+
+    # --- Schema für den Decoder (retained auf <MQTT_TOPIC>/schema) / Schema for the decoder (retained on <MQTT_TOPIC>/schema) ---
+    def schema(self):
+        return {
+            "v": VERSION,
+            "id": self.id,
+            "size": self.size,
+            "f": [[f, s[0][1], s[2]] for f, s in zip(self.fields, self._slots)],
+        }
@@ -0,0 +1,115 @@
+# bme280_comp.py – Ganzzahl-Kompensation für den BME280 nach Bosch-Referenzcode
+# bme280_comp.py – Integer compensation for the BME280 following Bosch's reference code
+#
+# Festkomma wie im Datenblatt (Kap. 4.2.3 / 8.2): Temperatur in 0,01 °C, Druck in Pa
+# (32-Bit-Variante, wenige Pa neben der Double-Formel), Luftfeuchte in %RH * 1024 mit H1..H6.
+# Nur Ganzzahl-Operationen, Kalibrierwerte in einem array("i") – keine Dict-Zugriffe,
+# keine Floats, native-Emitter-tauglich.
+# Fixed point as in the datasheet (sect. 4.2.3 / 8.2): temperature in 0.01 °C, pressure in Pa
+# (32-bit variant, within a few Pa of the double formula), humidity in %RH * 1024 using H1..H6.
+# Integer operations only, calibration in an array("i") – no dict lookups, no floats,
+# suitable for the native emitter.
+
+import struct
+import micropython
+from micropython import const
+from array import array
+
+# Index der Kalibrierwerte im Array / Index of the calibration values in the array
+_T1 = const(0)
+_T2 = const(1)
+_T3 = const(2)
+_P1 = const(3)
+_P2 = const(4)
+_P3 = const(5)
+_P4 = const(6)
+_P5 = const(7)
+_P6 = const(8)
+_P7 = const(9)
+_P8 = const(10)
+_P9 = const(11)
+_H1 = const(12)
+_H2 = const(13)
+_H3 = const(14)
+_H4 = const(15)
+_H5 = const(16)
+_H6 = const(17)
+
+# --- Kalibrierung einmalig entpacken / Unpack calibration once ---
+# calib = 24 Bytes ab 0x88, h1 = Byte 0xA1, h2_h6 = 7 Bytes ab 0xE1
+# calib = 24 bytes from 0x88, h1 = byte 0xA1, h2_h6 = 7 bytes from 0xE1
+def unpack(calib, h1, h2_h6):
+    cal = array("i", struct.unpack("<HhhHhhhhhhhh", calib))
+    e4 = h2_h6[3] - 256 if h2_h6[3] > 127 else h2_h6[3]
+    e6 = h2_h6[5] - 256 if h2_h6[5] > 127 else h2_h6[5]
+    h6 = h2_h6[6] - 256 if h2_h6[6] > 127 else h2_h6[6]
+    cal.append(h1)
+    cal.append(struct.unpack("<h", h2_h6[0:2])[0])      # H2
+    cal.append(h2_h6[2])                                # H3
+    cal.append(e4 * 16 | (h2_h6[4] & 0x0F))            # H4 (12 Bit, vorzeichenbehaftet / signed)
+    cal.append(e6 * 16 | (h2_h6[4] >> 4))              # H5 (12 Bit, vorzeichenbehaftet / signed)
+    cal.append(h6)                                      # H6
+    return cal
+
+# --- Rohwerte aus dem 8-Byte-Burst 0xF7..0xFE / Raw values from the 8-byte burst 0xF7..0xFE ---
+@micropython.native
+def adc_values(raw):
+    adc_p = (raw[0] << 12) | (raw[1] << 4) | (raw[2] >> 4)
+    adc_t = (raw[3] << 12) | (raw[4] << 4) | (raw[5] >> 4)
+    adc_h = (raw[6] << 8) | raw[7]
+    return adc_t, adc_p, adc_h
+
+# --- t_fine aus adc_T (Basis für alle drei Werte) / t_fine from adc_T (basis for all three values) ---
+@micropython.native
+def t_fine(adc_t, cal):
+    t1 = cal[_T1]
+    var1 = (((adc_t >> 3) - (t1 << 1)) * cal[_T2]) >> 11
+    d = (adc_t >> 4) - t1
+    var2 = (((d * d) >> 12) * cal[_T3]) >> 14
+    return var1 + var2
+
+# --- Temperatur in 0,01 °C / Temperature in 0.01 °C ---
+@micropython.native
+def temperature(fine):
+    return (fine * 5 + 128) >> 8
+
+# --- Druck in Pa (Bosch 32-Bit-Variante) / Pressure in Pa (Bosch 32-bit variant) ---
+@micropython.native
+def pressure(adc_p, cal, fine):
+    var1 = (fine >> 1) - 64000
+    var2 = (((var1 >> 2) * (var1 >> 2)) >> 11) * cal[_P6]
+    var2 = var2 + ((var1 * cal[_P5]) << 1)
+    var2 = (var2 >> 2) + (cal[_P4] << 16)
+    var1 = (((cal[_P3] * (((var1 >> 2) * (var1 >> 2)) >> 13)) >> 3) + ((cal[_P2] * var1) >> 1)) >> 18
+    var1 = ((32768 + var1) * cal[_P1]) >> 15
+    if var1 == 0:
+        return 0  # Division durch null vermeiden / avoid division by zero
+    # Bei gültigem adc_P positiv und < 2^32 wie im C-Code (uint32) / positive and < 2^32 for a valid adc_P as in C (uint32)
+    p = (1048576 - adc_p - (var2 >> 12)) * 3125
+    if p < 0x80000000:
+        p = (p << 1) // var1
+    else:
+        p = (p // var1) * 2
+    var1 = (cal[_P9] * (((p >> 3) * (p >> 3)) >> 13)) >> 12
+    var2 = ((p >> 2) * cal[_P8]) >> 13
+    return p + ((var1 + var2 + cal[_P7]) >> 4)
+
+# --- Luftfeuchte in %RH * 1024 / Humidity in %RH * 1024 ---
+@micropython.native
+def humidity(adc_h, cal, fine):
+    v = fine - 76800
+    v = ((((adc_h << 14) - (cal[_H4] << 20) - (cal[_H5] * v)) + 16384) >> 15) * \
+        (((((((v * cal[_H6]) >> 10) * (((v * cal[_H3]) >> 11) + 32768)) >> 10) + 2097152) * cal[_H2] + 8192) >> 14)
+    v = v - (((((v >> 15) * (v >> 15)) >> 7) * cal[_H1]) >> 4)
+    if v < 0:
+        v = 0
+    elif v > 419430400:
+        v = 419430400
+    return v >> 12
+
+# --- Alle drei Werte aus einem Rohdaten-Burst / All three values from one raw burst ---
+# Rückgabe / returns: (temp 0,01 °C, Druck / pressure Pa, Feuchte / humidity %RH * 1024)
+def compensate(raw, cal):
+    adc_t, adc_p, adc_h = adc_values(raw)
+    fine = t_fine(adc_t, cal)
+    return temperature(fine), pressure(adc_p, cal, fine), humidity(adc_h, cal, fine)
@@ -1,82 +1,133 @@
 # bme280_driver.py – BME280 Sensor-Treiber für MicroPython
 
 import time
-from machine import I2C, Pin
 import config
-import struct
+import i2cbus
+import bme280_comp
+
+# Registerkodierung laut Datenblatt / Register encoding per datasheet
+_OSRS = {0: 0, 1: 1, 2: 2, 4: 3, 8: 4, 16: 5}
+_IIR = {0: 0, 2: 1, 4: 2, 8: 3, 16: 4}
+_STANDBY = {0.5: 0, 62.5: 1, 125: 2, 250: 3, 500: 4, 1000: 5, 10: 6, 20: 7}
+
+def _code(table, value, name):
+    try:
+        return table[value]
+    except KeyError:
+        raise ValueError("BME280 %s ungültig / invalid: %s" % (name, value))
+
+# --- Messdauer laut Datenblatt (Kap. 9.1) in µs / Measurement time per datasheet (sect. 9.1) in µs ---
+# Kanäle mit Oversampling 0 entfallen. / Channels with oversampling 0 are skipped.
+def measurement_time_us(osrs_t, osrs_p, osrs_h, typical=False):
+    base, per, extra = (1000, 2000, 500) if typical else (1250, 2300, 575)
+    t = base + per * osrs_t
+    if osrs_p:
+        t += per * osrs_p + extra
+    if osrs_h:
+        t += per * osrs_h + extra
+    return t
 
 class BME280:
     def __init__(self, i2c=None, address=None):
         self.address = address if address is not None else config.BME280_ADDRESS
-        if i2c is None:
-            self.i2c = I2C(0, scl=Pin(config.BME_SCL), sda=Pin(config.BME_SDA))
-        else:
-            self.i2c = i2c
-
-        self.power_pin = Pin(config.BME_PWR, Pin.OUT)
-        self.power_pin.value(1)
+        # Bus und Sensorstrom verwaltet sensors.py / bus and sensor power are managed by sensors.py
+        self.i2c = i2c if i2c is not None else i2cbus.get(0)
 
+        self._byte = bytearray(1)
+        self.latency_us = 0  # Dauer der letzten Wandlung / duration of the last conversion
         self._load_calibration()
-        self._reg_write(0xF2, 0x01)  # Humidity oversampling x1
-        self._reg_write(0xF4, 0x27)  # Temp and pressure oversampling x1, normal mode
-        time.sleep_ms(100)
+        self.configure()
 
     def _reg_write(self, reg, val):
-        self.i2c.writeto_mem(self.address, reg, bytes([val]))
+        self._byte[0] = val
+        self.i2c.writeto_mem(self.address, reg, self._byte)
+
+    def _status(self):
+        self.i2c.readfrom_mem_into(self.address, 0xF3, self._byte)
+        return self._byte[0]
+
+    # --- Betriebsart, Oversampling, IIR und Standby setzen (Standard aus config.py) ---
+    # --- Set mode, oversampling, IIR and standby (defaults from config.py) ---
+    def configure(self, mode=None, osrs_t=None, osrs_p=None, osrs_h=None, iir=None, standby_ms=None, wait=None):
+        self.mode = mode or getattr(config, "BME_OP_MODE", "forced")
+        self.wait = wait or getattr(config, "BME_WAIT", "status")
+        osrs_t = getattr(config, "BME_OSRS_T", 1) if osrs_t is None else osrs_t
+        osrs_p = getattr(config, "BME_OSRS_P", 1) if osrs_p is None else osrs_p
+        osrs_h = getattr(config, "BME_OSRS_H", 1) if osrs_h is None else osrs_h
+        iir = getattr(config, "BME_IIR", 0) if iir is None else iir
+        standby_ms = getattr(config, "BME_STANDBY_MS", 1000) if standby_ms is None else standby_ms
+        if self.mode not in ("forced", "normal"):
+            raise ValueError("BME280 Modus ungültig / invalid mode: %s" % self.mode)
+
+        self._ctrl_meas = (_code(_OSRS, osrs_t, "osrs_t") << 5) | (_code(_OSRS, osrs_p, "osrs_p") << 2)
+        ctrl_hum = _code(_OSRS, osrs_h, "osrs_h")
+        conf = (_code(_STANDBY, standby_ms, "standby_ms") << 5) | (_code(_IIR, iir, "iir") << 2)
+        self.meas_time_us = measurement_time_us(osrs_t, osrs_p, osrs_h)
+        self._meas_typ_us = measurement_time_us(osrs_t, osrs_p, osrs_h, typical=True)
+
+        # 0xF5 wirkt nur im Sleep-Modus, ctrl_hum erst nach dem Schreiben von ctrl_meas
+        # 0xF5 only takes effect in sleep mode, ctrl_hum only after writing ctrl_meas
+        self._reg_write(0xF4, self._ctrl_meas)  # Sleep
+        self._reg_write(0xF2, ctrl_hum)
+        self._reg_write(0xF5, conf)
+        if self.mode == "normal":
+            self._reg_write(0xF4, self._ctrl_meas | 0x03)
+            time.sleep_us(self.meas_time_us)  # erste Messung abwarten / wait for the first conversion
+        else:
+            self._reg_write(0xF4, self._ctrl_meas)
+
+    # --- Forced Mode: eine Wandlung auslösen und abwarten / Trigger one conversion and wait for it ---
+    # Normal Mode: Register enthalten bereits die letzte Messung. / Registers already hold the latest result.
+    def _measure(self):
+        if self.mode != "forced":
+            self.latency_us = 0
+            return
+        start = time.ticks_us()
+        self._reg_write(0xF4, self._ctrl_meas | 0x01)
+        if self.wait == "status":
+            # Typische Dauer abwarten, dann "measuring"-Bit (3) abfragen
+            # Wait the typical time, then poll the "measuring" bit (3)
+            time.sleep_us(self._meas_typ_us)
+            while self._status() & 0x08:
+                if time.ticks_diff(time.ticks_us(), start) > 2 * self.meas_time_us:
+                    raise OSError("BME280 Messung hängt / conversion stuck")
+                time.sleep_us(100)
+        else:
+            time.sleep_us(self.meas_time_us)
+        self.latency_us = time.ticks_diff(time.ticks_us(), start)
 
     def _load_calibration(self):
         calib = self.i2c.readfrom_mem(self.address, 0x88, 24)
         h1 = self.i2c.readfrom_mem(self.address, 0xA1, 1)[0]
         h2_h6 = self.i2c.readfrom_mem(self.address, 0xE1, 7)
 
-        def u8(buf, offset): return struct.unpack('<B', buf[offset:offset+1])[0]
-        def s8(buf, offset): return struct.unpack('<b', buf[offset:offset+1])[0]
-        def u16(buf, offset): return struct.unpack('<H', buf[offset:offset+2])[0]
-        def s16(buf, offset): return struct.unpack('<h', buf[offset:offset+2])[0]
-
-        self.dig = {
-            'T1': u16(calib, 0), 'T2': s16(calib, 2), 'T3': s16(calib, 4),
-            'P1': u16(calib, 6), 'P2': s16(calib, 8), 'P3': s16(calib,10),
-            'P4': s16(calib,12), 'P5': s16(calib,14), 'P6': s16(calib,16),
-            'P7': s16(calib,18), 'P8': s16(calib,20), 'P9': s16(calib,22),
-            'H1': h1,
-            'H2': s16(h2_h6, 0), 'H3': u8(h2_h6, 2),
-            'H4': (h2_h6[3] << 4) | (h2_h6[4] & 0xF),
-            'H5': (h2_h6[5] << 4) | (h2_h6[4] >> 4),
-            'H6': s8(h2_h6, 6)
-        }
+        # Einmal entpackt, danach nur noch Array-Zugriffe / Unpacked once, array access only afterwards
+        self.cal = bme280_comp.unpack(calib, h1, h2_h6)
+        self._raw = bytearray(8)
         self.t_fine = 0
 
+    # --- Rohdaten-Burst 0xF7..0xFE (Druck, Temperatur, Feuchte) / Raw burst 0xF7..0xFE (pressure, temperature, humidity) ---
+    def read_raw(self):
+        self.i2c.readfrom_mem_into(self.address, 0xF7, self._raw)
+        return self._raw
+
     def read_compensated_data(self):
-        raw = self.i2c.readfrom_mem(self.address, 0xF7, 8)
-        pres_raw = (raw[0] << 12) | (raw[1] << 4) | (raw[2] >> 4)
-        temp_raw = (raw[3] << 12) | (raw[4] << 4) | (raw[5] >> 4)
-        hum_raw = (raw[6] << 8) | raw[7]
-
-        # Temperatur [°C] – wie gehabt
-        var1 = (((temp_raw / 16384.0) - (self.dig['T1'] / 1024.0)) * self.dig['T2'])
-        var2 = ((((temp_raw / 131072.0) - (self.dig['T1'] / 8192.0)) ** 2) * self.dig['T3'])
-        self.t_fine = var1 + var2
-        temp = self.t_fine / 5120.0
-
-        # --- Korrekte Druckformel (Bosch) ---
-        var1 = self.t_fine / 2.0 - 64000.0
-        var2 = var1 * var1 * self.dig['P6'] / 32768.0
-        var2 = var2 + var1 * self.dig['P5'] * 2.0
-        var2 = var2 / 4.0 + self.dig['P4'] * 65536.0
-        var1 = (self.dig['P3'] * var1 * var1 / 524288.0 + self.dig['P2'] * var1) / 524288.0
-        var1 = (1.0 + var1 / 32768.0) * self.dig['P1']
-        if var1 == 0:
-            pres = 0
-        else:
-            pres = 1048576.0 - pres_raw
-            pres = ((pres - var2 / 4096.0) * 6250.0) / var1
-            var1 = self.dig['P9'] * pres * pres / 2147483648.0
-            var2 = pres * self.dig['P8'] / 32768.0
-            pres = pres + (var1 + var2 + self.dig['P7']) / 16.0
-        pres_hpa = pres / 100.0  # <-- Jetzt korrekt in hPa
+        self._measure()
+        raw = self.read_raw()
+
+        # Ganzzahl-Kompensation nach Bosch, Umrechnung in Float erst am Ende
+        # Bosch integer compensation, conversion to float only at the end
+        adc_t, adc_p, adc_h = bme280_comp.adc_values(raw)
+        self.t_fine = bme280_comp.t_fine(adc_t, self.cal)
+        temp = bme280_comp.temperature(self.t_fine)
+        pres = bme280_comp.pressure(adc_p, self.cal, self.t_fine)
+        hum = bme280_comp.humidity(adc_h, self.cal, self.t_fine)
 
-        # Luftfeuchte [%] (grob)
-        hum = hum_raw / 1024.0
+        # °C, hPa, %
+        return temp / 100, round(pres / 100, 2), round(hum / 1024, 2)
 
-        return round(temp, 2), round(pres_hpa, 2), round(hum, 2)
+    # --- Messwerte plus Wandlungsdauer / Readings plus conversion latency ---
+    # Rückgabe / returns: (°C, hPa, %, Latenz / latency ms)
+    def read(self):
+        temp, pres, hum = self.read_compensated_data()
+        return temp, pres, hum, self.latency_us / 1000
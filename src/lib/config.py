@@ -19,14 +19,22 @@ DNS_FB          = "1.1.1.1"
 
 # ========== Zeitsynchronisation / Time sync settings ==========
 NTP_SERVER      = "pool.ntp.org"
-UTC_OFFSET      = "3600"
-SUMMER_OFFSET   = "3600"
+UTC_OFFSET      = 3600     # Sekunden, nur für date/time im Payload – die RTC läuft in UTC / seconds, only for date/time in the payload – the RTC runs in UTC
+SUMMER_OFFSET   = 3600     # Sommerzeit zusätzlich / daylight saving on top
+DST_RULE        = "eu"     # "eu" = Sommerzeit nach EU-Regel, None = SUMMER_OFFSET immer / DST per EU rule, None = SUMMER_OFFSET always
+TIME_SYNC_INTERVAL = 21600 # Sekunden zwischen NTP-Abgleichen / seconds between NTP syncs
+TIME_SYNC_RETRY = 300      # Sekunden bis zum neuen Versuch nach Fehlschlag / seconds until the next try after a failure
+TIME_DRIFT_MIN  = 21600    # Mindestabstand für eine Drift-Schätzung (ntptime: 1 s Auflösung) / minimum span for a drift estimate (ntptime: 1 s resolution)
 
 # ========== WLAN-Verbindungsversuche / WiFi retry logic ==========
 MAX_WIFI_RETRIES    = 10
 WIFI_RETRY_DELAY    = 0.5
 WIFI_PRIMARY_CHECK  = 10
-WIFI_CONNECT_TIMEOUT = 3
+WIFI_CONNECT_TIMEOUT = 3      # Sekunden je Verbindungsversuch / seconds per connection attempt
+WIFI_POLL_MS        = 50      # Status-Abfrage während des Verbindens / status polling while connecting
+WIFI_SCAN_MS        = 2500    # Dauer eines Scans (blockiert, async nur in Lücken des Abtastplans) / duration of a scan (blocking, async only in gaps of the sampling schedule)
+WIFI_MIN_RSSI       = -80     # dBm, schwächer = Fallback bevorzugen / weaker = prefer the fallback
+WIFI_LEASE_TTL      = 3600    # Sekunden, DHCP-Adresse fest weiterverwenden (0 = immer DHCP) / seconds to reuse the DHCP address statically (0 = always DHCP)
 
 # ========== MQTT-Konfiguration / MQTT configuration ==========
 MQTT_MODE       = "active"
@@ -36,7 +44,28 @@ MQTT_CLIENT_ID  = "sensor_default"
 MQTT_TOPIC      = "sensor/default"
 MQTT_USER       = None
 MQTT_PASSWORD   = None
+MQTT_TX_BUF     = 512     # Sendepuffer in Bytes (ein PUBLISH, ein write) / send buffer in bytes (one PUBLISH, one write)
+MQTT_QOS        = 0       # 0 oder 1 (PUBACK, Wiederholung nach Reconnect) / 0 or 1 (PUBACK, retransmit after reconnect)
+MQTT_INFLIGHT   = 8       # max. unbestätigte QoS-1-Nachrichten / max. unacked QoS 1 messages
+MQTT_ACK_TIMEOUT = 5      # Sekunden Wartezeit bei vollem Fenster / seconds to wait when the window is full
+MQTT_KEEPALIVE  = 60      # Sekunden, PINGREQ nach der Hälfte ohne Empfang / seconds, PINGREQ after half of it without receiving
+MQTT_CONNECT_TIMEOUT = 5  # Sekunden für den TCP-Aufbau / seconds for the TCP connect
+MQTT_READ_TIMEOUT    = 5  # Sekunden für CONNACK/PINGRESP / seconds for CONNACK/PINGRESP
+MQTT_WRITE_TIMEOUT   = 5  # Sekunden für ein Paket / seconds per packet
+MQTT_POLL_MS         = 20  # async: Abfrage-Takt beim Verbindungsaufbau / async: polling step while connecting
+MQTT_CLEAN_SESSION   = True  # False = persistente Session beim Broker / persistent session on the broker
+MQTT_BACKOFF_MIN     = 1   # Sekunden, erstes Reconnect-Backoff / seconds, first reconnect backoff
+MQTT_BACKOFF_MAX     = 60  # Sekunden, maximales Backoff / seconds, maximum backoff
+MQTT_CONFIRM_EVERY   = 20  # QoS 0 mit SF_ENABLED: PINGREQ spätestens nach so vielen unbestätigten Messungen / PINGREQ after at most this many unconfirmed readings
 
+# ========== MQTT-TLS / MQTT TLS ==========
+MQTT_TLS        = False  # True = TLS (MQTT_PORT meist 8883) / TLS (MQTT_PORT usually 8883)
+MQTT_CA_FILE    = None   # z.B. "ca.crt" (PEM/DER) – prüft das Broker-Zertifikat / verifies the broker certificate
+MQTT_CERT_FILE  = None   # Client-Zertifikat / client certificate
+MQTT_KEY_FILE   = None   # Client-Schlüssel / client key
+MQTT_TLS_RESUME = True   # TLS-Session über Reconnects wiederverwenden / reuse TLS session across reconnects
+
+# Zeitfelder / time fields: "date", "time" (Lokalzeit / local time), "epoch" (UTC), "ms"
 MQTT_PAYLOAD_FIELDS = [
     "date",
     "time",
@@ -46,9 +75,114 @@ MQTT_PAYLOAD_FIELDS = [
     "lux",
 ]
 
+# Mit AGG_ENABLED zusätzlich Kennzahlen je Feld / with AGG_ENABLED also statistics per field:
+# "<feld>_min", "_max", "_mean", "_stddev", "_median" (z. B. / e.g. "temp_mean", "lux_max"), "samples"
+
+# ------ Payload-Format / Payload format ------
+# "json"   = JSON-Objekt (Standard, kompatibel) / JSON object (default, compatible)
+# "binary" = fester Binär-Record aus MQTT_PAYLOAD_FIELDS, Festkomma (siehe bincodec.py), ca. 6x kleiner;
+#            date/time/epoch werden ein Epoch, das Schema liegt retained auf MQTT_TOPIC + Suffix,
+#            Dekodieren mit tools/payload_decoder.py. Batches: Records hintereinander, je mit Epoch.
+#            fixed binary record from MQTT_PAYLOAD_FIELDS, fixed-point (see bincodec.py), about 6x smaller;
+#            date/time/epoch become one epoch, the schema is retained on MQTT_TOPIC + suffix,
+#            decode with tools/payload_decoder.py. Batches: records back to back, each with its epoch.
+MQTT_PAYLOAD_FORMAT      = "json"
+MQTT_SCHEMA_TOPIC_SUFFIX = "/schema"
+
+# ------ Batch-Modus / Batch mode ------
+# None = ein JSON je Messung (Standard, kompatibel) / one JSON per reading (default, compatible)
+# "columnar" = Feldliste + Wertespalten + Epochs / field list + value columns + epochs
+# "delta"    = wie columnar, Zeit als t0 + Deltas / like columnar, time as t0 + deltas
+# Mit SF_ENABLED geht jede Messung sofort in den Flash-Puffer, gesendet wird von dort – ein
+# Reset verliert keinen Batch. Ohne Flash-Puffer sammelt das RAM: verloren gehen dann
+# höchstens MQTT_BATCH_SIZE Messungen bzw. MQTT_BATCH_SECONDS.
+# With SF_ENABLED every reading goes straight to the flash buffer and is sent from there – a
+# reset loses no batch. Without a flash buffer RAM collects: at most MQTT_BATCH_SIZE readings
+# or MQTT_BATCH_SECONDS are lost then.
+MQTT_BATCH_MODE         = None
+MQTT_BATCH_SIZE         = 10        # max. Messungen je Batch / max. readings per batch
+MQTT_BATCH_SECONDS      = 60        # max. Alter der ältesten Messung / max. age of the oldest reading
+MQTT_BATCH_MAX_BYTES    = 1024      # max. JSON-Größe je Batch / max. JSON size per batch
+MQTT_BATCH_TOPIC_SUFFIX = "/batch"  # Batches gehen an MQTT_TOPIC + Suffix / batches go to MQTT_TOPIC + suffix
+
 # ========== Sensor-Update-Intervall / Sensor data send interval ==========
 UPDATE_INTERVAL = 10
 
+# ========== Hauptloop-Modus / Main loop mode ==========
+# "async": uasyncio-Tasks (WLAN, MQTT, Sensoren, LED laufen unabhängig)
+#          uasyncio tasks (WiFi, MQTT, sensors, LED run independently)
+# "sync":  klassischer blockierender Loop / classic blocking loop
+# "duty":  messen, senden, schlafen (Batteriebetrieb, siehe POWER_*) / measure, publish, sleep (battery operation, see POWER_*)
+LOOP_MODE           = "async"
+ASYNC_QUEUE_LEN     = 10     # max. gepufferte Messungen / max. queued readings
+WIFI_CHECK_INTERVAL = 1      # Sekunden zwischen WLAN-Prüfungen / seconds between WiFi checks
+MQTT_CHECK_INTERVAL = 1      # Sekunden zwischen MQTT-Prüfungen / seconds between MQTT checks
+
+# ========== Abtast-Scheduler / Sampling scheduler ==========
+# Eigene Abtastraten je Sensor stehen als "rate" in SENSORS (unten). Gesendet wird im UPDATE_INTERVAL.
+# Per-sensor sampling rates are set as "rate" in SENSORS (below). Publishing follows UPDATE_INTERVAL.
+SCHED_POLICY          = "skip"   # "skip" = verpasste Slots verwerfen / drop missed slots, "catchup" = nachholen / run late
+SCHED_MAX_CATCH_UP    = 3        # max. nachgeholte Slots je Job / max. late slots per job
+SCHED_REPORT_INTERVAL = 0        # Sekunden zwischen Timing-Reports (0 = aus) / seconds between timing reports (0 = off)
+
+# ========== Deadband (Senden nur bei Änderung) / Deadband (publish on change only) ==========
+# Feld: absolute Schwelle oder (absolut, relativ in %) gegenüber dem zuletzt gesendeten Wert.
+# Field: absolute threshold or (absolute, relative in %) against the last published value.
+# {} = jede Messung senden / publish every reading
+DEADBAND = {}
+# Beispiel / example: {"temp": 0.2, "pressure": 0.5, "humidity": 1.0, "lux": (5, 10)}
+DEADBAND_HEARTBEAT  = 900    # Sekunden, spätestens dann trotzdem senden (0 = nie) / seconds, publish anyway after this (0 = never)
+
+# ========== Aggregation (Zusammenfassungen statt Einzelwerten) / Aggregation (summaries instead of single readings) ==========
+# Schnell abtasten, aber nur eine Zusammenfassung je Intervall senden (z. B. Lux mit 1 Hz, Senden 1× pro Minute).
+# Sample fast but publish only one summary per interval (e.g. lux at 1 Hz, publish once per minute).
+AGG_ENABLED         = False
+AGG_FIELDS          = ["temp", "pressure", "humidity", "lux"]  # zusammengefasste Felder / summarised fields
+AGG_SAMPLE_INTERVAL = 1      # Sekunden je Abtastung für Sensoren ohne "rate" / seconds per sample for sensors without "rate"
+AGG_WINDOW          = 60     # Werte je Feld im Ringfenster, Aufwand je Wert bis O(n) – besser <= 600 / values per field in the ring window, cost per value up to O(n) – better <= 600
+AGG_EVERY           = 60     # Zusammenfassung nach K neuen Werten (0 = aus) / summary after K new values (0 = off)
+AGG_SECONDS         = 60     # oder spätestens nach T Sekunden (0 = aus) / or after T seconds at the latest (0 = off)
+AGG_SLIDING         = False  # True = Fenster nach dem Senden behalten (gleitend) / keep window after publishing (sliding)
+
+# ========== Health-Telemetrie / Health telemetry ==========
+# Heap, Laufzeiten je Stufe, Reconnects, RSSI und Fehlerzähler als kompakte Meldung an MQTT_TOPIC + HEALTH_TOPIC_SUFFIX.
+# Heap, stage timings, reconnects, RSSI and error counters as a compact message to MQTT_TOPIC + HEALTH_TOPIC_SUFFIX.
+HEALTH_INTERVAL     = 300        # Sekunden zwischen Health-Meldungen (0 = aus) / seconds between health messages (0 = off)
+HEALTH_TOPIC_SUFFIX = "/health"
+
+# ========== Stromsparbetrieb (LOOP_MODE = "duty") / Low-power operation (LOOP_MODE = "duty") ==========
+# Je UPDATE_INTERVAL: Sensoren an, messen, Sensoren aus; WLAN + MQTT nur bei Bedarf (DEADBAND,
+# POWER_UPLINK_EVERY), dann Funk aus und schlafen. Scheduler, Raten und Aggregation gelten hier nicht.
+# Per UPDATE_INTERVAL: sensors on, measure, sensors off; WiFi + MQTT only when needed (DEADBAND,
+# POWER_UPLINK_EVERY), then radio off and sleep. Scheduler, rates and aggregation do not apply here.
+# USB-Seriell ist im Schlaf weg / USB serial is gone while sleeping.
+POWER_SLEEP         = "deep"     # "light" (RAM bleibt) oder "deep" (Neustart, Zustand in POWER_STATE_FILE) / "light" (RAM kept) or "deep" (restart, state in POWER_STATE_FILE)
+POWER_STATE_FILE    = "wake.json"  # nur ohne RTC-Speicher, ein kleiner Schreibvorgang je Zyklus / only without RTC memory, one small write per cycle
+POWER_UPLINK_EVERY  = 1          # nur jede n-te Messung sofort senden, dazwischen Flash-Puffer (SF_ENABLED) / publish only every n-th reading right away, flash buffer in between (SF_ENABLED)
+POWER_MIN_SLEEP     = 1          # Sekunden Mindestschlaf / seconds of minimum sleep
+
+# ========== Logging / Logging ==========
+# Level: "DEBUG", "INFO", "WARN", "ERROR", "FATAL" – darunter kostet ein Aufruf nur den Funktionsaufruf.
+# Level: "DEBUG", "INFO", "WARN", "ERROR", "FATAL" – below it a call costs only the function call.
+LOG_LEVEL           = "INFO"
+LOG_SINKS           = ["console"]  # "console", "file", "mqtt"
+LOG_BUFFER          = 32           # Einträge im RAM-Ringpuffer / records in the RAM ring buffer
+LOG_FILE            = "log.txt"
+LOG_FILE_MAX        = 8192         # Bytes, danach Rotation nach LOG_FILE + ".1" / bytes, then rotate to LOG_FILE + ".1"
+LOG_MQTT_LEVEL      = "WARN"       # ab diesem Level an MQTT_TOPIC + LOG_TOPIC_SUFFIX / from this level to MQTT_TOPIC + LOG_TOPIC_SUFFIX
+LOG_TOPIC_SUFFIX    = "/log"
+LOG_FLUSH_INTERVAL  = 10           # Sekunden zwischen Datei-/MQTT-Flush / seconds between file/MQTT flushes
+
+# ========== Store-and-Forward (Ringpuffer auf Flash) / Store-and-forward (flash ring buffer) ==========
+# Messungen bei WLAN-/Broker-Ausfall puffern und nach Reconnect nachsenden.
+# Buffer readings during WiFi/broker outages and send them after reconnect.
+SF_ENABLED          = True
+SF_PATH             = "sf_buffer.bin"
+SF_SECTORS          = 8       # Sektoren im Ring / sectors in the ring
+SF_SECTOR_SIZE      = 4096    # Bytes je Sektor (194 Messungen mit den Standard-Feldern) / bytes per sector (194 readings with the default fields)
+SF_DRAIN_BATCH      = 10      # max. Records je Sendedurchgang / max. records per drain pass
+SF_DRAIN_INTERVAL   = 1       # Sekunden zwischen Sendedurchgängen / seconds between drain passes
+
 # ========== LED-Konfiguration / LED pin setup ==========
 ONBOARD_LED     = "LED"
 STATUS_LED      = 16
@@ -57,16 +191,49 @@ STATUS_LED      = 16
 
 # ------ VEML7700 (Lichtsensor) / Light sensor ------
 VEML_MODE           = "active"
-VEML_SDA            = 0
-VEML_SCL            = 1
 VEML_PWR            = 15
 VEML7700_ADDRESS    = 0x10
 VEML7700_IT         = 25
 VEML7700_GAIN       = 1/8
+VEML7700_AUTO       = True  # Gain/IT automatisch wählen (IT/GAIN = Startwerte) / pick gain/IT automatically (IT/GAIN = start values)
+VEML7700_AUTO_MAX_IT = 800  # längste erlaubte Integrationszeit in ms / longest allowed integration time in ms
+VEML7700_PSM        = 0     # Power-Save-Modus 0 (aus/off), 1..4 = +0,5/1/2/4 s Pause je Messung / pause per measurement
+VEML_EVENT          = False # nur bei Lichtänderung lesen und senden, dazwischen EVENT_HEARTBEAT / read and publish only on light change, EVENT_HEARTBEAT in between
+VEML_EVENT_BAND     = 10    # Band um den letzten Wert in % / band around the last value in %
+VEML_EVENT_PERS     = 1     # Messungen außerhalb des Bands bis zum Ereignis (1, 2, 4, 8) / readings outside the band until an event
+VEML_INT_PIN        = None  # GPIO für INT-Ausgang (nur kompatible Sensoren mit INT-Pin) / GPIO for the INT output (compatible sensors with INT pin only)
 
 # ------ BME280 (Temp/RLF/Druck) / Temperature, humidity, pressure sensor ------
 BME_MODE            = "active"
-BME_SDA             = 2
-BME_SCL             = 3
 BME_PWR             = 14
-BME280_ADDRESS      = 0x76
\ No newline at end of file
+BME280_ADDRESS      = 0x76
+BME_OP_MODE         = "forced"  # "forced" = eine Messung je Abruf, danach Schlaf / one conversion per read, then sleep; "normal" = Dauerbetrieb / continuous
+BME_OSRS_T          = 1         # Oversampling Temperatur / temperature: 0 (aus/off), 1, 2, 4, 8, 16
+BME_OSRS_P          = 1         # Oversampling Druck / pressure: 0, 1, 2, 4, 8, 16
+BME_OSRS_H          = 1         # Oversampling Feuchte / humidity: 0, 1, 2, 4, 8, 16
+BME_IIR             = 0         # IIR-Filterkoeffizient / IIR filter coefficient: 0 (aus/off), 2, 4, 8, 16
+BME_STANDBY_MS      = 1000      # nur "normal" / "normal" only: 0.5, 10, 20, 62.5, 125, 250, 500, 1000
+BME_WAIT            = "status"  # "status" = Statusregister abfragen / poll status register, "time" = max. Messzeit laut Datenblatt / datasheet max. measurement time
+
+# ========== I2C-Busse / I2C buses ==========
+# Jeder Bus wird einmal angelegt und von allen Sensoren darauf geteilt.
+# Each bus is created once and shared by all sensors on it.
+I2C_BUSES = {
+    0: {"sda": 0, "scl": 1, "freq": 400000},
+    1: {"sda": 2, "scl": 3, "freq": 400000},
+}
+I2C_SCAN            = True   # Busse beim Start scannen, fehlende Sensoren überspringen / scan buses at startup, skip missing sensors
+
+# ========== Sensor-Registry / Sensor registry ==========
+# driver: "veml7700", "bme280" oder Modulname mit Klasse Sensor / or module name with a Sensor class
+# mode: "active", "dummy", "inactive" – power: GPIO für Sensorstrom / GPIO for sensor power (None = keiner / none)
+# rate: eigene Abtastrate in Sekunden (None = mit UPDATE_INTERVAL) / own sampling rate in seconds (None = with UPDATE_INTERVAL)
+# fields: gelieferte Felder (None = alle des Treibers) / fields to deliver (None = all of the driver)
+SENSORS = [
+    {"name": "veml", "driver": "veml7700", "bus": 0, "address": VEML7700_ADDRESS, "mode": VEML_MODE,
+     "power": VEML_PWR, "rate": None, "fields": ["lux"]},
+    {"name": "bme", "driver": "bme280", "bus": 1, "address": BME280_ADDRESS, "mode": BME_MODE,
+     "power": BME_PWR, "rate": None, "fields": ["temp", "pressure", "humidity", "bme_latency_ms"]},
+]
+SENSOR_EVENT_POLL   = 1      # Sekunden zwischen Ereignis-Abfragen (z. B. VEML_EVENT) / seconds between event polls (e.g. VEML_EVENT)
+EVENT_HEARTBEAT     = 900    # Ereignis-Modus: Sekunden ohne Ereignis bis zur Heartbeat-Messung / event mode: seconds without an event until a heartbeat reading
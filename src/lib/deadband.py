@@ -0,0 +1,116 @@
+# deadband.py – Senden nur bei Änderung (Report-by-Exception) mit Heartbeat
+# deadband.py – Publish on change only (report-by-exception) with heartbeat
+#
+# Je Feld eine Schwelle: absolut (0.2 °C) und/oder relativ (10 % vom zuletzt gesendeten
+# Wert). Eine Messung geht raus, wenn mindestens ein Feld seine Schwelle erreicht oder
+# seit dem letzten Senden DEADBAND_HEARTBEAT Sekunden vergangen sind.
+# Felder ohne Regel (date, time, ...) werden nicht verglichen.
+# One threshold per field: absolute (0.2 °C) and/or relative (10 % of the last published
+# value). A reading goes out when at least one field reaches its threshold or
+# DEADBAND_HEARTBEAT seconds have passed since the last publish.
+# Fields without a rule (date, time, ...) are not compared.
+
+import time
+import config
+from array import array
+
+class Deadband:
+    # rules: {feld: abs} oder {feld: (abs, rel_prozent)} / {field: abs} or {field: (abs, rel_percent)}
+    def __init__(self, rules, heartbeat_s=900):
+        self.fields = tuple(rules)
+        n = len(self.fields)
+        self._abs = array("f", bytes(4 * n))
+        self._rel = array("f", bytes(4 * n))
+        self._last = array("f", bytes(4 * n))
+        self._none = bytearray(n)   # 1 = zuletzt None gesendet / last published as None
+        for i in range(n):
+            rule = rules[self.fields[i]]
+            if isinstance(rule, (tuple, list)):
+                self._abs[i] = rule[0] or 0
+                self._rel[i] = (rule[1] or 0) / 100
+            else:
+                self._abs[i] = rule
+        self.heartbeat_ms = int(heartbeat_s * 1000)
+        self._sent_at = None
+        self.sent = 0
+        self.suppressed = 0
+        self.heartbeats = 0
+
+    # -- Liegt ein Feld außerhalb seines Bands? / Is any field outside its band? --
+    def _changed(self, data):
+        last = self._last
+        for i in range(len(self.fields)):
+            value = data.get(self.fields[i])
+            if value is None or self._none[i]:
+                if (value is None) != bool(self._none[i]):
+                    return True
+                continue
+            d = value - last[i]
+            if d < 0:
+                d = -d
+            band = self._rel[i] * (last[i] if last[i] >= 0 else -last[i])
+            if band < self._abs[i]:
+                band = self._abs[i]
+            if d >= band:
+                return True
+        return False
+
+    # --- True = senden (Werte werden neue Referenz), False = unterdrücken ---
+    # --- True = publish (values become the new reference), False = suppress ---
+    def check(self, data):
+        now = time.ticks_ms()
+        if self._sent_at is None:
+            changed = True
+        elif self.heartbeat_ms and time.ticks_diff(now, self._sent_at) >= self.heartbeat_ms:
+            changed = True
+            if not self._changed(data):
+                self.heartbeats += 1
+        else:
+            changed = self._changed(data)
+
+        if not changed:
+            self.suppressed += 1
+            return False
+
+        for i in range(len(self.fields)):
+            value = data.get(self.fields[i])
+            self._none[i] = value is None
+            if value is not None:
+                self._last[i] = value
+        self._sent_at = now
+        self.sent += 1
+        return True
+
+    # --- Referenz für den Neustart nach Deep-Sleep: [Werte, None-Flags, Epoch des letzten Sendens] ---
+    # --- Reference for the restart after deep sleep: [values, None flags, epoch of the last publish] ---
+    def state(self):
+        sent = None
+        if self._sent_at is not None:
+            sent = time.time() - time.ticks_diff(time.ticks_ms(), self._sent_at) // 1000
+        return [list(self._last), list(self._none), sent]
+
+    def restore(self, saved):
+        last, none, sent = saved
+        if len(last) != len(self.fields):
+            return False  # DEADBAND geändert / DEADBAND changed
+        for i in range(len(self.fields)):
+            self._last[i] = last[i]
+            self._none[i] = none[i]
+        if sent is not None:
+            # Alter auf den Heartbeat begrenzen – ticks laufen nur ein paar Tage / cap the age at the heartbeat – ticks only span a few days
+            # Liegt der Zeitpunkt in der Zukunft (Uhr zurückgestellt, RTC verloren), gilt er als
+            # abgelaufen – sonst käme der Heartbeat erst um die Abweichung später.
+            # If the time lies in the future (clock set back, RTC lost) it counts as expired –
+            # otherwise the heartbeat would come late by the difference.
+            age_ms = (time.time() - sent) * 1000
+            if age_ms < 0 or (self.heartbeat_ms and age_ms > self.heartbeat_ms):
+                age_ms = self.heartbeat_ms
+            self._sent_at = time.ticks_add(time.ticks_ms(), -min(age_ms, 0x0FFFFFFF))
+        return True
+
+# --- Filter aus config (None = jede Messung senden) / Filter from config (None = publish every reading) ---
+def from_config():
+    rules = getattr(config, "DEADBAND", None)
+    if not rules:
+        return None
+    return Deadband(rules, getattr(config, "DEADBAND_HEARTBEAT", 900))
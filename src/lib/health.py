@@ -0,0 +1,96 @@
+# health.py – Gerätezustand: Zähler, Stufen-Timer und eine kompakte Health-Meldung
+# health.py – Device health: counters, stage timers and a compact health message
+#
+# Timer und Zähler kosten je Aufruf nur ein paar Additionen. main.py schickt payload()
+# alle HEALTH_INTERVAL Sekunden an MQTT_TOPIC + HEALTH_TOPIC_SUFFIX. Timer gelten je
+# Meldung (reset_timers() nach dem Senden), Fehlerzähler seit dem Start.
+# Timers and counters cost only a few additions per call. main.py sends payload() every
+# HEALTH_INTERVAL seconds to MQTT_TOPIC + HEALTH_TOPIC_SUFFIX. Timers cover one message
+# (reset_timers() after sending), error counters count since startup.
+
+import gc
+import time
+
+timers = {}        # Stufe -> [Aufrufe, Summe µs, Max µs] / stage -> [calls, total µs, max µs]
+errors = {}        # Quelle -> Anzahl seit Start / source -> count since startup
+last_error = None  # "quelle:code" der letzten Störung / "source:code" of the last fault
+
+_up_ms = 0
+_last_ms = None    # erst beim ersten Aufruf, nicht beim Import / only on the first call, not at import
+
+# --- Laufzeit seit Start, überlauffest bei regelmäßigem Aufruf / Uptime since startup, wrap-safe when called regularly ---
+def uptime_s():
+    global _up_ms, _last_ms
+    now = time.ticks_ms()
+    if _last_ms is None:
+        _last_ms = now
+    _up_ms += time.ticks_diff(now, _last_ms)
+    _last_ms = now
+    return _up_ms // 1000
+
+# --- Dauer einer Stufe verbuchen / Book the duration of a stage ---
+def add_time(name, us):
+    t = timers.get(name)
+    if t is None:
+        t = timers[name] = [0, 0, 0]
+    t[0] += 1
+    t[1] += us
+    if us > t[2]:
+        t[2] = us
+
+# --- Decorator: Funktion als Stufe name messen / Decorator: time a function as stage name ---
+def timed(name):
+    def wrap(fn):
+        def run(*args, **kw):
+            start = time.ticks_us()
+            try:
+                return fn(*args, **kw)
+            finally:
+                add_time(name, time.ticks_diff(time.ticks_us(), start))
+        return run
+    return wrap
+
+# --- Störung zählen, exc liefert den Code (errno oder Typname) / Count a fault, exc provides the code (errno or type name) ---
+def error(source, exc=None):
+    global last_error
+    errors[source] = errors.get(source, 0) + 1
+    if exc is None:
+        last_error = source
+    elif exc.args and isinstance(exc.args[0], int):
+        last_error = "%s:%d" % (source, exc.args[0])
+    else:
+        last_error = "%s:%s" % (source, type(exc).__name__)
+
+def reset_timers():
+    timers.clear()
+
+# --- WLAN-Empfang (RSSI dBm, Kanal), None ohne Verbindung / WiFi reception (RSSI dBm, channel), None without a link ---
+def _radio():
+    try:
+        import network
+        wlan = network.WLAN(network.STA_IF)
+        if wlan.isconnected():
+            return wlan.status("rssi"), wlan.config("channel")
+    except Exception:
+        pass
+    return None, None
+
+# --- Kompakte Health-Meldung, extra ergänzt Werte aus main.py / Compact health message, extra adds values from main.py ---
+# t: Stufe -> [Aufrufe, Mittel µs, Max µs] seit dem letzten reset_timers()
+# t: stage -> [calls, mean µs, max µs] since the last reset_timers()
+def payload(**extra):
+    import machine
+    rssi, channel = _radio()
+    data = {
+        "up": uptime_s(),
+        "reset": machine.reset_cause(),
+        "mem_free": gc.mem_free() if hasattr(gc, "mem_free") else None,
+        "mem_alloc": gc.mem_alloc() if hasattr(gc, "mem_alloc") else None,
+        "rssi": rssi,
+        "ch": channel,
+    }
+    data.update(extra)
+    data["err"] = errors
+    data["last_err"] = last_error
+    data["t"] = {name: [t[0], t[1] // t[0], t[2]] for name, t in timers.items()}
+    return data
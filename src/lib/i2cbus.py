@@ -0,0 +1,41 @@
+# i2cbus.py – I2C-Busse einmalig anlegen und zwischen Sensoren teilen
+# i2cbus.py – Create I2C buses once and share them between sensors
+#
+# Pins je Bus kommen aus config.I2C_BUSES. Ein Scan beim Start merkt sich, welche
+# Adressen antworten – fehlende Sensoren werden dann gar nicht erst angesprochen.
+# Pins per bus come from config.I2C_BUSES. A scan at startup records which addresses
+# answer – missing sensors are then not addressed at all.
+
+from machine import I2C, Pin
+import config
+import logger
+
+_buses = {}
+found = {}   # Bus -> Adressen aus dem Scan / bus -> addresses from the scan
+
+# --- I2C-Objekt für einen Bus (wird nur einmal angelegt) / I2C object for a bus (created only once) ---
+def get(bus_id):
+    i2c = _buses.get(bus_id)
+    if i2c is None:
+        pins = getattr(config, "I2C_BUSES", {}).get(bus_id)
+        if pins is None:
+            raise ValueError("I2C-Bus %s fehlt in I2C_BUSES / missing in I2C_BUSES" % bus_id)
+        i2c = I2C(bus_id, sda=Pin(pins["sda"]), scl=Pin(pins["scl"]), freq=pins.get("freq", 400000))
+        _buses[bus_id] = i2c
+    return i2c
+
+# --- Alle angelegten Busse scannen / Scan all created buses ---
+def scan():
+    for bus_id, i2c in _buses.items():
+        try:
+            addresses = i2c.scan()
+        except OSError:
+            addresses = []
+        found[bus_id] = addresses
+        logger.info("I2C_SCAN", bus_id, [hex(a) for a in addresses])
+    return found
+
+# --- Antwortet die Adresse? Ohne Scan wird sie angenommen / Does the address answer? Assumed without a scan ---
+def present(bus_id, address):
+    addresses = found.get(bus_id)
+    return addresses is None or address in addresses
@@ -1,11 +1,16 @@
 from machine import Pin
 import uasyncio as asyncio
+import time
 import config
 
 # Pins direkt aus config.py
 onboard_led = Pin(config.ONBOARD_LED, Pin.OUT)
 status_led = Pin(config.STATUS_LED, Pin.OUT)
 
+# Wartendes Blinkmuster für den LED-Task (nur async-Modus)
+# Pending blink pattern for the LED task (async mode only)
+pending = None
+
 def on(led: Pin):
     led.on()
 
@@ -19,6 +24,34 @@ async def blink(led: Pin, count=1, delay_ms=200):
         led.off()
         await asyncio.sleep_ms(delay_ms)
 
+# Blockierende Variante für den synchronen Loop / Blocking variant for the sync loop
+def blink_sync(led: Pin, count=1, delay_ms=200):
+    for _ in range(count):
+        led.on()
+        time.sleep_ms(delay_ms)
+        led.off()
+        time.sleep_ms(delay_ms)
+
+# Blinkmuster anfordern – async: LED-Task spielt es ab, sync: sofort blockierend
+# Request a blink pattern – async: played by the LED task, sync: blocking right away
+def signal(led: Pin, count=1, delay_ms=200):
+    global pending
+    if getattr(config, "LOOP_MODE", "sync") == "async":
+        pending = (led, count, delay_ms)
+    else:
+        blink_sync(led, count, delay_ms)
+
+# LED-Task: spielt angeforderte Muster ab / LED task: plays requested patterns
+async def led_task(poll_ms=50):
+    global pending
+    while True:
+        if pending:
+            led, count, delay_ms = pending
+            pending = None
+            await blink(led, count, delay_ms)
+        else:
+            await asyncio.sleep_ms(poll_ms)
+
 # Shortcut für klassische Fehleranzeige
 async def error_blink():
     await blink(onboard_led, count=5, delay_ms=150)
@@ -0,0 +1,199 @@
+# logger.py – Leveled Logger mit Meldungscodes, RAM-Ringpuffer und wählbaren Ausgaben
+# logger.py – Leveled logger with message codes, RAM ring buffer and selectable sinks
+#
+# Aufrufe übergeben einen kurzen Code und bis zu vier Argumente, z. B.
+# logger.info("WIFI_UP", ip). Text entsteht erst in einer Ausgabe, die ihn braucht
+# (Konsole, Datei), über die Tabelle in logtext.py. Abgeschaltete Level sind leere
+# Funktionen: kein Formatieren, kein Tupel, kein Eintrag.
+# Calls pass a short code and up to four arguments, e.g. logger.info("WIFI_UP", ip).
+# Text is only produced in a sink that needs it (console, file), via the table in
+# logtext.py. Disabled levels are empty functions: no formatting, no tuple, no record.
+#
+# Ausgaben / sinks (LOG_SINKS):
+#   "console" – sofort per print() / right away via print()
+#   "file"    – gepuffert nach LOG_FILE, ab LOG_FILE_MAX Bytes nach LOG_FILE + ".1" rotiert
+#               buffered to LOG_FILE, rotated to LOG_FILE + ".1" beyond LOG_FILE_MAX bytes
+#   "mqtt"    – ab LOG_MQTT_LEVEL gesammelt, flush() sendet sie über sender als JSON-Liste
+#               collected from LOG_MQTT_LEVEL up, flush() sends them via sender as a JSON list
+# Ab ERROR wird die Datei sofort geschrieben, damit sie einen Neustart überlebt.
+# From ERROR up the file is written right away so that it survives a reboot.
+
+import time
+import config
+from micropython import const
+
+DEBUG = const(10)
+INFO = const(20)
+WARN = const(30)
+ERROR = const(40)
+FATAL = const(50)
+
+NAMES = {DEBUG: "DEBUG", INFO: "INFO", WARN: "WARN", ERROR: "ERROR", FATAL: "FATAL"}
+LEVELS = {"DEBUG": DEBUG, "INFO": INFO, "WARN": WARN, "ERROR": ERROR, "FATAL": FATAL}
+
+_NO = object()     # Platzhalter für "kein Argument" (None ist ein gültiger Wert) / marker for "no argument" (None is a valid value)
+
+level = INFO
+sinks = ()
+sender = None      # fn(records) für die MQTT-Ausgabe, setzt main.py / fn(records) for the MQTT sink, set by main.py
+
+# Ringpuffer der letzten Einträge (epoch, level, code, args) / ring buffer of the last records (epoch, level, code, args)
+_ring = []
+_pos = 0
+count = 0          # Einträge seit Start / records since startup
+dropped = 0        # MQTT-Einträge, die nicht mehr in die Warteschlange passten / MQTT records that did not fit the queue
+
+_file_lines = []
+_mqtt_queue = []
+_mqtt_level = WARN
+_flushing = False
+
+def _level(value, default):
+    if value is None:
+        return default
+    return LEVELS.get(value, value) if isinstance(value, str) else value
+
+def _off(code, a=_NO, b=_NO, c=_NO, d=_NO):
+    pass
+
+def _args(a, b, c, d):
+    if a is _NO:
+        return ()
+    if b is _NO:
+        return (a,)
+    if c is _NO:
+        return (a, b)
+    if d is _NO:
+        return (a, b, c)
+    return (a, b, c, d)
+
+def _record(lvl, code, a, b, c, d):
+    global _pos, count, dropped
+    rec = (time.time(), lvl, code, _args(a, b, c, d))
+    _ring[_pos] = rec
+    _pos = (_pos + 1) % len(_ring)
+    count += 1
+    for sink in sinks:
+        if sink == "console":
+            print(render(rec))
+        elif sink == "file":
+            _file_lines.append(render(rec, True))
+            if lvl >= ERROR or len(_file_lines) >= len(_ring):
+                _write_file()
+        elif sink == "mqtt" and lvl >= _mqtt_level and not _flushing:
+            if len(_mqtt_queue) >= len(_ring):
+                _mqtt_queue.pop(0)
+                dropped += 1
+            _mqtt_queue.append(rec)
+
+def _debug(code, a=_NO, b=_NO, c=_NO, d=_NO):
+    _record(DEBUG, code, a, b, c, d)
+
+def _info(code, a=_NO, b=_NO, c=_NO, d=_NO):
+    _record(INFO, code, a, b, c, d)
+
+def _warn(code, a=_NO, b=_NO, c=_NO, d=_NO):
+    _record(WARN, code, a, b, c, d)
+
+def _error(code, a=_NO, b=_NO, c=_NO, d=_NO):
+    _record(ERROR, code, a, b, c, d)
+
+def _fatal(code, a=_NO, b=_NO, c=_NO, d=_NO):
+    _record(FATAL, code, a, b, c, d)
+
+debug = info = warn = error = fatal = _off
+
+# --- Level und Ausgaben setzen (Standard aus config.py) / Set level and sinks (defaults from config.py) ---
+# Abgeschaltete Level werden zu _off – Aufrufer zahlen nur noch den Funktionsaufruf.
+# Disabled levels become _off – callers only pay for the function call.
+def configure(min_level=None, sink_names=None, buffer=None, mqtt_level=None):
+    global level, sinks, _ring, _pos, _mqtt_level, debug, info, warn, error, fatal
+    level = _level(min_level, _level(getattr(config, "LOG_LEVEL", "INFO"), INFO))
+    sinks = tuple(getattr(config, "LOG_SINKS", ("console",)) if sink_names is None else sink_names)
+    _mqtt_level = _level(mqtt_level, _level(getattr(config, "LOG_MQTT_LEVEL", "WARN"), WARN))
+    size = buffer or getattr(config, "LOG_BUFFER", 32)
+    if len(_ring) != size:
+        _ring = [None] * size
+        _pos = 0
+    debug = _debug if level <= DEBUG else _off
+    info = _info if level <= INFO else _off
+    warn = _warn if level <= WARN else _off
+    error = _error if level <= ERROR else _off
+    fatal = _fatal if level <= FATAL else _off
+
+# --- Wäre ein Eintrag mit diesem Level sichtbar? (teure Argumente vorab prüfen) ---
+# --- Would a record at this level be kept? (check expensive arguments beforehand) ---
+def enabled(lvl):
+    return lvl >= level
+
+# --- Eintrag als Text, Meldungstexte erst hier laden / Record as text, message texts loaded only here ---
+def render(rec, date=False):
+    import logtext
+    epoch, lvl, code, args = rec
+    t = time.localtime(epoch)
+    ts = "%02d:%02d:%02d" % (t[3], t[4], t[5])
+    if date:
+        ts = "%04d-%02d-%02d %s" % (t[0], t[1], t[2], ts)
+    text = logtext.TEXT.get(code)
+    if text is None:
+        text = code + (" " + repr(args) if args else "")
+    else:
+        try:
+            text = text % args
+        except (TypeError, ValueError):
+            text = text + " " + repr(args)
+    return "[%s] %s – %s" % (NAMES.get(lvl, lvl), ts, text)
+
+# --- Letzte Einträge, älteste zuerst / Last records, oldest first ---
+def records():
+    return [r for r in _ring[_pos:] + _ring[:_pos] if r is not None]
+
+def dump(out=print):
+    for rec in records():
+        out(render(rec))
+
+# --- Datei-Ausgabe: anhängen, bei Überlauf rotieren / File sink: append, rotate on overflow ---
+def _write_file():
+    import os
+    path = getattr(config, "LOG_FILE", "log.txt")
+    try:
+        with open(path, "a") as f:
+            for line in _file_lines:
+                f.write(line)
+                f.write("\n")
+        _file_lines.clear()
+        if os.stat(path)[6] > getattr(config, "LOG_FILE_MAX", 8192):
+            try:
+                os.remove(path + ".1")
+            except OSError:
+                pass
+            os.rename(path, path + ".1")
+    except OSError:
+        # Flash voll oder schreibgeschützt – Zeilen verwerfen statt den Loop zu stören
+        # Flash full or read-only – drop the lines rather than disturb the loop
+        _file_lines.clear()
+
+# --- MQTT-Einträge kompakt: [epoch, Level, Code, [Argumente]] / MQTT records compact: [epoch, level, code, [args]] ---
+def _plain(value):
+    if value is None or isinstance(value, (int, float, str, bool)):
+        return value
+    return str(value)
+
+def _mqtt_rows(recs):
+    return [[r[0], r[1], r[2], [_plain(v) for v in r[3]]] for r in recs]
+
+# --- Gepufferte Ausgaben schreiben, online=True sendet auch die MQTT-Warteschlange ---
+# --- Write buffered sinks, online=True also sends the MQTT queue ---
+def flush(online=False):
+    global _flushing
+    if _file_lines:
+        _write_file()
+    if online and _mqtt_queue and sender is not None and not _flushing:
+        _flushing = True
+        try:
+            if sender(_mqtt_rows(_mqtt_queue)):
+                _mqtt_queue.clear()
+        finally:
+            _flushing = False
+
+configure()
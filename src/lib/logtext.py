@@ -0,0 +1,79 @@
+# logtext.py – Meldungstexte zu den Log-Codes (nur für Konsole/Datei geladen)
+# logtext.py – Message texts for the log codes (only loaded for console/file)
+#
+# Argumente kommen per %-Formatierung in den Text. Unbekannte Codes erscheinen roh mit
+# ihren Argumenten, neue Meldungen brauchen also keinen Eintrag, um zu funktionieren.
+# Arguments are inserted via % formatting. Unknown codes show up raw with their
+# arguments, so new messages work without an entry here.
+
+TEXT = {
+    # main.py
+    "LOOP_START": "🔧 Starte Hauptloop / Starting main loop...",
+    "LOOP_ASYNC": "🔧 Starte async-Hauptloop / Starting async main loop...",
+    "WIFI_PRIMARY": "🔌 Verbinde mit primärem WLAN... / Connecting to primary WiFi...",
+    "WIFI_FALLBACK": "🔌 Verbinde mit Fallback-WLAN / Connecting to fallback WiFi: %s – Versuch / attempt %d",
+    "WIFI_GIVE_UP": "❌ Keine WLAN-Verbindung möglich – Neustart / Failed to connect to any network – rebooting.",
+    "WIFI_LOST": "🚫 WLAN getrennt – versuche Wiederverbindung / WiFi disconnected – trying to reconnect...",
+    "WIFI_CHECK_PRIMARY": "🔁 Prüfe ob primäres WLAN verfügbar ist / Checking for primary WiFi availability...",
+    "WIFI_BACK_PRIMARY": "✅ Zurück zum primären WLAN gewechselt / Switched back to primary WiFi",
+    "WIFI_STAY_FALLBACK": "❌ Primär weiterhin nicht erreichbar / Primary still unavailable – remain in fallback",
+    "NTP_SKIP": "⚠️ Zeit-Synchronisierung fehlgeschlagen – fahre ohne NTP fort / Time sync failed – continuing without NTP.",
+    "MQTT_UP": "✅ MQTT-Verbindung aufgebaut / MQTT connection established",
+    "MQTT_RETRY": "❌ MQTT nicht erreichbar – neuer Versuch folgt / MQTT unreachable – will retry",
+    "MQTT_DEAD": "💔 Broker antwortet nicht – Verbindung getrennt / Broker not responding – connection dropped",
+    "SENSOR_RESET": "⚠️ Sensorfehler – versuche Sensor-Reset / Sensor error – attempting sensor reset",
+    "SF_READY": "💾 Store-and-Forward bereit / ready – gepufferte Messungen / buffered readings: %d",
+    "SF_FAIL": "❌ Store-and-Forward nicht verfügbar / Store-and-forward unavailable: %s",
+    "SF_STASH_FAIL": "❌ Puffern fehlgeschlagen / Buffering failed: %s",
+    "SF_RESCUE": "💾 Unbestätigte Messungen der toten Verbindung gepuffert / Unconfirmed readings of the dead connection buffered: %d",
+    "PUB_OK": "✅ Daten erfolgreich gesendet / Data published successfully",
+    "PUB_RECOVERED": "🔁 MQTT wieder verbunden – weiter geht’s / MQTT reconnected – continuing",
+    "PUB_FAIL": "❌ Publish fehlgeschlagen – MQTT getrennt / Publish failed – MQTT disconnected",
+    "PUB_REBOOT": "🚨 Zu viele Fehler beim Senden – Neustart / Too many publish errors – rebooting.",
+    "NET_DOWN": "📡 Netzwerk oder Broker nicht verfügbar – Messungen gehen verloren / Network or broker unavailable – readings are dropped.",
+    "NET_DOWN_BUFFER": "📡 Netzwerk oder Broker nicht verfügbar – puffere Messungen / Network or broker unavailable – buffering readings.",
+    "QUEUE_FULL": "⚠️ Warteschlange voll – älteste Messung verworfen / Queue full – dropped oldest reading",
+    "SCHED": "⏱️ %s",
+    "LOOP_DUTY": "🔋 Duty-Cycle-Betrieb, bisherige Zyklen / Duty-cycle mode, cycles so far: %d",
+    "POWER_SKIP": "🔋 Nichts zu senden – Funk bleibt aus / Nothing to publish – radio stays off",
+    "POWER_SLEEP": "💤 Schlafe / Sleeping %d ms, wach / awake %d ms",
+
+    # power.py
+    "POWER_SAVE_FAIL": "⚠️ Zustand nicht gesichert / State not saved: %s",
+
+    # wifi.py
+    "WIFI_CONNECT": "🔌 Verbinde mit WLAN / Connecting to WiFi: %s",
+    "WIFI_UP": "✅ Verbunden – IP / Connected – IP: %s (%d ms)",
+    "WIFI_FAIL": "❌ Verbindung fehlgeschlagen / Connection failed – Status %d (%d ms)",
+    "WIFI_PICK": "📶 Primärnetz zu schwach oder nicht sichtbar – nehme / Primary too weak or not visible – using %s (%d dBm)",
+
+    # timekeep.py
+    "NTP_OK": "🕒 Zeit synchronisiert / Time synchronised – Abweichung / offset %d ms, Drift %d ppm",
+    "NTP_FAIL": "⚠️ Zeitabgleich fehlgeschlagen / Time sync failed: %s",
+
+    # mqtt.py
+    "MQTT_DUMMY": "[MQTT-DUMMY] %s",
+    "MQTT_OFF": "[MQTT] MQTT deaktiviert. / MQTT inactive, skipping.",
+    "MQTT_SKIP": "[MQTT] Publish übersprungen (deaktiviert). / Publish skipped (inactive).",
+    "MQTT_CONNECTED": "📡 MQTT verbunden / MQTT connected: %d ms",
+    "MQTT_RESUMED": "📡 MQTT verbunden / MQTT connected: %d ms, Session übernommen / session resumed",
+    "MQTT_TLS": "🔒 TLS-Handshake / TLS handshake: %s ms, resumed=%s, heap +%s B",
+    "MQTT_CONN_FAIL": "❌ MQTT-Verbindung fehlgeschlagen: / Connection failed: %s",
+    "MQTT_NO_CA": "⚠️ MQTT_CA_FILE fehlt – Broker-Zertifikat wird nicht geprüft. / MQTT_CA_FILE missing – broker certificate not verified.",
+    "MQTT_LOST": "💔 MQTT-Verbindung tot: / MQTT connection dead: %s",
+    "MQTT_RECONNECT": "⚠️ MQTT-Client nicht verbunden – versuche Reconnect... / Not connected, try reconnect",
+    "MQTT_RECONNECT_OK": "✅ MQTT-Reconnect erfolgreich / Reconnect OK",
+    "MQTT_SENT": "📤 MQTT: Gesendet an / Sent to %s: %s",
+    "MQTT_SEND_FAIL": "❌ Fehler beim Senden: / Error on publish: %s",
+    "MQTT_RECOVERED": "🔁 MQTT: nach Reconnect erneut gesendet. / Sent again after reconnect.",
+    "MQTT_RECONNECT_FAIL": "❌ Reconnect oder erneutes Senden fehlgeschlagen. / Reconnect or resend failed.",
+    "SF_DRAIN": "💾 Rückstand gesendet / Backlog sent: %d, offen / pending: %d",
+
+    # sensors.py, i2cbus.py
+    "SENSOR_MISSING": "❌ %s: keine Antwort auf / no answer at 0x%02x (Bus / bus %d)",
+    "SENSOR_OK": "✅ %s initialisiert / initialized.",
+    "SENSOR_FAIL": "❌ %s Fehler / Error: %s",
+    "SENSOR_READ_FAIL": "⚠️ %s: Messung fehlgeschlagen / reading failed: %s",
+    "PAYLOAD_FIELDS": "⚠️ MQTT_PAYLOAD_FIELDS enthält unbekannte Felder / contains unknown fields: %s",
+    "I2C_SCAN": "🔎 I2C-Bus / I2C bus %d: %s",
+}
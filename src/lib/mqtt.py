@@ -1,20 +1,74 @@
 # mqtt.py – MQTT-Client mit Dummy-/Inactive-Mode, Protokollfix (ohne externe Abhängigkeiten)
 # mqtt.py – MQTT client with dummy/inactive mode, protocol fix (no external dependencies)
 
+import gc
 import socket
+import select
 import struct
+import time
+import random
+from array import array
 import ujson
 import config
+import health
+import logger
 from state import SUCCESS, RECOVERED, FATAL_ERROR
-import leds  # Optional für Fehler-Blinkmuster / For error blink patterns
 
 client = None
 
+# Platz für den festen Header vor dem Topic: Typ-Byte + max. 4 Remaining-Length-Bytes
+# Room for the fixed header in front of the topic: type byte + max. 4 remaining-length bytes
+TX_HDR = 5
+
+# Empfangspuffer – der Broker schickt uns nur kurze Pakete (CONNACK, PUBACK, PINGRESP)
+# Receive buffer – the broker only sends us short packets (CONNACK, PUBACK, PINGRESP)
+RX_BUF = 32
+
+# errno-Werte (lwIP/Linux) beim nicht-blockierenden Verbinden / errno values (lwIP/Linux) for non-blocking connect
+_EINPROGRESS = 115
+_ETIMEDOUT = 110
+_ECONNREFUSED = 111
+
 class MQTTException(Exception):
     pass
 
+# --- Länge der Remaining-Length-Kodierung / Size of the remaining-length encoding ---
+def _rl_size(length):
+    if length < 0x80:
+        return 1
+    if length < 0x4000:
+        return 2
+    if length < 0x200000:
+        return 3
+    return 4
+
+# --- Remaining Length ab pos in buf schreiben / Write remaining length into buf at pos ---
+def _put_rl(buf, pos, length):
+    while True:
+        byte = length & 0x7F
+        length >>= 7
+        if length:
+            byte |= 0x80
+        buf[pos] = byte
+        pos += 1
+        if not length:
+            return pos
+
+# --- String mit 2-Byte-Längenpräfix schreiben / Write string with 2-byte length prefix ---
+def _put_str(buf, pos, data):
+    n = len(data)
+    buf[pos] = n >> 8
+    buf[pos + 1] = n & 0xFF
+    buf[pos + 2:pos + 2 + n] = data
+    return pos + 2 + n
+
+# --- Belegter Heap (nur MicroPython) / Allocated heap (MicroPython only) ---
+def _mem_alloc():
+    return gc.mem_alloc() if hasattr(gc, "mem_alloc") else None
+
 class MQTTClient:
-    def __init__(self, client_id, server, port=1883, user=None, password=None):
+    def __init__(self, client_id, server, port=1883, user=None, password=None, tx_size=None,
+                 ssl_context=None, server_hostname=None):
         self.client_id = client_id
         self.server = server
         self.port = port
@@ -22,170 +76,1038 @@ class MQTTClient:
         self.password = password
         self.sock = None
 
+        # TLS: Kontext wird von außen gereicht und über Reconnects hinweg wiederverwendet
+        # TLS: the context is passed in and reused across reconnects
+        self.ssl_context = ssl_context
+        self.server_hostname = server_hostname or server
+        self.tls_resume = getattr(config, "MQTT_TLS_RESUME", True)
+        self.tls_handshake_ms = None  # Dauer des letzten Handshakes / duration of the last handshake
+        self.tls_heap = None          # Heap-Zuwachs durch den Handshake / heap growth from the handshake
+        self.tls_resumed = False      # letzte Verbindung per Session-Resumption / last connection resumed
+        self._tls_session = None
+
+        # Wiederverwendeter Sendepuffer: [Header rechtsbündig bis TX_HDR][Topic][Payload]
+        # Reused send buffer: [header right-aligned up to TX_HDR][topic][payload]
+        self._tx = bytearray(tx_size or getattr(config, "MQTT_TX_BUF", 512))
+        self._tx_mv = memoryview(self._tx)
+        self._tx_topic = None   # Topic, das gerade im Puffer steht / topic currently in the buffer
+        self._topics = {}       # Topic -> Längenpräfix + UTF-8 / topic -> length prefix + UTF-8
+
+        # QoS 1: In-Flight-Fenster – Paket-IDs kompakt im Array, 0 = freier Slot
+        # QoS 1: in-flight window – packet ids packed in an array, 0 = free slot
+        window = getattr(config, "MQTT_INFLIGHT", 8)
+        self._inflight_ids = array("H", bytes(2 * window))
+        self._inflight_msgs = [None] * window   # (topic, msg, retain) für Wiederholung / for retransmit
+        self._inflight = 0
+        self._pid = 0
+        self._pidbuf = bytearray(2)
+        self.acked = 0
+        self.retransmits = 0
+
+        # Nicht-blockierende Ein-/Ausgabe mit Zeitlimits (Millisekunden)
+        # Non-blocking I/O with timeouts (milliseconds)
+        self.keepalive = getattr(config, "MQTT_KEEPALIVE", 60)
+        self.connect_timeout_ms = int(getattr(config, "MQTT_CONNECT_TIMEOUT", 5) * 1000)
+        self.read_timeout_ms = int(getattr(config, "MQTT_READ_TIMEOUT", 5) * 1000)
+        self.write_timeout_ms = int(getattr(config, "MQTT_WRITE_TIMEOUT", 5) * 1000)
+        self._poller = None
+        self._rx = bytearray(RX_BUF)
+        self._rx_mv = memoryview(self._rx)
+        self._rx_len = 0        # Bytes im Empfangspuffer / bytes in the receive buffer
+        self._skip = 0          # Rest eines zu großen Pakets verwerfen / rest of an oversized packet to drop
+        self._connack = None    # Return Code aus dem CONNACK / return code from CONNACK
+        self.session_present = False
+        self.clean_session = getattr(config, "MQTT_CLEAN_SESSION", True)
+        self.connect_ms = None  # Dauer des letzten connect() / duration of the last connect()
+        self._addr = None       # aufgelöste Broker-Adresse (Cache) / resolved broker address (cache)
+        self._last_tx = 0
+        self._last_rx = 0       # ticks_ms des letzten empfangenen Pakets / ticks_ms of the last received packet
+        self._ping_sent = None  # ticks_ms des offenen PINGREQ / ticks_ms of the pending PINGREQ
+
+        # Bestätigung für QoS 0: TCP liefert in Reihenfolge, ein PINGRESP bestätigt also alle
+        # PUBLISH vor dem PINGREQ. link zählt die Verbindungen, sent die PUBLISH-Pakete.
+        # Confirmation for QoS 0: TCP delivers in order, so a PINGRESP confirms every PUBLISH
+        # before the PINGREQ. link counts the connections, sent the PUBLISH packets.
+        self.link = 0
+        self.sent = 0
+        self.confirmed = 0
+        self._ping_seq = 0
+
+    # --- Topic einmalig kodieren und cachen / Encode topic once and cache it ---
+    def _topic(self, topic):
+        encoded = self._topics.get(topic)
+        if encoded is None:
+            raw = topic.encode() if isinstance(topic, str) else bytes(topic)
+            encoded = struct.pack("!H", len(raw)) + raw
+            self._topics[topic] = encoded
+        return encoded
+
     def connect(self):
-        # -- Socket-Verbindung zum Broker aufbauen / Open socket connection --
+        for left in self.connect_steps():
+            self._poller.poll(left)
+
+    # --- Verbindungsaufbau in Schritten / Connect in steps ---
+    # Generator: muss er auf den Socket warten, liefert er die Restzeit in ms und hat den
+    # Poller auf das erwartete Ereignis gestellt. connect() wartet dort per poll(),
+    # mqtt.connect_async() gibt die Zeit solange anderen Tasks. Mit blocking=False läuft
+    # auch der TLS-Handshake nicht-blockierend (beim Senden des CONNECT). Nur die
+    # DNS-Auflösung blockiert – einmal, danach gilt der Adress-Cache.
+    # Generator: when it has to wait for the socket it yields the time left in ms, with the
+    # poller set to the expected event. connect() waits there via poll(), mqtt.connect_async()
+    # hands the time to other tasks meanwhile. With blocking=False the TLS handshake is
+    # non-blocking too (while sending CONNECT). Only the DNS lookup blocks – once, then the
+    # address cache applies.
+    def connect_steps(self, blocking=True):
+        self.close()
+        self.link += 1
+
+        start = time.ticks_ms()
+
+        # -- Broker-Adresse nur beim ersten Mal auflösen / Resolve the broker address only once --
+        if self._addr is None:
+            self._addr = socket.getaddrinfo(self.server, self.port)[0][-1]
+
+        # -- Socket-Verbindung zum Broker aufbauen, bis MQTT_CONNECT_TIMEOUT / Open socket connection, up to MQTT_CONNECT_TIMEOUT --
         self.sock = socket.socket()
-        addr = socket.getaddrinfo(self.server, self.port)[0][-1]
-        self.sock.connect(addr)
+        self.sock.setblocking(False)
+        self._poller = select.poll()
+        self._poller.register(self.sock, select.POLLOUT)
+        try:
+            try:
+                self.sock.connect(self._addr)
+            except OSError as e:
+                if e.args[0] != _EINPROGRESS:
+                    raise
+            while True:
+                events = self._poller.poll(0)
+                if events:
+                    if events[0][1] & (select.POLLERR | select.POLLHUP):
+                        raise OSError(_ECONNREFUSED)
+                    break
+                left = self.connect_timeout_ms - time.ticks_diff(time.ticks_ms(), start)
+                if left <= 0:
+                    raise OSError(_ETIMEDOUT)
+                yield left
+        except OSError:
+            self._addr = None  # beim nächsten Mal neu auflösen / resolve again next time
+            raise
+        if self.ssl_context is not None:
+            if blocking:
+                self.sock.settimeout(self.connect_timeout_ms / 1000)
+            self._tls_handshake(lazy=not blocking)
+            self.sock.setblocking(False)
+        self._poller = select.poll()
+        self._poller.register(self.sock, select.POLLIN)
+        self._rx_len = 0
+        self._skip = 0
+        self._connack = None
+        self._ping_sent = None
 
-        # -- MQTT CONNECT-Paket bauen / Build correct MQTT CONNECT packet --
-        payload = bytearray()
-        payload.extend(b"\x00\x04MQTT")    # Protocol Name ("MQTT")
-        payload.append(0x04)               # Protocol Level 4 (MQTT 3.1.1)
+        # -- MQTT CONNECT-Paket im Sendepuffer bauen / Build MQTT CONNECT packet in the send buffer --
+        client_id = self.client_id.encode()
+        user = self.user.encode() if self.user else None
+        password = self.password.encode() if self.password else None
 
-        flags = 0x02  # Clean session
+        remaining = 10 + 2 + len(client_id)
+        if user:
+            remaining += 2 + len(user)
+        if password:
+            remaining += 2 + len(password)
+        size = 1 + _rl_size(remaining) + remaining
+        buf = self._tx if size <= len(self._tx) else bytearray(size)
+        self._tx_topic = None
+
+        flags = 0x02 if self.clean_session else 0x00  # Clean session / persistente Session / persistent session
         if self.user and self.password:
             flags |= 0xC0  # User + Password flag
         elif self.user:
             flags |= 0x80  # User only
         elif self.password:
             flags |= 0x40  # Password only
-        payload.append(flags)
-
-        payload.extend(struct.pack("!H", 60))  # Keepalive (Sekunden)
 
-        # -- Client ID --
-        payload.extend(struct.pack("!H", len(self.client_id)))
-        payload.extend(self.client_id.encode())
+        buf[0] = 0x10
+        pos = _put_rl(buf, 1, remaining)
+        pos = _put_str(buf, pos, b"MQTT")  # Protocol Name ("MQTT")
+        buf[pos] = 0x04                      # Protocol Level 4 (MQTT 3.1.1)
+        buf[pos + 1] = flags
+        buf[pos + 2] = self.keepalive >> 8   # Keepalive (Sekunden / seconds)
+        buf[pos + 3] = self.keepalive & 0xFF
+        pos = _put_str(buf, pos + 4, client_id)
 
         # -- Username/Password falls gesetzt / Add username/password if set --
-        if self.user:
-            payload.extend(struct.pack("!H", len(self.user)))
-            payload.extend(self.user.encode())
-        if self.password:
-            payload.extend(struct.pack("!H", len(self.password)))
-            payload.extend(self.password.encode())
-
-        # -- Remaining Length korrekt kodieren / Correct MQTT remaining length --
-        remaining_length = len(payload)
-        rl_bytes = bytearray()
-        while True:
-            byte = remaining_length % 128
-            remaining_length //= 128
-            if remaining_length > 0:
-                byte |= 0x80
-            rl_bytes.append(byte)
-            if remaining_length == 0:
-                break
+        if user:
+            pos = _put_str(buf, pos, user)
+        if password:
+            pos = _put_str(buf, pos, password)
 
-        # -- Komplettes CONNECT-Paket / Full CONNECT packet --
-        msg = bytearray(b"\x10") + rl_bytes + payload
-        self.sock.write(msg)
+        sent = time.ticks_ms()
+        for left in self._write_steps(buf, 0, pos, self.connect_timeout_ms):
+            yield left
+        self._last_tx = time.ticks_ms()
+        if self.ssl_context is not None and not blocking:
+            # Handshake lief beim Senden mit / the handshake ran while sending
+            self.tls_handshake_ms = time.ticks_diff(self._last_tx, sent)
+            self.tls_resumed = bool(getattr(self.sock, "session_reused", False))
 
         # -- Antwort vom Broker prüfen / Check broker response --
-        resp = self.sock.read(4)
-        if not resp or len(resp) != 4:
-            raise MQTTException("MQTT-Verbindung fehlgeschlagen: Keine Antwort vom Broker / No response from broker")
-        if resp[0] != 0x20 or resp[1] != 0x02 or resp[3] != 0x00:
+        sent = self._last_tx
+        while True:
+            self._pump(0)
+            if self._got_connack():
+                break
+            left = self.read_timeout_ms - time.ticks_diff(time.ticks_ms(), sent)
+            if left <= 0:
+                raise MQTTException("MQTT-Verbindung fehlgeschlagen: Keine Antwort vom Broker / No response from broker")
+            yield left
+        if self._connack != 0:
             raise MQTTException("MQTT-Verbindung fehlgeschlagen: Ungültige Broker-Antwort / Invalid broker response")
 
+        # -- TLS-Session erst nach dem CONNACK merken (TLS 1.3 schickt Tickets nach dem Handshake) --
+        # -- Keep the TLS session only after CONNACK (TLS 1.3 sends tickets after the handshake) --
+        if self.ssl_context is not None and self.tls_resume:
+            self._tls_session = getattr(self.sock, "session", None)
+
+        # -- Unbestätigte QoS-1-Nachrichten mit DUP-Flag wiederholen / Resend unacked QoS 1 messages with DUP --
+        # Ohne Session-Present hat der Broker den Zustand verloren, die Nachrichten gehen trotzdem raus.
+        # Without session present the broker lost its state, the messages are sent anyway.
+        if self._inflight:
+            self._resend_inflight()
+        self.connect_ms = time.ticks_diff(time.ticks_ms(), start)
+
+    # --- TLS-Handshake auf dem verbundenen Socket (blockierend mit Zeitlimit) ---
+    # --- TLS handshake on the connected socket (blocking with timeout) ---
+    # Die Session der letzten Verbindung wird angeboten – mit Resumption entfällt der
+    # teure Schlüsselaustausch. Kennt der tls-Build keine Sessions, wird ohne verbunden.
+    # lazy: nur einpacken, der Handshake läuft beim ersten Schreiben auf dem
+    # nicht-blockierenden Socket (connect_steps(blocking=False)).
+    # The session of the last connection is offered – resumption skips the expensive
+    # key exchange. If the tls build does not know sessions, it connects without.
+    # lazy: only wrap, the handshake runs on the first write on the non-blocking socket
+    # (connect_steps(blocking=False)).
+    def _tls_handshake(self, lazy=False):
+        gc.collect()
+        heap = _mem_alloc()
+        start = time.ticks_ms()
+        raw = self.sock
+        session = self._tls_session if self.tls_resume else None
+        try:
+            self.sock = self.ssl_context.wrap_socket(raw, server_hostname=self.server_hostname, session=session,
+                                                     do_handshake_on_connect=not lazy)
+        except TypeError:
+            if session is None:
+                raise
+            self.tls_resume = False
+            self._tls_session = None
+            self.sock = self.ssl_context.wrap_socket(raw, server_hostname=self.server_hostname,
+                                                     do_handshake_on_connect=not lazy)
+        except Exception:
+            self._tls_session = None  # kaputte Session nicht erneut anbieten / do not offer a broken session again
+            raise
+        self.tls_handshake_ms = time.ticks_diff(time.ticks_ms(), start)
+        self.tls_heap = None if heap is None else _mem_alloc() - heap
+        self.tls_resumed = bool(getattr(self.sock, "session_reused", False))
+
+    def _got_connack(self):
+        return self._connack is not None
+
     def disconnect(self):
         if self.sock:
-            self.sock.write(b"\xe0\0")
-            self.sock.close()
-            self.sock = None
+            try:
+                self._write(b"\xe0\0", 0, 2)
+            finally:
+                self.close()
+
+    # --- Socket schließen, In-Flight-Nachrichten behalten / Close socket, keep in-flight messages ---
+    def close(self):
+        if self.sock:
+            try:
+                self.sock.close()
+            except OSError:
+                pass
+        self.sock = None
+        self._poller = None
+
+    # --- buf[off:off+n] schreiben ohne Slice-Objekt / Write buf[off:off+n] without a slice object ---
+    # MicroPython-Streams (Socket, TLS) akzeptieren write(buf, off, len). Der Socket ist
+    # nicht-blockierend: Teil-Schreibvorgänge werden fortgesetzt, bis MQTT_WRITE_TIMEOUT.
+    # MicroPython streams (socket, TLS) accept write(buf, off, len). The socket is
+    # non-blocking: partial writes are continued, up to MQTT_WRITE_TIMEOUT.
+    def _write(self, buf, off, n):
+        written = self.sock.write(buf, off, n) or 0
+        if written < n:
+            for left in self._write_steps(buf, off + written, n - written, self.write_timeout_ms):
+                self._poller.poll(left)
+        self._last_tx = time.ticks_ms()
+
+    # Rest schreiben; liefert die Restzeit, solange der Socket voll ist (Poller auf POLLOUT)
+    # Write the rest; yields the time left while the socket is full (poller on POLLOUT)
+    def _write_steps(self, buf, off, n, timeout_ms):
+        start = time.ticks_ms()
+        while n:
+            written = self.sock.write(buf, off, n)
+            if written:
+                off += written
+                n -= written
+                continue
+            left = timeout_ms - time.ticks_diff(time.ticks_ms(), start)
+            if left <= 0:
+                raise MQTTException("Schreib-Timeout / Write timeout")
+            self._poller.modify(self.sock, select.POLLOUT)
+            yield left
+            self._poller.modify(self.sock, select.POLLIN)
+
+    # --- PUBLISH ohne Heap-Allokation pro Aufruf / PUBLISH without per-call heap allocation ---
+    # Header wird rechtsbündig vor das gecachte Topic geschrieben, die Payload dahinter
+    # kopiert und alles mit einem einzigen sock.write gesendet. Passt das Paket nicht in
+    # den Puffer, wird ohne Verkettung in Teilen geschrieben.
+    # The header is written right-aligned in front of the cached topic, the payload copied
+    # behind it and everything sent with a single sock.write. If the packet does not fit
+    # the buffer, it is written in parts without concatenating.
+    def _publish_packet(self, topic, msg, retain, qos, pid, dup):
+        t = self._topic(topic)
+        tx = self._tx
+        body = TX_HDR + len(t)
+        id_len = 2 if qos else 0
+        end = body + id_len + len(msg)
+
+        remaining = len(t) + id_len + len(msg)
+        start = TX_HDR - 1 - _rl_size(remaining)
+        tx[start] = 0x30 | (dup << 3) | (qos << 1) | retain
+        _put_rl(tx, start + 1, remaining)
 
+        if self._tx_topic is not t and body + 2 <= len(tx):
+            self._tx_mv[TX_HDR:body] = t
+            self._tx_topic = t
+
+        if self._tx_topic is not t:
+            self._write(tx, start, TX_HDR - start)
+            self._write(t, 0, len(t))
+            if qos:
+                self._pidbuf[0] = pid >> 8
+                self._pidbuf[1] = pid & 0xFF
+                self._write(self._pidbuf, 0, 2)
+            self._write(msg, 0, len(msg))
+            return
+
+        if qos:
+            tx[body] = pid >> 8
+            tx[body + 1] = pid & 0xFF
+        if end <= len(tx):
+            self._tx_mv[body + id_len:end] = msg
+            self._write(tx, start, end - start)
+        else:
+            self._write(tx, start, body + id_len - start)
+            self._write(msg, 0, len(msg))
+
+    # --- Nachricht senden; QoS 1 liefert die Paket-ID / Publish a message; QoS 1 returns the packet id ---
+    # QoS 1 wartet nicht auf das PUBACK: bis zu MQTT_INFLIGHT Nachrichten sind gleichzeitig
+    # unterwegs, Bestätigungen holt process_acks() ab. Nur bei vollem Fenster wird gewartet.
+    # QoS 1 does not wait for the PUBACK: up to MQTT_INFLIGHT messages are outstanding at
+    # once, process_acks() collects the acknowledgements. Only a full window blocks.
+    # Scheitert das Schreiben, ist die Nachricht nie ganz raus: der Slot wird frei, Wiederholen
+    # oder Puffern übernimmt der Aufrufer. Was im Fenster steht, wiederholt nur der Reconnect.
+    # If the write fails the message never fully went out: the slot is freed, the caller
+    # retries or buffers. Whatever is in the window is only retransmitted by the reconnect.
     def publish(self, topic, msg, retain=False, qos=0):
         if self.sock is None:
             raise MQTTException("Not connected")
 
-        pkt = bytearray()
-        pkt_type = 0x30 | (qos << 1) | retain
-        pkt.append(pkt_type)
+        if isinstance(msg, str):
+            msg = msg.encode()
+        if not qos:
+            self._publish_packet(topic, msg, retain, 0, 0, 0)
+            self.sent += 1
+            return 0
 
-        topic_bytes = topic.encode()
-        msg_bytes = msg.encode() if isinstance(msg, str) else msg
+        slot = self._free_slot()
+        pid = self._next_pid()
+        if not isinstance(msg, bytes):
+            msg = bytes(msg)  # Puffer kann sich ändern, Kopie für Wiederholung / buffer may change, copy for retransmit
+        self._inflight_ids[slot] = pid
+        self._inflight_msgs[slot] = (topic, msg, retain)
+        self._inflight += 1
+        try:
+            self._publish_packet(topic, msg, retain, 1, pid, 0)
+        except Exception:
+            self._release(slot)
+            raise
+        self.sent += 1
+        return pid
 
-        remaining_length = 2 + len(topic_bytes) + len(msg_bytes)
-        rl_bytes = bytearray()
+    def _next_pid(self):
         while True:
-            byte = remaining_length % 128
-            remaining_length //= 128
-            if remaining_length > 0:
-                byte |= 0x80
-            rl_bytes.append(byte)
-            if remaining_length == 0:
+            self._pid = self._pid % 0xFFFF + 1
+            if self._pid not in self._inflight_ids:
+                return self._pid
+
+    def _window_open(self):
+        return self._inflight < len(self._inflight_ids)
+
+    def _free_slot(self):
+        timeout_ms = int(getattr(config, "MQTT_ACK_TIMEOUT", 5) * 1000)
+        if not self._wait_for(self._window_open, timeout_ms):
+            raise MQTTException("PUBACK-Timeout / PUBACK timeout")
+        for slot in range(len(self._inflight_ids)):
+            if not self._inflight_ids[slot]:
+                return slot
+
+    def _resend_inflight(self):
+        for slot in range(len(self._inflight_ids)):
+            pid = self._inflight_ids[slot]
+            if pid:
+                topic, msg, retain = self._inflight_msgs[slot]
+                self._publish_packet(topic, msg, retain, 1, pid, 1)
+                self.retransmits += 1
+
+    def _release(self, slot):
+        self._inflight_ids[slot] = 0
+        self._inflight_msgs[slot] = None
+        self._inflight -= 1
+
+    def _ack(self, pid):
+        for slot in range(len(self._inflight_ids)):
+            if self._inflight_ids[slot] == pid:
+                self._release(slot)
+                self.acked += 1
+                return
+
+    def pending_acks(self):
+        return self._inflight
+
+    def _all_acked(self):
+        return not self._inflight
+
+    # --- Verfügbare Bytes lesen und vollständige Pakete verarbeiten / Read available bytes and handle complete packets ---
+    # Wartet höchstens timeout_ms auf Daten, blockiert nie darüber hinaus. Rückgabe: Anzahl Pakete.
+    # Waits at most timeout_ms for data, never blocks beyond that. Returns number of packets.
+    def _pump(self, timeout_ms=0):
+        handled = 0
+        while self._poller is not None and self._poller.poll(timeout_ms):
+            timeout_ms = 0
+            n = self.sock.readinto(self._rx_mv[self._rx_len:])
+            if n is None:
                 break
+            if not n:
+                raise MQTTException("Verbindung vom Broker geschlossen / Connection closed by broker")
+            self._rx_len += n
+            self._last_rx = time.ticks_ms()
+            handled += self._parse()
+        return handled
+
+    # --- Inkrementeller Parser über den Empfangspuffer / Incremental parser over the receive buffer ---
+    def _parse(self):
+        rx = self._rx
+        pos = 0
+        handled = 0
+        while pos < self._rx_len:
+            if self._skip:
+                n = min(self._skip, self._rx_len - pos)
+                self._skip -= n
+                pos += n
+                continue
+
+            # Remaining Length lesen, evtl. noch unvollständig / read remaining length, may be incomplete
+            i = pos + 1
+            length = 0
+            shift = 0
+            complete = False
+            while i < self._rx_len:
+                byte = rx[i]
+                i += 1
+                length |= (byte & 0x7F) << shift
+                shift += 7
+                if not byte & 0x80:
+                    complete = True
+                    break
+                if shift > 21:
+                    raise MQTTException("Ungültiges Paket vom Broker / Malformed packet from broker")
+            if not complete:
+                break
+
+            if i + length > self._rx_len:
+                if i - pos + length <= len(rx):
+                    break  # Rest kommt noch / rest still to come
+                # Passt nie in den Puffer – verwerfen / never fits the buffer – drop it
+                self._skip = length - (self._rx_len - i)
+                pos = self._rx_len
+                continue
+
+            self._handle(rx[pos] & 0xF0, i, length)
+            handled += 1
+            pos = i + length
 
-        pkt.extend(rl_bytes)
-        pkt.extend(struct.pack("!H", len(topic_bytes)))
-        pkt.extend(topic_bytes)
-        pkt.extend(msg_bytes)
+        # Unverarbeiteten Rest nach vorne schieben / move unprocessed rest to the front
+        rest = self._rx_len - pos
+        for k in range(rest):
+            rx[k] = rx[pos + k]
+        self._rx_len = rest
+        return handled
 
-        self.sock.write(pkt)
+    def _handle(self, ptype, body, length):
+        rx = self._rx
+        if ptype == 0x40 and length == 2:    # PUBACK
+            self._ack((rx[body] << 8) | rx[body + 1])
+        elif ptype == 0xD0:                  # PINGRESP
+            self._ping_sent = None
+            self.confirmed = self._ping_seq
+        elif ptype == 0x20 and length == 2:  # CONNACK
+            self.session_present = bool(rx[body] & 0x01)
+            self._connack = rx[body + 1]
+
+    # --- Warten bis check() wahr ist, höchstens timeout_ms / Wait until check() is true, at most timeout_ms ---
+    def _wait_for(self, check, timeout_ms):
+        start = time.ticks_ms()
+        while not check():
+            left = timeout_ms - time.ticks_diff(time.ticks_ms(), start)
+            if left <= 0:
+                return False
+            self._pump(left)
+        return True
+
+    # --- Vorliegende Pakete (v. a. PUBACKs) abholen ohne zu blockieren / Collect pending packets (mainly PUBACKs) without blocking ---
+    # timeout_ms > 0 wartet höchstens so lange auf Daten. Rückgabe: Anzahl Pakete.
+    # timeout_ms > 0 waits at most that long for data. Returns number of packets.
+    def process_acks(self, timeout_ms=0):
+        return self._pump(timeout_ms)
+
+    # --- Warten bis alle QoS-1-Nachrichten bestätigt sind / Wait until all QoS 1 messages are acked ---
+    def wait_acks(self, timeout_ms):
+        return self._wait_for(self._all_acked, timeout_ms)
+
+    def ping(self):
+        self._write(b"\xc0\0", 0, 2)
+        self._ping_sent = time.ticks_ms()
+        self._ping_seq = self.sent
+
+    def _pong(self):
+        return self._ping_sent is None
+
+    # --- Alle bisherigen PUBLISH per PINGREQ/PINGRESP bestätigen lassen / Have all PUBLISH so far confirmed via PINGREQ/PINGRESP ---
+    # Ein offener PINGREQ deckt nur die PUBLISH vor ihm ab – danach bei Bedarf ein zweiter.
+    # An open PINGREQ only covers the PUBLISH before it – a second one follows if needed.
+    def confirm(self, timeout_ms):
+        while self.confirmed < self.sent:
+            if self._ping_sent is None:
+                self.ping()
+            if not self._wait_for(self._pong, timeout_ms):
+                return False
+        return True
+
+    # --- Regelmäßig aufrufen: Pakete abholen, Keepalive, toten Broker erkennen ---
+    # --- Call regularly: collect packets, keepalive, detect a dead broker ---
+    # PINGREQ nach keepalive/2 Sekunden ohne Empfang (oder ohne Senden). Laufende QoS-0-
+    # Publishes verschieben den Ping nicht: sie kommen nie zurück, ein stiller Ausfall fiele
+    # sonst nicht auf. Bleibt PINGRESP länger als MQTT_READ_TIMEOUT aus, gilt der Broker
+    # als tot (MQTTException).
+    # PINGREQ after keepalive/2 seconds without receiving (or without sending). Ongoing QoS 0
+    # publishes do not postpone the ping: nothing comes back for them, so a silent outage
+    # would go unnoticed otherwise. If PINGRESP does not arrive within MQTT_READ_TIMEOUT,
+    # the broker counts as dead (MQTTException).
+    def service(self):
+        if self.sock is None:
+            raise MQTTException("Not connected")
+        self._pump(0)
+        now = time.ticks_ms()
+        if self._ping_sent is not None:
+            if time.ticks_diff(now, self._ping_sent) > self.read_timeout_ms:
+                raise MQTTException("Keine PINGRESP – Broker tot / No PINGRESP – broker dead")
+        elif self.keepalive and (time.ticks_diff(now, self._last_rx) >= self.keepalive * 500
+                                 or time.ticks_diff(now, self._last_tx) >= self.keepalive * 500):
+            self.ping()
 
 # --- MQTT Dummy/Inactive Mode Support ---
 
 def _dummy_log(msg):
-    print("[MQTT-DUMMY] " + msg)
+    logger.info("MQTT_DUMMY", msg)
 
 def connect():
+    result = _connect_begin()
+    if result is not None:
+        return result
+    try:
+        client.connect()
+    except Exception as e:
+        return _connect_failed(e)
+    return _connect_done()
+
+# --- Nicht-blockierende Variante für den async-Loop / Non-blocking variant for the async loop ---
+# Wartet zwischen den Schritten (TCP, TLS, CONNACK) höchstens MQTT_POLL_MS per asyncio.sleep_ms,
+# andere Tasks (Sensoren, LED) laufen solange weiter.
+# Waits at most MQTT_POLL_MS via asyncio.sleep_ms between the steps (TCP, TLS, CONNACK),
+# other tasks (sensors, LED) keep running meanwhile.
+async def connect_async():
+    import uasyncio as asyncio
+    result = _connect_begin()
+    if result is not None:
+        return result
+    poll_ms = getattr(config, "MQTT_POLL_MS", 20)
+    try:
+        for left in client.connect_steps(blocking=False):
+            await asyncio.sleep_ms(min(left, poll_ms))
+    except Exception as e:
+        return _connect_failed(e)
+    return _connect_done()
+
+# Modus und Backoff prüfen, Client anlegen; None = verbinden / check mode and backoff, create the client; None = go ahead
+def _connect_begin():
     mode = getattr(config, "MQTT_MODE", "active")
     if mode == "dummy":
         _dummy_log("Simuliere Verbindung zum Broker. / Simulating broker connection.")
         return SUCCESS
     if mode == "inactive":
-        print("[MQTT] MQTT deaktiviert. / MQTT inactive, skipping.")
+        logger.info("MQTT_OFF")
         return SUCCESS
 
-    global client
+    global client, reconnects
+
+    # Backoff läuft noch – nicht erneut versuchen / backoff still running – do not retry yet
+    if backoff_remaining_ms() > 0:
+        return FATAL_ERROR
+
+    # Objekt behalten: Adress-Cache, Puffer und unbestätigte QoS-1-Nachrichten überleben den Reconnect
+    # Keep the object: address cache, buffers and unacked QoS 1 messages survive the reconnect
+    if client is None:
+        try:
+            client = MQTTClient(
+                config.MQTT_CLIENT_ID,
+                config.MQTT_BROKER,
+                port=config.MQTT_PORT,
+                user=config.MQTT_USER,
+                password=config.MQTT_PASSWORD,
+                ssl_context=tls_context(),
+            )
+        except Exception as e:
+            return _connect_failed(e)
+        client._pid = resume_pid
+    else:
+        reconnects += 1
+    return None
+
+def _connect_done():
+    global last_connect_ms
+    last_connect_ms = client.connect_ms
+    _reset_backoff()
+    logger.info("MQTT_RESUMED" if client.session_present else "MQTT_CONNECTED", last_connect_ms)
+    if client.ssl_context is not None:
+        logger.info("MQTT_TLS", client.tls_handshake_ms, client.tls_resumed, client.tls_heap)
+    return SUCCESS
+
+def _connect_failed(e):
+    logger.error("MQTT_CONN_FAIL", e)
+    health.error("mqtt", e)
+    if client is not None:
+        client.close()
+    _increase_backoff()
+    return FATAL_ERROR
+
+# --- TLS-Kontext einmalig anlegen / Create the TLS context once ---
+# Zertifikate werden beim ersten Aufruf in den RAM geladen, jeder Reconnect nutzt denselben
+# Kontext. Ohne MQTT_CA_FILE wird das Broker-Zertifikat nicht geprüft.
+# Certificates are loaded into RAM on the first call, every reconnect uses the same context.
+# Without MQTT_CA_FILE the broker certificate is not verified.
+_tls_ctx = None
+
+def tls_context():
+    global _tls_ctx
+    if not getattr(config, "MQTT_TLS", False):
+        return None
+    if _tls_ctx is None:
+        import ssl
+        ctx = ssl.SSLContext(ssl.PROTOCOL_TLS_CLIENT)
+        ca_file = getattr(config, "MQTT_CA_FILE", None)
+        if ca_file:
+            ctx.load_verify_locations(cafile=ca_file)
+            ctx.verify_mode = ssl.CERT_REQUIRED
+        else:
+            logger.warn("MQTT_NO_CA")
+        cert_file = getattr(config, "MQTT_CERT_FILE", None)
+        if cert_file:
+            ctx.load_cert_chain(cert_file, getattr(config, "MQTT_KEY_FILE", None))
+        _tls_ctx = ctx
+    return _tls_ctx
+
+# --- Exponentielles Backoff mit Jitter / Exponential backoff with jitter ---
+# Wartezeit verdoppelt sich je Fehlschlag (MQTT_BACKOFF_MIN .. MQTT_BACKOFF_MAX Sekunden),
+# davon wird zufällig bis zur Hälfte abgezogen, damit Sensoren nicht im Gleichschritt reconnecten.
+# The delay doubles per failure (MQTT_BACKOFF_MIN .. MQTT_BACKOFF_MAX seconds), up to half of it
+# is randomly taken off so that sensors do not reconnect in lockstep.
+reconnects = 0
+last_connect_ms = None
+_backoff_ms = 0
+_retry_at = None
+
+def _reset_backoff():
+    global _backoff_ms, _retry_at
+    _backoff_ms = 0
+    _retry_at = None
+
+def _increase_backoff():
+    global _backoff_ms, _retry_at
+    low = int(getattr(config, "MQTT_BACKOFF_MIN", 1) * 1000)
+    high = int(getattr(config, "MQTT_BACKOFF_MAX", 60) * 1000)
+    _backoff_ms = min(high, max(low, _backoff_ms * 2))
+    half = _backoff_ms // 2
+    delay = _backoff_ms - (random.getrandbits(16) * half >> 16)
+    _retry_at = time.ticks_add(time.ticks_ms(), delay)
+
+def backoff_remaining_ms():
+    if _retry_at is None:
+        return 0
+    left = time.ticks_diff(_retry_at, time.ticks_ms())
+    return left if left > 0 else 0
+
+# --- Paket-ID über Deep-Sleep retten (persistente Session) / Keep the packet id across deep sleep (persistent session) ---
+resume_pid = 0     # Startwert für den nächsten Client / start value for the next client
+
+def packet_id():
+    return client._pid if client is not None else resume_pid
+
+# --- Sauber trennen (vor dem Schlafen): QoS-1-Bestätigungen abwarten, DISCONNECT senden ---
+# --- Disconnect cleanly (before sleeping): wait for QoS 1 acks, send DISCONNECT ---
+def disconnect():
+    if getattr(config, "MQTT_MODE", "active") != "active" or not is_connected():
+        return SUCCESS
     try:
-        client = MQTTClient(
-            config.MQTT_CLIENT_ID,
-            config.MQTT_BROKER,
-            port=config.MQTT_PORT,
-            user=config.MQTT_USER,
-            password=config.MQTT_PASSWORD,
-        )
-        client.connect()
-        print("📡 MQTT verbunden. / MQTT connected.")
+        if client.pending_acks():
+            client.wait_acks(client.read_timeout_ms)
+        if unconfirmed:
+            client.confirm(client.read_timeout_ms)
+            _drop_confirmed()
+        client.disconnect()
         return SUCCESS
     except Exception as e:
-        print("❌ MQTT-Verbindung fehlgeschlagen: / Connection failed:", e)
-        client = None
+        health.error("mqtt", e)
+        client.close()
         return FATAL_ERROR
 
 def is_connected():
     mode = getattr(config, "MQTT_MODE", "active")
     if mode in ["dummy", "inactive"]:
         return True
-    return client is not None
+    return client is not None and client.sock is not None
 
-def publish(payload: dict):
+# --- Keepalive und eingehende Pakete bedienen / Serve keepalive and incoming packets ---
+# Regelmäßig aufrufen (MQTT_CHECK_INTERVAL). FATAL_ERROR = Broker tot, Socket geschlossen.
+# Call regularly (MQTT_CHECK_INTERVAL). FATAL_ERROR = broker dead, socket closed.
+def service():
+    if getattr(config, "MQTT_MODE", "active") != "active" or not is_connected():
+        return SUCCESS
+    try:
+        client.service()
+        return SUCCESS
+    except Exception as e:
+        logger.warn("MQTT_LOST", e)
+        health.error("mqtt", e)
+        client.close()
+        return FATAL_ERROR
+
+# --- Payload an ein Topic senden (JSON) / Send a payload to a topic (JSON) ---
+# tpl: template.Template/bincodec.Codec für payload, sonst ujson.dumps / template.Template/bincodec.Codec for payload, else ujson.dumps
+def _send(topic, payload, tpl=None, retain=False):
     mode = getattr(config, "MQTT_MODE", "active")
     if mode == "dummy":
         _dummy_log("Publish: " + str(payload))
         return SUCCESS
     if mode == "inactive":
-        print("[MQTT] Publish übersprungen (deaktiviert). / Publish skipped (inactive).")
+        logger.debug("MQTT_SKIP")
         return SUCCESS
 
     global client
 
-    if client is None:
-        print("⚠️ MQTT-Client nicht verbunden – versuche Reconnect... / Not connected, try reconnect")
+    # async: Reconnect nur nicht-blockierend im MQTT-Task (connect_async) / async: reconnect only non-blocking in the MQTT task (connect_async)
+    inline = getattr(config, "LOOP_MODE", "sync") != "async"
+    if not is_connected():
+        if not inline:
+            return FATAL_ERROR
+        logger.warn("MQTT_RECONNECT")
         if connect() != SUCCESS:
             return FATAL_ERROR
         else:
-            print("✅ MQTT-Reconnect erfolgreich / Reconnect OK")
+            logger.info("MQTT_RECONNECT_OK")
 
-    try:
-        json_data = ujson.dumps(payload)
-        client.publish(config.MQTT_TOPIC, json_data)
-        print("📤 MQTT: Gesendet: / Sent:", json_data)
+    # Schlägt das Senden fehl: neu verbinden und genau einmal wiederholen. RECOVERED heißt,
+    # die Nachricht ist nach dem Reconnect wirklich raus.
+    # If sending fails: reconnect and retry exactly once. RECOVERED means the message really
+    # went out after the reconnect.
+    for attempt in range(2):
+        try:
+            if isinstance(payload, (str, bytes, bytearray)):
+                json_data = payload
+            elif tpl is not None:
+                json_data = tpl.encode(payload)  # memoryview auf den Puffer des Templates / memoryview on the template's buffer (JSON oder binär / or binary)
+            else:
+                json_data = ujson.dumps(payload)
+            client.process_acks()
+            client.publish(topic, json_data, retain, qos=getattr(config, "MQTT_QOS", 0))
+            if logger.enabled(logger.DEBUG):
+                logger.debug("MQTT_SENT", topic, bytes(json_data) if isinstance(json_data, memoryview) else json_data)
+            if attempt:
+                logger.info("MQTT_RECOVERED")
+                return RECOVERED
+            return SUCCESS
+
+        except Exception as e:
+            logger.error("MQTT_SEND_FAIL", e)
+            health.error("publish", e)
+            client.close()
+            if not inline:
+                return FATAL_ERROR
+            if attempt or connect() != SUCCESS:
+                break
+
+    logger.error("MQTT_RECONNECT_FAIL")
+    # Optional: Blink LED für Fehleranzeige / For error indication
+    import leds
+    leds.signal(leds.onboard_led, 3, 400)
+    return FATAL_ERROR
+
+# --- Batch-Modus: mehrere Messungen in einem PUBLISH / Batch mode: several readings in one PUBLISH ---
+# MQTT_BATCH_MODE = None (Standard, ein JSON je Messung / default, one JSON per reading),
+# "columnar": {"f": [Felder], "t": [Epochs], "v": [[Spalte], ...]}
+# "delta":    {"f": [Felder], "t0": Epoch, "dt": [Sekunden seit t0], "v": [[Spalte], ...]}
+# date/time/epoch entfallen im Batch, der Zeitstempel steckt in t bzw. t0/dt (ms bleibt als Spalte).
+# date/time/epoch are omitted in batches, the timestamp is carried in t or t0/dt (ms stays a column).
+# MQTT_PAYLOAD_FORMAT "binary": die Records liegen einfach hintereinander, jeder mit eigenem Epoch.
+# MQTT_PAYLOAD_FORMAT "binary": the records simply follow each other, each with its own epoch.
+#
+# batch_rows liegt im RAM – ein Reset oder Stromausfall verliert, was darin wartet. Mit
+# Flash-Puffer sammelt main.py deshalb nicht hier, sondern schreibt jede Messung sofort in den
+# Ring; drain_backlog() baut den Batch erst beim Senden daraus (batch_due()). Ohne Flash-Puffer
+# begrenzen MQTT_BATCH_SIZE und MQTT_BATCH_SECONDS den möglichen Verlust.
+# batch_rows lives in RAM – a reset or power loss loses whatever waits in it. With a flash
+# buffer main.py therefore does not collect here but writes every reading straight into the
+# ring; drain_backlog() builds the batch from it only when sending (batch_due()). Without a
+# flash buffer MQTT_BATCH_SIZE and MQTT_BATCH_SECONDS bound the possible loss.
+BATCH_SKIP_FIELDS = ("date", "time", "epoch")
+
+batch_rows = []        # [(epoch, payload), ...] – noch nicht gesendet / not sent yet
+_batch_bytes = 0       # geschätzte JSON-Größe / estimated JSON size
+_batch_started = None  # ticks_ms der ältesten Messung / ticks_ms of the oldest reading
+
+def _value_size(value):
+    if value is None:
+        return 4
+    if isinstance(value, str):
+        return len(value) + 2
+    return len(str(value))
+
+def _batch_fields(payload):
+    fields = payload_template.fields if payload_template is not None else payload
+    return [f for f in fields if f not in BATCH_SKIP_FIELDS]
+
+def _row_size(epoch, payload):
+    if _binary():
+        return payload_template.size
+    size = len(str(epoch)) + 2
+    for field in _batch_fields(payload):
+        size += _value_size(payload[field]) + 2
+    return size
+
+def _encode_batch(rows):
+    if _binary():
+        size = payload_template.size
+        buf = bytearray(size * len(rows))
+        pos = 0
+        for _, payload in rows:
+            buf[pos:pos + size] = payload_template.encode(payload)
+            pos += size
+        return buf
+    fields = _batch_fields(rows[0][1])
+    stamps = [epoch for epoch, _ in rows]
+    doc = {"f": fields}
+    if getattr(config, "MQTT_BATCH_MODE", None) == "delta":
+        doc["t0"] = stamps[0]
+        doc["dt"] = [epoch - stamps[0] for epoch in stamps]
+    else:
+        doc["t"] = stamps
+    doc["v"] = [[payload.get(field) for _, payload in rows] for field in fields]
+    return ujson.dumps(doc)
+
+# --- Batch senden (force: auch wenn noch nicht fällig) / Send batch (force: even if not due yet) ---
+def flush_batch(force=False):
+    global _batch_bytes, _batch_started
+    if not batch_rows:
         return SUCCESS
+    if not force:
+        max_ms = int(getattr(config, "MQTT_BATCH_SECONDS", 60) * 1000)
+        if time.ticks_diff(time.ticks_ms(), _batch_started) < max_ms and len(batch_rows) < getattr(config, "MQTT_BATCH_SIZE", 10):
+            return SUCCESS
 
-    except Exception as e:
-        print("❌ Fehler beim Senden: / Error on publish:", e)
+    if not _schema_ok():
+        return FATAL_ERROR
+    topic = config.MQTT_TOPIC + getattr(config, "MQTT_BATCH_TOPIC_SUFFIX", "/batch")
+    result = _send(topic, _encode_batch(batch_rows))
+    if result == SUCCESS:
+        if unconfirmed is not None:
+            _track(batch_rows)
+        batch_rows.clear()
+        _batch_bytes = 0
+        _batch_started = None
+    return result
+
+# --- Batch aus dem Flash-Puffer fällig? Wie flush_batch(): voll oder älteste Messung alt genug ---
+# --- Batch from the flash buffer due? As in flush_batch(): full or the oldest reading old enough ---
+def batch_due(store):
+    if store.pending() >= getattr(config, "MQTT_BATCH_SIZE", 10):
+        return True
+    record = store.peek()
+    return record is not None and time.time() - record[0] >= getattr(config, "MQTT_BATCH_SECONDS", 60)
+
+def _batch_add(payload, epoch):
+    global _batch_bytes, _batch_started
+    row = _row_size(epoch, payload)
+    max_bytes = getattr(config, "MQTT_BATCH_MAX_BYTES", 1024)
+
+    # Byte-Limit: erst den vollen Batch senden / byte limit: send the full batch first
+    if batch_rows and _batch_bytes + row > max_bytes:
+        result = flush_batch(force=True)
+        if result != SUCCESS:
+            return result
+
+    if not batch_rows:
+        if _binary():
+            _batch_bytes = 0
+        else:
+            fields = _batch_fields(payload)
+            _batch_bytes = len(ujson.dumps({"f": fields, "t0": epoch, "dt": [], "v": [[]] * len(fields)}))
+        _batch_started = time.ticks_ms()
+    # Mit Layout füllt sensors.build_payload() sein Dict beim nächsten Mal neu / with a layout sensors.build_payload() refills its dict next time
+    batch_rows.append((epoch, payload if payload_template is None else dict(payload)))
+    _batch_bytes += row
+
+    result = flush_batch()
+    if result != SUCCESS:
+        # Aktuelle Messung zurück an den Aufrufer (wird gepuffert), Rest bleibt im Batch
+        # Hand the current reading back to the caller (gets buffered), the rest stays batched
+        batch_rows.pop()
+        _batch_bytes -= row
+    return result
+
+# Vorkompiliertes Payload-Layout (sensors.compile_payload()), setzt main.py / precompiled payload layout, set by main.py
+payload_template = None
+schema_sent = None     # Schema-ID, die zuletzt retained gesendet wurde / schema id last sent retained
+
+# --- Binär-Schema retained an MQTT_TOPIC + MQTT_SCHEMA_TOPIC_SUFFIX (einmal je Schema) ---
+# --- Binary schema retained to MQTT_TOPIC + MQTT_SCHEMA_TOPIC_SUFFIX (once per schema) ---
+def publish_schema():
+    global schema_sent
+    topic = config.MQTT_TOPIC + getattr(config, "MQTT_SCHEMA_TOPIC_SUFFIX", "/schema")
+    result = _send(topic, ujson.dumps(payload_template.schema()), retain=True)
+    if result == SUCCESS:
+        schema_sent = payload_template.id
+    return result
+
+def _binary():
+    return getattr(config, "MQTT_PAYLOAD_FORMAT", "json") == "binary" and payload_template is not None
+
+# Vor dem ersten Binär-Record muss das Schema raus sein / the schema must be out before the first binary record
+def _schema_ok():
+    return not _binary() or schema_sent == payload_template.id or publish_schema() == SUCCESS
+
+# --- Messung senden / Publish a reading ---
+# Standard: ein JSON-Objekt je Messung auf MQTT_TOPIC. Im Batch-Modus wird gesammelt
+# (epoch = Zeitstempel der Messung) und gesendet, sobald der Batch voll oder fällig ist.
+# Default: one JSON object per reading on MQTT_TOPIC. In batch mode readings are collected
+# (epoch = timestamp of the reading) and sent once the batch is full or due.
+def publish(payload: dict, epoch=None):
+    if epoch is None:
+        epoch = time.time()
+    if getattr(config, "MQTT_BATCH_MODE", None):
+        return _batch_add(payload, epoch)
+    if not _schema_ok():
+        return FATAL_ERROR
+    result = _send(config.MQTT_TOPIC, payload, payload_template)
+    if result != FATAL_ERROR and unconfirmed is not None:
+        _track(((epoch, payload if payload_template is None else dict(payload)),))
+    return result
+
+# --- QoS 0: gesendet, aber noch nicht bestätigt / QoS 0: sent but not confirmed yet ---
+# Ein Broker, der still verschwindet, verschluckt QoS-0-Publishes ohne Fehler. Mit Flash-Puffer
+# (main.py setzt unconfirmed = []) bleiben die Messungen hier, bis ein PINGRESP sie bestätigt;
+# stirbt die Verbindung vorher, liefert lost() sie zum Puffern. Spätestens nach
+# MQTT_CONFIRM_EVERY offenen Messungen geht ein PINGREQ raus. Doppelte Zustellung ist möglich
+# (at-least-once), Verlust nicht. QoS 1 braucht das nicht, das In-Flight-Fenster wiederholt selbst.
+# A broker that silently disappears swallows QoS 0 publishes without an error. With the flash
+# buffer (main.py sets unconfirmed = []) the readings stay here until a PINGRESP confirms them;
+# if the connection dies first, lost() hands them out for buffering. After MQTT_CONFIRM_EVERY
+# open readings at the latest a PINGREQ goes out. Duplicates are possible (at-least-once),
+# loss is not. QoS 1 does not need this, the in-flight window retransmits by itself.
+unconfirmed = None     # [(Verbindung / link, Paket-Nr. / packet no., epoch, payload)], None = aus / off
+
+def _track(rows):
+    if client is None or getattr(config, "MQTT_QOS", 0):
+        return
+    for epoch, payload in rows:
+        unconfirmed.append((client.link, client.sent, epoch, payload))
+    _drop_confirmed()
+    if len(unconfirmed) >= getattr(config, "MQTT_CONFIRM_EVERY", 20) and client._ping_sent is None:
         try:
-            client.disconnect()
-            client.connect()
-            print("🔁 MQTT reconnect durch disconnect/connect. / Reconnect after error.")
-            return RECOVERED
-        except Exception as e:
-            print("❌ Reconnect fehlgeschlagen: / Reconnect failed:", e)
-            client = None
-            # Optional: Blink LED für Fehleranzeige / For error indication
-            import uasyncio as asyncio
-            asyncio.create_task(leds.blink(leds.onboard_led, 3, 400))
-            return FATAL_ERROR
+            client.ping()
+        except Exception:
+            pass  # service() merkt den Ausfall / service() notices the failure
+
+def _drop_confirmed():
+    while unconfirmed and unconfirmed[0][0] == client.link and unconfirmed[0][1] <= client.confirmed:
+        unconfirmed.pop(0)
+
+# --- Messungen toter Verbindungen abholen: [(epoch, payload), ...] / Collect readings of dead connections ---
+def lost():
+    if not unconfirmed:
+        return []
+    _drop_confirmed()
+    alive = client.sock is not None
+    rows = [(row[2], row[3]) for row in unconfirmed if not alive or row[0] != client.link]
+    if rows:
+        unconfirmed[:] = [row for row in unconfirmed if alive and row[0] == client.link]
+    return rows
+
+# --- Log-Einträge an MQTT_TOPIC + LOG_TOPIC_SUFFIX / Log records to MQTT_TOPIC + LOG_TOPIC_SUFFIX ---
+def publish_log(rows):
+    return _send(config.MQTT_TOPIC + getattr(config, "LOG_TOPIC_SUFFIX", "/log"), rows)
+
+# --- Health-Meldung an MQTT_TOPIC + HEALTH_TOPIC_SUFFIX (nie gebatcht) / Health message to MQTT_TOPIC + HEALTH_TOPIC_SUFFIX (never batched) ---
+def publish_health(payload: dict):
+    return _send(config.MQTT_TOPIC + getattr(config, "HEALTH_TOPIC_SUFFIX", "/health"), payload)
+
+# --- Store-and-Forward-Rückstand senden / Drain store-and-forward backlog ---
+# Sendet höchstens SF_DRAIN_BATCH Records alle SF_DRAIN_INTERVAL Sekunden, mit batch
+# sofort bis zu batch Records. build(epoch, values) baut daraus das Payload. Im Batch-Modus
+# ohne batch nur, wenn batch_due(). Rückgabe: Anzahl gesendeter Records.
+# Sends at most SF_DRAIN_BATCH records every SF_DRAIN_INTERVAL seconds, with batch up to
+# batch records right away. build(epoch, values) turns a record into the payload. In batch
+# mode without batch only when batch_due(). Returns number of records sent.
+_last_drain = None
+
+def drain_backlog(store, build, batch=None):
+    global _last_drain
+    if store is None or not is_connected() or store.pending() <= 0:
+        return 0
+
+    if batch is None:
+        interval_ms = int(getattr(config, "SF_DRAIN_INTERVAL", 1) * 1000)
+        now = time.ticks_ms()
+        if _last_drain is not None and time.ticks_diff(now, _last_drain) < interval_ms:
+            return 0
+        _last_drain = now
+        batch = getattr(config, "SF_DRAIN_BATCH", 10)
+        # Im Batch-Modus liegen auch die laufenden Messungen im Ring: erst senden, wenn fällig
+        # In batch mode the current readings are in the ring too: send only once due
+        if getattr(config, "MQTT_BATCH_MODE", None):
+            if not batch_due(store):
+                return 0
+            batch = max(batch, getattr(config, "MQTT_BATCH_SIZE", 10))
+    sent = 0
+    while sent < batch:
+        record = store.peek()
+        if record is None:
+            break
+        if publish(build(*record), record[0]) != SUCCESS:
+            break
+        store.advance()
+        sent += 1
+
+    # Lesezeiger erst sichern, wenn auch der Batch raus ist / persist cursor only once the batch is out
+    if sent and flush_batch(force=True) == SUCCESS:
+        store.commit()
+        logger.info("SF_DRAIN", sent, store.pending())
+    return sent
@@ -0,0 +1,167 @@
+# power.py – Duty-Cycle-Betrieb: Zustand über Schlafphasen retten, Wachzeit je Phase messen
+# power.py – Duty-cycled operation: keep state across sleep, measure awake time per phase
+#
+# Im LOOP_MODE "duty" wacht das Gerät je UPDATE_INTERVAL kurz auf, misst, sendet bei Bedarf
+# und schläft dann mit abgeschalteten Sensoren und Funk (POWER_SLEEP "light" oder "deep").
+# Nach Deep-Sleep startet die Firmware neu – was für einen schnellen Wiedereinstieg nötig
+# ist (Zähler, Deadband-Referenz, Store-Kopf, WLAN-Cache, Uhrzeit), liegt in retained: im
+# RTC-Speicher, wenn der Port einen hat, sonst als kleine JSON-Datei POWER_STATE_FILE.
+# In LOOP_MODE "duty" the device wakes briefly every UPDATE_INTERVAL, measures, publishes
+# if needed and then sleeps with sensors and radio off (POWER_SLEEP "light" or "deep").
+# After deep sleep the firmware restarts – what it needs to resume quickly (counters,
+# deadband reference, store head, WiFi cache, time) is kept in retained: in RTC memory if the port
+# has one, otherwise as a small JSON file POWER_STATE_FILE.
+#
+# Wachzeit zählt ab dem Import dieses Moduls (Boot davor fehlt) in Phasen: mark(name) bucht
+# die Zeit seit der vorigen Marke auf name.
+# Awake time counts from importing this module (boot before that is missing) in phases:
+# mark(name) books the time since the previous mark to name.
+
+import time
+import config
+import machine
+import ujson
+import logger
+
+retained = {}      # über Deep-Sleep gerettet / kept across deep sleep
+warm = False       # True = aus Deep-Sleep aufgewacht, retained ist gültig / woke from deep sleep, retained is valid
+phases = {}        # Phase -> ms in diesem Wachzyklus / phase -> ms in this wake cycle
+
+_mark = time.ticks_ms()
+_awake_start = _mark
+
+# --- RTC-Speicher (z. B. ESP32), None wenn der Port keinen hat / RTC memory (e.g. ESP32), None if the port has none ---
+def _rtc_memory():
+    rtc = machine.RTC()
+    return rtc if hasattr(rtc, "memory") else None
+
+def _load():
+    rtc = _rtc_memory()
+    if rtc is not None:
+        raw = rtc.memory()
+        return ujson.loads(raw) if raw else {}
+    with open(getattr(config, "POWER_STATE_FILE", "wake.json")) as f:
+        return ujson.load(f)
+
+def save():
+    raw = ujson.dumps(retained)
+    rtc = _rtc_memory()
+    if rtc is not None:
+        rtc.memory(raw)
+        return
+    with open(getattr(config, "POWER_STATE_FILE", "wake.json"), "w") as f:
+        f.write(raw)
+
+# --- Nach dem Boot: gesicherten Zustand laden (nur nach Deep-Sleep) / After boot: load saved state (deep sleep only) ---
+# Der gesicherte Zustand überlebt auch einen Stromausfall (Datei im Flash), entscheiden muss
+# also etwas, das dabei verloren geht: ein PWRON_RESET ist immer ein Kaltstart. Ports mit
+# machine.DEEPSLEEP_RESET (ESP32) erkennen den Warmstart daran. Auf rp2 endet Deep-Sleep mit
+# einem Reset wie jeder andere – dort zählt zusätzlich die gesicherte Weckzeit: sie darf
+# höchstens WAKE_SLACK_S zurückliegen, sofern die Uhr glaubwürdig ist (Jahr >= MIN_YEAR).
+# Eine verlorene Uhr (rp2 startet 2021) lässt die Weckzeit ungeprüft und wird nur bei
+# einem Warmstart auf sie gestellt.
+# The saved state survives a power loss as well (file on flash), so the decision has to
+# rest on something that gets lost: a PWRON_RESET is always a cold start. Ports with
+# machine.DEEPSLEEP_RESET (ESP32) recognise the warm start by it. On rp2 deep sleep ends
+# in a reset like any other – there the saved wake time counts as well: it may lie at most
+# WAKE_SLACK_S in the past, provided the clock is plausible (year >= MIN_YEAR). A lost
+# clock (rp2 starts at 2021) leaves the wake time unchecked and is only set to it on a
+# warm start.
+WAKE_SLACK_S = 60
+MIN_YEAR = 2024
+
+def resume():
+    global retained, warm
+    retained = {}
+    warm = False
+    cause = machine.reset_cause()
+    deep = getattr(machine, "DEEPSLEEP_RESET", None)
+    if cause != getattr(machine, "PWRON_RESET", None) and (deep is None or cause == deep):
+        try:
+            saved = _load()
+        except (OSError, ValueError):
+            saved = None
+        if saved is not None and (deep is not None or not _clock_ok() or _wake_due(saved.get("t"))):
+            retained = saved
+            warm = True
+            _restore_clock(retained.get("t"))
+    return retained
+
+def _clock_ok():
+    return time.localtime()[0] >= MIN_YEAR
+
+def _wake_due(wake_epoch):
+    return wake_epoch is not None and time.time() <= wake_epoch + WAKE_SLACK_S
+
+# Uhr nach dem Schlaf verloren (Port ohne laufende RTC)? Dann auf die erwartete Weckzeit stellen
+# Clock lost over sleep (port without a running RTC)? Then set it to the expected wake time
+def _restore_clock(wake_epoch):
+    if wake_epoch is None or time.time() >= wake_epoch - 60:
+        return
+    tm = time.localtime(wake_epoch + time.ticks_ms() // 1000)
+    machine.RTC().datetime((tm[0], tm[1], tm[2], tm[6], tm[3], tm[4], tm[5], 0))
+
+# --- Zeit seit der letzten Marke auf Phase name buchen / Book the time since the last mark to phase name ---
+def mark(name):
+    global _mark
+    now = time.ticks_ms()
+    phases[name] = phases.get(name, 0) + time.ticks_diff(now, _mark)
+    _mark = now
+
+def awake_ms():
+    return time.ticks_diff(time.ticks_ms(), _awake_start)
+
+# --- Nur jede POWER_UPLINK_EVERY-te Messung sofort senden / Publish only every POWER_UPLINK_EVERY-th reading right away ---
+def uplink_due():
+    n = retained.get("q", 0) + 1
+    if n >= getattr(config, "POWER_UPLINK_EVERY", 1):
+        n = 0
+    retained["q"] = n
+    return n == 0
+
+# --- Wachzeit dieses Zyklus in die Summen übernehmen / Add this cycle's awake time to the totals ---
+def _book(sleep_ms):
+    mark("idle")
+    awake = awake_ms()
+    retained["n"] = retained.get("n", 0) + 1
+    retained["aw"] = retained.get("aw", 0) + awake
+    retained["sl"] = retained.get("sl", 0) + sleep_ms
+    retained["last"] = awake
+    totals = retained.get("ph") or {}
+    for name, ms in phases.items():
+        totals[name] = totals.get(name, 0) + ms
+    retained["ph"] = totals
+    phases.clear()
+    retained["t"] = time.time() + sleep_ms // 1000
+    return awake
+
+# --- Schlafen bis zum nächsten Zyklus / Sleep until the next cycle ---
+# Deep-Sleep kehrt nicht zurück (Neustart), Light-Sleep schon – RAM und Objekte bleiben.
+# Deep sleep does not return (reboot), light sleep does – RAM and objects are kept.
+def sleep(sleep_ms):
+    global _mark, _awake_start
+    _book(sleep_ms)
+    if getattr(config, "POWER_SLEEP", "deep") == "deep":
+        try:
+            save()
+        except OSError as e:
+            # Schlafen trotzdem, der nächste Start ist dann kalt / sleep anyway, the next start is cold
+            logger.warn("POWER_SAVE_FAIL", e)
+        machine.deepsleep(sleep_ms)
+    machine.lightsleep(sleep_ms)
+    _mark = _awake_start = time.ticks_ms()
+
+# --- Kennzahlen für die Health-Meldung / Figures for the health message ---
+# ph: Phase -> mittlere ms je Aufwachen / phase -> mean ms per wake
+def stats():
+    n = retained.get("n", 0)
+    aw = retained.get("aw", 0)
+    sl = retained.get("sl", 0)
+    return {
+        "wakes": n,
+        "awake_s": aw // 1000,
+        "sleep_s": sl // 1000,
+        "last_ms": retained.get("last"),
+        "duty": round(aw / (aw + sl), 4) if aw + sl else None,
+        "ph": {name: ms // n for name, ms in (retained.get("ph") or {}).items()} if n else {},
+    }
@@ -0,0 +1,258 @@
+# ringbuf.py – Persistenter Ringpuffer auf dem Flash für Store-and-Forward
+# ringbuf.py – Persistent on-flash ring buffer for store-and-forward
+#
+# Datei = SECTORS Sektoren à SECTOR_SIZE Bytes, jeder mit Header (Magic, Sequenznummer).
+# Sektor-Index = Sequenz % SECTORS, Sektoren werden reihum beschrieben (gleichmäßiger
+# Verschleiß), Records nur angehängt. Beim Booten genügt ein Scan der Header.
+# File = SECTORS sectors of SECTOR_SIZE bytes, each with a header (magic, sequence number).
+# Sector index = sequence % SECTORS, sectors are written round-robin (even wear),
+# records are append-only. Booting only needs a scan of the headers.
+#
+# Record = Marker, Epoch, danach ein bincodec-Record der gespeicherten Felder (fields, z. B.
+# die Felder des Payloads samt Kennzahlen). Die Schema-ID steht im Sektor-Header – ändert
+# sich das Layout, wird die Datei neu formatiert statt falsch gelesen.
+# Record = marker, epoch, then a bincodec record of the stored fields (fields, e.g. the
+# payload's fields including statistics). The schema id is in the sector header – if the
+# layout changes, the file is reformatted instead of being misread.
+
+import os
+import struct
+import bincodec
+
+MAGIC = b"R5"
+HEADER_FMT = "<2sIHH"       # Magic, Sektor-Sequenz, Record-Größe, Schema-ID / magic, sector sequence, record size, schema id
+HEADER_SIZE = 10
+RECORD_HEAD_FMT = "<BI"     # Marker, Epoch / marker, epoch
+RECORD_HEAD_SIZE = 5
+MARKER = 0xA5
+CURSOR_FMT = "<IH"          # Lese-Sequenz, Lese-Slot / read sequence, read slot
+FIELDS = ("temp", "pressure", "humidity", "lux")
+
+# Layout der gespeicherten Felder; Zeitfelder zählen nicht (die Zeit ist der Epoch des Records)
+# Layout of the stored fields; time fields do not count (the time is the record's epoch)
+def _codec(fields):
+    return bincodec.Codec([f for f in fields if f not in bincodec.TIME_FIELDS])
+
+# --- Record-Größe für eine Feldliste (z. B. für SF_SECTOR_SIZE) / Record size for a field list (e.g. for SF_SECTOR_SIZE) ---
+def record_size(fields=FIELDS):
+    return RECORD_HEAD_SIZE + _codec(fields).size
+
+class RingBuffer:
+    # head: (Sektor-Sequenz, Slot) aus head() des letzten Laufs – passt er zum Flash, entfällt der Scan
+    # head: (sector sequence, slot) from head() of the last run – if it matches the flash, the scan is skipped
+    # fields: gespeicherte Felder / stored fields
+    def __init__(self, path, sectors=8, sector_size=4096, head=None, fields=FIELDS):
+        self.path = path
+        self.cursor_path = path + ".cur"
+        self.sectors = sectors
+        self.sector_size = sector_size
+        self.codec = _codec(fields)
+        self.record_size = RECORD_HEAD_SIZE + self.codec.size
+        self.slots = (sector_size - HEADER_SIZE) // self.record_size
+        self.dropped = 0
+
+        # Feste Puffer – Speicherbedarf unabhängig von der Ausfalldauer
+        # Fixed buffers – memory use independent of outage length
+        self._rec = bytearray(self.record_size)
+        self._hdr = bytearray(HEADER_SIZE)
+        self._marker = memoryview(self._rec)[:1]
+
+        self.head_seq = 0
+        self.head_slot = 0
+        self.read_seq = 0
+        self.read_slot = 0
+        self._committed = None
+
+        self._open(head)
+
+    # --- Datei öffnen oder anlegen, Kopf/Lesezeiger finden / Open or create file, find head/cursor ---
+    def _open(self, hint=None):
+        size = self.sectors * self.sector_size
+        try:
+            exists = os.stat(self.path)[6] == size
+        except OSError:
+            exists = False
+
+        if not exists:
+            self._format(size)
+        self.f = open(self.path, "r+b")
+
+        if exists and hint is not None and self._is_head(hint[0], hint[1]):
+            self.head_seq, self.head_slot = hint[0], hint[1]
+            self._load_cursor()
+            return
+
+        head = self._scan_headers()
+        if head is None:
+            self.f.close()
+            self._format(size)
+            self.f = open(self.path, "r+b")
+            head = 0
+        self.head_seq = head
+        self.head_slot = self._scan_slots(head)
+        self._load_cursor()
+
+    def _format(self, size):
+        chunk = bytes(256)
+        with open(self.path, "wb") as f:
+            written = 0
+            while written < size:
+                n = min(len(chunk), size - written)
+                f.write(chunk[:n] if n < len(chunk) else chunk)
+                written += n
+            struct.pack_into(HEADER_FMT, self._hdr, 0, MAGIC, 0, self.record_size, self.codec.id)
+            f.seek(0)
+            f.write(self._hdr)
+        self._write_cursor(0, 0)
+
+    # Passt der Header zu Datei und Layout? Rückgabe: Sequenz oder None / Does the header match file and layout? Returns: sequence or None
+    def _header_seq(self):
+        magic, seq, rsize, schema_id = struct.unpack(HEADER_FMT, self._hdr)
+        if magic != MAGIC or rsize != self.record_size or schema_id != self.codec.id:
+            return None
+        return seq
+
+    def _scan_headers(self):
+        best = None
+        for index in range(self.sectors):
+            self.f.seek(index * self.sector_size)
+            self.f.readinto(self._hdr)
+            seq = self._header_seq()
+            if seq is not None and seq % self.sectors == index:
+                if best is None or seq > best:
+                    best = seq
+        return best
+
+    def _scan_slots(self, seq):
+        base = (seq % self.sectors) * self.sector_size + HEADER_SIZE
+        for slot in range(self.slots):
+            self.f.seek(base + slot * self.record_size)
+            self.f.readinto(self._marker)
+            if self._marker[0] != MARKER:
+                return slot
+        return self.slots
+
+    # Stimmen Sektor-Header und Record-Grenze an dieser Stelle? / Do sector header and record boundary match here?
+    def _is_head(self, seq, slot):
+        if not 0 <= slot <= self.slots:
+            return False
+        base = (seq % self.sectors) * self.sector_size
+        self.f.seek(base)
+        self.f.readinto(self._hdr)
+        if self._header_seq() != seq:
+            return False
+        if slot > 0:
+            self.f.seek(base + HEADER_SIZE + (slot - 1) * self.record_size)
+            self.f.readinto(self._marker)
+            if self._marker[0] != MARKER:
+                return False
+        if slot < self.slots:
+            self.f.seek(base + HEADER_SIZE + slot * self.record_size)
+            self.f.readinto(self._marker)
+            if self._marker[0] == MARKER:
+                return False
+        return True
+
+    def _oldest_seq(self):
+        oldest = self.head_seq - self.sectors + 1
+        return oldest if oldest > 0 else 0
+
+    def _load_cursor(self):
+        try:
+            with open(self.cursor_path, "rb") as f:
+                seq, slot = struct.unpack(CURSOR_FMT, f.read())
+        except (OSError, ValueError):
+            seq, slot = self._oldest_seq(), 0
+
+        if seq > self.head_seq or (seq == self.head_seq and slot > self.head_slot):
+            seq, slot = self.head_seq, self.head_slot
+        elif seq < self._oldest_seq():
+            seq, slot = self._oldest_seq(), 0
+        self.read_seq, self.read_slot = seq, slot
+        self._wrap_cursor()
+        self._committed = (seq, slot)
+
+    # Lesezeiger am Ende eines schon abgeschlossenen Sektors auf den Anfang des nächsten
+    # Read cursor at the end of a sector that is already closed to the start of the next one
+    def _wrap_cursor(self):
+        if self.read_slot >= self.slots and self.read_seq < self.head_seq:
+            self.read_seq += 1
+            self.read_slot = 0
+
+    def _write_cursor(self, seq, slot):
+        with open(self.cursor_path, "wb") as f:
+            f.write(struct.pack(CURSOR_FMT, seq, slot))
+
+    # --- Nächsten Sektor beginnen, ältesten ggf. überschreiben / Start next sector, overwrite oldest if needed ---
+    def _rotate(self):
+        self.head_seq += 1
+        self.head_slot = 0
+        oldest = self._oldest_seq()
+        if self.read_seq < oldest:
+            self.dropped += self.slots - self.read_slot
+            self.read_seq, self.read_slot = oldest, 0
+        self._wrap_cursor()
+
+        base = (self.head_seq % self.sectors) * self.sector_size
+        struct.pack_into(HEADER_FMT, self._hdr, 0, MAGIC, self.head_seq, self.record_size, self.codec.id)
+        self.f.seek(base)
+        self.f.write(self._hdr)
+        # Alte Records des Sektors löschen / Clear the sector's old records
+        self._rec[:] = bytes(self.record_size)
+        for _ in range(self.slots):
+            self.f.write(self._rec)
+        self.f.flush()
+
+    # --- Messung anhängen / Append a reading ---
+    def push(self, epoch, data):
+        if self.head_slot >= self.slots:
+            self._rotate()
+
+        struct.pack_into(RECORD_HEAD_FMT, self._rec, 0, MARKER, int(epoch))
+        self.codec.pack_into(self._rec, RECORD_HEAD_SIZE, data)
+
+        base = (self.head_seq % self.sectors) * self.sector_size + HEADER_SIZE
+        self.f.seek(base + self.head_slot * self.record_size)
+        self.f.write(self._rec)
+        self.f.flush()
+        self.head_slot += 1
+
+    # --- Schreibposition (für den nächsten Start) / Write position (for the next start) ---
+    def head(self):
+        return self.head_seq, self.head_slot
+
+    # --- Anzahl ungesendeter Records / Number of unsent records ---
+    def pending(self):
+        return (self.head_seq - self.read_seq) * self.slots + self.head_slot - self.read_slot
+
+    # --- Ältesten ungesendeten Record lesen / Read oldest unsent record ---
+    # Rückgabe / returns: (epoch, {feld / field: wert / value, ...}) oder / or None
+    def peek(self):
+        if self.pending() <= 0:
+            return None
+        base = (self.read_seq % self.sectors) * self.sector_size + HEADER_SIZE
+        self.f.seek(base + self.read_slot * self.record_size)
+        self.f.readinto(self._rec)
+        marker, epoch = struct.unpack_from(RECORD_HEAD_FMT, self._rec)
+        values = self.codec.decode(self._rec, RECORD_HEAD_SIZE) if marker == MARKER else None
+        if values is None:
+            values = dict((field, None) for field in self.codec.fields)  # beschädigt – alle Felder leer / corrupt – all fields empty
+        return epoch, values
+
+    # --- Lesezeiger weiterschieben (nur RAM) / Advance read cursor (RAM only) ---
+    def advance(self):
+        if self.pending() <= 0:
+            return
+        self.read_slot += 1
+        self._wrap_cursor()
+
+    # --- Lesezeiger auf Flash sichern / Persist read cursor to flash ---
+    def commit(self):
+        cursor = (self.read_seq, self.read_slot)
+        if cursor != self._committed:
+            self._write_cursor(*cursor)
+            self._committed = cursor
+
+    def close(self):
+        self.commit()
+        self.f.close()
@@ -0,0 +1,111 @@
+# scheduler.py – Driftfreier Festtakt-Scheduler mit ticks_ms-Deadlines
+# scheduler.py – Drift-free fixed-rate scheduler using ticks_ms deadlines
+
+import time
+
+CATCH_UP = "catchup"   # verpasste Slots nachholen / run missed slots late
+SKIP = "skip"          # verpasste Slots verwerfen / drop missed slots
+
+class Job:
+    def __init__(self, name, period_ms, callback, policy):
+        self.name = name
+        self.period_ms = period_ms
+        self.callback = callback
+        self.policy = policy
+        self.deadline = time.ticks_ms()
+        self.runs = 0
+        self.overruns = 0      # Start >= 1 Periode zu spät / start late by >= 1 period
+        self.skipped = 0       # verworfene Slots / dropped slots
+        self.jitter_ms = 0     # Verspätung des letzten Starts / lateness of last start
+        self.jitter_max = 0    # max. Verspätung seit letztem Report / max lateness since last report
+        self.jitter_sum = 0
+        self.window_runs = 0
+
+class Scheduler:
+    def __init__(self, policy=SKIP, max_catch_up=3):
+        self.policy = policy
+        self.max_catch_up = max_catch_up
+        self.jobs = []
+
+    # --- Job registrieren (Periode in Sekunden) / Register job (period in seconds) ---
+    def add(self, name, period_s, callback, policy=None):
+        job = Job(name, int(period_s * 1000), callback, policy or self.policy)
+        self.jobs.append(job)
+        return job
+
+    # --- Fällige Jobs ausführen / Run due jobs ---
+    def run_pending(self):
+        ran = 0
+        for job in self.jobs:
+            late = time.ticks_diff(time.ticks_ms(), job.deadline)
+            if late < 0:
+                continue
+
+            job.jitter_ms = late
+            job.jitter_sum += late
+            job.window_runs += 1
+            if late > job.jitter_max:
+                job.jitter_max = late
+            if late >= job.period_ms:
+                job.overruns += 1
+
+            job.callback()
+            job.runs += 1
+            ran += 1
+
+            # Deadline immer um genau eine Periode weiterschieben – kein Drift
+            # Always advance the deadline by exactly one period – no drift
+            job.deadline = time.ticks_add(job.deadline, job.period_ms)
+            behind = time.ticks_diff(time.ticks_ms(), job.deadline)
+            if behind < 0:
+                continue
+
+            missed = behind // job.period_ms + 1
+            if job.policy == CATCH_UP and missed <= self.max_catch_up:
+                continue  # läuft beim nächsten Aufruf erneut / runs again on next call
+
+            # Rückstand verwerfen, nächster Slot im Raster / drop backlog, next slot on the grid
+            if job.policy == CATCH_UP:
+                missed -= self.max_catch_up
+            job.deadline = time.ticks_add(job.deadline, missed * job.period_ms)
+            job.skipped += missed
+        return ran
+
+    # --- Zeit bis zum nächsten fälligen Job / Time until next due job ---
+    def next_delay_ms(self):
+        now = time.ticks_ms()
+        delay = None
+        for job in self.jobs:
+            d = time.ticks_diff(job.deadline, now)
+            if delay is None or d < delay:
+                delay = d
+        if delay is None or delay < 0:
+            return 0
+        return delay
+
+    def sleep_until_next(self):
+        time.sleep_ms(self.next_delay_ms())
+
+    async def run(self):
+        import uasyncio as asyncio
+        while True:
+            self.run_pending()
+            await asyncio.sleep_ms(self.next_delay_ms())
+
+    # --- Timing-Statistik / Timing statistics ---
+    # (name, runs, jitter_last_ms, jitter_avg_ms, jitter_max_ms, overruns, skipped)
+    def stats(self):
+        result = []
+        for job in self.jobs:
+            avg = job.jitter_sum // job.window_runs if job.window_runs else 0
+            result.append((job.name, job.runs, job.jitter_ms, avg, job.jitter_max, job.overruns, job.skipped))
+        return result
+
+    # --- Statistik ausgeben und Fenster zurücksetzen / Print stats and reset window ---
+    def report(self, log=print):
+        for name, runs, last, avg, peak, overruns, skipped in self.stats():
+            log(f"⏱️ {name}: runs={runs} jitter last/avg/max={last}/{avg}/{peak} ms overruns={overruns} skipped={skipped}")
+        for job in self.jobs:
+            job.jitter_sum = 0
+            job.jitter_max = 0
+            job.window_runs = 0
@@ -1,141 +1,392 @@
-# sensors.py – Sensorlogik für BME280 und VEML7700 / Sensor logic for BME280 and VEML7700
+# sensors.py – Sensor-Registry und Sensorlogik (BME280, VEML7700, eigene Treiber)
+# sensors.py – Sensor registry and sensor logic (BME280, VEML7700, custom drivers)
 
 from veml7700_driver import VEML7700
 from bme280_driver import BME280
-from machine import Pin, I2C
+from machine import Pin
 import time
 import config
 import state
 import random
+import i2cbus
+import health
+import logger
+import timekeep
+import template
 from collections import OrderedDict
 
-veml = None
-bme = None
-veml_initialized = False
-bme_initialized = False
+# --- Basisklasse für registrierte Sensoren / Base class for registered sensors ---
+# Ein Eintrag aus config.SENSORS: name, driver, bus, address, mode, power, rate, fields.
+# Unterklassen liefern FIELDS, DUMMY (Wertebereiche), open() und measure() – FIELDS, open()
+# und measure() sind Pflicht, _driver() weist Treiber ohne sie zurück.
+# One entry from config.SENSORS: name, driver, bus, address, mode, power, rate, fields.
+# Subclasses provide FIELDS, DUMMY (value ranges), open() and measure() – FIELDS, open()
+# and measure() are mandatory, _driver() rejects drivers without them.
+class Sensor:
+    FIELDS = ()
+    DUMMY = {}
+
+    def __init__(self, spec):
+        self.name = spec["name"]
+        self.mode = spec.get("mode", "active")
+        self.bus = spec.get("bus", 0)
+        self.address = spec.get("address")
+        self.rate = spec.get("rate")
+        self.fields = spec.get("fields") or self.FIELDS
+        power = spec.get("power")
+        self.power = Pin(power, Pin.OUT) if power is not None else None
+        self.dev = None
+        self.ok = False
+
+    # -- Treiber anlegen, wirft bei Fehlern / Create the driver, raises on errors --
+    def open(self, i2c):
+        raise NotImplementedError
+
+    # -- Werte in der Reihenfolge von FIELDS / Values in the order of FIELDS --
+    def measure(self):
+        raise NotImplementedError
+
+    # -- Ereignis-Modus: neue Werte oder None / Event mode: new values or None --
+    def has_events(self):
+        return False
+
+    def event(self):
+        return None
+
+    def start(self):
+        self.ok = False
+        if not i2cbus.present(self.bus, self.address):
+            logger.error("SENSOR_MISSING", self.name, self.address, self.bus)
+            health.error(self.name)
+            return
+        try:
+            self.open(i2cbus.get(self.bus))
+            self.ok = True
+            logger.info("SENSOR_OK", self.name)
+        except Exception as e:
+            logger.error("SENSOR_FAIL", self.name, e)
+            health.error(self.name, e)
+            self.dev = None
+
+    def _store(self, data, values):
+        for i in range(len(self.FIELDS)):
+            if self.FIELDS[i] in self.fields:
+                data[self.FIELDS[i]] = None if values is None else values[i]
+
+    def read(self, data):
+        if self.mode == "active" and self.ok:
+            try:
+                self._store(data, self.measure())
+            except Exception as e:
+                # Wert wird None, der Fehler landet im Health-Zähler / value becomes None, the fault goes to the health counter
+                health.error(self.name, e)
+                logger.warn("SENSOR_READ_FAIL", self.name, e)
+                self._store(data, None)
+        elif self.mode == "dummy":
+            for field in self.fields:
+                lo, hi = self.DUMMY.get(field, (None, None))
+                if lo is None:
+                    data[field] = None
+                elif isinstance(lo, int):
+                    data[field] = random.randint(lo, hi)
+                else:
+                    data[field] = round(random.uniform(lo, hi), 1)
+        else:
+            self._store(data, None)
+
+    # -- Sensor über seinen Power-Pin neu starten / Restart the sensor via its power pin --
+    def reset(self):
+        if self.power is None:
+            return False
+        self.power.off()
+        time.sleep(0.2)
+        self.power.on()
+        time.sleep(0.5)
+        if self.mode == "active":
+            self.start()
+        return True
+
+# --- VEML7700 (Licht) / VEML7700 (light) ---
+class VEML7700Sensor(Sensor):
+    FIELDS = ("lux",)
+    DUMMY = {"lux": (100, 2000)}
+
+    def open(self, i2c):
+        self.dev = VEML7700(i2c, address=self.address)
+        self.last = None
+        if getattr(config, "VEML_EVENT", False):
+            self.dev.enable_interrupt(getattr(config, "VEML_EVENT_PERS", 1), getattr(config, "VEML_INT_PIN", None))
+
+    # Lux messen, im Event-Modus Schwellen neu setzen / Measure lux, re-arm thresholds in event mode
+    def _fresh(self):
+        self.last = (self.dev.read_lux(),)
+        if self.dev.int_enabled:
+            self.dev.arm(getattr(config, "VEML_EVENT_BAND", 10))
+        return self.last
+
+    # Event-Modus: ALS nur lesen, wenn das Licht das Band verlassen hat, sonst letzter Wert
+    # Event mode: only read the ALS if the light left the band, otherwise the last value
+    def measure(self):
+        if self.dev.int_enabled and self.last is not None and not self.dev.event():
+            return self.last
+        return self._fresh()
+
+    def has_events(self):
+        return self.ok and self.mode == "active" and self.dev.int_enabled
+
+    def event(self):
+        return self._fresh() if self.dev.event() else None
+
+# --- BME280 (Temperatur, Druck, Feuchte) / BME280 (temperature, pressure, humidity) ---
+class BME280Sensor(Sensor):
+    FIELDS = ("temp", "pressure", "humidity", "bme_latency_ms")
+    DUMMY = {"temp": (18.0, 32.0), "pressure": (980.0, 1020.0), "humidity": (30.0, 60.0)}
+
+    def open(self, i2c):
+        self.dev = BME280(i2c=i2c, address=self.address)
+
+    def measure(self):
+        temp, pressure, humidity, latency_ms = self.dev.read()
+        return round(temp, 1), round(pressure, 1), round(humidity, 1), round(latency_ms, 1)
+
+# Treiber nach Name; unbekannte Namen werden als Modul mit Klasse Sensor importiert
+# (z. B. "sht4x_sensor" -> sht4x_sensor.py), main.py bleibt unverändert.
+# Drivers by name; unknown names are imported as a module with a Sensor class
+# (e.g. "sht4x_sensor" -> sht4x_sensor.py), main.py stays unchanged.
+DRIVERS = {
+    "veml7700": VEML7700Sensor,
+    "bme280": BME280Sensor,
+}
+
+def _driver(name):
+    cls = DRIVERS.get(name)
+    if cls is None:
+        cls = __import__(name).Sensor
+        if not cls.FIELDS or cls.open is Sensor.open or cls.measure is Sensor.measure:
+            raise TypeError("Treiber / driver %s: FIELDS, open() und / and measure() fehlen / missing" % name)
+        DRIVERS[name] = cls
+    return cls
+
+# Registrierte Sensoren in Konfigurationsreihenfolge / Registered sensors in config order
+registry = []
 
 # --- Sensorstrom aktivieren / Activate sensor power ---
 def power_on():
-    if hasattr(config, "VEML_PWR"):
-        Pin(config.VEML_PWR, Pin.OUT).on()
-    if hasattr(config, "BME_PWR"):
-        Pin(config.BME_PWR, Pin.OUT).on()
-    time.sleep(0.2)
+    pins = [s.power for s in registry if s.power is not None]
+    for pin in pins:
+        pin.on()
+    if pins:
+        time.sleep(0.2)
 
 # --- Sensorstrom deaktivieren / Deactivate sensor power ---
 def power_off():
-    if hasattr(config, "VEML_PWR"):
-        Pin(config.VEML_PWR, Pin.OUT).off()
-    if hasattr(config, "BME_PWR"):
-        Pin(config.BME_PWR, Pin.OUT).off()
+    for s in registry:
+        if s.power is not None:
+            s.power.off()
 
-# --- Sensorinitialisierung / Sensor initialization ---
-def init_sensors():
-    global veml, bme, veml_initialized, bme_initialized
+# --- Sensorinitialisierung (scan=False: kein I2C-Scan, z. B. nach Deep-Sleep) ---
+# --- Sensor initialization (scan=False: no I2C scan, e.g. after deep sleep) ---
+def init_sensors(scan=True):
+    registry.clear()
+    for spec in getattr(config, "SENSORS", ()):
+        registry.append(_driver(spec["driver"])(spec))
 
-    if config.VEML_MODE == "off" and config.BME_MODE == "off":
+    compile_payload()
+    active = [s for s in registry if s.mode == "active"]
+    if not active:
         return state.SUCCESS  # nichts zu tun / nothing to do
 
     power_on()
+    for s in active:
+        i2cbus.get(s.bus)
+    if scan and getattr(config, "I2C_SCAN", True):
+        i2cbus.scan()
+    for s in active:
+        s.start()
+    return state.SUCCESS
 
-    if config.VEML_MODE == "active":
-        try:
-            veml_i2c = I2C(0, sda=Pin(config.VEML_SDA), scl=Pin(config.VEML_SCL))
-            veml = VEML7700(veml_i2c)
-            veml_initialized = True
-            print("📷 VEML7700 initialisiert / VEML7700 initialized.")
-        except Exception as e:
-            print("❌ VEML7700 Fehler / Error:", e)
-            veml = None
-            veml_initialized = False
+# --- Nach power_off(): Strom an, Sensoren mit Power-Pin neu starten / After power_off(): power on, restart sensors with a power pin ---
+def wake():
+    power_on()
+    for s in registry:
+        if s.mode == "active" and s.power is not None:
+            s.start()
 
-    if config.BME_MODE == "active":
-        try:
-            bme_i2c = I2C(1, sda=Pin(config.BME_SDA), scl=Pin(config.BME_SCL))
-            bme = BME280(i2c=bme_i2c)
-            bme_initialized = True
-            print("🌡️ BME280 initialisiert / BME280 initialized.")
-        except Exception as e:
-            print("❌ BME280 Fehler / Error:", e)
-            bme = None
-            bme_initialized = False
+# --- Aktive Sensoren mit Power-Pin neu starten / Restart active sensors that have a power pin ---
+def reset():
+    for s in registry:
+        if s.mode == "active":
+            s.reset()
 
-    return state.SUCCESS
+# --- Eigene Abtastraten je Sensor (Name -> Sekunden) / Own sampling rates per sensor (name -> seconds) ---
+# "rate" aus SENSORS, ältere Konfigurationen dürfen noch SENSOR_RATES setzen
+# "rate" from SENSORS, older configurations may still set SENSOR_RATES
+def rates():
+    legacy = getattr(config, "SENSOR_RATES", None) or {}
+    result = {}
+    for s in registry:
+        rate = s.rate or legacy.get(s.name)
+        if rate:
+            result[s.name] = rate
+    return result
 
-# --- RTC-Zeit holen / Get RTC time ---
-def get_formatted_rtc():
-    now = time.localtime()
-    datum = "{:02d}.{:02d}.{:04d}".format(now[2], now[1], now[0])
-    uhrzeit = "{:02d}:{:02d}:{:02d}".format(now[3], now[4], now[5])
-    return datum, uhrzeit
+# Zeitfelder entstehen erst beim Payload-Bau aus dem Stempel (Epoch, ms) – und nur, wenn
+# MQTT_PAYLOAD_FIELDS sie nennt. Ohne Feldliste kommen date und time wie bisher mit.
+# Time fields are only made when building the payload, from the stamp (epoch, ms) – and
+# only if MQTT_PAYLOAD_FIELDS names them. Without a field list date and time come along as before.
+TIME_FIELDS = ("date", "time", "epoch", "ms")
 
-# --- Hilfsfunktion: Payload bauen nach config / Helper: Build payload from config ---
-def build_payload(data):
+# Zeitstempel der letzten Messung / timestamp of the last reading
+last_stamp = None
+
+# Payload-Layout aus MQTT_PAYLOAD_FIELDS (template.Template oder bincodec.Codec), None = ohne Feldliste
+# Payload layout from MQTT_PAYLOAD_FIELDS (template.Template or bincodec.Codec), None = no field list
+payload_template = None
+_compiled = False
+_payload = None    # Payload-Dict zum Layout, je Messung neu befüllt / payload dict for the layout, refilled per reading
+_time_fields = ()  # Zeitfelder des Layouts / time fields of the layout
+_value_fields = () # übrige Felder des Layouts / remaining fields of the layout
+
+# --- MQTT_PAYLOAD_FIELDS einmal übersetzen und prüfen / Compile and check MQTT_PAYLOAD_FIELDS once ---
+# MQTT_PAYLOAD_FORMAT "binary": fester Binär-Record statt JSON / fixed binary record instead of JSON
+# Bekannt sind die Felder der Sensoren (auch inaktiver – sie liefern None), Zeitfelder und
+# mit AGG_ENABLED die Kennzahlen. Unbekannte Felder bleiben None, die Warnung kommt nur hier.
+# Known are the sensors' fields (inactive ones too – they deliver None), time fields and with
+# AGG_ENABLED the statistics. Unknown fields stay None, the warning is only given here.
+def compile_payload():
+    global payload_template, _compiled, _payload, _time_fields, _value_fields
+    _compiled = True
     fields = getattr(config, "MQTT_PAYLOAD_FIELDS", None)
-    if fields:
-        payload = OrderedDict()
-        for field in fields:
-            payload[field] = data.get(field, None)
-        missing = [f for f in fields if f not in data]
-        if missing:
-            print("⚠️ MQTT_PAYLOAD_FIELDS enthält unbekannte Felder / contains unknown fields:", missing)
+    if not fields:
+        payload_template = None
+        _payload = None
+        return None
+    if getattr(config, "MQTT_PAYLOAD_FORMAT", "json") == "binary":
+        import bincodec
+        # Im Batch braucht jeder Record seinen Zeitstempel / in a batch every record needs its timestamp
+        if getattr(config, "MQTT_BATCH_MODE", None) and not any(f in bincodec.TIME_FIELDS for f in fields):
+            fields = ["epoch"] + list(fields)
+        payload_template = bincodec.Codec(fields)
+    else:
+        payload_template = template.Template(fields)
+    _payload = OrderedDict((field, None) for field in payload_template.fields)
+    _time_fields = tuple(f for f in payload_template.fields if f in TIME_FIELDS)
+    _value_fields = tuple(f for f in payload_template.fields if f not in TIME_FIELDS)
+    known = list(TIME_FIELDS) + _data_fields()
+    unknown = [f for f in fields if f not in known]
+    if unknown:
+        logger.warn("PAYLOAD_FIELDS", unknown)
+    return payload_template
+
+# Felder, die Sensoren und Aggregation liefern können / Fields that sensors and aggregation can deliver
+def _data_fields():
+    fields = []
+    for s in registry:
+        fields.extend(f for f in s.FIELDS if f in s.fields)
+    if getattr(config, "AGG_ENABLED", False):
+        import aggregate
+        for field in getattr(config, "AGG_FIELDS", ("temp", "pressure", "humidity", "lux")):
+            fields.extend(field + "_" + stat for stat in aggregate.STATS)
+        fields.append("samples")
+    return fields
+
+# --- Felder für den Flash-Puffer: alles, was das Payload trägt / Fields for the flash buffer: everything the payload carries ---
+def stash_fields():
+    if not _compiled:
+        compile_payload()
+    if payload_template is not None:
+        return payload_template.fields
+    return _data_fields()
+
+# --- Hilfsfunktion: Payload bauen nach config / Helper: Build payload from config ---
+# at: (Epoch, ms) der Messung, None = jetzt / (epoch, ms) of the reading, None = now
+# Mit Feldliste kommt immer dasselbe Dict zurück, nur die Werte sind neu – keine Allokation
+# je Messung. Es gilt bis zum nächsten Aufruf; wer eine Messung länger hält (Warteschlange,
+# Batch), kopiert sie.
+# With a field list the same dict always comes back, only the values are new – no allocation
+# per reading. It is valid until the next call; whoever keeps a reading longer (queue,
+# batch) copies it.
+def build_payload(data, at=None):
+    if not _compiled:
+        compile_payload()
+    if payload_template is not None:
+        payload = _payload
+        if _time_fields:
+            at = at or timekeep.stamp()
+            for field in _time_fields:
+                payload[field] = timekeep.field(field, at)
+        for field in _value_fields:
+            payload[field] = data.get(field)
         return payload
-    return OrderedDict(data)  # fallback
+    at = at or timekeep.stamp()
+    payload = OrderedDict((("date", timekeep.field("date", at)), ("time", timekeep.field("time", at))))
+    payload.update(data)
+    return payload  # fallback
 
-# --- Gesamtsensor-Auslesung / Full sensor reading ---
-def read_all():
-    datum, uhrzeit = get_formatted_rtc()
-    data = {"date": datum, "time": uhrzeit}
+# --- Messung über den nächsten build_payload() hinaus halten / Keep a reading beyond the next build_payload() ---
+def keep(payload):
+    return dict(payload) if payload is _payload else payload
 
-    # Lux-Wert lesen / Read lux
-    if config.VEML_MODE == "active" and veml_initialized:
-        try:
-            data["lux"] = veml.read_lux()
-        except:
-            data["lux"] = None
-    elif config.VEML_MODE == "dummy":
-        data["lux"] = random.randint(100, 2000)
-    else:
-        data["lux"] = None
+# Letzte Werte aller Sensoren / Latest values of all sensors
+latest = {}
 
-    # BME-Werte lesen / Read BME values
-    if config.BME_MODE == "active" and bme_initialized:
-        try:
-            temp, pressure, humidity = bme.read_compensated_data()
-            data["temp"] = round(temp, 1)
-            data["pressure"] = round(pressure / 100, 1)
-            data["humidity"] = round(humidity, 1)
-        except:
-            data["temp"] = None
-            data["pressure"] = None
-            data["humidity"] = None
-    elif config.BME_MODE == "dummy":
-        data["temp"] = round(random.uniform(18.0, 32.0), 1)
-        data["pressure"] = round(random.uniform(980.0, 1020.0), 1)
-        data["humidity"] = round(random.uniform(30.0, 60.0), 1)
-    else:
-        data["temp"] = None
-        data["pressure"] = None
-        data["humidity"] = None
+# --- Einzelnen Sensor abtasten / Sample a single sensor ---
+def sample(name):
+    for s in registry:
+        if s.name == name:
+            s.read(latest)
+    return state.SUCCESS
 
-    return state.SUCCESS, build_payload(data)
+# --- Payload aus den letzten Werten / Payload from the latest values ---
+def snapshot():
+    global last_stamp
+    last_stamp = timekeep.stamp()
+    return state.SUCCESS, build_payload(latest, last_stamp)
 
-# --- VEML Reset über GPIO / VEML reset via GPIO ---
-def veml_reset():
-    if hasattr(config, "VEML_PWR"):
-        Pin(config.VEML_PWR, Pin.OUT).off()
-        time.sleep(0.2)
-        Pin(config.VEML_PWR, Pin.OUT).on()
-        time.sleep(0.5)
-        return True
-    return False
+# --- Payload aus einer Zusammenfassung (aggregate.Aggregator) / Payload from a summary (aggregate.Aggregator) ---
+# Enthält die letzten Werte und <feld>_min/_max/_mean/_stddev/_median sowie samples
+# Contains the latest values and <field>_min/_max/_mean/_stddev/_median plus samples
+def summary(agg):
+    global last_stamp
+    last_stamp = timekeep.stamp()
+    data = dict(latest)
+    agg.summarize(data)
+    return state.SUCCESS, build_payload(data, last_stamp)
 
-# --- BME Reset über GPIO / BME reset via GPIO ---
-def bme_reset():
-    if hasattr(config, "BME_PWR"):
-        Pin(config.BME_PWR, Pin.OUT).off()
-        time.sleep(0.2)
-        Pin(config.BME_PWR, Pin.OUT).on()
-        time.sleep(0.5)
-        return True
+# --- Unterstützt ein Sensor den Ereignis-Modus? / Does any sensor support event mode? ---
+def has_events():
+    for s in registry:
+        if s.has_events():
+            return True
     return False
+
+# --- Ereignisse prüfen (z. B. Lichtänderung) / Check for events (e.g. light change) ---
+# True = neue Werte in latest, Messung sollte gesendet werden
+# True = new values in latest, the reading should be published
+def events():
+    changed = False
+    for s in registry:
+        if not s.has_events():
+            continue
+        try:
+            values = s.event()
+        except Exception as e:
+            health.error(s.name, e)
+            logger.warn("SENSOR_READ_FAIL", s.name, e)
+            s._store(latest, None)
+            changed = True
+            continue
+        if values is not None:
+            s._store(latest, values)
+            changed = True
+    return changed
+
+# --- Gesamtsensor-Auslesung / Full sensor reading ---
+# Werte landen auch in latest, damit snapshot() nach einem Ereignis vollständig ist
+# Values also go to latest so that snapshot() is complete after an event
+def read_all():
+    global last_stamp
+    last_stamp = timekeep.stamp()
+    for s in registry:
+        s.read(latest)
+    return state.SUCCESS, build_payload(latest, last_stamp)
@@ -31,13 +31,23 @@ class SSLContext:
         self._context.load_verify_locations(cadata)
 
     def wrap_socket(
-        self, sock, server_side=False, do_handshake_on_connect=True, server_hostname=None
+        self,
+        sock,
+        server_side=False,
+        do_handshake_on_connect=True,
+        server_hostname=None,
+        session=None,
     ):
+        # Only pass session when resuming, tls builds without it reject the kwarg.
+        kwargs = {}
+        if session is not None:
+            kwargs["session"] = session
         return self._context.wrap_socket(
             sock,
             server_side=server_side,
             do_handshake_on_connect=do_handshake_on_connect,
             server_hostname=server_hostname,
+            **kwargs
         )
 
 
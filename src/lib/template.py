@@ -0,0 +1,99 @@
+# template.py – Vorkompiliertes JSON-Payload: feste Schlüssel, Werte direkt in einen Puffer
+# template.py – Precompiled JSON payload: fixed keys, values straight into a buffer
+#
+# Template(fields) erzeugt die Schlüssel-Fragmente ('{"temp": ', ', "lux": ', ...) einmal als
+# bytes. encode(payload) schreibt Fragmente und Werte in ein wiederverwendetes bytearray und
+# liefert einen memoryview darauf – kein ujson.dumps des Ganzen, kein str.encode(). Das
+# Ergebnis ist byte-gleich zu ujson.dumps(OrderedDict) mit denselben Feldern.
+# Template(fields) builds the key fragments ('{"temp": ', ', "lux": ', ...) once as bytes.
+# encode(payload) writes fragments and values into a reused bytearray and returns a
+# memoryview on it – no ujson.dumps of the whole thing, no str.encode(). The result is
+# byte-identical to ujson.dumps(OrderedDict) with the same fields.
+#
+# Zahlen entstehen wie in ujson per str()/repr() (gleiche Darstellung wie bisher, auch bei
+# float32-Ports), die Stellen legen die Treiber per round() fest. Unveränderte Werte (Datum,
+# Lux bei Nacht, ...) nimmt encode() aus dem Cache des Felds statt neu zu formatieren.
+# Numbers are made via str()/repr() as in ujson (same format as before, also on float32
+# ports), the digits are fixed by the drivers via round(). Unchanged values (date, lux at
+# night, ...) are taken from the field's cache instead of being formatted again.
+#
+# Der memoryview gilt nur bis zum nächsten encode() – QoS 1 kopiert ihn ohnehin für Wiederholungen.
+# The memoryview is only valid until the next encode() – QoS 1 copies it for retransmits anyway.
+
+import ujson
+
+_NULL = b"null"
+_TRUE = b"true"
+_FALSE = b"false"
+
+# Zahlen wie ujson: int per str(), float per repr() (nan/inf und der Rest über ujson)
+# Numbers as ujson does: int via str(), float via repr() (nan/inf and the rest via ujson)
+def _json(value):
+    if value is None:
+        return _NULL
+    if value is True:
+        return _TRUE
+    if value is False:
+        return _FALSE
+    kind = type(value)
+    if kind is int:
+        return str(value).encode()
+    if kind is float and value - value == 0:
+        return repr(value).encode()
+    return ujson.dumps(value).encode()
+
+class Template:
+    def __init__(self, fields, size=256):
+        self.fields = tuple(fields)
+        keys = []
+        sep = b"{"
+        for field in self.fields:
+            keys.append(sep + ujson.dumps(field).encode() + b": ")
+            sep = b", "
+        self._keys = tuple(keys)
+        # Cache je Feld: zuletzt formatierter Wert und dessen JSON-Bytes / cache per field: last formatted value and its JSON bytes
+        self._values = [None] * len(self.fields)
+        self._raw = [None] * len(self.fields)
+        self._buf = bytearray(size)
+        self._mv = memoryview(self._buf)
+
+    # --- Payload (Felder wie fields) als JSON in den Puffer / Payload (fields as in fields) as JSON into the buffer ---
+    def encode(self, payload):
+        while True:
+            n = self._fill(payload)
+            if n:
+                return self._mv[:n]
+            # Zu klein (lange Strings) – Puffer verdoppeln / too small (long strings) – double the buffer
+            self._buf = bytearray(2 * len(self._buf))
+            self._mv = memoryview(self._buf)
+
+    # Rückgabe: Länge, 0 = Puffer zu klein / returns: length, 0 = buffer too small
+    def _fill(self, payload):
+        mv = self._mv
+        size = len(mv) - 1
+        n = 0
+        keys = self._keys
+        fields = self.fields
+        values = self._values
+        raws = self._raw
+        for i in range(len(fields)):
+            value = payload.get(fields[i])
+            raw = raws[i]
+            # 0.0 == -0.0 und nan != nan: Null und Falsches (None, False, "") immer neu formatieren
+            # 0.0 == -0.0 and nan != nan: always reformat zero and falsy values (None, False, "")
+            if raw is None or not value or values[i] != value or type(values[i]) is not type(value):
+                raw = raws[i] = _json(value)
+                values[i] = value
+            key = keys[i]
+            mid = n + len(key)
+            end = mid + len(raw)
+            if end > size:
+                return 0
+            mv[n:mid] = key
+            mv[mid:end] = raw
+            n = end
+        if not fields:
+            mv[0] = 0x7B  # "{"
+            n = 1
+        mv[n] = 0x7D  # "}"
+        return n + 1
@@ -0,0 +1,166 @@
+# timekeep.py – Zeitbasis: NTP-Abgleich, Drift-Korrektur, Zeitstempel in Epoch + Millisekunden
+# timekeep.py – Time base: NTP sync, drift correction, timestamps as epoch + milliseconds
+#
+# sync() stellt die RTC per ntptime.settime() auf UTC und merkt sich dazu ticks_ms. Zwischen
+# zwei Abgleichen läuft die Zeit über ticks_ms weiter, korrigiert um die geschätzte Drift
+# (drift_ppm, aus der Abweichung beim nächsten Abgleich). stamp() liefert (Epoch, ms) –
+# monoton, auch wenn ein Abgleich die Uhr zurückstellt. Lokale Datums-/Uhrzeit-Texte
+# entstehen erst in field(), wenn ein Payload-Feld sie verlangt.
+# sync() sets the RTC to UTC via ntptime.settime() and notes ticks_ms alongside. Between
+# two syncs time advances via ticks_ms, corrected by the estimated drift (drift_ppm, from
+# the offset found at the next sync). stamp() returns (epoch, ms) – monotonic, even if a
+# sync sets the clock back. Local date/time strings are only made in field(), when a
+# payload field asks for them.
+#
+# ntptime liefert ganze Sekunden (±0,5 s), daher schätzt sync() die Drift erst nach
+# TIME_DRIFT_MIN Sekunden und übernimmt jeweils nur die Hälfte der neuen Abweichung.
+# ntptime returns whole seconds (±0.5 s), so sync() only estimates drift after
+# TIME_DRIFT_MIN seconds and takes over only half of each new offset.
+
+import time
+import config
+import logger
+
+MAX_DRIFT_PPM = 500         # mehr ist kein Quarz, sondern ein Messfehler / beyond that it is a measurement error, not a crystal
+REBASE_MS = 86400000        # Basis täglich nachziehen, ticks_ms läuft nach ~6 Tagen über / rebase daily, ticks_ms wraps after ~6 days
+
+synced = False
+drift_ppm = 0               # >0: lokale Uhr geht nach / local clock is slow
+last_sync = None            # Epoch des letzten Abgleichs / epoch of the last sync
+last_offset_ms = None       # Abweichung beim letzten Abgleich / offset found at the last sync
+
+_base_ms = time.time() * 1000
+_base_ticks = time.ticks_ms()
+_span = None                # ms seit dem letzten Abgleich bis _base_ticks, None = kein Bezug / ms since the last sync up to _base_ticks, None = no reference
+_last_ms = 0                # letzter Zeitstempel (Monotonie) / last timestamp (monotonic)
+_next_try = 0               # Epoch des nächsten fälligen Abgleichs / epoch of the next due sync
+
+# --- Epoch in ms zum Zeitpunkt ticks / Epoch in ms at ticks ---
+def _at(ticks):
+    e = time.ticks_diff(ticks, _base_ticks)
+    return _base_ms + e + e * drift_ppm // 1000000
+
+def _rebase(ticks, epoch_ms):
+    global _base_ms, _base_ticks, _span
+    if _span is not None:
+        _span += time.ticks_diff(ticks, _base_ticks)
+    _base_ms = epoch_ms
+    _base_ticks = ticks
+
+# --- Aktuelle Zeit in ms seit Epoch, nie kleiner als der vorige Wert / Current time in ms since epoch, never below the previous value ---
+def now_ms():
+    global _last_ms
+    ticks = time.ticks_ms()
+    ms = _at(ticks)
+    if time.ticks_diff(ticks, _base_ticks) >= REBASE_MS:
+        _rebase(ticks, ms)
+    if ms < _last_ms:
+        ms = _last_ms
+    _last_ms = ms
+    return ms
+
+# --- Zeitstempel einer Messung: (Epoch als uint32, Millisekunden) / Timestamp of a reading: (epoch as uint32, milliseconds) ---
+def stamp():
+    ms = now_ms()
+    return ms // 1000, ms % 1000
+
+# --- Abgleich fällig? (TIME_SYNC_INTERVAL, nach Fehlschlag TIME_SYNC_RETRY) / Sync due? (TIME_SYNC_INTERVAL, after a failure TIME_SYNC_RETRY) ---
+def due():
+    return time.time() >= _next_try
+
+# --- NTP-Abgleich / NTP sync ---
+def sync():
+    global synced, drift_ppm, last_sync, last_offset_ms, _span, _next_try, _last_ms
+    try:
+        import ntptime
+        ntptime.host = getattr(config, "NTP_SERVER", "pool.ntp.org")
+        ntptime.settime()
+    except Exception as e:
+        _next_try = time.time() + getattr(config, "TIME_SYNC_RETRY", 300)
+        logger.warn("NTP_FAIL", e)
+        return False
+
+    ticks = time.ticks_ms()
+    # settime() schneidet den Sekundenbruchteil ab – Mitte annehmen / settime() cuts the fraction – assume the middle
+    ntp_ms = time.time() * 1000 + 500
+    offset = ntp_ms - _at(ticks)
+    if offset < -2000:
+        # Uhr lief deutlich vor (z. B. falsche RTC) – nicht bis dahin einfrieren / clock was well ahead (e.g. wrong RTC) – do not freeze until then
+        _last_ms = 0
+    if synced and _span is not None:
+        span = _span + time.ticks_diff(ticks, _base_ticks)
+        if span >= getattr(config, "TIME_DRIFT_MIN", 21600) * 1000:
+            drift = drift_ppm + offset * 1000000 // span // 2
+            drift_ppm = max(-MAX_DRIFT_PPM, min(MAX_DRIFT_PPM, drift))
+    _rebase(ticks, ntp_ms)
+    _span = 0
+    synced = True
+    last_sync = time.time()
+    last_offset_ms = offset
+    _next_try = last_sync + getattr(config, "TIME_SYNC_INTERVAL", 21600)
+    logger.info("NTP_OK", offset, drift_ppm)
+    return True
+
+# --- Zustand für den Neustart nach Deep-Sleep / State for the restart after deep sleep ---
+# Nach dem Neustart beginnt ticks_ms bei 0: Basis aus der RTC, die nächste Drift-Schätzung entfällt.
+# After the restart ticks_ms begins at 0: base from the RTC, the next drift estimate is skipped.
+def state():
+    return [drift_ppm, last_sync, _next_try, now_ms()]
+
+def restore(saved):
+    global synced, drift_ppm, last_sync, _next_try, _last_ms, _span
+    if not saved:
+        return
+    drift_ppm, last_sync, _next_try, _last_ms = saved
+    synced = last_sync is not None
+    _span = None
+    _rebase(time.ticks_ms(), time.time() * 1000)
+
+# --- Lokalzeit: UTC_OFFSET, dazu SUMMER_OFFSET (immer oder nach DST_RULE) / Local time: UTC_OFFSET plus SUMMER_OFFSET (always or per DST_RULE) ---
+_dst = (None, 0, 0)         # (Jahr, Beginn, Ende) der Sommerzeit in UTC / (year, start, end) of summer time in UTC
+
+def _last_sunday(year, month):
+    wday = time.localtime(time.mktime((year, month, 31, 0, 0, 0, 0, 0, 0)))[6]
+    return 31 - (wday + 1) % 7
+
+def _summer(epoch):
+    global _dst
+    rule = getattr(config, "DST_RULE", None)
+    if rule is None:
+        return True
+    if rule != "eu":
+        return False
+    # EU: letzter Sonntag im März bis letzter Sonntag im Oktober, jeweils 01:00 UTC
+    # EU: last Sunday in March to last Sunday in October, 01:00 UTC each
+    year = time.localtime(epoch)[0]
+    if _dst[0] != year:
+        _dst = (year,
+                time.mktime((year, 3, _last_sunday(year, 3), 1, 0, 0, 0, 0, 0)),
+                time.mktime((year, 10, _last_sunday(year, 10), 1, 0, 0, 0, 0, 0)))
+    return _dst[1] <= epoch < _dst[2]
+
+def local(epoch):
+    offset = int(getattr(config, "UTC_OFFSET", 0))
+    if _summer(epoch):
+        offset += int(getattr(config, "SUMMER_OFFSET", 0))
+    return time.localtime(epoch + offset)
+
+# --- Zeitfeld für das Payload aus einem Stempel (Epoch, ms) / Time field for the payload from a stamp (epoch, ms) ---
+# date und time eines Payloads teilen sich einen Stempel: Lokalzeit nur einmal je Epoch
+# date and time of a payload share one stamp: local time only once per epoch
+_local_at = (None, None)
+
+def field(name, at):
+    global _local_at
+    if name == "epoch":
+        return at[0]
+    if name == "ms":
+        return at[1]
+    if _local_at[0] == at[0]:
+        t = _local_at[1]
+    else:
+        t = local(at[0])
+        _local_at = (at[0], t)
+    if name == "date":
+        return "{:02d}.{:02d}.{:04d}".format(t[2], t[1], t[0])
+    return "{:02d}:{:02d}:{:02d}".format(t[3], t[4], t[5])
@@ -1,9 +1,10 @@
 # veml7700_driver.py – VEML7700 Sensor-Treiber für MicroPython
 
-from machine import I2C, Pin
+from machine import Pin
 import time
 from micropython import const
 import config
+import i2cbus
 
 # --- Konstanten ---
 ADDR = const(0x10)
@@ -16,7 +17,7 @@ WHITE = const(0x05)
 INTERRUPT = const(0x06)
 
 CONF_VALUES = {
-    25: {1/8: bytearray([0x00, 0x13]), 1/4: bytearray([0x00, 0x1B]), 1: bytearray([0x00, 0x01]), 2: bytearray([0x00, 0x0B])},
+    25: {1/8: bytearray([0x00, 0x13]), 1/4: bytearray([0x00, 0x1B]), 1: bytearray([0x00, 0x03]), 2: bytearray([0x00, 0x0B])},
     50: {1/8: bytearray([0x00, 0x12]), 1/4: bytearray([0x00, 0x1A]), 1: bytearray([0x00, 0x02]), 2: bytearray([0x00, 0x0A])},
     100:{1/8: bytearray([0x00, 0x10]), 1/4: bytearray([0x00, 0x18]), 1: bytearray([0x00, 0x00]), 2: bytearray([0x00, 0x08])},
     200:{1/8: bytearray([0x40, 0x10]), 1/4: bytearray([0x40, 0x18]), 1: bytearray([0x40, 0x00]), 2: bytearray([0x40, 0x08])},
@@ -27,26 +28,39 @@ CONF_VALUES = {
 GAIN_VALUES = {
     25: {1/8: 1.8432, 1/4: 0.9216, 1: 0.2304, 2: 0.1152},
     50: {1/8: 0.9216, 1/4: 0.4608, 1: 0.1152, 2: 0.0576},
-    100:{1/8: 0.4608, 1/4: 0.2304, 1: 0.0288, 2: 0.0144},
+    100:{1/8: 0.4608, 1/4: 0.2304, 1: 0.0576, 2: 0.0288},
     200:{1/8: 0.2304, 1/4: 0.1152, 1: 0.0288, 2: 0.0144},
     400:{1/8: 0.1152, 1/4: 0.0576, 1: 0.0144, 2: 0.0072},
-    800:{1/8: 0.0876, 1/4: 0.0288, 1: 0.0072, 2: 0.0036}
+    800:{1/8: 0.0576, 1/4: 0.0288, 1: 0.0072, 2: 0.0036}
 }
 
+# Auflösung in Vielfachen von 0,0036 lx/Count (IT 800 ms, Gain 2) – Lux ohne Float-Rechnung
+# Resolution in multiples of 0.0036 lx/count (IT 800 ms, gain 2) – lux without float math
+RES_UNIT = 0.0036
+
+# Auto-Range: Rohwert-Fenster, in dem die Stufe bleibt / raw count window in which the setting stays
+AUTO_LOW = const(1000)
+AUTO_HIGH = const(20000)    # Reserve bis 65535 für steigendes Licht / headroom up to 65535 for rising light
+SATURATED = const(65000)
+
 INTERRUPT_HIGH = bytearray([0x00, 0x00])
 INTERRUPT_LOW = bytearray([0x00, 0x00])
 POWER_SAVE_MODE = bytearray([0x00, 0x00])
 
+# Power-Save-Modus 1..4: zusätzliche Pause zwischen Messungen in ms / extra pause between measurements in ms
+PSM_WAIT_MS = (0, 500, 1000, 2000, 4000)
+
+# ALS_PERS: Anzahl Messungen außerhalb der Schwellen bis zum Interrupt / readings outside the thresholds until interrupt
+PERS_VALUES = {1: 0, 2: 1, 4: 2, 8: 3}
+
+INT_EN = const(0x02)        # ALS_CONF_0 Bit 1
+INT_FLAGS = const(0xC0)     # INTERRUPT Bit 15 (low) / 14 (high), im oberen Byte / in the high byte
+
 class VEML7700:
-    def __init__(self, i2c=None, address=None, it=None, gain=None):
+    def __init__(self, i2c=None, address=None, it=None, gain=None, auto=None, psm=None):
         self.address = address if address is not None else config.VEML7700_ADDRESS
-        if i2c is None:
-            self.i2c = I2C(0, scl=Pin(config.VEML_SCL), sda=Pin(config.VEML_SDA))
-        else:
-            self.i2c = i2c
-
-        self.power_pin = Pin(config.VEML_PWR, Pin.OUT)
-        self.power_pin.value(1)
+        # Bus und Sensorstrom verwaltet sensors.py / bus and sensor power are managed by sensors.py
+        self.i2c = i2c if i2c is not None else i2cbus.get(0)
 
         self.it = it if it is not None else config.VEML7700_IT
         self.gain_factor = gain if gain is not None else config.VEML7700_GAIN
@@ -65,18 +79,142 @@ class VEML7700:
         else:
             raise ValueError("Ungültiger Integrationszeit-Wert. Erlaubt: 25, 50, 100, 200, 400, 800")
 
+        # Auto-Range: alle Stufen nach Empfindlichkeit, bei gleicher Auflösung kürzere IT zuerst
+        # Auto-range: all settings by sensitivity, shorter IT first at equal resolution
+        self.auto = getattr(config, "VEML7700_AUTO", False) if auto is None else auto
+        max_it = getattr(config, "VEML7700_AUTO_MAX_IT", 800)
+        self._settings = sorted(
+            (round(GAIN_VALUES[t][g] / RES_UNIT), t, g) for t in CONF_VALUES if t <= max_it for g in CONF_VALUES[t]
+        )
+
+        self.psm = psm if psm is not None else getattr(config, "VEML7700_PSM", 0)
+        if self.psm not in (0, 1, 2, 3, 4):
+            raise ValueError("Ungültiger PSM-Wert. Erlaubt: 0 (aus), 1, 2, 3, 4")
+
+        self.lux = bytearray(2)  # Lesepuffer / read buffer
+        self.raw = 0
+        self.level = 0           # letzter Wert in Einheiten von 0,0036 lx / last value in units of 0.0036 lx
+
+        # Schwellen-Interrupt / threshold interrupt
+        self.int_enabled = False
+        self._int_pin = None
+        self._pers = 0
+        self._irq = False
+        self._conf = bytearray(2)
+        self._word = bytearray(2)
+        self._int = bytearray(2)
         self.init()
 
     def init(self):
-        self.i2c.writeto_mem(self.address, ALS_CONF_0, self.confValues)
         self.i2c.writeto_mem(self.address, ALS_WH, INTERRUPT_HIGH)
         self.i2c.writeto_mem(self.address, ALS_WL, INTERRUPT_LOW)
-        self.i2c.writeto_mem(self.address, POW_SAV, POWER_SAVE_MODE)
+        psm = POWER_SAVE_MODE
+        if self.psm:
+            psm = bytearray([((self.psm - 1) << 1) | 0x01, 0x00])
+        self.i2c.writeto_mem(self.address, POW_SAV, psm)
+        self._select(self.it, self.gain_factor)
 
-    def read_lux(self):
-        self.lux = bytearray(2)
-        time.sleep(0.04)  # 40 ms Wartezeit
+    def _write_word(self, reg, value):
+        self._word[0] = value & 0xFF
+        self._word[1] = value >> 8
+        self.i2c.writeto_mem(self.address, reg, self._word)
+
+    # --- IT/Gain setzen, nächster gültiger Wert nach einer vollen Integration ---
+    # --- Set IT/gain, next valid value after one full integration ---
+    def _select(self, it, gain):
+        self.it = it
+        self.gain_factor = gain
+        self.confValues = CONF_VALUES[it][gain]
+        self.gain = GAIN_VALUES[it][gain]
+        self._k = round(self.gain / RES_UNIT)
+        self._conf[0] = self.confValues[0] | (self._pers << 4) | (INT_EN if self.int_enabled else 0)
+        self._conf[1] = self.confValues[1]
+        self.i2c.writeto_mem(self.address, ALS_CONF_0, self._conf)
+        # IT + 25 % Toleranz + PSM-Pause / IT + 25 % tolerance + PSM pause
+        self._ready_at = time.ticks_add(time.ticks_ms(), it + it // 4 + 2 + PSM_WAIT_MS[self.psm])
+
+    # --- Nur warten, wenn seit dem Umschalten noch keine Integration fertig ist ---
+    # --- Only wait if no integration has finished since the last change ---
+    def _read_raw(self):
+        wait = time.ticks_diff(self._ready_at, time.ticks_ms())
+        if wait > 0:
+            time.sleep_ms(wait)
         self.i2c.readfrom_mem_into(self.address, ALS, self.lux)
-        raw = self.lux[0] + self.lux[1] * 256
-        lux = raw * self.gain
-        return int(round(lux))
+        self.raw = self.lux[0] | (self.lux[1] << 8)
+        return self.raw
+
+    # --- Rohwert in Lux, über 1000 lx mit Korrekturpolynom aus dem Datenblatt ---
+    # --- Raw count to lux, above 1000 lx with the datasheet correction polynomial ---
+    def _to_lux(self, raw):
+        lux = (raw * self._k * 9 + 1250) // 2500  # raw * k * 0,0036
+        if lux <= 1000:
+            return lux
+        x = raw * self.gain
+        x = (((6.0135e-13 * x - 9.3924e-9) * x + 8.1488e-5) * x + 1.0023) * x
+        return min(int(round(x)), 120000)  # Messbereichsende / end of measuring range
+
+    # --- Stufe für die nächste Messung aus dem letzten Rohwert wählen / Pick the setting for the next read ---
+    # Empfindlichste Stufe, deren erwarteter Rohwert unter AUTO_HIGH bleibt.
+    # Most sensitive setting whose expected raw count stays below AUTO_HIGH.
+    def _autorange(self, raw):
+        if AUTO_LOW <= raw <= AUTO_HIGH:
+            return
+        counts = raw * self._k  # Licht in Einheiten von 0,0036 lx / light in units of 0.0036 lx
+        best = self._settings[-1]
+        for setting in self._settings:
+            if counts <= AUTO_HIGH * setting[0]:
+                best = setting
+                break
+        if best[1] != self.it or best[2] != self.gain_factor:
+            self._select(best[1], best[2])
+
+    def read_lux(self):
+        raw = self._read_raw()
+        if self.auto and raw >= SATURATED and self._k != self._settings[-1][0]:
+            # Übersteuert: sofort mit der unempfindlichsten Stufe neu messen
+            # Saturated: measure again right away with the least sensitive setting
+            self._select(self._settings[-1][1], self._settings[-1][2])
+            raw = self._read_raw()
+        lux = self._to_lux(raw)
+        self.level = raw * self._k
+        if self.auto:
+            self._autorange(raw)
+        return lux
+
+    # --- Schwellen-Interrupt einschalten / Enable the threshold interrupt ---
+    # Der VEML7700 selbst hat keinen INT-Pin – dann wird das INTERRUPT-Register abgefragt.
+    # Registerkompatible Varianten mit INT-Ausgang (z. B. VEML6030) können int_pin nutzen.
+    # The VEML7700 itself has no INT pin – the INTERRUPT register is polled instead.
+    # Register-compatible parts with an INT output (e.g. VEML6030) can use int_pin.
+    def enable_interrupt(self, persistence=1, int_pin=None):
+        if persistence not in PERS_VALUES:
+            raise ValueError("Ungültige Persistenz. Erlaubt: 1, 2, 4, 8")
+        self._pers = PERS_VALUES[persistence]
+        self.int_enabled = True
+        self._int_pin = None
+        if int_pin is not None:
+            self._int_pin = Pin(int_pin, Pin.IN, Pin.PULL_UP)
+            self._int_pin.irq(trigger=Pin.IRQ_FALLING, handler=self._on_irq)
+        self._select(self.it, self.gain_factor)
+
+    def _on_irq(self, pin):
+        self._irq = True
+
+    # --- Schwellen um den letzten Wert legen (± band_pct %) / Put thresholds around the last value (± band_pct %) ---
+    def arm(self, band_pct):
+        center = self.level // self._k  # Rohwert in der aktuellen Stufe / raw count at the current setting
+        delta = max(center * band_pct // 100, 2)
+        self._write_word(ALS_WL, max(center - delta, 0))
+        self._write_word(ALS_WH, min(center + delta, 0xFFFF))
+        self._irq = False
+        self.i2c.readfrom_mem_into(self.address, INTERRUPT, self._int)  # alte Flags löschen / clear stale flags
+
+    # --- Hat das Licht das Band verlassen? Lesen löscht die Flags / Has the light left the band? Reading clears the flags ---
+    # Mit INT-Pin ohne I2C-Zugriff, solange kein Interrupt kam. / With an INT pin no I2C access until an interrupt arrived.
+    def event(self):
+        if self._int_pin is not None:
+            if not self._irq:
+                return False
+            self._irq = False
+        self.i2c.readfrom_mem_into(self.address, INTERRUPT, self._int)
+        return bool(self._int[1] & INT_FLAGS)
@@ -1,42 +1,215 @@
-# wifi.py – Minimaler WLAN-Connector, wie aus vanilla.zip
+# wifi.py – WLAN-Verbindung: Netzwahl per Scan, BSSID-/IP-Cache, schnelles Status-Polling
+# wifi.py – WiFi connection: network choice by scan, BSSID/IP cache, fine-grained status polling
+#
+# Zwei Profile aus config.py: primär (SSID, STATIC_IP, ...) und Fallback (SSID_FB,
+# STATIC_IP_FB, ...), use_fallback wählt. Ein Scan (pick()) liefert je SSID den stärksten
+# Access Point; dessen BSSID und Kanal bleiben in known, die IP-Konfiguration nach DHCP in
+# leases. Folgende Verbindungen gehen direkt an die BSSID und setzen die IP für
+# WIFI_LEASE_TTL Sekunden fest (kein Scan, kein DHCP). Schlägt das fehl, wird der Cache
+# der SSID verworfen.
+# Two profiles from config.py: primary (SSID, STATIC_IP, ...) and fallback (SSID_FB,
+# STATIC_IP_FB, ...), use_fallback selects. A scan (pick()) yields the strongest access
+# point per SSID; its BSSID and channel stay in known, the IP configuration after DHCP in
+# leases. Later connections go straight to the BSSID and set the IP statically for
+# WIFI_LEASE_TTL seconds (no scan, no DHCP). If that fails, the SSID's cache is dropped.
 
 import network
 import config
 import time
+import uasyncio as asyncio
+import logger
+import health
+
+use_fallback = False
+known = {}            # SSID -> [BSSID hex, Kanal / channel, RSSI]
+leases = {}           # SSID -> [IP, Maske / netmask, Gateway, DNS, Epoch] aus DHCP / from DHCP
+last_connect_ms = None
+
+_ssid = None          # SSID der laufenden Verbindung / SSID of the current link
+_cached = False       # laufender Versuch nutzt Cache (BSSID/Lease) / current attempt uses the cache
+
+def _wlan():
+    return network.WLAN(network.STA_IF)
 
 def is_connected():
-    wlan = network.WLAN(network.STA_IF)
-    return wlan.isconnected()
+    return _wlan().isconnected()
 
-def connect_wifi():
-    print(f"🔌 Verbinde mit WLAN: {config.SSID}")
-    wlan = network.WLAN(network.STA_IF)
-    wlan.active(True)
-    wlan.disconnect()
-    time.sleep(1)
-    wlan.connect(config.SSID, config.PASSWORD)
+# --- Profil: (SSID, Passwort, feste IP oder None) / Profile: (SSID, password, static IP or None) ---
+def _profile(fallback):
+    if fallback:
+        ssid, password = config.SSID_FB, config.PASSWORD_FB
+        ip = getattr(config, "STATIC_IP_FB", "")
+        static = (ip, config.NETMASK_FB, config.GATEWAY_FB, config.DNS_FB) if ip else None
+    else:
+        ssid, password = config.SSID, config.PASSWORD
+        ip = getattr(config, "STATIC_IP", "")
+        static = (ip, config.NETMASK, config.GATEWAY, config.DNS) if ip else None
+    return ssid, password, static
 
-    for _ in range(10):
-        if wlan.isconnected():
-            print(f"✅ Verbunden – IP: {wlan.ifconfig()[0]}")
-            return True
-        print("⏳ warte auf Verbindung...")
-        time.sleep(1)
+# --- Scannen, je gesuchter SSID den stärksten AP merken / Scan, remember the strongest AP per wanted SSID ---
+def scan():
+    wlan = _wlan()
+    wlan.active(True)
+    wanted = (config.SSID, getattr(config, "SSID_FB", None))
+    seen = {}
+    for entry in wlan.scan():
+        ssid = entry[0].decode() if isinstance(entry[0], bytes) else entry[0]
+        if ssid in wanted and (ssid not in seen or entry[3] > seen[ssid][2]):
+            seen[ssid] = [bytes(entry[1]).hex(), entry[2], entry[3]]
+    known.update(seen)
+    return seen
 
-    print("❌ Verbindung fehlgeschlagen.")
+# --- Netz wählen: True = Fallback / Choose the network: True = fallback ---
+# Primär, solange es mit mindestens WIFI_MIN_RSSI sichtbar ist, sonst das stärkere Netz.
+# Mit gecachter BSSID fürs Primärnetz entfällt der Scan.
+# Primary as long as it is visible with at least WIFI_MIN_RSSI, otherwise the stronger network.
+# With a cached BSSID for the primary network the scan is skipped.
+def pick():
+    if not pick_scans():
+        return False
+    seen = scan()
+    primary = seen.get(config.SSID)
+    fallback = seen.get(config.SSID_FB)
+    min_rssi = getattr(config, "WIFI_MIN_RSSI", -80)
+    if primary is not None and (primary[2] >= min_rssi or fallback is None or primary[2] >= fallback[2]):
+        return False
+    if fallback is not None:
+        logger.info("WIFI_PICK", config.SSID_FB, fallback[2])
+        return True
     return False
 
-def sync_time():
+# Braucht pick() einen Scan? / Does pick() need a scan?
+def pick_scans():
+    return config.SSID not in known and bool(getattr(config, "SSID_FB", None))
+
+# --- Primärnetz in Reichweite? Scan ohne die laufende Verbindung zu trennen ---
+# --- Primary network in range? Scan without dropping the current link ---
+def primary_visible():
+    seen = scan()
+    primary = seen.get(config.SSID)
+    return primary is not None and primary[2] >= getattr(config, "WIFI_MIN_RSSI", -80)
+
+# --- Verbindungsaufbau starten; None = besteht schon / Start connecting; None = already up ---
+def _begin():
+    global _ssid, _cached
+    ssid, password, static = _profile(use_fallback)
+    wlan = _wlan()
+    wlan.active(True)
+    if wlan.isconnected():
+        if (_ssid or wlan.config("ssid")) == ssid:
+            _ssid = ssid
+            return None
+        wlan.disconnect()  # anderes Netz – wechseln / other network – switch
+
+    logger.info("WIFI_CONNECT", ssid)
+    ip = static or _lease(ssid)
+    if ip:
+        wlan.ifconfig(tuple(ip))
+    else:
+        _dhcp(wlan)
+    ap = known.get(ssid)
+    _cached = ap is not None or (ip is not None and static is None)
+    _ssid = ssid
+    if ap is not None:
+        wlan.connect(ssid, password, bssid=bytes.fromhex(ap[0]))
+    else:
+        wlan.connect(ssid, password)
+    return wlan
+
+# Gemerkte DHCP-Adresse, solange jünger als WIFI_LEASE_TTL / remembered DHCP address while younger than WIFI_LEASE_TTL
+def _lease(ssid):
+    lease = leases.get(ssid)
+    if lease is None:
+        return None
+    if 0 <= time.time() - lease[4] < getattr(config, "WIFI_LEASE_TTL", 3600):
+        return lease[:4]
+    del leases[ssid]
+    return None
+
+# Zurück auf DHCP, nachdem eine Lease fest gesetzt war / back to DHCP after a lease was set statically
+def _dhcp(wlan):
     try:
-        import ntptime
-        ntptime.host = getattr(config, "NTP_SERVER", "pool.ntp.org")
-        time.sleep(1)
-        now = time.time() + int(getattr(config, "UTC_OFFSET", 0)) + int(getattr(config, "SUMMER_OFFSET", 0))
-        tm = time.localtime(now)
-        import machine
-        machine.RTC().datetime((tm[0], tm[1], tm[2], tm[6]+1, tm[3], tm[4], tm[5], 0))
-        print("[INFO] Zeit synchronisiert.")
+        wlan.ipconfig(dhcp4=True)
+    except (AttributeError, OSError, TypeError, ValueError):
+        pass  # ältere Firmware: DHCP ist ohnehin an / older firmware: DHCP is on anyway
+
+# --- Ergebnis buchen / Book the result ---
+def _finish(wlan, start, ok):
+    global last_connect_ms, _ssid
+    ms = time.ticks_diff(time.ticks_ms(), start)
+    if ok:
+        last_connect_ms = ms
+        health.add_time("wifi_connect", ms * 1000)
+        ifconfig = list(wlan.ifconfig())
+        if _profile(use_fallback)[2] is None:
+            leases[_ssid] = ifconfig + [time.time()]
+        logger.info("WIFI_UP", ifconfig[0], ms)
+        return True
+    status = wlan.status()
+    wlan.disconnect()
+    if _cached:
+        # BSSID oder Lease passen nicht mehr – nächstes Mal Scan und DHCP / BSSID or lease stale – scan and DHCP next time
+        known.pop(_ssid, None)
+        leases.pop(_ssid, None)
+    logger.error("WIFI_FAIL", status, ms)
+    _ssid = None
+    return False
+
+# Fertig? True = verbunden, False = fehlgeschlagen, None = läuft noch / Done? True = connected, False = failed, None = still running
+def _state(wlan):
+    status = wlan.status()
+    if status == network.STAT_GOT_IP:
         return True
-    except Exception as e:
-        print(f"[WARN] Zeitabgleich fehlgeschlagen: {e}")
+    if status < 0:
         return False
+    return None
+
+# --- Verbinden nach use_fallback, Status alle WIFI_POLL_MS bis WIFI_CONNECT_TIMEOUT ---
+# --- Connect per use_fallback, status every WIFI_POLL_MS until WIFI_CONNECT_TIMEOUT ---
+def connect_wifi():
+    start = time.ticks_ms()
+    wlan = _begin()
+    if wlan is None:
+        return True
+    poll_ms = getattr(config, "WIFI_POLL_MS", 50)
+    timeout_ms = int(getattr(config, "WIFI_CONNECT_TIMEOUT", 10) * 1000)
+    while True:
+        done = _state(wlan)
+        if done is not None:
+            return _finish(wlan, start, done)
+        if time.ticks_diff(time.ticks_ms(), start) >= timeout_ms:
+            return _finish(wlan, start, False)
+        time.sleep_ms(poll_ms)
+
+# --- Nicht-blockierende Variante für den async-Loop / Non-blocking variant for the async loop ---
+async def connect_wifi_async():
+    start = time.ticks_ms()
+    wlan = _begin()
+    if wlan is None:
+        return True
+    poll_ms = getattr(config, "WIFI_POLL_MS", 50)
+    timeout_ms = int(getattr(config, "WIFI_CONNECT_TIMEOUT", 10) * 1000)
+    while True:
+        done = _state(wlan)
+        if done is not None:
+            return _finish(wlan, start, done)
+        if time.ticks_diff(time.ticks_ms(), start) >= timeout_ms:
+            return _finish(wlan, start, False)
+        await asyncio.sleep_ms(poll_ms)
+
+# --- Funk abschalten (vor dem Schlafen) / Switch the radio off (before sleeping) ---
+def radio_off():
+    global _ssid
+    wlan = _wlan()
+    wlan.disconnect()
+    wlan.active(False)
+    _ssid = None
+
+# --- Cache für den Neustart nach Deep-Sleep / Cache for the restart after deep sleep ---
+def cache():
+    return {"known": known, "leases": leases}
+
+def restore(saved):
+    if saved:
+        known.update(saved.get("known") or {})
+        leases.update(saved.get("leases") or {})
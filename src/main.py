@@ -1,142 +1,677 @@
 # main.py – Main control logic for MQTT, WiFi and sensor handling
-# (synchrones robustes WLAN-Setup / synchronous robust WiFi setup)
+# (uasyncio-Tasks oder synchroner Loop / uasyncio tasks or synchronous loop, see LOOP_MODE)
 
 import wifi
 import mqtt
 import sensors
 import leds
 import state
+import scheduler
+import ringbuf
+import aggregate
+import deadband
+import health
+import logger
+import power
+import timekeep
 import time
 import config
 import machine
+import uasyncio as asyncio
 
 soft_error_count = 0
 MAX_SOFT_ERRORS = 5
+NTP_TIMEOUT_MS = 1000   # ntptime wartet höchstens so lange auf die Antwort / ntptime waits at most this long for the reply
 
 fallback_mode = False
 fallback_check_timer = time.time()
 mqtt_connected = False
 
-# --- Logging Funktion / Logging function ---
-def log(msg, level="INFO"):
-    t = time.localtime()
-    ts = f"{t[3]:02}:{t[4]:02}:{t[5]:02}"
-    print(f"[{level}] {ts} – {msg}")
+# Messwert-Warteschlange zwischen Sensor- und MQTT-Task (nur async), Einträge (epoch, payload)
+# Reading queue between sensor and MQTT task (async only), entries (epoch, payload)
+outbox = []
 
-# --- WLAN verbinden (primär, dann fallback) / Connect WiFi (primary, then fallback) ---
+# Store-and-Forward-Puffer (None = deaktiviert) / Store-and-forward buffer (None = disabled)
+store = None
+
+# Deadband-Filter (None = jede Messung senden) / Deadband filter (None = publish every reading)
+report = None
+
+# Abtastplan des Sensor-Tasks (nur async) / sampling schedule of the sensor task (async only)
+sched = None
+
+# ticks_ms der letzten gesendeten Messung im Ereignis-Modus / ticks_ms of the last published reading in event mode
+last_reading = None
+
+# --- WLAN verbinden (Netz per Scan wählen, dann fallback) / Connect WiFi (choose network by scan, then fallback) ---
 def connect_wifi_blocking():
-    wifi.use_fallback = False
-    log("🔌 Verbinde mit primärem WLAN... / Connecting to primary WiFi...")
+    global fallback_mode
+    wifi.use_fallback = wifi.pick()
+    if not wifi.use_fallback:
+        logger.info("WIFI_PRIMARY")
     if wifi.connect_wifi():
+        fallback_mode = wifi.use_fallback
         return state.SUCCESS
 
     for attempt in range(config.MAX_WIFI_RETRIES):
-        log(f"🔌 Verbinde mit Fallback-WLAN: {config.SSID_FB} – Versuch {attempt + 1} / Connecting to fallback WiFi – attempt {attempt + 1}")
+        logger.info("WIFI_FALLBACK", config.SSID_FB, attempt + 1)
         wifi.use_fallback = True
         if wifi.connect_wifi():
-            global fallback_mode
             fallback_mode = True
             return state.SUCCESS
         time.sleep(config.WIFI_RETRY_DELAY)
 
-    log("❌ Keine WLAN-Verbindung möglich – Neustart / Failed to connect to any network – rebooting.", "FATAL")
+    logger.fatal("WIFI_GIVE_UP")
     error_blink("WIFI_FAIL")
     machine.reset()
     return state.FATAL_ERROR
 
 # --- WLAN prüfen / Check WiFi status ---
+@health.timed("wifi")
 def handle_wifi():
     global fallback_mode, fallback_check_timer
     if not wifi.is_connected():
-        log("🚫 WLAN getrennt – versuche Wiederverbindung / WiFi disconnected – trying to reconnect...", "WARN")
+        logger.warn("WIFI_LOST")
+        health.error("wifi")
         connect_wifi_blocking()
 
+    # Primärnetz per Scan suchen, die Fallback-Verbindung bleibt dabei bestehen
+    # Look for the primary network by scan, the fallback link stays up meanwhile
     if fallback_mode and time.time() - fallback_check_timer >= config.WIFI_PRIMARY_CHECK:
-        log("🔁 Prüfe ob primäres WLAN verfügbar ist / Checking for primary WiFi availability...")
-        wifi.use_fallback = False
-        if wifi.connect_wifi():
-            log("✅ Zurück zum primären WLAN gewechselt / Switched back to primary WiFi")
-            fallback_mode = False
+        logger.info("WIFI_CHECK_PRIMARY")
+        if not wifi.primary_visible():
+            logger.info("WIFI_STAY_FALLBACK")
         else:
-            log("❌ Primär weiterhin nicht erreichbar / Primary still unavailable – remain in fallback")
-            wifi.use_fallback = True
+            wifi.use_fallback = False
+            if wifi.connect_wifi():
+                logger.info("WIFI_BACK_PRIMARY")
+                fallback_mode = False
+            else:
+                logger.info("WIFI_STAY_FALLBACK")
+                wifi.use_fallback = True
+                wifi.connect_wifi()
         fallback_check_timer = time.time()
 
 # --- MQTT-Verbindung prüfen / Check MQTT connection ---
+@health.timed("mqtt")
 def handle_mqtt():
+    if mqtt_connected:
+        return True
+    if mqtt.backoff_remaining_ms() > 0:
+        return False
+    return mqtt_result(mqtt.connect())
+
+# --- Dasselbe ohne Blockieren (async) / The same without blocking (async) ---
+async def handle_mqtt_async():
+    if mqtt_connected:
+        return True
+    if mqtt.backoff_remaining_ms() > 0:
+        return False
+    start = time.ticks_us()
+    ok = mqtt_result(await mqtt.connect_async())
+    health.add_time("mqtt", time.ticks_diff(time.ticks_us(), start))
+    return ok
+
+def mqtt_result(result):
     global mqtt_connected
-    if not mqtt_connected:
-        if mqtt.connect() == mqtt.SUCCESS:
-            mqtt_connected = True
-            log("✅ MQTT-Verbindung aufgebaut / MQTT connection established")
-        else:
-            log("❌ MQTT nicht erreichbar – neuer Versuch folgt / MQTT unreachable – will retry", "ERROR")
-            error_blink("MQTT_FAIL")
-            time.sleep(5)
-            return False
-    return True
+    if result == mqtt.SUCCESS:
+        mqtt_connected = True
+        logger.info("MQTT_UP")
+        return True
+    logger.error("MQTT_RETRY")
+    error_blink("MQTT_FAIL")
+    return False
+
+# --- MQTT-Keepalive und eingehende Pakete / MQTT keepalive and incoming packets ---
+def handle_mqtt_service():
+    global mqtt_connected
+    if mqtt_connected and mqtt.service() != mqtt.SUCCESS:
+        logger.warn("MQTT_DEAD")
+        mqtt_connected = False
+        rescue()
 
 # --- Sensoren abfragen / Read sensors ---
-def handle_sensors():
-    sensor_status, sensor_data = sensors.read_all()
+@health.timed("sensors")
+def handle_sensors(reader=sensors.read_all):
+    sensor_status, sensor_data = reader()
     if sensor_status != state.SUCCESS:
-        log("⚠️ Sensorfehler – versuche VEML7700-Reset / Sensor error – attempting VEML7700 reset", "WARN")
+        logger.warn("SENSOR_RESET")
+        health.error("sensors")
         error_blink("SENSOR_FAIL")
-        if config.VEML_MODE == "active":
-            sensors.veml_reset()
-        if config.BME_MODE == "active":
-            sensors.bme_reset()
-        time.sleep(5)
+        sensors.reset()
         return None
     return sensor_data
 
+# --- Store-and-Forward öffnen (head: Schreibposition vom letzten Lauf) / Open store-and-forward buffer (head: write position from the last run) ---
+def open_store(head=None):
+    global store
+    if not getattr(config, "SF_ENABLED", False):
+        return None
+    try:
+        store = ringbuf.RingBuffer(
+            config.SF_PATH,
+            sectors=getattr(config, "SF_SECTORS", 8),
+            sector_size=getattr(config, "SF_SECTOR_SIZE", 4096),
+            head=head,
+            fields=sensors.stash_fields(),
+        )
+        mqtt.unconfirmed = []  # QoS 0 bis zur Bestätigung behalten / keep QoS 0 until confirmed
+        logger.info("SF_READY", store.pending())
+    except Exception as e:
+        logger.error("SF_FAIL", e)
+        health.error("store", e)
+        store = None
+    return store
+
+# --- Messung im Flash puffern / Buffer a reading on flash ---
+def stash(epoch, data):
+    if store is None:
+        return False
+    try:
+        store.push(epoch, data)
+        return True
+    except Exception as e:
+        logger.error("SF_STASH_FAIL", e)
+        health.error("store", e)
+        return False
+
+# --- Unbestätigte Messungen einer toten Verbindung puffern / Buffer unconfirmed readings of a dead connection ---
+def rescue():
+    rows = mqtt.lost()
+    for epoch, data in rows:
+        stash(epoch, data)
+    if rows:
+        logger.warn("SF_RESCUE", len(rows))
+
+# --- Payload für nachgesendete Messungen / Payload for backlog readings ---
+# Der Flash speichert ganze Sekunden, ms nur, wenn das Payload es trägt / the flash keeps whole seconds, ms only if the payload carries it
+def backlog_payload(epoch, values):
+    return sensors.build_payload(values, (epoch, values.get("ms")))
+
+# --- Messung senden? Nur bei Änderung über DEADBAND oder Heartbeat / Publish the reading? Only on change beyond DEADBAND or heartbeat ---
+def significant(data):
+    return report is None or report.check(data)
+
+# --- Uplink (WLAN + Broker) verfügbar? / Uplink (WiFi + broker) available? ---
+def uplink_ok():
+    return mqtt_connected and wifi.is_connected()
+
 # --- Daten publizieren / Publish data ---
-def handle_publish(data):
+# Bei FATAL_ERROR wird die Messung (mit Zeitstempel epoch) im Flash gepuffert, dazu alles,
+# was über eine inzwischen tote Verbindung ging und nie bestätigt wurde (mqtt.lost()).
+# On FATAL_ERROR the reading (with timestamp epoch) is buffered on flash, along with
+# everything that went over a now dead connection and was never confirmed (mqtt.lost()).
+@health.timed("publish")
+def handle_publish(data, epoch=None):
     global soft_error_count, mqtt_connected
-    result = mqtt.publish(data)
+    # Batch-Modus mit Flash-Puffer: sofort in den Ring, drain_backlog() sendet den Batch – ein
+    # Reset verliert so nichts / batch mode with flash buffer: straight into the ring,
+    # drain_backlog() sends the batch – a reset thus loses nothing
+    if store is not None and getattr(config, "MQTT_BATCH_MODE", None):
+        if stash(timekeep.stamp()[0] if epoch is None else epoch, data):
+            return mqtt.SUCCESS
+    result = mqtt.publish(data, epoch)
     if result == mqtt.SUCCESS:
-        log("✅ Daten erfolgreich gesendet / Data published successfully")
+        logger.debug("PUB_OK")
         soft_error_count = 0
     elif result == mqtt.RECOVERED:
-        log("🔁 MQTT wieder verbunden – weiter geht’s / MQTT reconnected – continuing")
+        logger.info("PUB_RECOVERED")
         soft_error_count = 0
     elif result == mqtt.FATAL_ERROR:
-        log("❌ Publish fehlgeschlagen – MQTT getrennt / Publish failed – MQTT disconnected", "ERROR")
+        logger.error("PUB_FAIL")
         mqtt_connected = False
+        stash(timekeep.stamp()[0] if epoch is None else epoch, data)
         soft_error_count += 1
         if soft_error_count >= MAX_SOFT_ERRORS:
-            log("🚨 Zu viele Fehler beim Senden – Neustart / Too many publish errors – rebooting.", "FATAL")
+            logger.fatal("PUB_REBOOT")
+            for queued_epoch, queued in mqtt.batch_rows + outbox:
+                stash(queued_epoch, queued)
+            if store:
+                store.close()
             machine.reset()
-        leds.blink(leds.onboard_led, 3, 400)
-        time.sleep(5)
+        error_blink("PUBLISH_FAIL")
+    if result != mqtt.SUCCESS:
+        rescue()
+    return result
 
-# --- Hauptloop / Main loop ---
-def main():
-    log("🔧 Starte Hauptloop / Starting main loop...")
+# --- Health-Meldung senden (nur mit Uplink, wird nie gepuffert) / Publish the health message (uplink only, never buffered) ---
+def send_health():
+    global mqtt_connected
+    if not uplink_ok():
+        return False
+    data = health.payload(
+        soft_err=soft_error_count,
+        fallback=1 if fallback_mode else 0,
+        mqtt_reconn=mqtt.reconnects,
+        sf_pending=store.pending() if store is not None else None,
+    )
+    if getattr(config, "LOOP_MODE", "sync") == "duty":
+        data["pw"] = power.stats()
+    result = mqtt.publish_health(data)
+    if result == mqtt.FATAL_ERROR:
+        mqtt_connected = False
+        return False
+    health.reset_timers()
+    return True
+
+# --- Uhr nachstellen, wenn fällig und WLAN da / Resync the clock when due and WiFi is up ---
+def resync_time():
+    if timekeep.due() and wifi.is_connected() and not timekeep.sync():
+        health.error("ntp")
+
+# --- Log-Einträge an MQTT_TOPIC + LOG_TOPIC_SUFFIX (logger-Ausgabe "mqtt") / Log records to MQTT_TOPIC + LOG_TOPIC_SUFFIX (logger sink "mqtt") ---
+def send_log(rows):
+    return mqtt.publish_log(rows) != mqtt.FATAL_ERROR
+
+# --- Synchroner Hauptloop / Synchronous main loop ---
+def main_sync():
+    global report
+    logger.info("LOOP_START")
     wifi_result = connect_wifi_blocking()
     if wifi_result != state.SUCCESS:
         return
 
-    if not wifi.sync_time():
-        log("⚠️ Zeit-Synchronisierung fehlgeschlagen – fahre ohne NTP fort / Time sync failed – continuing without NTP.", "WARN")
-        leds.blink(leds.onboard_led, 4, 100)
+    if not timekeep.sync():
+        logger.warn("NTP_SKIP")
+        health.error("ntp")
+        error_blink("NTP_FAIL")
 
     sensors.init_sensors()
+    open_store()
+    report = deadband.from_config()
+    logger.sender = send_log
+    mqtt.payload_template = sensors.payload_template
+
+    # Fehler warten nie: den nächsten Versuch bringt der nächste Slot (Sensoren) bzw. das Backoff (MQTT)
+    # Errors never wait: the next slot (sensors) or the backoff (MQTT) brings the next attempt
+    def publish_reading(reader):
+        sensor_data = handle_sensors(reader)
+        epoch = sensors.last_stamp[0]
+        if sensor_data is None or not significant(sensor_data):
+            return
+        if not uplink_ok():
+            stash(epoch, sensor_data)
+        else:
+            handle_publish(sensor_data, epoch)
 
+    sched = build_schedule(publish_reading)
+    # Keepalive auch bei langem UPDATE_INTERVAL / keepalive even with a long UPDATE_INTERVAL
+    sched.add("mqtt", getattr(config, "MQTT_CHECK_INTERVAL", 1), handle_mqtt_service)
+
+    net_down = False
     while True:
         handle_wifi()
-        mqtt_ok = handle_mqtt()
+        net_ok = handle_mqtt() and wifi.is_connected()
+        if net_ok:
+            mqtt.flush_batch()
+            mqtt.drain_backlog(store, backlog_payload)
+        elif not net_down:
+            # Weiter messen, mit Flash-Puffer landen die Messungen dort / keep sampling, with a flash buffer the readings go there
+            logger.warn("NET_DOWN" if store is None else "NET_DOWN_BUFFER")
+        net_down = not net_ok
+
+        sched.run_pending()
+        sched.sleep_until_next()
+
+# --- Abtastplan aufbauen / Build the sampling schedule ---
+# Ohne eigene Raten: ein Job liest alles im UPDATE_INTERVAL (wie bisher).
+# Mit "rate" in SENSORS: je Sensor ein eigener Takt, gesendet wird der letzte Stand.
+# Mit AGG_ENABLED: je Sensor ein Takt (rate oder AGG_SAMPLE_INTERVAL), gesendet wird die Zusammenfassung.
+# Without own rates: one job reads everything every UPDATE_INTERVAL (as before).
+# With "rate" in SENSORS: one rate per sensor, the latest values get published.
+# With AGG_ENABLED: one rate per sensor (rate or AGG_SAMPLE_INTERVAL), the summary gets published.
+# ntp=False: Abgleich übernimmt wifi_task (async), nicht der Abtastplan / ntp=False: wifi_task (async) syncs, not the sampling schedule
+def build_schedule(on_reading, ntp=True):
+    sched = scheduler.Scheduler(
+        policy=getattr(config, "SCHED_POLICY", scheduler.SKIP),
+        max_catch_up=getattr(config, "SCHED_MAX_CATCH_UP", 3),
+    )
+    rates = sensors.rates()
+
+    # Ereignis-Modus: der Takt sendet nur noch als Heartbeat, wenn EVENT_HEARTBEAT Sekunden
+    # lang nichts rausging – ohne Senden wird dann auch nicht gelesen.
+    # Event mode: the periodic job only publishes as a heartbeat when nothing went out for
+    # EVENT_HEARTBEAT seconds – without publishing nothing gets read either.
+    events = sensors.has_events()
+    heartbeat_ms = int(getattr(config, "EVENT_HEARTBEAT", 900) * 1000)
+
+    def send(reader):
+        global last_reading
+        last_reading = time.ticks_ms()
+        on_reading(reader)
+
+    def periodic(reader):
+        if not events or last_reading is None or time.ticks_diff(time.ticks_ms(), last_reading) >= heartbeat_ms:
+            send(reader)
+    agg = aggregate.from_config()
+    if agg is not None:
+        # Schnell abtasten, nur Zusammenfassungen senden (alle AGG_EVERY Werte oder AGG_SECONDS)
+        # Sample fast, publish summaries only (every AGG_EVERY values or AGG_SECONDS)
+        def collect(s):
+            sensors.sample(s.name)
+            if agg.add(sensors.latest, s.fields):
+                send(lambda: sensors.summary(agg))
+        interval = getattr(config, "AGG_SAMPLE_INTERVAL", 1)
+        for s in sensors.registry:
+            sched.add(s.name, rates.get(s.name) or interval, lambda s=s: collect(s))
+    elif rates:
+        for name, rate in rates.items():
+            sched.add(name, rate, lambda name=name: sensors.sample(name))
+        sched.add("publish", config.UPDATE_INTERVAL, lambda: periodic(sensors.snapshot))
+    else:
+        sched.add("sample", config.UPDATE_INTERVAL, lambda: periodic(sensors.read_all))
+
+    # Ereignisse (z. B. Lichtänderung) sofort senden, dazwischen nur der Heartbeat
+    # Publish events (e.g. light changes) right away, only the heartbeat in between
+    if events:
+        def on_event():
+            if sensors.events():
+                send(sensors.snapshot)
+        sched.add("events", getattr(config, "SENSOR_EVENT_POLL", 1), on_event)
+
+    report_interval = getattr(config, "SCHED_REPORT_INTERVAL", 0)
+    if report_interval:
+        def timing_report():
+            if logger.enabled(logger.INFO):
+                sched.report(lambda line: logger.info("SCHED", line))
+        sched.add("report", report_interval, timing_report)
+
+    health_interval = getattr(config, "HEALTH_INTERVAL", 0)
+    if health_interval:
+        sched.add("health", health_interval, send_health)
+
+    # NTP-Abgleich alle TIME_SYNC_INTERVAL, nach Fehlschlag alle TIME_SYNC_RETRY Sekunden
+    # NTP resync every TIME_SYNC_INTERVAL, after a failure every TIME_SYNC_RETRY seconds
+    if ntp:
+        sched.add("ntp", getattr(config, "TIME_SYNC_RETRY", 300), resync_time)
+
+    # Gepufferte Log-Ausgaben (Datei, MQTT) regelmäßig leeren / flush buffered log sinks (file, MQTT) regularly
+    if "file" in logger.sinks or "mqtt" in logger.sinks:
+        sched.add("log", getattr(config, "LOG_FLUSH_INTERVAL", 10), lambda: logger.flush(uplink_ok()))
+    return sched
+
+# --- Auf eine Lücke im Abtastplan warten (async) / Wait for a gap in the sampling schedule (async) ---
+# Scan und NTP blockieren die Schleife (CYW43-Scan ~2 s, UDP bis zum Timeout). Sie laufen
+# deshalb direkt nach einer Messung, wenn bis zur nächsten mindestens need_ms Zeit ist.
+# Ohne solche Lücke (schnelle Abtastraten) spätestens nach WIFI_PRIMARY_CHECK Sekunden.
+# Scan and NTP block the loop (CYW43 scan ~2 s, UDP up to the timeout). They therefore run
+# right after a reading when the next one is at least need_ms away. Without such a gap
+# (fast sampling rates) after WIFI_PRIMARY_CHECK seconds at the latest.
+async def idle_slot(need_ms):
+    start = time.ticks_ms()
+    limit_ms = int(config.WIFI_PRIMARY_CHECK * 1000)
+    while sched is not None and time.ticks_diff(time.ticks_ms(), start) < limit_ms:
+        delay = sched.next_delay_ms()
+        if delay >= need_ms:
+            return
+        await asyncio.sleep_ms(delay + 1)
+
+# --- WLAN verbinden ohne Blockieren (async) / Connect WiFi without blocking (async) ---
+async def connect_wifi_async():
+    global fallback_mode
+    if wifi.pick_scans():
+        await idle_slot(getattr(config, "WIFI_SCAN_MS", 2500))
+    wifi.use_fallback = wifi.pick()
+    if not wifi.use_fallback:
+        logger.info("WIFI_PRIMARY")
+    if await wifi.connect_wifi_async():
+        fallback_mode = wifi.use_fallback
+        return state.SUCCESS
+
+    for attempt in range(config.MAX_WIFI_RETRIES):
+        logger.info("WIFI_FALLBACK", config.SSID_FB, attempt + 1)
+        wifi.use_fallback = True
+        if await wifi.connect_wifi_async():
+            fallback_mode = True
+            return state.SUCCESS
+        await asyncio.sleep(config.WIFI_RETRY_DELAY)
+
+    logger.fatal("WIFI_GIVE_UP")
+    error_blink("WIFI_FAIL")
+    await asyncio.sleep(3)  # LED-Muster abspielen lassen / let the LED pattern play
+    machine.reset()
+    return state.FATAL_ERROR
+
+# --- Task: WLAN-Überwachung / Task: WiFi supervision ---
+async def wifi_task():
+    global fallback_mode, fallback_check_timer
+    check_ms = int(getattr(config, "WIFI_CHECK_INTERVAL", 1) * 1000)
+    while True:
+        start = time.ticks_us()
+        if not wifi.is_connected():
+            logger.warn("WIFI_LOST")
+            health.error("wifi")
+            await connect_wifi_async()
+        elif fallback_mode and time.time() - fallback_check_timer >= config.WIFI_PRIMARY_CHECK:
+            # Scan statt Probe-Verbindung, der Fallback-Link bleibt stehen / scan instead of a probe connection, the fallback link stays up
+            await idle_slot(getattr(config, "WIFI_SCAN_MS", 2500))
+            logger.info("WIFI_CHECK_PRIMARY")
+            if not wifi.primary_visible():
+                logger.info("WIFI_STAY_FALLBACK")
+            else:
+                wifi.use_fallback = False
+                if await wifi.connect_wifi_async():
+                    logger.info("WIFI_BACK_PRIMARY")
+                    fallback_mode = False
+                else:
+                    logger.info("WIFI_STAY_FALLBACK")
+                    wifi.use_fallback = True
+                    await wifi.connect_wifi_async()
+            fallback_check_timer = time.time()
+        elif timekeep.due():
+            await idle_slot(NTP_TIMEOUT_MS)
+            resync_time()
+        health.add_time("wifi", time.ticks_diff(time.ticks_us(), start))
+        await asyncio.sleep_ms(check_ms)
+
+# --- Task: MQTT-Verbindung halten und Warteschlange senden / Task: keep MQTT up and send queue ---
+async def mqtt_task():
+    check_ms = int(getattr(config, "MQTT_CHECK_INTERVAL", 1) * 1000)
+    while True:
+        if not wifi.is_connected():
+            await asyncio.sleep_ms(check_ms)
+            continue
 
-        if not wifi.is_connected() or not mqtt_ok:
-            log("📡 Netzwerk oder Broker nicht verfügbar – erneuter Versuch / Network or broker unavailable – reconnect only.", "WARN")
-            time.sleep(5)
+        if not await handle_mqtt_async():
+            # Wartezeit bestimmt das Backoff in mqtt.py / the backoff in mqtt.py sets the pace
+            await asyncio.sleep_ms(check_ms)
             continue
 
-        sensor_data = handle_sensors()
-        if sensor_data:
-            handle_publish(sensor_data)
+        handle_mqtt_service()
 
-        time.sleep(config.UPDATE_INTERVAL)
+        while outbox and mqtt_connected:
+            epoch, data = outbox[0]
+            if handle_publish(data, epoch) == mqtt.FATAL_ERROR:
+                if store is not None:
+                    outbox.pop(0)  # liegt jetzt im Flash / now buffered on flash
+                break
+            outbox.pop(0)
+            await asyncio.sleep_ms(0)  # anderen Tasks Zeit geben / yield to other tasks
+
+        if not outbox and mqtt_connected:
+            mqtt.flush_batch()
+            mqtt.drain_backlog(store, backlog_payload)
+
+        await asyncio.sleep_ms(check_ms)
+
+# --- Task: Sensoren im festen Takt abfragen / Task: sample sensors at a fixed rate ---
+# Nur Messen und Einreihen – Verbindungsaufbau, Scan und NTP laufen in mqtt_task/wifi_task.
+# Only sampling and queueing – connecting, scan and NTP run in mqtt_task/wifi_task.
+async def sensor_task():
+    global sched
+    max_queue = getattr(config, "ASYNC_QUEUE_LEN", 10)
+
+    def queue_reading(reader):
+        sensor_data = handle_sensors(reader)
+        epoch = sensors.last_stamp[0]
+        if not sensor_data or not significant(sensor_data):
+            return
+        # Uplink weg: direkt in den Flash-Puffer / Uplink down: straight to the flash buffer
+        if not uplink_ok() and stash(epoch, sensor_data):
+            return
+        if len(outbox) >= max_queue:
+            oldest_epoch, oldest = outbox.pop(0)
+            if not stash(oldest_epoch, oldest):
+                logger.warn("QUEUE_FULL")
+        outbox.append((epoch, sensors.keep(sensor_data)))
+
+    sched = build_schedule(queue_reading, ntp=False)
+    await sched.run()
+
+# --- Asynchroner Hauptloop / Asynchronous main loop ---
+async def main_async():
+    global report
+    logger.info("LOOP_ASYNC")
+    asyncio.create_task(leds.led_task())
+
+    wifi_result = await connect_wifi_async()
+    if wifi_result != state.SUCCESS:
+        return
+
+    if not timekeep.sync():
+        logger.warn("NTP_SKIP")
+        health.error("ntp")
+        error_blink("NTP_FAIL")
+
+    sensors.init_sensors()
+    open_store()
+    report = deadband.from_config()
+    logger.sender = send_log
+    mqtt.payload_template = sensors.payload_template
+
+    asyncio.create_task(wifi_task())
+    asyncio.create_task(mqtt_task())
+    await sensor_task()
+
+# --- Duty-Cycle: senden, Rückstand leeren, Health, dann trennen / Duty cycle: publish, drain backlog, health, then disconnect ---
+# data None = nur Rückstand senden / only send the backlog
+def duty_uplink(data, epoch):
+    global mqtt_connected
+    if not wifi.is_connected():
+        wifi.use_fallback = wifi.pick()
+        if not wifi.connect_wifi():
+            health.error("wifi")
+            power.mark("wifi")
+            if data is not None:
+                stash(epoch, data)
+            return False
+    power.mark("wifi")
+    resync_time()
+
+    if not handle_mqtt():
+        power.mark("mqtt")
+        if data is not None:
+            stash(epoch, data)
+        return False
+    power.mark("mqtt")
+
+    if data is not None:
+        handle_publish(data, epoch)
+    batch = getattr(config, "SF_DRAIN_BATCH", 10)
+    while mqtt_connected and mqtt.drain_backlog(store, backlog_payload, batch):
+        pass
+    if mqtt.flush_batch(force=True) != mqtt.SUCCESS:
+        for queued_epoch, queued in mqtt.batch_rows:
+            stash(queued_epoch, queued)
+        mqtt.batch_rows.clear()
+
+    health_interval = getattr(config, "HEALTH_INTERVAL", 0)
+    if health_interval and time.time() - power.retained.get("hb", 0) >= health_interval and send_health():
+        power.retained["hb"] = time.time()
+    logger.flush(uplink_ok())
+    power.mark("publish")
+
+    mqtt.disconnect()
+    mqtt_connected = False
+    rescue()
+    return True
+
+# --- Ein Zyklus: messen, bei Bedarf senden, Sensoren und Funk aus, schlafen ---
+# --- One cycle: measure, publish if needed, sensors and radio off, sleep ---
+def duty_cycle(interval_ms):
+    data = handle_sensors()
+    epoch = sensors.last_stamp[0]
+    sensors.power_off()
+    power.mark("sensors")
+
+    if data is not None and significant(data):
+        # Zwischen zwei Uplinks in den Flash-Puffer, der nächste Uplink sendet mit
+        # Between two uplinks into the flash buffer, the next uplink sends it along
+        if store is not None and not wifi.is_connected() and not power.uplink_due():
+            stash(epoch, data)
+        else:
+            duty_uplink(data, epoch)
+    elif wifi.is_connected():
+        duty_uplink(None, epoch)  # Kaltstart: WLAN steht schon / cold start: WiFi is up already
+    else:
+        logger.debug("POWER_SKIP")
+    wifi.radio_off()
+
+    power.retained["wifi"] = wifi.cache()
+    power.retained["tk"] = timekeep.state()
+    power.retained["pid"] = mqtt.packet_id()
+    power.retained["sch"] = mqtt.schema_sent
+    power.retained["err"] = health.errors
+    if report is not None:
+        power.retained["db"] = report.state()
+    if store is not None:
+        power.retained["sf"] = store.head()
+        store.commit()
+    sleep_ms = max(int(getattr(config, "POWER_MIN_SLEEP", 1) * 1000), interval_ms - power.awake_ms())
+    logger.info("POWER_SLEEP", sleep_ms, power.awake_ms())
+    logger.flush()
+    power.sleep(sleep_ms)
+
+# --- Duty-Cycle-Hauptloop (LOOP_MODE "duty") / Duty-cycle main loop (LOOP_MODE "duty") ---
+# Nach Deep-Sleep beginnt hier jeder Zyklus neu, retained liefert den Zustand von vorher.
+# Kaltstart: einmal WLAN + NTP. Light-Sleep bleibt in der Schleife.
+# After deep sleep every cycle starts here again, retained provides the earlier state.
+# Cold start: WiFi + NTP once. Light sleep stays in the loop.
+def main_duty():
+    global report
+    saved = power.resume()
+    logger.info("LOOP_DUTY", saved.get("n", 0))
+    wifi.restore(saved.get("wifi"))
+    timekeep.restore(saved.get("tk"))
+    mqtt.resume_pid = saved.get("pid", 0)
+    mqtt.schema_sent = saved.get("sch")
+    health.errors.update(saved.get("err") or {})
+
+    sensors.init_sensors(scan=not power.warm)
+    open_store(saved.get("sf"))
+    report = deadband.from_config()
+    if report is not None and saved.get("db"):
+        report.restore(saved["db"])
+    logger.sender = send_log
+    mqtt.payload_template = sensors.payload_template
+
+    if not power.warm:
+        wifi.use_fallback = wifi.pick()
+        if wifi.connect_wifi():
+            if not timekeep.sync():
+                logger.warn("NTP_SKIP")
+                health.error("ntp")
+        else:
+            health.error("wifi")
+    power.mark("boot")
+
+    interval_ms = int(config.UPDATE_INTERVAL * 1000)
+    while True:
+        duty_cycle(interval_ms)
+        # Nur nach Light-Sleep: Sensoren waren stromlos / light sleep only: sensors were unpowered
+        sensors.wake()
+        power.mark("boot")
+
+# --- Hauptloop je nach LOOP_MODE / Main loop depending on LOOP_MODE ---
+def main():
+    health.uptime_s()  # Laufzeit ab hier zählen / count uptime from here
+    mode = getattr(config, "LOOP_MODE", "sync")
+    if mode == "async":
+        asyncio.run(main_async())
+    elif mode == "duty":
+        main_duty()
+    else:
+        main_sync()
 
 # --- LED-Fehlermuster / LED error patterns ---
 ERROR_PATTERNS = {
@@ -148,11 +683,14 @@ ERROR_PATTERNS = {
 }
 
 # --- Fehlerblinken / LED error blink ---
+# async: LED-Task spielt das Muster ab, sync: blinkt sofort (blockierend)
+# async: the LED task plays the pattern, sync: blinks right away (blocking)
 def error_blink(reason):
     pattern = ERROR_PATTERNS.get(reason)
     if pattern:
-        return leds.blink(leds.onboard_led, *pattern)
-    return None
+        leds.signal(leds.onboard_led, *pattern)
+        return True
+    return False
 
 # --- Einstiegspunkt / Entry point ---
 if __name__ == "__main__":
@@ -0,0 +1,61 @@
+# conftest.py – Firmware-Module aus src/lib unter CPython testen
+# conftest.py – Test firmware modules from src/lib on CPython
+#
+# Wie in den Benchmarks: src/lib und bench in den sys.path, dann die Host-Shims für
+# machine, time.ticks_*, micropython und ujson.
+# As in the benchmarks: src/lib and bench on sys.path, then the host shims for
+# machine, time.ticks_*, micropython and ujson.
+#
+#   python3 -m pytest -q
+
+import os
+import sys
+
+import pytest
+
+_here = __file__.rsplit("/", 1)[0] if "/" in __file__ else "."
+sys.path.insert(0, _here + "/../src/lib")
+sys.path.insert(0, _here + "/../bench")
+
+try:
+    import ujson  # noqa: F401
+except ImportError:
+    import json
+    sys.modules["ujson"] = json
+
+try:
+    import micropython  # noqa: F401
+except ImportError:
+    class micropython:
+        native = staticmethod(lambda f: f)
+        const = staticmethod(lambda x: x)
+    sys.modules["micropython"] = micropython
+
+import hostmachine
+import hostnet
+
+hostmachine.install()
+hostnet.install_ticks()
+
+# --- Simulation (sim.run) für einen Test / Simulation (sim.run) for one test ---
+# sim.run() tauscht time, machine, network usw. in sys.modules aus; die Fixture stellt den
+# Zustand danach wieder her, damit die übrigen Tests ihre Host-Shims behalten.
+# sim.run() swaps time, machine, network etc. in sys.modules; the fixture restores the
+# state afterwards so the other tests keep their host shims.
+ROOT = os.path.realpath(os.path.join(_here, ".."))
+SRC = os.path.join(ROOT, "src")
+
+@pytest.fixture
+def sim():
+    modules = dict(sys.modules)
+    path = list(sys.path)
+    # Firmware-Module der anderen Tests (Host-Shims) entladen / unload the other tests' firmware modules (host shims)
+    for name, mod in modules.items():
+        if os.path.realpath(getattr(mod, "__file__", None) or "").startswith(SRC):
+            del sys.modules[name]
+    sys.path.insert(0, ROOT)
+    import sim
+    yield sim
+    sys.modules.clear()
+    sys.modules.update(modules)
+    sys.path[:] = path
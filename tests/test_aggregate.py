@@ -0,0 +1,72 @@
+# test_aggregate.py – Ringfenster-Kennzahlen gegen statistics, Fälligkeit nach K Werten / T Sekunden
+# test_aggregate.py – Ring window statistics against statistics, due after K values / T seconds
+
+import random
+import statistics
+import time
+from array import array
+
+import aggregate
+
+def f32(values):
+    return list(array("f", values))
+
+def check(w, values, tol):
+    values = f32(values)
+    assert w.n == len(values)
+    assert list(w.sorted[:w.n]) == sorted(values)
+    assert abs(w.mean() - statistics.fmean(values)) < tol
+    assert abs(w.stddev() - statistics.pstdev(values)) < tol
+    assert abs(w.median() - statistics.median(values)) < tol
+
+def test_window_matches_statistics_while_sliding():
+    rnd = random.Random(7)
+    w = aggregate.Window(16)
+    seen = []
+    for _ in range(200):
+        value = rnd.uniform(1000.0, 1020.0)  # Druck: float32-Auslöschung / pressure: float32 cancellation
+        w.add(value)
+        seen.append(value)
+        check(w, seen[-16:], 0.01)
+
+def test_window_with_duplicates_and_partial_fill():
+    w = aggregate.Window(8)
+    for value in (3, 1, 3, 2, 3):
+        w.add(value)
+    check(w, [3, 1, 3, 2, 3], 1e-6)
+    data = {}
+    w.summarize("x", data)
+    assert data == {"x_min": 1.0, "x_max": 3.0, "x_mean": 2.4, "x_stddev": 0.8, "x_median": 3.0}
+
+def test_summary_after_k_values_and_reset():
+    agg = aggregate.Aggregator(("temp", "lux"), size=10, every=3, seconds=0)
+    assert not agg.add({"temp": 20.0, "lux": 5})
+    assert not agg.add({"temp": 21.0, "lux": None})
+    assert agg.add({"temp": 22.0, "lux": 7})
+    data = agg.summarize({})
+    assert data["samples"] == 3
+    assert (data["temp_min"], data["temp_max"], data["temp_mean"]) == (20.0, 22.0, 21.0)
+    assert (data["lux_min"], data["lux_max"]) == (5.0, 7.0)
+    assert not agg.due()
+    assert agg.summarize({})["temp_mean"] is None  # Fenster geleert / window cleared
+
+def test_sliding_keeps_window():
+    agg = aggregate.Aggregator(("temp",), size=4, every=2, seconds=0, sliding=True)
+    for value in (1.0, 2.0):
+        agg.add({"temp": value})
+    agg.summarize({})
+    for value in (3.0, 4.0):
+        agg.add({"temp": value})
+    data = agg.summarize({})
+    assert (data["temp_min"], data["temp_max"], data["samples"]) == (1.0, 4.0, 2)
+
+def test_summary_after_t_seconds(monkeypatch):
+    now = [1000]
+    monkeypatch.setattr(time, "ticks_ms", lambda: now[0])
+    agg = aggregate.Aggregator(("temp",), size=60, every=0, seconds=60)
+    assert not agg.due()
+    agg.add({"temp": 20.0})
+    now[0] += 59999
+    assert not agg.due()
+    now[0] += 1
+    assert agg.due()
@@ -0,0 +1,32 @@
+# test_bincodec.py – Binär-Records und Binär-Batches gegen den Host-Decoder
+# test_bincodec.py – Binary records and binary batches against the host decoder
+
+import sys
+
+sys.path.insert(0, __file__.rsplit("/", 2)[0] + "/tools")
+
+import bincodec
+import config
+import mqtt
+import payload_decoder
+
+FIELDS = ["date", "time", "temp", "pressure", "humidity", "lux"]
+
+def test_record_round_trip():
+    codec = bincodec.Codec(FIELDS)
+    schema = payload_decoder.Schema(codec.schema())
+    record = bytes(codec.encode({"epoch": 1792324800, "temp": -3.21, "pressure": 1013.2, "humidity": None, "lux": 70000}))
+    assert len(record) == codec.size
+    assert schema.decode(record) == [{"epoch": 1792324800, "temp": -3.21, "pressure": 1013.2, "humidity": None, "lux": 70000}]
+
+def test_batch_is_records_back_to_back(monkeypatch):
+    codec = bincodec.Codec(FIELDS)
+    monkeypatch.setattr(config, "MQTT_PAYLOAD_FORMAT", "binary", raising=False)
+    monkeypatch.setattr(mqtt, "payload_template", codec)
+    rows = [(1792324800 + 60 * i, {"epoch": 1792324800 + 60 * i, "temp": 20.0 + i, "pressure": 1000.0, "humidity": 50.0, "lux": i})
+            for i in range(3)]
+    msg = bytes(mqtt._encode_batch(rows))
+    assert len(msg) == 3 * codec.size
+    decoded = payload_decoder.Schema(codec.schema()).decode(msg)
+    assert [row["epoch"] for row in decoded] == [epoch for epoch, _ in rows]
+    assert [row["lux"] for row in decoded] == [0, 1, 2]
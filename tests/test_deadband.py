@@ -0,0 +1,95 @@
+# test_deadband.py – Report-by-Exception: absolute/relative Bänder, None-Wechsel, Heartbeat
+# test_deadband.py – Report-by-exception: absolute/relative bands, None changes, heartbeat
+
+import time
+
+import pytest
+
+import deadband
+
+@pytest.fixture
+def clock(monkeypatch):
+    now = {"ms": 0, "s": 1792324800}
+    monkeypatch.setattr(time, "ticks_ms", lambda: now["ms"] % (1 << 30))
+    monkeypatch.setattr(time, "time", lambda: now["s"] + now["ms"] // 1000)
+    return now
+
+def test_absolute_band(clock):
+    db = deadband.Deadband({"temp": 0.5}, heartbeat_s=0)
+    assert db.check({"temp": 20.0})          # erste Messung / first reading
+    assert not db.check({"temp": 20.4})
+    assert not db.check({"temp": 19.6})
+    assert db.check({"temp": 20.5})
+    assert not db.check({"temp": 20.9})      # Referenz ist jetzt 20.5 / reference is now 20.5
+    assert (db.sent, db.suppressed) == (2, 3)
+
+def test_relative_band_uses_larger_threshold(clock):
+    db = deadband.Deadband({"lux": (5, 10)}, heartbeat_s=0)
+    assert db.check({"lux": 1000})
+    assert not db.check({"lux": 1090})       # 10 % = 100 lx
+    assert db.check({"lux": 1101})           # Schwelle in float32, daher knapp darüber / threshold in float32, hence just above
+    db = deadband.Deadband({"lux": (5, 10)}, heartbeat_s=0)
+    assert db.check({"lux": 20})
+    assert not db.check({"lux": 24})         # absolut 5 lx > 10 % / absolute 5 lx > 10 %
+    assert db.check({"lux": 25})
+
+def test_none_transitions_are_changes(clock):
+    db = deadband.Deadband({"temp": 0.5}, heartbeat_s=0)
+    assert db.check({"temp": 20.0})
+    assert db.check({"temp": None})
+    assert not db.check({"temp": None})
+    assert db.check({"temp": 20.0})
+
+def test_fields_without_rule_are_ignored(clock):
+    db = deadband.Deadband({"temp": 0.5}, heartbeat_s=0)
+    assert db.check({"temp": 20.0, "time": "12:00:00"})
+    assert not db.check({"temp": 20.0, "time": "12:00:10"})
+
+def test_heartbeat(clock):
+    db = deadband.Deadband({"temp": 0.5}, heartbeat_s=60)
+    assert db.check({"temp": 20.0})
+    clock["ms"] += 59999
+    assert not db.check({"temp": 20.0})
+    clock["ms"] += 1
+    assert db.check({"temp": 20.0})
+    assert db.heartbeats == 1
+    clock["ms"] += 1000
+    assert not db.check({"temp": 20.0})      # Heartbeat setzt den Zeitpunkt neu / heartbeat resets the time
+
+def test_state_survives_restart(clock):
+    db = deadband.Deadband({"temp": 0.5}, heartbeat_s=60)
+    db.check({"temp": 20.0})
+    clock["ms"] += 30000
+    saved = db.state()
+
+    clock["ms"] = 5000                       # Neustart: ticks von vorn, Uhr läuft weiter / restart: ticks from scratch, clock keeps going
+    clock["s"] += 30
+    db = deadband.Deadband({"temp": 0.5}, heartbeat_s=60)
+    assert db.restore(saved)
+    assert not db.check({"temp": 20.2})
+    clock["ms"] += 30000
+    assert db.check({"temp": 20.2})          # Heartbeat nach insgesamt 60 s / heartbeat after 60 s in total
+
+def test_restore_from_the_future_is_expired(clock):
+    db = deadband.Deadband({"temp": 0.5}, heartbeat_s=60)
+    db.check({"temp": 20.0})
+    saved = db.state()
+
+    clock["ms"] = 5000                       # Neustart, Uhr eine Stunde zurück / restart, clock one hour back
+    clock["s"] -= 3600
+    db = deadband.Deadband({"temp": 0.5}, heartbeat_s=60)
+    assert db.restore(saved)
+    assert db.check({"temp": 20.2})          # Heartbeat sofort statt in einer Stunde / heartbeat at once instead of in an hour
+    assert db.heartbeats == 1
+    clock["ms"] += 30000
+    assert not db.check({"temp": 20.2})
+
+    db = deadband.Deadband({"temp": 0.5}, heartbeat_s=0)
+    assert db.restore(saved)
+    assert not db.check({"temp": 20.2})      # ohne Heartbeat zählt nur das Band / without heartbeat only the band counts
+
+def test_restore_rejects_changed_rules(clock):
+    db = deadband.Deadband({"temp": 0.5}, heartbeat_s=60)
+    db.check({"temp": 20.0})
+    saved = db.state()
+    assert not deadband.Deadband({"temp": 0.5, "lux": 10}).restore(saved)
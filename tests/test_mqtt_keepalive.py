@@ -0,0 +1,78 @@
+# test_mqtt_keepalive.py – Keepalive: PINGREQ trotz laufender Publishes, toter Broker ohne PINGRESP
+# test_mqtt_keepalive.py – Keepalive: PINGREQ despite ongoing publishes, dead broker without PINGRESP
+
+import time
+
+import pytest
+
+import config
+import mqtt
+
+PINGREQ = b"\xc0\x00"
+PINGRESP = b"\xd0\x00"
+
+# Broker, der alles verschluckt / broker that swallows everything
+class SilentSocket:
+    def __init__(self):
+        self.packets = []
+
+    def write(self, buf, off=0, n=None):
+        n = len(buf) - off if n is None else n
+        self.packets.append(bytes(buf[off:off + n]))
+        return n
+
+@pytest.fixture
+def clock(monkeypatch):
+    now = {"ms": 0}
+    monkeypatch.setattr(time, "ticks_ms", lambda: now["ms"])
+    return now
+
+@pytest.fixture
+def client(clock, monkeypatch):
+    monkeypatch.setattr(config, "MQTT_KEEPALIVE", 60, raising=False)
+    monkeypatch.setattr(config, "MQTT_READ_TIMEOUT", 5, raising=False)
+    c = mqtt.MQTTClient("test", "localhost")
+    c.sock = SilentSocket()
+    c._poller = None   # Pakete vom Broker kommen über receive() / broker packets come via receive()
+    return c
+
+def receive(c, data):
+    c._rx[c._rx_len:c._rx_len + len(data)] = data
+    c._rx_len += len(data)
+    c._last_rx = time.ticks_ms()
+    return c._parse()
+
+def publish_for(c, clock, seconds, every=10):
+    for _ in range(seconds // every):
+        clock["ms"] += every * 1000
+        c.publish("t", b"x")
+        c.service()
+
+def test_ping_goes_out_while_publishing(client, clock):
+    publish_for(client, clock, 30)
+    assert client.sock.packets[-1] == PINGREQ
+    assert client.sock.packets.count(PINGREQ) == 1
+
+def test_pingresp_keeps_the_link(client, clock):
+    publish_for(client, clock, 30)
+    clock["ms"] += 1000
+    receive(client, PINGRESP)
+    publish_for(client, clock, 20)
+    client.service()
+    assert client.sock.packets.count(PINGREQ) == 1
+
+def test_silent_broker_is_detected(client, clock):
+    publish_for(client, clock, 30)
+    clock["ms"] += 5000
+    client.service()                     # Zeitlimit gerade erreicht / timeout just reached
+    clock["ms"] += 1
+    with pytest.raises(mqtt.MQTTException):
+        client.service()
+
+def test_idle_link_pings_too(client, clock):
+    clock["ms"] += 29999
+    client.service()
+    assert PINGREQ not in client.sock.packets
+    clock["ms"] += 1
+    client.service()
+    assert client.sock.packets == [PINGREQ]
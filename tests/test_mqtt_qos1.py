@@ -0,0 +1,84 @@
+# test_mqtt_qos1.py – QoS-1-Fenster: Slots, PUBACK, volles Fenster, Wiederholung mit DUP
+# test_mqtt_qos1.py – QoS 1 window: slots, PUBACK, full window, retransmit with DUP
+
+import pytest
+
+import config
+import mqtt
+
+class RecordingSocket:
+    def __init__(self):
+        self.packets = []
+
+    def write(self, buf, off=0, n=None):
+        n = len(buf) - off if n is None else n
+        self.packets.append(bytes(buf[off:off + n]))
+        return n
+
+@pytest.fixture
+def client(monkeypatch):
+    monkeypatch.setattr(config, "MQTT_INFLIGHT", 3, raising=False)
+    monkeypatch.setattr(config, "MQTT_ACK_TIMEOUT", 0.02, raising=False)
+    c = mqtt.MQTTClient("test", "localhost")
+    c.sock = RecordingSocket()
+    c._poller = None   # kein Netz: Pakete vom Broker kommen über receive() / no network: broker packets come via receive()
+    return c
+
+def receive(c, data):
+    c._rx[c._rx_len:c._rx_len + len(data)] = data
+    c._rx_len += len(data)
+    return c._parse()
+
+def puback(pid):
+    return bytes((0x40, 2, pid >> 8, pid & 0xFF))
+
+def test_window_fills_without_waiting(client):
+    assert [client.publish("t", b"x", qos=1) for _ in range(3)] == [1, 2, 3]
+    assert client.pending_acks() == 3
+    assert [p[0] for p in client.sock.packets] == [0x32, 0x32, 0x32]
+
+def test_full_window_times_out(client):
+    for _ in range(3):
+        client.publish("t", b"x", qos=1)
+    with pytest.raises(mqtt.MQTTException):
+        client.publish("t", b"x", qos=1)
+    assert client.pending_acks() == 3
+
+def test_puback_frees_its_slot(client):
+    for _ in range(3):
+        client.publish("t", b"x", qos=1)
+    assert receive(client, puback(2) + puback(99)) == 2   # unbekannte ID wird ignoriert / unknown id is ignored
+    assert client.pending_acks() == 2 and client.acked == 1
+    assert client.publish("t", b"y", qos=1) == 4
+    assert list(client._inflight_ids) == [1, 4, 3]
+
+def test_puback_split_across_reads(client):
+    client.publish("t", b"x", qos=1)
+    assert receive(client, puback(1)[:1]) == 0
+    assert receive(client, puback(1)[1:]) == 1
+    assert client.wait_acks(0)
+
+def test_retransmit_sets_dup_and_keeps_payload(client):
+    buf = bytearray(b"abc")
+    client.publish("t", memoryview(buf), qos=1)
+    buf[:] = b"xyz"                      # Template-Puffer ändert sich / template buffer changes
+    client.sock.packets.clear()
+    client._resend_inflight()
+    packet = b"".join(client.sock.packets)
+    assert packet[0] == 0x3A             # PUBLISH, DUP, QoS 1
+    assert packet.endswith(b"\x00\x01abc")
+    assert client.retransmits == 1
+
+def test_packet_ids_wrap_and_skip_inflight(client):
+    client._pid = 0xFFFE
+    assert client.publish("t", b"x", qos=1) == 0xFFFF
+    assert client.publish("t", b"x", qos=1) == 1
+    receive(client, puback(0xFFFF))
+    client._pid = 0
+    assert client.publish("t", b"x", qos=1) == 2   # 1 ist noch unterwegs / 1 is still in flight
+
+def test_qos0_needs_no_slot(client):
+    for _ in range(3):
+        client.publish("t", b"x", qos=1)
+    assert client.publish("t", b"x") == 0
+    assert client.pending_acks() == 3
@@ -0,0 +1,131 @@
+# test_mqtt_send.py – _send: Reconnect und einmalige Wiederholung nach einem Sendefehler
+# test_mqtt_send.py – _send: reconnect and a single retry after a send error
+
+import sys
+import types
+
+import config
+import mqtt
+
+class FakeClient:
+    def __init__(self, failures):
+        self.failures = failures
+        self.sock = object()
+        self.sent = []
+
+    def process_acks(self):
+        pass
+
+    def publish(self, topic, msg, retain=False, qos=0):
+        if self.failures:
+            self.failures -= 1
+            raise OSError(104)
+        self.sent.append((topic, msg))
+
+    def close(self):
+        self.sock = None
+
+def setup(monkeypatch, failures, reconnect=mqtt.SUCCESS):
+    fake = FakeClient(failures)
+    connects = []
+
+    def connect():
+        connects.append(1)
+        if reconnect == mqtt.SUCCESS:
+            fake.sock = object()
+        return reconnect
+
+    monkeypatch.setattr(config, "MQTT_MODE", "active", raising=False)
+    monkeypatch.setattr(config, "LOOP_MODE", "sync", raising=False)
+    monkeypatch.setattr(mqtt, "client", fake)
+    monkeypatch.setattr(mqtt, "connect", connect)
+    # leds braucht uasyncio – hier genügt ein Platzhalter / leds needs uasyncio – a placeholder is enough here
+    monkeypatch.setitem(sys.modules, "leds", types.SimpleNamespace(onboard_led=None, signal=lambda *a: None))
+    return fake, connects
+
+def test_success(monkeypatch):
+    fake, connects = setup(monkeypatch, 0)
+    assert mqtt._send("t", "x") == mqtt.SUCCESS
+    assert fake.sent == [("t", "x")] and not connects
+
+def test_recovered_means_sent(monkeypatch):
+    fake, connects = setup(monkeypatch, 1)
+    assert mqtt._send("t", "x") == mqtt.RECOVERED
+    assert fake.sent == [("t", "x")] and len(connects) == 1
+
+def test_retry_fails_after_reconnect(monkeypatch):
+    fake, connects = setup(monkeypatch, 2)
+    assert mqtt._send("t", "x") == mqtt.FATAL_ERROR
+    assert fake.sent == [] and len(connects) == 1
+
+def test_reconnect_fails(monkeypatch):
+    fake, connects = setup(monkeypatch, 1, reconnect=mqtt.FATAL_ERROR)
+    assert mqtt._send("t", "x") == mqtt.FATAL_ERROR
+    assert fake.sent == [] and len(connects) == 1
+
+def test_async_never_reconnects_inline(monkeypatch):
+    fake, connects = setup(monkeypatch, 1)
+    monkeypatch.setattr(config, "LOOP_MODE", "async")
+    assert mqtt._send("t", "x") == mqtt.FATAL_ERROR
+    assert not connects
+
+# --- QoS 1: eine gescheiterte Nachricht hat genau einen Besitzer / QoS 1: a failed message has exactly one owner ---
+# Der Broker zählt, was über alle Verbindungen ankommt / the broker counts what arrives over all connections
+class Broker:
+    def __init__(self):
+        self.received = b""
+
+    def count(self, payload):
+        return self.received.count(payload)
+
+class BrokerSocket:
+    def __init__(self, broker, failures=0):
+        self.broker = broker
+        self.failures = failures
+
+    def write(self, buf, off=0, n=None):
+        if self.failures:
+            self.failures -= 1
+            raise OSError(104)
+        n = len(buf) - off if n is None else n
+        self.broker.received += bytes(buf[off:off + n])
+        return n
+
+    def close(self):
+        pass
+
+def setup_qos1(monkeypatch, loop_mode):
+    broker = Broker()
+    monkeypatch.setattr(config, "MQTT_MODE", "active", raising=False)
+    monkeypatch.setattr(config, "MQTT_QOS", 1, raising=False)
+    monkeypatch.setattr(config, "LOOP_MODE", loop_mode, raising=False)
+    c = mqtt.MQTTClient("test", "localhost")
+    c.sock = BrokerSocket(broker)
+
+    # wie das Ende von connect_steps(): offene QoS-1-Nachrichten mit DUP / like the end of connect_steps(): open QoS 1 messages with DUP
+    def connect():
+        c.sock = BrokerSocket(broker)
+        c._resend_inflight()
+        return mqtt.SUCCESS
+
+    monkeypatch.setattr(mqtt, "client", c)
+    monkeypatch.setattr(mqtt, "connect", connect)
+    monkeypatch.setitem(sys.modules, "leds", types.SimpleNamespace(onboard_led=None, signal=lambda *a: None))
+    return broker, c, connect
+
+def test_qos1_retry_does_not_duplicate(monkeypatch):
+    broker, c, _ = setup_qos1(monkeypatch, "sync")
+    assert mqtt._send("t", "reading-0") == mqtt.SUCCESS      # unterwegs, noch ohne PUBACK / in flight, no PUBACK yet
+    c.sock.failures = 1
+    assert mqtt._send("t", "reading-1") == mqtt.RECOVERED
+    assert broker.count(b"reading-1") == 1
+    assert broker.count(b"reading-0") == 2                    # Original + DUP nach dem Reconnect / original + DUP after the reconnect
+    assert c.pending_acks() == 2 and c.retransmits == 1
+
+def test_qos1_failed_message_is_left_to_the_caller(monkeypatch):
+    broker, c, connect = setup_qos1(monkeypatch, "async")
+    c.sock.failures = 1
+    assert mqtt._send("t", "reading-1") == mqtt.FATAL_ERROR  # main.py puffert sie / main.py buffers it
+    assert c.pending_acks() == 0
+    connect()
+    assert broker.count(b"reading-1") == 0
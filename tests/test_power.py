@@ -0,0 +1,70 @@
+# test_power.py – Warm- oder Kaltstart nach dem Boot, Uhr nach Deep-Sleep
+# test_power.py – Warm or cold start after boot, clock after deep sleep
+
+import time
+import types
+
+import pytest
+
+import config
+import power
+
+WAKE = 1792324800            # gesicherte Weckzeit (2026) / saved wake time (2026)
+RTC_LOST = 1609459200        # rp2 nach Stromausfall: 2021-01-01 / rp2 after power loss: 2021-01-01
+
+class FakeRTC:
+    def __init__(self, now):
+        self.now = now
+        self.set = None
+
+    def datetime(self, dt=None):
+        self.set = dt
+
+@pytest.fixture
+def board(monkeypatch, tmp_path):
+    now = {"t": WAKE, "cause": 1}
+    rtc = FakeRTC(now)
+    # rp2: PWRON_RESET und WDT_RESET, kein DEEPSLEEP_RESET, kein RTC-Speicher
+    # rp2: PWRON_RESET and WDT_RESET, no DEEPSLEEP_RESET, no RTC memory
+    machine = types.SimpleNamespace(PWRON_RESET=1, WDT_RESET=3, reset_cause=lambda: now["cause"], RTC=lambda: rtc)
+    monkeypatch.setattr(power, "machine", machine)
+    monkeypatch.setattr(time, "time", lambda: now["t"])
+    monkeypatch.setattr(time, "localtime", lambda t=None: time.gmtime(now["t"] if t is None else t))
+    monkeypatch.setattr(config, "POWER_STATE_FILE", str(tmp_path / "wake.json"), raising=False)
+    monkeypatch.setattr(power, "retained", {"t": WAKE, "n": 5})
+    power.save()
+    return now, machine, rtc
+
+def test_cold_power_on_ignores_saved_state(board):
+    now, _, rtc = board
+    now.update(t=RTC_LOST, cause=1)         # Strom weg: RTC auf 2021, Datei noch da / power lost: RTC at 2021, file still there
+    assert power.resume() == {}
+    assert not power.warm
+    assert rtc.set is None                   # Uhr nicht auf die alte Weckzeit / clock not set to the old wake time
+
+def test_rp2_deep_sleep_wake_with_lost_clock(board):
+    now, _, rtc = board
+    now.update(t=RTC_LOST, cause=3)
+    assert power.resume()["n"] == 5
+    assert power.warm
+    assert rtc.set[:3] == time.gmtime(WAKE)[:3]
+
+def test_rp2_wake_with_running_clock(board):
+    now, _, rtc = board
+    now.update(t=WAKE + 1, cause=3)
+    assert power.resume()["n"] == 5 and power.warm
+    assert rtc.set is None
+
+def test_rp2_stale_state_is_cold(board):
+    now, _, _ = board
+    now.update(t=WAKE + 3600, cause=3)      # Reset lange nach der Weckzeit / reset long after the wake time
+    assert power.resume() == {}
+    assert not power.warm
+
+def test_deepsleep_reset_decides_where_available(board):
+    now, machine, _ = board
+    machine.DEEPSLEEP_RESET = 4
+    now.update(t=WAKE + 3600, cause=4)
+    assert power.resume()["n"] == 5 and power.warm
+    now.update(cause=3)
+    assert power.resume() == {} and not power.warm
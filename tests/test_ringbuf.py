@@ -0,0 +1,93 @@
+# test_ringbuf.py – Ringpuffer: Lesezeiger über Sektorgrenzen, Überlauf, Neustart
+# test_ringbuf.py – Ring buffer: read cursor across sector ends, overflow, restart
+
+import ringbuf
+
+SECTOR_SIZE = ringbuf.HEADER_SIZE + 3 * ringbuf.record_size()  # 3 Slots / 3 slots
+
+def make(tmp_path, head=None):
+    return ringbuf.RingBuffer(str(tmp_path / "rb.bin"), sectors=4, sector_size=SECTOR_SIZE, head=head)
+
+def drain(rb):
+    out = []
+    while True:
+        rec = rb.peek()
+        if rec is None:
+            return out
+        out.append(rec)
+        rb.advance()
+
+def reading(i):
+    return {"temp": 20 + i / 10, "pressure": 1000.0 + i, "humidity": 40.0, "lux": i}
+
+# Sektor bis zum Ende geleert, dann neuer Record / Sector drained to its end, then a new record
+def test_drain_to_sector_end_then_push(tmp_path):
+    rb = make(tmp_path)
+    for i in range(3):
+        rb.push(100 + i, reading(i))
+    assert [epoch for epoch, _ in drain(rb)] == [100, 101, 102]
+    assert rb.pending() == 0
+
+    rb.push(200, reading(5))
+    assert rb.pending() == 1
+    records = drain(rb)
+    assert records == [(200, {"temp": 20.5, "pressure": 1005.0, "humidity": 40.0, "lux": 5})]
+    assert rb.pending() == 0
+
+def test_cursor_at_sector_end_survives_restart(tmp_path):
+    rb = make(tmp_path)
+    for i in range(3):
+        rb.push(100 + i, reading(i))
+    drain(rb)
+    head = rb.head()
+    rb.close()
+
+    rb = make(tmp_path, head=head)
+    rb.push(200, reading(1))
+    assert [epoch for epoch, _ in drain(rb)] == [200]
+    rb.close()
+
+def test_many_sectors_in_order(tmp_path):
+    rb = make(tmp_path)
+    epochs = []
+    for i in range(10):
+        rb.push(i, reading(i))
+        if i % 4 == 3:
+            epochs += [epoch for epoch, _ in drain(rb)]
+    epochs += [epoch for epoch, _ in drain(rb)]
+    assert epochs == list(range(10))
+
+def test_overflow_drops_oldest_sector(tmp_path):
+    rb = make(tmp_path)
+    for i in range(4 * 3 + 1):
+        rb.push(i, reading(i))
+    assert rb.dropped == 3
+    assert [epoch for epoch, _ in drain(rb)] == list(range(3, 13))
+
+def test_none_fields_round_trip(tmp_path):
+    rb = make(tmp_path)
+    rb.push(1, {"temp": None, "pressure": 990.5, "humidity": None, "lux": None})
+    assert rb.peek() == (1, {"temp": None, "pressure": 990.5, "humidity": None, "lux": None})
+
+# Kennzahlen und Felder weiterer Sensoren überleben Puffern und Nachsenden
+# Statistics and fields of further sensors survive stashing and replay
+def test_round_trip_aggregate_and_registry_fields(tmp_path):
+    fields = ("epoch", "temp", "temp_min", "temp_max", "temp_mean", "temp_stddev", "temp_median",
+              "lux_max", "samples", "bme_latency_ms", "soil")
+    rb = ringbuf.RingBuffer(str(tmp_path / "rb.bin"), sectors=4, sector_size=512, fields=fields)
+    data = {"temp": 21.5, "temp_min": -4.25, "temp_max": 30.0, "temp_mean": 20.12, "temp_stddev": 0.35,
+            "temp_median": 20.1, "lux_max": 70000, "samples": 60, "bme_latency_ms": 8.3, "soil": 0.5}
+    rb.push(1792324800, data)
+    rb.push(1792324860, dict(data, soil=None, samples=None))
+    first, second = drain(rb)
+    assert first == (1792324800, data)
+    assert second == (1792324860, dict(data, soil=None, samples=None))
+
+def test_layout_change_reformats(tmp_path):
+    rb = make(tmp_path)
+    rb.push(1, reading(1))
+    rb.close()
+    rb = ringbuf.RingBuffer(str(tmp_path / "rb.bin"), sectors=4, sector_size=SECTOR_SIZE, fields=("temp", "soil"))
+    assert rb.pending() == 0
+    rb.push(2, {"temp": 20.0, "soil": 0.25})
+    assert drain(rb) == [(2, {"temp": 20.0, "soil": 0.25})]
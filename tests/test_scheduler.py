@@ -0,0 +1,94 @@
+# test_scheduler.py – Festtakt: SKIP/CATCH_UP, Überläufe, Jitter-Statistik, Wartezeit
+# test_scheduler.py – Fixed rate: SKIP/CATCH_UP, overruns, jitter statistics, delay
+
+import time
+
+import pytest
+
+import scheduler
+
+@pytest.fixture
+def clock(monkeypatch):
+    now = {"ms": 1000}
+    monkeypatch.setattr(time, "ticks_ms", lambda: now["ms"])
+    return now
+
+def at(clock, ms):
+    clock["ms"] = 1000 + ms
+
+def test_fixed_rate_without_drift(clock):
+    sched = scheduler.Scheduler()
+    runs = []
+    sched.add("a", 1, lambda: runs.append(clock["ms"] - 1000))
+    for t in (0, 1030, 2010, 3000, 4500):
+        at(clock, t)
+        sched.run_pending()
+    assert runs == [0, 1030, 2010, 3000, 4500]
+    assert sched.next_delay_ms() == 500      # Raster bleibt bei 5000 / grid stays at 5000
+
+def test_skip_drops_missed_slots(clock):
+    sched = scheduler.Scheduler(policy=scheduler.SKIP)
+    job = sched.add("a", 1, lambda: None)
+    sched.run_pending()
+    at(clock, 3500)                          # Slots 1000, 2000, 3000 verpasst / slots missed
+    assert sched.run_pending() == 1
+    assert sched.run_pending() == 0
+    assert job.skipped == 2 and job.overruns == 1
+    assert sched.next_delay_ms() == 500
+
+def test_catch_up_runs_late_slots(clock):
+    sched = scheduler.Scheduler(policy=scheduler.CATCH_UP, max_catch_up=3)
+    job = sched.add("a", 1, lambda: None)
+    sched.run_pending()
+    at(clock, 3500)
+    ran = 0
+    while sched.run_pending():
+        ran += 1
+    assert ran == 3 and job.skipped == 0     # 1000, 2000, 3000 nachgeholt / run late
+    assert sched.next_delay_ms() == 500
+
+def test_catch_up_is_limited(clock):
+    sched = scheduler.Scheduler(policy=scheduler.CATCH_UP, max_catch_up=2)
+    job = sched.add("a", 1, lambda: None)
+    sched.run_pending()
+    at(clock, 5500)                          # 5 Slots verpasst / 5 slots missed
+    ran = 0
+    while sched.run_pending():
+        ran += 1
+    assert ran == 3 and job.skipped == 2
+    assert sched.next_delay_ms() == 500
+
+def test_overrunning_callback(clock):
+    sched = scheduler.Scheduler(policy=scheduler.SKIP)
+    durations = [2500, 0]
+    job = sched.add("slow", 1, lambda: clock.update(ms=clock["ms"] + durations.pop(0)))
+    sched.run_pending()                      # dauert 2,5 Perioden / takes 2.5 periods
+    assert job.skipped == 2
+    assert sched.next_delay_ms() == 500
+    at(clock, 3000)
+    sched.run_pending()                      # wieder im Raster / back on the grid
+    assert job.jitter_ms == 0 and job.runs == 2
+
+def test_jitter_statistics_and_report_window(clock):
+    sched = scheduler.Scheduler()
+    sched.add("a", 1, lambda: None)
+    for t in (0, 1010, 2030, 3020):
+        at(clock, t)
+        sched.run_pending()
+    name, runs, last, avg, peak, overruns, skipped = sched.stats()[0]
+    assert (name, runs, last, avg, peak, overruns, skipped) == ("a", 4, 20, 15, 30, 0, 0)
+    lines = []
+    sched.report(lines.append)
+    assert "jitter last/avg/max=20/15/30 ms" in lines[0]
+    assert sched.stats()[0][3:5] == (0, 0)   # Fenster zurückgesetzt / window reset
+    assert sched.stats()[0][1] == 4          # Zähler bleiben / counters stay
+
+def test_next_delay_covers_all_jobs(clock):
+    sched = scheduler.Scheduler()
+    assert sched.next_delay_ms() == 0
+    sched.add("slow", 10, lambda: None)
+    sched.add("fast", 0.25, lambda: None)
+    sched.run_pending()
+    assert sched.next_delay_ms() == 250
+    at(clock, 400)
+    assert sched.next_delay_ms() == 0
@@ -0,0 +1,49 @@
+# test_sensors.py – Treiber-Registry: eigene Treiber, Pflicht-Schnittstelle, Felder im Payload
+# test_sensors.py – Driver registry: custom drivers, mandatory interface, fields in the payload
+
+import sys
+import types
+
+import pytest
+
+import config
+import sensors
+
+def driver_module(monkeypatch, name, **attrs):
+    cls = type("Sensor", (sensors.Sensor,), attrs)
+    monkeypatch.setitem(sys.modules, name, types.SimpleNamespace(Sensor=cls))
+    monkeypatch.delitem(sensors.DRIVERS, name, raising=False)
+    return cls
+
+def test_custom_driver_is_registered(monkeypatch):
+    cls = driver_module(monkeypatch, "soil_sensor", FIELDS=("soil",),
+                        open=lambda self, i2c: None, measure=lambda self: (0.4,))
+    assert sensors._driver("soil_sensor") is cls
+    s = cls({"name": "soil", "mode": "active"})
+    s.ok = True
+    data = {}
+    s.read(data)
+    assert data == {"soil": 0.4}
+
+@pytest.mark.parametrize("attrs", [
+    {"FIELDS": ("soil",), "open": lambda self, i2c: None},
+    {"FIELDS": ("soil",), "measure": lambda self: (0.4,)},
+    {"open": lambda self, i2c: None, "measure": lambda self: (0.4,)},
+])
+def test_incomplete_driver_is_rejected(monkeypatch, attrs):
+    driver_module(monkeypatch, "soil_sensor", **attrs)
+    with pytest.raises(TypeError):
+        sensors._driver("soil_sensor")
+    assert "soil_sensor" not in sensors.DRIVERS
+
+def test_stash_fields_cover_registry_and_aggregate(monkeypatch):
+    driver_module(monkeypatch, "soil_sensor", FIELDS=("soil",),
+                  open=lambda self, i2c: None, measure=lambda self: (0.4,))
+    monkeypatch.setattr(config, "SENSORS", [{"name": "soil", "driver": "soil_sensor", "mode": "inactive"}], raising=False)
+    monkeypatch.setattr(config, "MQTT_PAYLOAD_FIELDS", None, raising=False)
+    monkeypatch.setattr(config, "AGG_ENABLED", True, raising=False)
+    monkeypatch.setattr(config, "AGG_FIELDS", ["soil"], raising=False)
+    for name in ("registry", "payload_template", "_payload", "_compiled"):
+        monkeypatch.setattr(sensors, name, [] if name == "registry" else getattr(sensors, name))
+    sensors.init_sensors()
+    assert sensors.stash_fields() == ["soil", "soil_min", "soil_max", "soil_mean", "soil_stddev", "soil_median", "samples"]
@@ -0,0 +1,34 @@
+# test_sim_batch.py – Batch-Modus mit Flash-Puffer: ein Reset mitten im Batch verliert nichts
+# test_sim_batch.py – Batch mode with flash buffer: a reset in the middle of a batch loses nothing
+
+import json
+
+import pytest
+
+def batch_seconds(world, clock):
+    seconds = []
+    for m in world.broker.messages:
+        if m[1] == "sensor/default/batch":
+            seconds.extend(t - clock.epoch_start for t in json.loads(m[2])["t"])
+    return sorted(set(seconds))
+
+# Reset 330 s nach dem Start, 47 s nach dem letzten Batch / reset 330 s after start, 47 s after the last batch
+@pytest.mark.parametrize("mode", ["async", "sync"])
+def test_reset_mid_batch_leaves_no_gap(sim, mode):
+    from sim import clock, machine
+
+    def setup(world, config):
+        fired = []
+
+        def reset_once():
+            if not fired and clock.now_us >= 330000000:
+                fired.append(True)
+                machine.reset()
+        clock.watch(reset_once)
+
+    world = sim.run(700, setup=setup, overrides={"LOOP_MODE": mode, "MQTT_BATCH_MODE": "columnar"}, quiet=True)
+    seconds = batch_seconds(world, clock)
+    assert world.boots == 2
+    gaps = [b - a for a, b in zip(seconds, seconds[1:]) if b - a > 15]
+    assert gaps == []
+    assert len(seconds) >= 60                # eine Messung je UPDATE_INTERVAL / one reading per UPDATE_INTERVAL
@@ -0,0 +1,18 @@
+# test_sim_events.py – Ereignis-Modus (VEML_EVENT) in der Simulation: Senden nur bei Lichtänderung plus Heartbeat
+# test_sim_events.py – Event mode (VEML_EVENT) in the simulation: publish on light changes plus heartbeat only
+
+import pytest
+
+def published(world):
+    return [m[0] for m in world.broker.messages if m[1] == "sensor/default"]
+
+# 2 Stunden ab 09:00 Ortszeit, Tageslicht-Trace / 2 hours from 09:00 local time, daylight trace
+@pytest.mark.parametrize("mode", ["async", "sync"])
+def test_event_mode_publishes_far_less(sim, mode):
+    world = sim.run(2 * 3600, overrides={"LOOP_MODE": mode, "VEML_EVENT": True, "EVENT_HEARTBEAT": 900,
+                                         "HEALTH_INTERVAL": 0}, start_epoch=1717225200, quiet=True)
+    times = published(world)
+    assert 2 * 4 <= len(times) <= 2 * 360 // 10   # mindestens Heartbeats, höchstens ein Zehntel / at least heartbeats, at most a tenth
+    gaps = [b - a for a, b in zip(times, times[1:])]
+    assert max(gaps) <= 900 + 10                  # Heartbeat im UPDATE_INTERVAL-Raster / heartbeat on the UPDATE_INTERVAL grid
+    assert world.devices["bme"].reads < 2 * 360 // 10
@@ -0,0 +1,26 @@
+# test_sim_outage.py – Stiller Broker-Ausfall in der Simulation: keine Lücke in den Daten
+# test_sim_outage.py – Silent broker outage in the simulation: no gap in the data
+
+import json
+
+import pytest
+
+def reading_seconds(world):
+    seconds = set()
+    for m in world.broker.messages:
+        if m[1] == "sensor/default":
+            h, mi, s = map(int, json.loads(m[2])["time"].split(":"))
+            seconds.add(h * 3600 + mi * 60 + s)
+    return sorted(seconds)
+
+# Broker verschluckt ab 300 s alles (Schreiben "gelingt"), ab 700 s ist er zurück
+# The broker swallows everything from 300 s on (writes "succeed"), it is back from 700 s on
+@pytest.mark.parametrize("mode", ["async", "sync", "duty"])
+def test_silent_outage_leaves_no_gap(sim, mode):
+    world = sim.run(1200, setup=lambda world, config: world.broker.outage(300, 400),
+                    overrides={"LOOP_MODE": mode}, quiet=True)
+    seconds = reading_seconds(world)
+    gaps = [b - a for a, b in zip(seconds, seconds[1:]) if b - a > 15]
+    assert gaps == []
+    assert len(seconds) >= 118               # eine Messung je UPDATE_INTERVAL / one reading per UPDATE_INTERVAL
+    assert world.broker.connects >= 2
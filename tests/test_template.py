@@ -0,0 +1,61 @@
+# test_template.py – Template.encode byte-gleich zu ujson.dumps(OrderedDict)
+# test_template.py – Template.encode byte-identical to ujson.dumps(OrderedDict)
+
+from collections import OrderedDict
+
+import pytest
+import ujson
+
+import template
+
+FIELDS = ["date", "time", "temp", "pressure", "humidity", "lux", "Grüße"]
+
+VALUES = [
+    None,
+    True,
+    False,
+    0,
+    -7,
+    1 << 40,
+    0.0,
+    -0.0,
+    21.3,
+    -0.5,
+    1e-05,
+    1.5e+300,
+    -2.5e-12,
+    1e16,
+    float("nan"),
+    float("inf"),
+    float("-inf"),
+    "",
+    "18.10.2026",
+    "Grüße \"draußen\"\n",
+    "☃ \U0001F321",
+    [1, 2.5, None],
+]
+
+def _want(payload):
+    return ujson.dumps(OrderedDict((field, payload.get(field)) for field in FIELDS)).encode()
+
+@pytest.mark.parametrize("value", VALUES, ids=repr)
+def test_value_matches_ujson(value):
+    tpl = template.Template(FIELDS)
+    payload = {field: value for field in FIELDS}
+    assert bytes(tpl.encode(payload)) == _want(payload)
+
+# Der Wert-Cache darf gleiche, aber anders formatierte Werte nicht verwechseln
+# The value cache must not confuse equal values that format differently
+def test_cache_keeps_each_value_apart():
+    tpl = template.Template(FIELDS)
+    for value in VALUES + VALUES[::-1] + [0.0, -0.0, 0, False, 1, True, 1.0, float("nan"), float("nan")]:
+        payload = {"temp": value, "lux": 0, "date": "18.10.2026"}
+        assert bytes(tpl.encode(payload)) == _want(payload)
+
+def test_buffer_grows_for_long_strings():
+    tpl = template.Template(FIELDS, size=16)
+    payload = {"Grüße": "x" * 300, "temp": 21.3}
+    assert bytes(tpl.encode(payload)) == _want(payload)
+
+def test_no_fields():
+    assert bytes(template.Template(()).encode({"temp": 1})) == ujson.dumps(OrderedDict()).encode()
@@ -0,0 +1,114 @@
+# test_timekeep.py – NTP-Abgleich: Drift-Schätzung, Mindestabstand, Begrenzung, Monotonie, Neustart
+# test_timekeep.py – NTP sync: drift estimate, minimum span, clamping, monotonicity, restart
+
+import sys
+import time
+import types
+
+import pytest
+
+import config
+import timekeep
+
+EPOCH = 1792324800
+
+# Uhr-Attrappe: "true" ist die echte Zeit in ms, ticks_ms läuft um ppm langsamer,
+# settime() stellt die RTC (time.time) auf ganze echte Sekunden.
+# Clock fake: "true" is real time in ms, ticks_ms runs slow by ppm,
+# settime() sets the RTC (time.time) to whole real seconds.
+@pytest.fixture
+def clock(monkeypatch):
+    now = {"true": 0, "ppm": 0, "rtc": EPOCH, "fail": False}
+
+    def ticks():
+        return now["true"] - now["true"] * now["ppm"] // 1000000
+
+    def settime():
+        if now["fail"]:
+            raise OSError("timeout")
+        now["rtc"] = EPOCH + now["true"] // 1000
+
+    monkeypatch.setattr(time, "ticks_ms", ticks)
+    monkeypatch.setattr(time, "time", lambda: now["rtc"])
+    monkeypatch.setitem(sys.modules, "ntptime", types.SimpleNamespace(settime=settime))
+    monkeypatch.setattr(config, "TIME_DRIFT_MIN", 21600, raising=False)
+    for name, value in (("synced", False), ("drift_ppm", 0), ("last_sync", None), ("last_offset_ms", None),
+                        ("_base_ms", EPOCH * 1000), ("_base_ticks", 0), ("_span", None),
+                        ("_last_ms", 0), ("_next_try", 0)):
+        monkeypatch.setattr(timekeep, name, value)
+    return now
+
+def hours(now, h):
+    now["true"] += h * 3600000
+
+def test_first_sync_sets_time_without_drift(clock):
+    clock["ppm"] = 100
+    hours(clock, 10)
+    assert timekeep.sync()
+    assert timekeep.synced and timekeep.drift_ppm == 0
+    assert abs(timekeep.now_ms() - (EPOCH * 1000 + clock["true"])) <= 500
+
+def test_drift_estimate_converges_by_halves(clock):
+    clock["ppm"] = 100                       # lokale Uhr geht nach / local clock is slow
+    timekeep.sync()
+    hours(clock, 24)
+    timekeep.sync()
+    assert 45 <= timekeep.drift_ppm <= 55    # halbe Abweichung / half the offset
+    assert timekeep.last_offset_ms > 8000
+    hours(clock, 24)
+    timekeep.sync()
+    assert 70 <= timekeep.drift_ppm <= 80
+    hours(clock, 24)
+    timekeep.sync()
+    assert 83 <= timekeep.drift_ppm <= 92
+    # korrigierte Zeit bleibt nah an der echten / corrected time stays close to real time
+    hours(clock, 24)
+    assert abs(timekeep.now_ms() - (EPOCH * 1000 + clock["true"])) < 2000
+
+def test_short_span_gives_no_estimate(clock):
+    clock["ppm"] = 100
+    timekeep.sync()
+    hours(clock, 5)                          # < TIME_DRIFT_MIN (6 h)
+    timekeep.sync()
+    assert timekeep.drift_ppm == 0
+
+def test_drift_is_clamped(clock):
+    clock["ppm"] = 5000
+    timekeep.sync()
+    hours(clock, 24)
+    timekeep.sync()
+    assert timekeep.drift_ppm == timekeep.MAX_DRIFT_PPM
+
+def test_failed_sync_schedules_retry(clock, monkeypatch):
+    monkeypatch.setattr(config, "TIME_SYNC_RETRY", 300, raising=False)
+    clock["fail"] = True
+    assert not timekeep.sync()
+    assert not timekeep.synced
+    assert not timekeep.due()
+    clock["rtc"] += 300
+    assert timekeep.due()
+
+def test_stamps_stay_monotonic_when_sync_sets_clock_back(clock):
+    clock["rtc"] = EPOCH + 1                 # RTC 1 s vor / RTC 1 s ahead
+    timekeep.restore([0, None, 0, 0])
+    hours(clock, 1)
+    before = timekeep.now_ms()
+    timekeep.sync()                          # stellt ~1 s zurück / sets back by ~1 s
+    assert timekeep.now_ms() >= before
+    assert timekeep.stamp() >= divmod(before, 1000)
+
+def test_restore_skips_next_drift_estimate(clock):
+    clock["ppm"] = 100
+    timekeep.sync()
+    hours(clock, 24)
+    timekeep.sync()
+    drift = timekeep.drift_ppm
+    saved = timekeep.state()
+    timekeep.restore(saved)                  # ticks_ms-Bezug ist nach dem Neustart weg / ticks_ms reference is gone after the restart
+    assert timekeep.drift_ppm == drift and timekeep.synced
+    hours(clock, 24)
+    timekeep.sync()
+    assert timekeep.drift_ppm == drift
+    hours(clock, 24)
+    timekeep.sync()
+    assert timekeep.drift_ppm > drift
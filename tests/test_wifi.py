@@ -0,0 +1,137 @@
+# test_wifi.py – Netzwahl per Scan, BSSID-/Lease-Cache und sein Verwerfen
+# test_wifi.py – Network choice by scan, BSSID/lease cache and dropping it
+
+import sys
+import time
+import types
+
+import pytest
+
+import config
+
+STAT_GOT_IP = 3
+STAT_NO_AP_FOUND = -2
+
+# WLAN-Attrappe: APs als (SSID, BSSID, Kanal, RSSI), DHCP vergibt 192.168.1.50
+# WLAN fake: APs as (SSID, BSSID, channel, RSSI), DHCP hands out 192.168.1.50
+class FakeWLAN:
+    def __init__(self):
+        self.aps = []
+        self.scans = 0
+        self.connects = []       # (SSID, BSSID, feste IP / static IP)
+        self.dhcp = 0
+        self._static = None
+        self._ssid = None
+        self._status = 0
+
+    def active(self, on=None):
+        return True
+
+    def scan(self):
+        self.scans += 1
+        return [(ssid.encode(), bssid, ch, rssi, 3, 0) for ssid, bssid, ch, rssi in self.aps]
+
+    def ifconfig(self, cfg=None):
+        if cfg is not None:
+            self._static = cfg
+            return None
+        return self._static or ("192.168.1.50", "255.255.255.0", "192.168.1.1", "192.168.1.1")
+
+    def ipconfig(self, dhcp4=None):
+        self._static = None
+        self.dhcp += 1
+
+    def connect(self, ssid, key, bssid=None):
+        self.connects.append((ssid, bssid, self._static and self._static[0]))
+        found = any(ap[0] == ssid and (bssid is None or ap[1] == bssid) for ap in self.aps)
+        self._ssid = ssid if found else None
+        self._status = STAT_GOT_IP if found else STAT_NO_AP_FOUND
+
+    def status(self):
+        return self._status
+
+    def isconnected(self):
+        return self._status == STAT_GOT_IP
+
+    def disconnect(self):
+        self._status = 0
+
+    def config(self, name):
+        return self._ssid
+
+@pytest.fixture
+def net(monkeypatch):
+    wlan = FakeWLAN()
+    fake = types.SimpleNamespace(STA_IF=0, STAT_GOT_IP=STAT_GOT_IP, WLAN=lambda iface: wlan)
+    monkeypatch.setitem(sys.modules, "network", fake)
+    monkeypatch.setitem(sys.modules, "uasyncio", types.SimpleNamespace())
+    import wifi
+    monkeypatch.setattr(wifi, "network", fake)
+    monkeypatch.setattr(wifi, "known", {})
+    monkeypatch.setattr(wifi, "leases", {})
+    monkeypatch.setattr(wifi, "use_fallback", False)
+    monkeypatch.setattr(wifi, "_ssid", None)
+    for name, value in (("SSID", "home"), ("PASSWORD", "pw"), ("STATIC_IP", ""),
+                        ("SSID_FB", "backup"), ("PASSWORD_FB", "pw"), ("STATIC_IP_FB", ""),
+                        ("WIFI_MIN_RSSI", -80), ("WIFI_LEASE_TTL", 3600), ("WIFI_CONNECT_TIMEOUT", 1)):
+        monkeypatch.setattr(config, name, value, raising=False)
+    wlan.aps = [("home", b"\x01" * 6, 6, -70), ("home", b"\x02" * 6, 11, -55), ("backup", b"\x03" * 6, 1, -40)]
+    return wifi, wlan
+
+def reconnect(wifi, wlan):
+    wlan.disconnect()
+    wifi.use_fallback = wifi.pick()
+    return wifi.connect_wifi()
+
+def test_scan_picks_strongest_ap_and_caches_it(net):
+    wifi, wlan = net
+    assert reconnect(wifi, wlan)
+    assert wlan.scans == 1
+    assert wifi.known["home"] == ["02" * 6, 11, -55]
+    assert wlan.connects[-1] == ("home", b"\x02" * 6, None)
+    assert wifi.leases["home"][0] == "192.168.1.50"
+
+def test_cached_bssid_and_lease_skip_scan_and_dhcp(net):
+    wifi, wlan = net
+    reconnect(wifi, wlan)
+    dhcp = wlan.dhcp
+    assert reconnect(wifi, wlan)
+    assert wlan.scans == 1
+    assert wlan.dhcp == dhcp
+    assert wlan.connects[-1] == ("home", b"\x02" * 6, "192.168.1.50")
+
+def test_stale_bssid_drops_cache(net):
+    wifi, wlan = net
+    reconnect(wifi, wlan)
+    wlan.aps = [("home", b"\x04" * 6, 6, -60), ("backup", b"\x03" * 6, 1, -40)]   # AP getauscht / AP replaced
+    assert not reconnect(wifi, wlan)
+    assert "home" not in wifi.known and "home" not in wifi.leases
+    assert reconnect(wifi, wlan)
+    assert wlan.scans == 2
+    assert wifi.known["home"][0] == "04" * 6
+
+def test_weak_primary_picks_fallback(net):
+    wifi, wlan = net
+    wlan.aps = [("home", b"\x01" * 6, 6, -90), ("backup", b"\x03" * 6, 1, -40)]
+    assert reconnect(wifi, wlan)
+    assert wifi.use_fallback
+    assert wlan.connects[-1][0] == "backup"
+
+def test_expired_lease_falls_back_to_dhcp(net, monkeypatch):
+    wifi, wlan = net
+    reconnect(wifi, wlan)
+    wifi.leases["home"][4] -= 3601
+    dhcp = wlan.dhcp
+    assert reconnect(wifi, wlan)
+    assert wlan.dhcp == dhcp + 1
+    assert wlan.connects[-1] == ("home", b"\x02" * 6, None)
+
+def test_cache_survives_deep_sleep(net, monkeypatch):
+    wifi, wlan = net
+    reconnect(wifi, wlan)
+    saved = wifi.cache()
+    monkeypatch.setattr(wifi, "known", {})
+    monkeypatch.setattr(wifi, "leases", {})
+    wifi.restore(saved)
+    assert reconnect(wifi, wlan)
+    assert wlan.scans == 1
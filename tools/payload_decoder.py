@@ -0,0 +1,115 @@
+# payload_decoder.py – Binär-Payloads (MQTT_PAYLOAD_FORMAT = "binary") am Host dekodieren
+# payload_decoder.py – Decode binary payloads (MQTT_PAYLOAD_FORMAT = "binary") on the host
+#
+# Läuft unter CPython, nicht auf dem Pico. Das Schema ist das JSON-Objekt, das die Firmware
+# retained an <MQTT_TOPIC>/schema sendet (bincodec.Codec.schema()). Eine Nachricht darf
+# mehrere Records hintereinander enthalten (Batch-Modus auf <MQTT_TOPIC>/batch).
+# Runs on CPython, not on the Pico. The schema is the JSON object the firmware sends retained
+# to <MQTT_TOPIC>/schema (bincodec.Codec.schema()). A message may hold several records in a
+# row (batch mode on <MQTT_TOPIC>/batch).
+#
+#   import payload_decoder
+#   schema = payload_decoder.Schema(json.loads(schema_msg))
+#   rows = schema.decode(msg)                      # [{"epoch": ..., "temp": 21.3, ...}]
+#   arr = payload_decoder.to_numpy(rows, schema)   # strukturiertes Array, NaN für None / structured array, NaN for None
+#
+# Kommandozeile: Nachrichten als Hex je Zeile auf stdin, CSV auf stdout
+# Command line: messages as hex per line on stdin, CSV on stdout
+#   mosquitto_sub -t sensor/default -F %x | python3 tools/payload_decoder.py schema.json
+
+import json
+import struct
+import sys
+
+HEADER_FMT = "<BH"
+HEADER_SIZE = 3
+VERSION = 1
+
+class SchemaError(ValueError):
+    pass
+
+class Schema:
+    def __init__(self, doc):
+        if isinstance(doc, (str, bytes)):
+            doc = json.loads(doc)
+        if doc.get("v") != VERSION:
+            raise SchemaError("Version %r nicht unterstützt / not supported" % doc.get("v"))
+        self.id = doc["id"]
+        self.fields = [f[0] for f in doc["f"]]
+        self.codes = [f[1] for f in doc["f"]]
+        self.scales = [f[2] for f in doc["f"]]
+        n = len(self.fields)
+        mask = "B" if n <= 8 else "H" if n <= 16 else "I"
+        self._record = struct.Struct("<" + HEADER_FMT[1:] + mask + "".join(self.codes))
+        self.size = self._record.size
+        if self.size != doc.get("size", self.size):
+            raise SchemaError("Größe / size %d != %d" % (self.size, doc["size"]))
+
+    # --- Eine Nachricht (ein oder mehrere Records) zu Zeilen / One message (one or more records) to rows ---
+    def decode(self, msg):
+        msg = bytes(msg)
+        if len(msg) % self.size:
+            raise SchemaError("Länge / length %d ist kein Vielfaches von / is not a multiple of %d" % (len(msg), self.size))
+        rows = []
+        for values in self._record.iter_unpack(msg):
+            version, schema_id, mask = values[:HEADER_SIZE]
+            if version != VERSION or schema_id != self.id:
+                raise SchemaError("Record v%d/id %d passt nicht zum Schema / does not match schema v%d/id %d"
+                                  % (version, schema_id, VERSION, self.id))
+            row = {}
+            for i, value in enumerate(values[HEADER_SIZE:]):
+                if mask >> i & 1:
+                    value = None
+                elif self.scales[i] != 1:
+                    value = value / self.scales[i]
+                row[self.fields[i]] = value
+            rows.append(row)
+        return rows
+
+    # --- Viele Nachrichten hintereinander / Many messages in a row ---
+    def decode_stream(self, messages):
+        for msg in messages:
+            for row in self.decode(msg):
+                yield row
+
+    # numpy-Datentyp je Feld: Ganzzahl bleibt Ganzzahl, sofern unskaliert und nie None
+    # numpy dtype per field: integers stay integers if unscaled and never None
+    def dtype(self, rows=()):
+        fields = []
+        for i, name in enumerate(self.fields):
+            integer = self.codes[i] != "f" and self.scales[i] == 1
+            if integer and all(row.get(name) is not None for row in rows):
+                fields.append((name, "<" + self.codes[i]))
+            else:
+                fields.append((name, "<f8"))
+        return fields
+
+# --- Zeilen als strukturiertes numpy-Array (numpy optional) / Rows as a structured numpy array (numpy optional) ---
+def to_numpy(rows, schema):
+    try:
+        import numpy
+    except ImportError:
+        raise ImportError("to_numpy() braucht numpy / needs numpy: pip install numpy")
+    rows = list(rows)
+    dtype = schema.dtype(rows)
+    nan = float("nan")
+    data = [tuple(nan if row.get(name) is None else row[name] for name in schema.fields) for row in rows]
+    return numpy.array(data, dtype=dtype)
+
+def main(argv):
+    if len(argv) != 2:
+        print("Aufruf / usage: payload_decoder.py schema.json < messages.hex", file=sys.stderr)
+        return 2
+    with open(argv[1]) as f:
+        schema = Schema(json.load(f))
+    print(",".join(schema.fields))
+    for line in sys.stdin:
+        line = line.strip()
+        if not line:
+            continue
+        for row in schema.decode(bytes.fromhex(line)):
+            print(",".join("" if row[name] is None else str(row[name]) for name in schema.fields))
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv))